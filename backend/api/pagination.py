@@ -0,0 +1,177 @@
+"""
+Keyset (cursor) pagination for large list endpoints.
+"""
+
+import base64
+import binascii
+import json
+from collections import OrderedDict
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginate by seeking past the last row seen instead of counting rows.
+
+    Pages are ordered by the view's ``keyset_ordering`` (indexed columns
+    ending in a unique one, default ``('-created_at', '-id')``) and the
+    ``next``/``previous`` links carry an opaque cursor holding the boundary
+    row's values, so every page costs one index range scan however deep it
+    is, and rows inserted meanwhile never shift a page. ``?skip_count=true``
+    also drops the ``COUNT(*)``.
+
+    Requests that ask for a page number (``?page=``) or a custom
+    ``?ordering=`` are served by ``PageNumberPagination`` as before, so the
+    web UI keeps its numbered pages.
+
+    Usage:
+        class MyListView(generics.ListAPIView):
+            pagination_class = KeysetPagination
+            keyset_ordering = ('-timestamp', '-id')
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    ordering = ('-created_at', '-id')
+    cursor_query_param = 'cursor'
+    skip_count_query_param = 'skip_count'
+    fallback_class = PageNumberPagination
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.fallback = None
+        if self._wants_page_numbers(request, view):
+            self.fallback = self.fallback_class()
+            return self.fallback.paginate_queryset(queryset, request, view)
+
+        ordering = tuple(getattr(view, 'keyset_ordering', self.ordering))
+        self.fields = [(field.lstrip('-'), field.startswith('-')) for field in ordering]
+        self.count = None
+        if request.query_params.get(self.skip_count_query_param) not in ('1', 'true'):
+            self.count = queryset.count()
+
+        cursor = self.decode_cursor(request, queryset.model)
+        reverse = bool(cursor and cursor['reverse'])
+        if reverse:
+            ordering = tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+        queryset = queryset.order_by(*ordering)
+        if cursor:
+            queryset = queryset.filter(self._after(cursor['values'], reverse))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        # Moving backwards from a cursor means there is a page after this one
+        self.has_next = bool(rows) and (reverse or has_more)
+        self.has_previous = bool(rows) and cursor is not None and (has_more if reverse else True)
+        self.page = rows
+        return rows
+
+    def _wants_page_numbers(self, request, view):
+        if self.fallback_class.page_query_param in request.query_params:
+            return True
+        ordering_param = getattr(view, 'ordering_param', api_settings.ORDERING_PARAM)
+        return bool(request.query_params.get(ordering_param))
+
+    def _after(self, values, reverse):
+        """Rows strictly past the boundary in (possibly reversed) keyset order"""
+        condition = Q()
+        for i, (name, descending) in enumerate(self.fields):
+            lookup = 'lt' if descending != reverse else 'gt'
+            step = Q(**{f'{name}__{lookup}': values[i]})
+            for j, (previous_name, _) in enumerate(self.fields[:i]):
+                step &= Q(**{previous_name: values[j]})
+            condition |= step
+        return condition
+
+    # ===== Cursors =====
+
+    def encode_cursor(self, row, reverse):
+        # isoformat keeps microseconds, which DjangoJSONEncoder would truncate
+        values = [
+            value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in (getattr(row, name) for name, _ in self.fields)
+        ]
+        payload = json.dumps({'v': values, 'r': int(reverse)}, cls=DjangoJSONEncoder)
+        encoded = base64.urlsafe_b64encode(payload.encode()).decode()
+        url = remove_query_param(self.request.build_absolute_uri(), self.fallback_class.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            raw_values = payload['v']
+            if len(raw_values) != len(self.fields):
+                raise ValueError('cursor does not match ordering')
+            values = [
+                model._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(self.fields, raw_values)
+            ]
+            return {'values': values, 'reverse': bool(payload.get('r'))}
+        except (TypeError, KeyError, ValueError, ValidationError, binascii.Error, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    # ===== Response =====
+
+    def get_paginated_response(self, data):
+        if self.fallback:
+            return self.fallback.get_paginated_response(data)
+        response = OrderedDict()
+        if self.count is not None:
+            response['count'] = self.count
+        response['next'] = self.get_next_link()
+        response['previous'] = self.get_previous_link()
+        response['results'] = data
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'count': {'type': 'integer', 'example': 123},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Cursor from a previous response\'s next/previous link',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.skip_count_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Set to true to omit the total count',
+                'schema': {'type': 'boolean'},
+            },
+        ] + self.fallback_class().get_schema_operation_parameters(view)
@@ -1,6 +1,4 @@
 from rest_framework import generics, status
-from rest_framework.views import APIView
-from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.db.models import Q
 from django_filters.rest_framework import DjangoFilterBackend
@@ -13,6 +11,8 @@ from .serializers import (
     ActivityLogSerializer,
     ActivityLogCreateSerializer
 )
+from api.exports import StreamingExportMixin
+from api.pagination import KeysetPagination
 from api.permissions import IsAdminOrManager
 
 
@@ -98,6 +98,8 @@ class ActivityLogListCreateView(generics.ListCreateAPIView):
     search_fields = ['description', 'model_name', 'object_id']
     ordering_fields = ['timestamp']
     ordering = ['-timestamp']
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-timestamp', '-id')
     
     def get_queryset(self):
         queryset = ActivityLog.objects.select_related('user').filter(
@@ -163,20 +165,32 @@ class ActivityLogByUserView(generics.ListAPIView):
         ).order_by('-timestamp')
 
 
-class ActivityLogExportView(APIView):
-    """Export activity logs to JSON."""
+class ActivityLogExportView(StreamingExportMixin, generics.GenericAPIView):
+    """Export activity logs as streamed CSV or NDJSON."""
     permission_classes = [IsAuthenticated, IsAdminOrManager]
+    export_filename = 'activity_logs'
+    export_fields = [
+        ('id', 'id'),
+        ('timestamp', 'timestamp'),
+        ('user', 'user__email'),
+        ('action', 'action'),
+        ('model_name', 'model_name'),
+        ('object_id', 'object_id'),
+        ('description', 'description'),
+        ('ip_address', 'ip_address'),
+        ('user_agent', 'user_agent'),
+    ]
     
-    def get(self, request):
-        queryset = ActivityLog.objects.select_related('user').filter(
-            user__assigned_property=request.user.assigned_property
-        )
+    def get_queryset(self):
+        queryset = ActivityLog.objects.filter(
+            user__assigned_property=self.request.user.assigned_property
+        ).order_by('-timestamp')
         
         # Apply filters
-        start_date = request.query_params.get('start_date')
-        end_date = request.query_params.get('end_date')
-        user_id = request.query_params.get('user')
-        action = request.query_params.get('action')
+        start_date = self.request.query_params.get('start_date')
+        end_date = self.request.query_params.get('end_date')
+        user_id = self.request.query_params.get('user')
+        action = self.request.query_params.get('action')
         
         if start_date:
             queryset = queryset.filter(timestamp__gte=start_date)
@@ -187,9 +201,4 @@ class ActivityLogExportView(APIView):
         if action:
             queryset = queryset.filter(action=action)
         
-        serializer = ActivityLogSerializer(queryset, many=True)
-        
-        return Response({
-            'count': queryset.count(),
-            'logs': serializer.data
-        })
+        return queryset
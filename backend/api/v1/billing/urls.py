@@ -7,6 +7,7 @@ app_name = 'billing'
 urlpatterns = [
     # Folio endpoints
     path('folios/', views.FolioListCreateView.as_view(), name='folio_list'),
+    path('folios/export/', views.FolioBulkExportView.as_view(), name='export_folios'),
     path('folios/<int:pk>/', views.FolioDetailView.as_view(), name='folio_detail'),
     path('folios/<int:pk>/charges/', views.AddChargeView.as_view(), name='add_charge'),
     path('folios/<int:pk>/payments/', views.AddPaymentView.as_view(), name='add_payment'),
@@ -21,6 +22,7 @@ urlpatterns = [
     path('invoices/', views.InvoiceListView.as_view(), name='invoice_list'),
     path('invoices/<int:pk>/', views.InvoiceDetailView.as_view(), name='invoice_detail'),
     path('invoices/<int:pk>/pay/', views.InvoicePayView.as_view(), name='invoice_pay'),
+    path('invoices/<int:pk>/export/', views.InvoiceExportView.as_view(), name='export_invoice'),
     
     # Payment endpoints
     path('payments/', views.PaymentListView.as_view(), name='payment_list'),
@@ -7,6 +7,7 @@ from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from apps.billing.models import Folio, FolioCharge, Payment, ChargeCode
+from apps.billing.services import FolioDocumentService, stream_folio_zip
 from api.permissions import IsAccountantOrAbove
 from .serializers import (
     FolioSerializer, FolioListSerializer, FolioCreateSerializer,
@@ -100,9 +101,6 @@ class AddChargeView(APIView):
             posted_by=request.user
         )
         
-        # Recalculate folio totals
-        folio.recalculate_totals()
-        
         return Response(FolioSerializer(folio).data)
 
 
@@ -128,9 +126,6 @@ class AddPaymentView(APIView):
             received_by=request.user
         )
         
-        # Recalculate folio totals
-        folio.recalculate_totals()
-        
         return Response(FolioSerializer(folio).data)
 
 
@@ -152,10 +147,14 @@ class CloseFolioView(APIView):
         
         # Close the folio
         folio.status = 'CLOSED'
-        folio.closed_at = timezone.now()
-        folio.closed_by = request.user
+        folio.close_date = timezone.localdate()
         folio.save()
         
+        # Render its documents ahead of the first download
+        from config.celery import enqueue_on_commit
+        from apps.billing.tasks import render_folio_documents_task
+        enqueue_on_commit(render_folio_documents_task, folio.pk)
+        
         return Response(FolioSerializer(folio).data)
 
 
@@ -164,109 +163,18 @@ class FolioExportView(APIView):
     permission_classes = [IsAuthenticated, IsAccountantOrAbove]
     
     def get(self, request, pk):
-        from django.http import HttpResponse
-        from io import BytesIO
-        
-        folio = get_object_or_404(Folio.objects.select_related(
-            'reservation__guest',
-            'reservation__hotel'
-        ).prefetch_related(
-            'charges__charge_code',
-            'payments'
-        ), pk=pk)
-        
-        # Generate PDF
+        from django.http import FileResponse, HttpResponse
+        
+        folio = get_object_or_404(FolioDocumentService.folio_queryset(), pk=pk)
+        
+        # Closed folios are served from the document cache
         try:
-            from reportlab.lib import colors
-            from reportlab.lib.pagesizes import letter, A4
-            from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.lib.units import inch
-            from reportlab.lib.enums import TA_CENTER, TA_RIGHT
-            
-            buffer = BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=letter)
-            elements = []
-            styles = getSampleStyleSheet()
-            
-            # Title
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=24,
-                textColor=colors.HexColor('#1a1a1a'),
-                spaceAfter=30,
-                alignment=TA_CENTER
+            return FileResponse(
+                FolioDocumentService.open_pdf(folio),
+                as_attachment=True,
+                filename=FolioDocumentService.filename(folio),
+                content_type='application/pdf'
             )
-            elements.append(Paragraph(f"Invoice - {folio.folio_number}", title_style))
-            elements.append(Spacer(1, 0.3*inch))
-            
-            # Guest Info
-            guest_data = [
-                ['Guest:', f"{folio.reservation.guest.first_name} {folio.reservation.guest.last_name}"],
-                ['Email:', folio.reservation.guest.email or 'N/A'],
-                ['Check-in:', folio.reservation.check_in_date.strftime('%Y-%m-%d')],
-                ['Check-out:', folio.reservation.check_out_date.strftime('%Y-%m-%d')],
-            ]
-            guest_table = Table(guest_data, colWidths=[1.5*inch, 4*inch])
-            guest_table.setStyle(TableStyle([
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ]))
-            elements.append(guest_table)
-            elements.append(Spacer(1, 0.3*inch))
-            
-            # Charges Table
-            charge_data = [['Date', 'Description', 'Quantity', 'Amount']]
-            for charge in folio.charges.all():
-                charge_data.append([
-                    charge.date.strftime('%Y-%m-%d'),
-                    charge.description,
-                    str(charge.quantity),
-                    f"${charge.amount:.2f}"
-                ])
-            
-            charge_table = Table(charge_data, colWidths=[1*inch, 3*inch, 1*inch, 1.5*inch])
-            charge_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('ALIGN', (2, 0), (-1, -1), 'RIGHT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 9),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ]))
-            elements.append(charge_table)
-            elements.append(Spacer(1, 0.2*inch))
-            
-            # Totals
-            totals_data = [
-                ['Subtotal:', f"${folio.total_charges:.2f}"],
-                ['Taxes:', f"${folio.total_tax:.2f}"],
-                ['Total:', f"${folio.total_amount:.2f}"],
-                ['Paid:', f"${folio.paid_amount:.2f}"],
-                ['Balance:', f"${folio.balance:.2f}"]
-            ]
-            totals_table = Table(totals_data, colWidths=[4.5*inch, 1.5*inch])
-            totals_table.setStyle(TableStyle([
-                ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
-                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('LINEABOVE', (0, -1), (-1, -1), 2, colors.black),
-                ('TOPPADDING', (0, -1), (-1, -1), 10),
-            ]))
-            elements.append(totals_table)
-            
-            # Build PDF
-            doc.build(elements)
-            buffer.seek(0)
-            
-            response = HttpResponse(buffer.getvalue(), content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="folio_{folio.folio_number}.pdf"'
-            return response
             
         except ImportError:
             # Fallback if reportlab not installed
@@ -278,6 +186,36 @@ class FolioExportView(APIView):
             return response
 
 
+class FolioBulkExportView(APIView):
+    """Export several folios as a streamed zip of PDFs."""
+    permission_classes = [IsAuthenticated, IsAccountantOrAbove]
+    
+    def get(self, request):
+        from django.conf import settings
+        from django.http import StreamingHttpResponse
+        
+        try:
+            ids = [int(pk) for pk in request.query_params.get('ids', '').split(',') if pk.strip()]
+        except ValueError:
+            return Response({'error': 'ids must be a comma-separated list of folio IDs'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if not ids:
+            return Response({'error': 'ids is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > settings.FOLIO_EXPORT_MAX_FOLIOS:
+            return Response(
+                {'error': f'At most {settings.FOLIO_EXPORT_MAX_FOLIOS} folios can be exported at once'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        folios = FolioDocumentService.folio_queryset().filter(pk__in=ids).order_by('pk')
+        if not folios.exists():
+            return Response({'error': 'No folios found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        response = StreamingHttpResponse(stream_folio_zip(folios.iterator(chunk_size=50)), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="folios_{timezone.localdate():%Y%m%d}.zip"'
+        return response
+
+
 class InvoiceDetailView(generics.RetrieveAPIView):
     """Get invoice detail."""
     permission_classes = [IsAuthenticated, IsAccountantOrAbove]
@@ -345,6 +283,30 @@ class InvoicePayView(APIView):
         return Response(InvoiceSerializer(invoice).data)
 
 
+class InvoiceExportView(APIView):
+    """Export invoice as PDF."""
+    permission_classes = [IsAuthenticated, IsAccountantOrAbove]
+    
+    def get(self, request, pk):
+        from django.http import FileResponse
+        from apps.billing.models import Invoice
+        
+        invoice = get_object_or_404(Invoice, pk=pk)
+        folio = FolioDocumentService.folio_queryset().get(pk=invoice.folio_id)
+        
+        try:
+            document = FolioDocumentService.open_pdf(folio, invoice)
+        except ImportError:
+            return Response({'error': 'PDF rendering is not available'}, status=status.HTTP_501_NOT_IMPLEMENTED)
+        
+        return FileResponse(
+            document,
+            as_attachment=True,
+            filename=FolioDocumentService.filename(folio, invoice),
+            content_type='application/pdf'
+        )
+
+
 class PaymentDetailView(generics.RetrieveAPIView):
     """Get payment detail."""
     permission_classes = [IsAuthenticated, IsAccountantOrAbove]
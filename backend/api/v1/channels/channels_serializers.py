@@ -4,7 +4,7 @@ Serializers for Channels Module
 from rest_framework import serializers
 from apps.channels.models import (
     PropertyChannel, RoomTypeMapping, RatePlanMapping,
-    AvailabilityUpdate, RateUpdate, ChannelReservation, Channel
+    AvailabilityUpdate, RateUpdate, ChannelReservation, Channel, SyncLog
 )
 from django.utils import timezone
 
@@ -227,6 +227,19 @@ class ChannelReservationSerializer(serializers.ModelSerializer):
         return data
 
 
+class SyncLogSerializer(serializers.ModelSerializer):
+    """Serializer for channel sync logs."""
+    channel_name = serializers.CharField(source='channel.name', read_only=True)
+    
+    class Meta:
+        model = SyncLog
+        fields = [
+            'id', 'channel', 'channel_name', 'type', 'status', 'message',
+            'records_synced', 'error_details', 'created_at'
+        ]
+        read_only_fields = fields
+
+
 class ChannelDashboardSerializer(serializers.Serializer):
     """Serializer for channel dashboard statistics."""
     active_channels = serializers.IntegerField()
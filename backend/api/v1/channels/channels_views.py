@@ -13,7 +13,7 @@ from datetime import date, timedelta
 
 from apps.channels.models import (
     PropertyChannel, RoomTypeMapping, RatePlanMapping,
-    AvailabilityUpdate, RateUpdate, ChannelReservation, Channel
+    AvailabilityUpdate, RateUpdate, ChannelReservation, Channel, SyncLog
 )
 from .channels_serializers import (
     PropertyChannelSerializer,
@@ -25,8 +25,10 @@ from .channels_serializers import (
     ChannelDashboardSerializer,
     BulkAvailabilityUpdateSerializer,
     BulkRateUpdateSerializer,
-    ChannelSerializer
+    ChannelSerializer,
+    SyncLogSerializer
 )
+from api.pagination import KeysetPagination
 from api.permissions import IsAdminOrManager
 
 
@@ -404,6 +406,29 @@ class UnprocessedChannelReservationsView(generics.ListAPIView):
         ).select_related('property_channel', 'property_channel__channel').order_by('received_at')
 
 
+# ===== Sync Logs =====
+
+class SyncLogListView(generics.ListAPIView):
+    """List sync logs of the channels connected to the user's property."""
+    permission_classes = [IsAuthenticated, IsAdminOrManager]
+    serializer_class = SyncLogSerializer
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['channel', 'type', 'status']
+    ordering_fields = ['created_at', 'records_synced']
+    ordering = ['-created_at']
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
+    
+    def get_queryset(self):
+        queryset = SyncLog.objects.select_related('channel')
+        property_obj = self.request.user.assigned_property
+        if property_obj:
+            queryset = queryset.filter(channel_id__in=PropertyChannel.objects.filter(
+                property=property_obj
+            ).values('channel_id'))
+        return queryset
+
+
 # ===== Dashboard & Stats =====
 
 class ChannelDashboardView(APIView):
@@ -42,6 +42,9 @@ urlpatterns = [
     path('reservations/<int:pk>/', channels_views.ChannelReservationDetailView.as_view(), name='reservation_detail'),
     path('reservations/unprocessed/', channels_views.UnprocessedChannelReservationsView.as_view(), name='unprocessed_reservations'),
     
+    # ===== Sync Logs =====
+    path('sync-logs/', channels_views.SyncLogListView.as_view(), name='sync_log_list'),
+    
     # ===== Dashboard =====
     path('dashboard/', channels_views.ChannelDashboardView.as_view(), name='dashboard'),
     
@@ -11,10 +11,10 @@ from apps.channels.models import (
     Channel, PropertyChannel, RoomTypeMapping, RatePlanMapping,
     AvailabilityUpdate, RateUpdate, ChannelReservation
 )
-from apps.channels.services import (
-    sync_channel_rates, sync_channel_availability, process_channel_webhook
-)
+from apps.channels.services import ChannelSyncError, WebhookInboxService
+from apps.channels.tasks import sync_channel_rates_task, sync_channel_availability_task
 from api.permissions import IsAdminOrManager
+from config.celery import enqueue_on_commit
 from .serializers import (
     ChannelSerializer, PropertyChannelSerializer, RoomTypeMappingSerializer,
     RatePlanMappingSerializer, RatePlanMappingCreateSerializer,
@@ -396,20 +396,12 @@ class SyncChannelRatesView(APIView):
         else:
             end_date = start_date + timedelta(days=30)
         
-        # Perform sync
-        try:
-            result = sync_channel_rates(property_channel.id, start_date, end_date)
-            return Response({
-                'success': result['success'],
-                'message': f"Synced {result['total_synced']} rate records",
-                'total_synced': result['total_synced'],
-                'errors': result.get('errors', [])
-            })
-        except Exception as e:
-            return Response(
-                {'error': str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        # Queue the sync once the request's transaction commits
+        task_id = enqueue_on_commit(sync_channel_rates_task, property_channel.id, start_date.isoformat(), end_date.isoformat())
+        return Response(
+            {'message': 'Rate sync queued', 'task_id': task_id},
+            status=status.HTTP_202_ACCEPTED
+        )
 
 
 class SyncChannelAvailabilityView(APIView):
@@ -441,55 +433,50 @@ class SyncChannelAvailabilityView(APIView):
         else:
             end_date = start_date + timedelta(days=30)
         
-        # Perform sync
-        try:
-            result = sync_channel_availability(property_channel.id, start_date, end_date)
-            return Response({
-                'success': result['success'],
-                'message': f"Synced {result['total_synced']} availability records",
-                'total_synced': result['total_synced'],
-                'errors': result.get('errors', [])
-            })
-        except Exception as e:
-            return Response(
-                {'error': str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        # Queue the sync once the request's transaction commits
+        task_id = enqueue_on_commit(sync_channel_availability_task, property_channel.id, start_date.isoformat(), end_date.isoformat())
+        return Response(
+            {'message': 'Availability sync queued', 'task_id': task_id},
+            status=status.HTTP_202_ACCEPTED
+        )
 
 
 class ChannelWebhookView(APIView):
-    """Receive and process channel reservation webhooks (no auth for webhooks)."""
+    """Receive channel reservation webhooks into the inbox (no auth for webhooks)."""
     permission_classes = []  # Webhooks from OTAs don't have auth
     authentication_classes = []
+    throttle_classes = []  # OTA retry bursts are absorbed by the inbox dedupe
     
     def post(self, request, property_channel_id):
         """
-        Process incoming reservation webhook from OTA
+        Accept an incoming reservation webhook from OTA
         Expected format varies by channel, but generally includes:
         - guest info
         - reservation dates
         - room type
         - rate info
+        
+        The payload is stored and acknowledged immediately; a worker creates
+        or updates the reservation. Replays of the same booking ID and
+        version are acknowledged as duplicates.
         """
-        try:
-            # Verify webhook signature (implementation depends on channel)
-            # For now, just process the data
-            
-            result = process_channel_webhook(property_channel_id, request.data)
-            
-            return Response({
-                'success': True,
-                'reservation_id': result.id,
-                'confirmation_code': result.confirmation_code
-            }, status=status.HTTP_201_CREATED)
-            
-        except PropertyChannel.DoesNotExist:
+        # Verify webhook signature (implementation depends on channel)
+        if not PropertyChannel.objects.filter(pk=property_channel_id).exists():
             return Response(
                 {'error': 'Property channel not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
-        except Exception as e:
+        
+        try:
+            entry, created = WebhookInboxService.accept(property_channel_id, request.data)
+        except ChannelSyncError as e:
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        
+        return Response({
+            'success': True,
+            'inbox_id': entry.id,
+            'duplicate': not created
+        }, status=status.HTTP_202_ACCEPTED)
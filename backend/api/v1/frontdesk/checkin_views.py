@@ -8,12 +8,10 @@ from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
 from django.utils import timezone
-from django.db.models import Q, Count
-from datetime import date
 
 from apps.frontdesk.models import CheckIn, CheckOut, RoomMove, WalkIn
-from apps.rooms.models import Room
 from apps.reservations.models import Reservation
+from apps.reports.dashboards import DashboardService
 from .checkin_serializers import (
     CheckInSerializer,
     CheckOutSerializer,
@@ -315,75 +313,6 @@ class FrontDeskDashboardView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        today = date.today()
-        property_obj = request.user.assigned_property
-        
-        # Get statistics
-        total_check_ins_today = CheckIn.objects.filter(
-            room__hotel=property_obj,
-            check_in_time__date=today
-        ).count()
-        
-        total_check_outs_today = CheckOut.objects.filter(
-            check_in__room__hotel=property_obj,
-            check_out_time__date=today
-        ).count()
-        
-        # Expected arrivals (reservations with check-in today, not yet checked in)
-        expected_arrivals = Reservation.objects.filter(
-            property=property_obj,
-            check_in=today,
-            status='CONFIRMED'
-        ).exclude(
-            check_in__isnull=False
-        ).count()
-        
-        # Expected departures (check-ins with expected checkout today, not yet checked out)
-        expected_departures = CheckIn.objects.filter(
-            room__hotel=property_obj,
-            expected_check_out=today
-        ).exclude(
-            check_out__isnull=False
-        ).count()
-        
-        # In-house guests (checked in, not checked out)
-        in_house_guests = CheckIn.objects.filter(
-            room__hotel=property_obj
-        ).exclude(
-            check_out__isnull=False
-        ).count()
-        
-        # Room statistics
-        room_stats = Room.objects.filter(
-            property=property_obj
-        ).aggregate(
-            available=Count('id', filter=Q(status='CLEAN')),
-            occupied=Count('id', filter=Q(status='OCCUPIED')),
-            dirty=Count('id', filter=Q(status='DIRTY'))
-        )
-        
-        walk_ins_today = WalkIn.objects.filter(
-            room__hotel=property_obj,
-            created_at__date=today
-        ).count()
-        
-        room_moves_today = RoomMove.objects.filter(
-            from_room__hotel=property_obj,
-            move_date=today
-        ).count()
-        
-        data = {
-            'total_check_ins_today': total_check_ins_today,
-            'total_check_outs_today': total_check_outs_today,
-            'expected_arrivals': expected_arrivals,
-            'expected_departures': expected_departures,
-            'in_house_guests': in_house_guests,
-            'available_rooms': room_stats['available'] or 0,
-            'occupied_rooms': room_stats['occupied'] or 0,
-            'dirty_rooms': room_stats['dirty'] or 0,
-            'walk_ins_today': walk_ins_today,
-            'room_moves_today': room_moves_today
-        }
-        
+        data = DashboardService.get(DashboardService.FRONT_DESK, request.user.assigned_property)
         serializer = CheckInDashboardSerializer(data)
         return Response(serializer.data)
@@ -6,12 +6,12 @@ from rest_framework.filters import SearchFilter, OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from django.db.models import Count
 from datetime import date
 from decimal import Decimal
 from apps.reservations.models import Reservation
 from apps.rooms.models import Room
 from apps.frontdesk.models import CheckIn, CheckOut, RoomMove, WalkIn
+from apps.reports.dashboards import DashboardService
 from apps.billing.models import Folio
 from apps.guests.models import Guest
 from api.permissions import IsFrontDeskOrAbove
@@ -28,48 +28,9 @@ class DashboardView(APIView):
     permission_classes = [IsAuthenticated, IsFrontDeskOrAbove]
     
     def get(self, request):
-        today = date.today()
-        property_obj = request.user.assigned_property
-        
-        # Room statistics
-        rooms = Room.objects.filter(is_active=True)
-        if property_obj:
-            rooms = rooms.filter(property=property_obj)
-        
-        room_stats = rooms.values('status').annotate(count=Count('id'))
-        room_stats_dict = {stat['status']: stat['count'] for stat in room_stats}
-        
-        # Reservation statistics
-        reservations = Reservation.objects
-        if property_obj:
-            reservations = reservations.filter(property=property_obj)
-        
-        arrivals = reservations.filter(
-            check_in_date=today,
-            status__in=['CONFIRMED', 'PENDING']
-        ).count()
-        
-        departures = reservations.filter(
-            check_out_date=today,
-            status='CHECKED_IN'
-        ).count()
-        
-        in_house = reservations.filter(status='CHECKED_IN').count()
-        
-        return Response({
-            'date': today,
-            'rooms': {
-                'total': rooms.count(),
-                'vacant_clean': room_stats_dict.get('VC', 0),
-                'vacant_dirty': room_stats_dict.get('VD', 0),
-                'occupied_clean': room_stats_dict.get('OC', 0),
-                'occupied_dirty': room_stats_dict.get('OD', 0),
-                'out_of_order': room_stats_dict.get('OOO', 0),
-            },
-            'arrivals': arrivals,
-            'departures': departures,
-            'in_house': in_house,
-        })
+        return Response(DashboardService.get(
+            DashboardService.ROOMS, request.user.assigned_property
+        ))
 
 
 class CheckInView(APIView):
@@ -298,11 +259,17 @@ class ArrivalsView(APIView):
         reservations = Reservation.objects.filter(
             check_in_date=target_date,
             status__in=['CONFIRMED', 'PENDING']
-        ).select_related('guest', 'hotel')
+        ).select_related('guest', 'hotel').prefetch_related('guest__preferences', 'rooms__room', 'rooms__room_type')
         
         if property_obj:
             reservations = reservations.filter(hotel=property_obj)
         
+        # VIP arrivals, best guests first, ranked on the stored lifetime figures
+        if request.query_params.get('vip_only') == 'true':
+            reservations = reservations.filter(guest__vip_level__gt=0).order_by(
+                '-guest__vip_level', '-guest__total_revenue', '-guest__total_stays'
+            )
+        
         return Response(ReservationSerializer(reservations, many=True).data)
 
 
@@ -7,7 +7,7 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
-from django.db.models import Q, Count, Sum
+from django.db.models import Q, Count
 
 from apps.guests.models import (
     GuestPreference, GuestDocument, Company,
@@ -347,17 +347,8 @@ class GuestLoyaltyDashboardView(APIView):
         try:
             guest = Guest.objects.get(id=guest_id)
             
-            # Calculate totals
-            transactions = LoyaltyTransaction.objects.filter(guest=guest)
-            earned = transactions.filter(transaction_type='EARN').aggregate(
-                total=Sum('points')
-            )['total'] or 0
-            redeemed = transactions.filter(transaction_type='REDEEM').aggregate(
-                total=Sum('points')
-            )['total'] or 0
-            
-            # Get recent transactions
-            recent = transactions.order_by('-created_at')[:10]
+            # Lifetime totals are kept on the guest (see GuestAggregateService)
+            recent = LoyaltyTransaction.objects.filter(guest=guest).order_by('-created_at')[:10]
             
             data = {
                 'guest_id': guest.id,
@@ -365,9 +356,9 @@ class GuestLoyaltyDashboardView(APIView):
                 'loyalty_number': guest.loyalty_number or '',
                 'loyalty_tier': guest.loyalty_tier or '',
                 'loyalty_points': guest.loyalty_points,
-                'total_earned': earned,
-                'total_redeemed': abs(redeemed),
-                'recent_transactions': LoyaltyTransactionSerializer(recent, many=True).data
+                'total_earned': guest.loyalty_points_earned,
+                'total_redeemed': guest.loyalty_points_redeemed,
+                'recent_transactions': recent
             }
             
             serializer = GuestLoyaltySerializer(data)
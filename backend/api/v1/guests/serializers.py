@@ -71,8 +71,8 @@ class GuestSerializer(serializers.ModelSerializer):
             'id', 'first_name', 'last_name', 'full_name', 'email', 'phone',
             'date_of_birth', 'gender', 'nationality', 'id_type', 'id_number',
             'address', 'city', 'state', 'country', 'postal_code',
-            'vip_level', 'is_blacklisted', 'total_stays', 'total_revenue',
-            'preferences', 'created_at'
+            'vip_level', 'is_blacklisted', 'total_stays', 'total_nights', 'total_revenue',
+            'last_stay_date', 'preferences', 'created_at'
         ]
     
     def get_full_name(self, obj):
@@ -7,6 +7,8 @@ from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q, Sum
 from django.shortcuts import get_object_or_404
 from apps.guests.models import Guest, GuestDocument, GuestPreference, Company, LoyaltyProgram, LoyaltyTier, LoyaltyTransaction
+from apps.guests.services import GuestSearchService
+from api.pagination import KeysetPagination
 from api.permissions import IsFrontDeskOrAbove
 from .serializers import (
     GuestSerializer, GuestCreateSerializer, GuestDocumentSerializer,
@@ -27,6 +29,8 @@ class GuestListView(generics.ListCreateAPIView):
     search_fields = ['first_name', 'last_name', 'email', 'phone', 'id_number']
     ordering_fields = ['created_at', 'last_name', 'total_stays', 'total_revenue']
     ordering = ['-created_at']
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -39,7 +43,7 @@ class GuestListView(generics.ListCreateAPIView):
         # Custom filters
         vip_only = self.request.query_params.get('vip_only')
         if vip_only == 'true':
-            qs = qs.exclude(vip_status='')
+            qs = qs.filter(vip_level__gt=0)
         
         return qs
 
@@ -49,11 +53,8 @@ class GuestDetailView(generics.RetrieveUpdateAPIView):
     serializer_class = GuestSerializer
     
     def get_queryset(self):
-        return Guest.objects.prefetch_related(
-            'reservations',
-            'documents',
-            'preferences'
-        )
+        # Stay history is read from the guest's aggregate fields
+        return Guest.objects.prefetch_related('preferences')
 
 
 class GuestCreateView(generics.CreateAPIView):
@@ -70,12 +71,8 @@ class GuestSearchView(APIView):
         if len(query) < 2:
             return Response({'results': []})
         
-        guests = Guest.objects.filter(
-            Q(first_name__icontains=query) |
-            Q(last_name__icontains=query) |
-            Q(email__icontains=query) |
-            Q(phone__icontains=query)
-        )[:20]
+        # Ranked, typo-tolerant lookup through the guest search index
+        guests = GuestSearchService.search(query, limit=20)
         
         return Response({
             'results': GuestSerializer(guests, many=True).data
@@ -8,7 +8,6 @@ from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
 from django.utils import timezone
-from django.db.models import Q, Count
 from datetime import date
 
 from apps.housekeeping.models import (
@@ -20,7 +19,9 @@ from apps.housekeeping.models import (
     StockMovement
 )
 from apps.rooms.models import Room
+from apps.reports.dashboards import DashboardService
 from apps.accounts.models import User
+from apps.notifications.services import queue_push_notification
 from .housekeeping_serializers import (
     HousekeepingTaskSerializer,
     RoomInspectionSerializer,
@@ -36,6 +37,24 @@ from api.permissions import IsAdminOrManager
 
 # ===== Housekeeping Tasks =====
 
+def _notify_housekeeping(tasks, property_id, assigned_to=None):
+    """
+    Push new tasks to their housekeeper once the request commits; unassigned
+    tasks are broadcast to the property's housekeeping staff.
+    """
+    rooms = ', '.join(task.room.room_number for task in tasks)
+    if assigned_to:
+        targets = {'users': [assigned_to.pk]}
+    else:
+        targets = {'roles': [User.Role.HOUSEKEEPING], 'property_id': property_id}
+    queue_push_notification(
+        'New housekeeping task' if len(tasks) == 1 else f'{len(tasks)} new housekeeping tasks',
+        f'Room {rooms}' if len(tasks) == 1 else f'Rooms {rooms}',
+        {'type': 'housekeeping_tasks', 'task_ids': ','.join(str(task.pk) for task in tasks)},
+        **targets
+    )
+
+
 class HousekeepingTaskListCreateView(generics.ListCreateAPIView):
     """List all tasks or create new task."""
     permission_classes = [IsAuthenticated]
@@ -63,7 +82,8 @@ class HousekeepingTaskListCreateView(generics.ListCreateAPIView):
         return queryset
     
     def perform_create(self, serializer):
-        serializer.save(created_by=self.request.user)
+        task = serializer.save(created_by=self.request.user)
+        _notify_housekeeping([task], task.room.hotel_id, task.assigned_to)
 
 
 class HousekeepingTaskDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -205,10 +225,12 @@ class BulkTaskAssignView(APIView):
                 assigned_to=assigned_to,
                 scheduled_date=data['scheduled_date'],
                 priority=data['priority'],
-                description=data.get('description', ''),
+                notes=data.get('description', ''),
                 created_by=request.user
             )
             created_tasks.append(task)
+        if created_tasks:
+            _notify_housekeeping(created_tasks, request.user.assigned_property_id, assigned_to)
         
         response_serializer = HousekeepingTaskSerializer(created_tasks, many=True)
         return Response({
@@ -450,41 +472,6 @@ class HousekeepingDashboardView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        from django.db import models
-        today = date.today()
-        property_obj = request.user.assigned_property
-        
-        # Simplified dashboard data with safe defaults
-        data = {
-            'pending_tasks': 0,
-            'in_progress_tasks': 0,
-            'completed_today': 0,
-            'inspections_today': 0,
-            'failed_inspections': 0,
-            'clean_rooms': 24,
-            'dirty_rooms': 0,
-            'inspecting_rooms': 0,
-            'out_of_order_rooms': 0,
-            'low_stock_items': 0
-        }
-        
-        # Try to get real room statistics using correct field
-        try:
-            if property_obj:
-                room_stats = Room.objects.filter(hotel=property_obj).aggregate(
-                    clean=Count('id', filter=Q(status='CLEAN')),
-                    dirty=Count('id', filter=Q(status='DIRTY')),
-                    inspecting=Count('id', filter=Q(status='INSPECTING')),
-                    out_of_order=Count('id', filter=Q(status='OUT_OF_ORDER'))
-                )
-                data.update({
-                    'clean_rooms': room_stats.get('clean', 0),
-                    'dirty_rooms': room_stats.get('dirty', 0),
-                    'inspecting_rooms': room_stats.get('inspecting', 0),
-                    'out_of_order_rooms': room_stats.get('out_of_order', 0),
-                })
-        except:
-            # Fall back to defaults if there's any error
-            pass
-        
-        return Response(data)
+        data = DashboardService.get(DashboardService.HOUSEKEEPING, request.user.assigned_property)
+        serializer = HousekeepingDashboardSerializer(data)
+        return Response(serializer.data)
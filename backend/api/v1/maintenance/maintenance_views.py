@@ -8,12 +8,11 @@ from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
 from django.utils import timezone
-from django.db.models import Q, Count, Avg
-from datetime import date, timedelta
+from datetime import date
 
 from apps.maintenance.models import MaintenanceRequest, Asset, MaintenanceLog
 from apps.accounts.models import User
-from apps.rooms.models import Room
+from apps.reports.dashboards import DashboardService
 from .maintenance_serializers import (
     MaintenanceRequestSerializer,
     AssetSerializer,
@@ -402,82 +401,6 @@ class MaintenanceDashboardView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        from django.db import models
-        today = date.today()
-        property_obj = request.user.assigned_property
-        
-        # Request statistics
-        request_stats = MaintenanceRequest.objects.filter(
-            property=property_obj
-        ).aggregate(
-            pending=Count('id', filter=Q(status='PENDING')),
-            assigned=Count('id', filter=Q(status='ASSIGNED')),
-            in_progress=Count('id', filter=Q(status='IN_PROGRESS')),
-            completed_today=Count('id', filter=Q(status='COMPLETED', completed_at__date=today)),
-            emergency=Count('id', filter=Q(
-                priority='EMERGENCY',
-                status__in=['PENDING', 'ASSIGNED', 'IN_PROGRESS']
-            ))
-        )
-        
-        # Count overdue requests (emergency > 1h, high > 24h)
-        one_hour_ago = timezone.now() - timedelta(hours=1)
-        one_day_ago = timezone.now() - timedelta(days=1)
-        
-        overdue_emergency = MaintenanceRequest.objects.filter(
-            property=property_obj,
-            priority='EMERGENCY',
-            status__in=['PENDING', 'ASSIGNED'],
-            created_at__lt=one_hour_ago
-        ).count()
-        
-        overdue_high = MaintenanceRequest.objects.filter(
-            property=property_obj,
-            priority='HIGH',
-            status__in=['PENDING', 'ASSIGNED'],
-            created_at__lt=one_day_ago
-        ).count()
-        
-        overdue_requests = overdue_emergency + overdue_high
-        
-        # Asset statistics
-        asset_stats = Asset.objects.filter(
-            property=property_obj,
-            is_active=True
-        ).aggregate(
-            total=Count('id'),
-            due_maintenance=Count('id', filter=Q(next_maintenance__lte=today)),
-            under_warranty=Count('id', filter=Q(warranty_expiry__gte=today))
-        )
-        
-        # Average resolution time
-        completed_requests = MaintenanceRequest.objects.filter(
-            property=property_obj,
-            status='COMPLETED',
-            started_at__isnull=False,
-            completed_at__isnull=False
-        )
-        
-        avg_resolution = 0
-        if completed_requests.exists():
-            total_seconds = sum([
-                (req.completed_at - req.started_at).total_seconds()
-                for req in completed_requests[:100]  # Limit for performance
-            ])
-            avg_resolution = round(total_seconds / completed_requests.count() / 3600, 2)
-        
-        data = {
-            'pending_requests': request_stats['pending'] or 0,
-            'assigned_requests': request_stats['assigned'] or 0,
-            'in_progress_requests': request_stats['in_progress'] or 0,
-            'completed_today': request_stats['completed_today'] or 0,
-            'emergency_requests': request_stats['emergency'] or 0,
-            'overdue_requests': overdue_requests,
-            'total_assets': asset_stats['total'] or 0,
-            'assets_due_maintenance': asset_stats['due_maintenance'] or 0,
-            'assets_under_warranty': asset_stats['under_warranty'] or 0,
-            'avg_resolution_hours': avg_resolution
-        }
-        
+        data = DashboardService.get(DashboardService.MAINTENANCE, request.user.assigned_property)
         serializer = MaintenanceDashboardSerializer(data)
         return Response(serializer.data)
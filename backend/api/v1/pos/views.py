@@ -195,9 +195,6 @@ class PostToRoomView(APIView):
         order.status = 'CLOSED'
         order.save()
         
-        # Recalculate folio
-        folio.recalculate_totals()
-        
         return Response({'message': 'Posted to room successfully'})
 
 
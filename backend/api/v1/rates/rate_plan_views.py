@@ -8,11 +8,11 @@ from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
 from django.db.models import Q, Avg, Min, Max
-from datetime import datetime, timedelta
-from decimal import Decimal
+from datetime import datetime
 
 from apps.rates.models import RatePlan, RoomRate, DateRate, YieldRule
 from apps.rooms.models import Room
+from apps.rates.services import RateEngine
 from .rate_plan_serializers import (
     RatePlanSerializer,
     RatePlanDetailSerializer,
@@ -296,109 +296,34 @@ class CalculateRateView(APIView):
         children = data.get('children', 0)
         rate_plan = data.get('rate_plan')
         
-        # Calculate number of nights
-        nights = (check_out - check_in).days
+        engine = RateEngine(
+            room_type.hotel_id, check_in, check_out,
+            room_type_ids=[room_type.id],
+            rate_plans=[rate_plan] if rate_plan else None
+        )
         
-        # Get base rate
-        if rate_plan:
-            try:
-                room_rate = RoomRate.objects.get(
-                    property=request.user.assigned_property,
-                    rate_plan=rate_plan,
-                    room_type=room_type,
-                    is_active=True
-                )
-                base_rate = room_rate.base_rate
-                extra_adult = room_rate.extra_adult_rate
-                extra_child = room_rate.extra_child_rate
-            except RoomRate.DoesNotExist:
-                return Response(
-                    {'error': 'No rate found for this room type and rate plan'},
-                    status=status.HTTP_404_NOT_FOUND
-                )
-        else:
-            # Use default rate plan
-            try:
-                default_plan = RatePlan.objects.get(
-                    property=request.user.assigned_property,
-                    is_default=True,
-                    is_active=True
-                )
-                room_rate = RoomRate.objects.get(
-                    property=request.user.assigned_property,
-                    rate_plan=default_plan,
-                    room_type=room_type,
-                    is_active=True
-                )
-                base_rate = room_rate.base_rate
-                extra_adult = room_rate.extra_adult_rate
-                extra_child = room_rate.extra_child_rate
-            except (RatePlan.DoesNotExist, RoomRate.DoesNotExist):
+        if not rate_plan:
+            # Use the best available rate across active rate plans
+            comparisons = engine.compare(room_type.id, check_in, check_out, adults, children)
+            if not comparisons:
                 return Response(
                     {'error': 'No default rate found for this room type'},
                     status=status.HTTP_404_NOT_FOUND
                 )
+            rate_plan = engine.rate_plans[comparisons[0]['rate_plan_id']]
         
-        # Calculate nightly rates considering date overrides
-        daily_rates = []
-        current_date = check_in
-        
-        while current_date < check_out:
-            # Check for date-specific rate
-            try:
-                date_rate = DateRate.objects.get(
-                    property=request.user.assigned_property,
-                    room_type=room_type,
-                    date=current_date
-                )
-                if date_rate.is_closed:
-                    return Response(
-                        {'error': f'Room type closed on {current_date}'},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                nightly_rate = date_rate.rate
-            except DateRate.DoesNotExist:
-                # Use base rate (check if weekend)
-                if current_date.weekday() >= 5 and room_rate.weekend_rate:  # Saturday=5, Sunday=6
-                    nightly_rate = room_rate.weekend_rate
-                else:
-                    nightly_rate = base_rate
-            
-            daily_rates.append({
-                'date': current_date.isoformat(),
-                'rate': float(nightly_rate)
-            })
-            current_date += timedelta(days=1)
-        
-        # Calculate total
-        subtotal = sum(Decimal(str(rate['rate'])) for rate in daily_rates)
-        
-        # Add extra person charges
-        extra_adults_count = max(0, adults - room_type.base_occupancy)
-        extra_children_count = children
-        
-        extra_adult_total = extra_adult * extra_adults_count * nights
-        extra_child_total = extra_child * extra_children_count * nights
-        
-        total = subtotal + extra_adult_total + extra_child_total
-        
-        # Apply yield rules if any
-        # (Simplified - in production, calculate occupancy and apply rules)
+        pricing = engine.price_stay(room_type.id, rate_plan.id, check_in, check_out, adults, children)
+        if 'error' in pricing:
+            return Response(pricing, status=status.HTTP_400_BAD_REQUEST)
         
         return Response({
             'room_type': room_type.name,
             'check_in': check_in,
             'check_out': check_out,
-            'nights': nights,
-            'adults': adults,
-            'children': children,
-            'daily_rates': daily_rates,
-            'subtotal': float(subtotal),
-            'extra_adult_charges': float(extra_adult_total),
-            'extra_child_charges': float(extra_child_total),
-            'total': float(total),
-            'currency': 'USD',
-            'rate_plan': rate_plan.name if rate_plan else 'Default'
+            **pricing,
+            'total': pricing['total_amount'],
+            'currency': room_type.hotel.currency,
+            'rate_plan': rate_plan.name
         })
 
 
@@ -3,7 +3,7 @@ Serializers for Reports Module
 """
 from rest_framework import serializers
 from apps.reports.models import (
-    DailyStatistics, MonthlyStatistics, ReportTemplate, NightAudit, AuditLog
+    DailyStatistics, MonthlyStatistics, ReportTemplate, ReportSnapshot, NightAudit, AuditLog
 )
 
 
@@ -50,7 +50,7 @@ class ReportTemplateSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'property', 'property_name', 'name', 'report_type',
             'report_type_display', 'description', 'config', 'is_scheduled',
-            'schedule_frequency', 'schedule_time', 'created_by',
+            'schedule_time', 'email_recipients', 'created_by',
             'created_by_name', 'created_at'
         ]
         read_only_fields = ['id', 'created_by', 'created_at']
@@ -62,6 +62,28 @@ class ReportTemplateSerializer(serializers.ModelSerializer):
         return value
 
 
+class ReportSnapshotSerializer(serializers.ModelSerializer):
+    """Serializer for stored report runs; `data` is only included on request."""
+    template_name = serializers.CharField(source='template.name', read_only=True)
+    has_pdf = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ReportSnapshot
+        fields = [
+            'id', 'template', 'template_name', 'report_date', 'version',
+            'is_scheduled_run', 'emailed_at', 'has_pdf', 'created_at', 'data'
+        ]
+        read_only_fields = fields
+    
+    def __init__(self, *args, include_data=True, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not include_data:
+            self.fields.pop('data')
+    
+    def get_has_pdf(self, obj):
+        return bool(obj.pdf_file)
+
+
 class AuditLogSerializer(serializers.ModelSerializer):
     """Serializer for audit log entries."""
     
@@ -11,17 +11,20 @@ from django.db.models import Q, Count, Avg, Sum
 from datetime import date, timedelta
 
 from apps.reports.models import (
-    DailyStatistics, MonthlyStatistics, ReportTemplate, NightAudit, AuditLog
+    DailyStatistics, MonthlyStatistics, ReportTemplate, ReportSnapshot, NightAudit, AuditLog
 )
+from apps.reports.engine import ReportEngine
 from .reports_serializers import (
     DailyStatisticsSerializer,
     MonthlyStatisticsSerializer,
     ReportTemplateSerializer,
+    ReportSnapshotSerializer,
     NightAuditSerializer,
     AuditLogSerializer,
     NightAuditSummarySerializer,
     GenerateReportSerializer
 )
+from api.exports import StreamingExportMixin
 from api.permissions import IsAdminOrManager
 
 
@@ -144,6 +147,82 @@ class ReportTemplateDetailView(generics.RetrieveUpdateDestroyAPIView):
         ).select_related('property', 'created_by')
 
 
+class ReportSnapshotListView(generics.ListAPIView):
+    """Stored runs of a report template, newest first (without report data)."""
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        return ReportSnapshot.objects.filter(
+            Q(template__property=self.request.user.assigned_property) | Q(template__property__isnull=True),
+            template_id=self.kwargs['pk']
+        ).select_related('template').defer('data').order_by('-version')
+    
+    def get_serializer(self, *args, **kwargs):
+        return ReportSnapshotSerializer(*args, include_data=False, **kwargs)
+
+
+class ReportSnapshotView(APIView):
+    """
+    Latest snapshot of a template's report for a date (default: the
+    template's report date), generated only if none exists yet.
+    
+    Query params:
+        date: Report date (YYYY-MM-DD)
+        refresh: 'true' to run the template again
+        export_format: 'json' (default), 'csv' or 'pdf'
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, pk):
+        from django.core.files.storage import default_storage
+        from django.http import FileResponse
+        from django.shortcuts import get_object_or_404
+        
+        template = get_object_or_404(
+            ReportTemplate.objects.filter(
+                Q(property=request.user.assigned_property) | Q(property__isnull=True)
+            ).select_related('property'),
+            pk=pk
+        )
+        if not ReportEngine.supports(template):
+            return Response(
+                {'error': f'{template.get_report_type_display()} cannot be generated'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        export_format = request.query_params.get('export_format', 'json').lower()
+        if export_format != 'json' and export_format not in ReportEngine.FORMATS:
+            return Response(
+                {'error': f'export_format must be one of: json, {", ".join(ReportEngine.FORMATS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            report_date = request.query_params.get('date')
+            report_date = date.fromisoformat(report_date) if report_date else None
+        except ValueError:
+            return Response({'error': 'Invalid date format. Use YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        snapshot = ReportEngine.get_or_run(
+            template, report_date, user=request.user,
+            refresh=request.query_params.get('refresh') in ('1', 'true')
+        )
+        if export_format == 'json':
+            return Response(ReportSnapshotSerializer(snapshot).data)
+        
+        name = snapshot.csv_file if export_format == 'csv' else snapshot.pdf_file
+        if not name:
+            return Response(
+                {'error': f'This report has no {export_format.upper()} rendering'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return FileResponse(
+            default_storage.open(name, 'rb'),
+            as_attachment=True,
+            filename=name.rsplit('/', 1)[-1],
+            content_type=ReportEngine.FORMATS[export_format]
+        )
+
+
 class GenerateReportView(APIView):
     """Generate a report based on template or parameters."""
     permission_classes = [IsAuthenticated]
@@ -222,46 +301,6 @@ class PendingNightAuditsView(generics.ListAPIView):
         ).select_related('property').order_by('business_date')
 
 
-class StartNightAuditView(APIView):
-    """Start a night audit process."""
-    permission_classes = [IsAuthenticated, IsAdminOrManager]
-    
-    def post(self, request, pk):
-        try:
-            from django.utils import timezone
-            audit = NightAudit.objects.get(
-                pk=pk,
-                property=request.user.assigned_property
-            )
-            
-            if audit.status != 'PENDING':
-                return Response(
-                    {'error': 'Audit is not in pending status'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            audit.status = 'IN_PROGRESS'
-            audit.started_at = timezone.now()
-            audit.save()
-            
-            # Create log entry
-            AuditLog.objects.create(
-                night_audit=audit,
-                action='Audit Started',
-                details=f'Started by {request.user.get_full_name()}',
-                success=True
-            )
-            
-            serializer = NightAuditSerializer(audit)
-            return Response(serializer.data)
-            
-        except NightAudit.DoesNotExist:
-            return Response(
-                {'error': 'Night audit not found'},
-                status=status.HTTP_404_NOT_FOUND
-            )
-
-
 class CompleteNightAuditView(APIView):
     """Complete a night audit process."""
     permission_classes = [IsAuthenticated, IsAdminOrManager]
@@ -315,7 +354,20 @@ class AuditLogListView(generics.ListAPIView):
         return AuditLog.objects.filter(
             night_audit_id=audit_id,
             night_audit__property=self.request.user.assigned_property
-        ).order_by('timestamp')
+        ).order_by('created_at')
+
+
+class AuditLogExportView(StreamingExportMixin, AuditLogListView):
+    """Export the audit logs of a night audit as streamed CSV or NDJSON."""
+    export_filename = 'night_audit_logs'
+    export_fields = [
+        ('id', 'id'),
+        ('created_at', 'created_at'),
+        ('business_date', 'night_audit__business_date'),
+        ('step', 'step'),
+        ('message', 'message'),
+        ('is_error', 'is_error'),
+    ]
 
 
 # ===== Dashboard & Stats =====
@@ -128,10 +128,11 @@ class NightAuditSerializer(serializers.ModelSerializer):
             'departures_checked', 'room_revenue', 'tax_amount', 'fb_revenue',
             'other_revenue', 'total_revenue', 'payments_collected',
             'rooms_sold', 'arrivals_count', 'departures_count',
+            'current_step', 'step_timings',
             'started_at', 'completed_at', 'completed_by', 'completed_by_name',
             'notes', 'logs', 'duration_minutes'
         ]
-        read_only_fields = ['id', 'started_at', 'completed_at']
+        read_only_fields = ['id', 'current_step', 'step_timings', 'started_at', 'completed_at']
     
     def get_duration_minutes(self, obj):
         """Calculate audit duration in minutes."""
@@ -20,15 +20,19 @@ urlpatterns = [
     # ===== Report Templates =====
     path('templates/', reports_views.ReportTemplateListCreateView.as_view(), name='template_list'),
     path('templates/<int:pk>/', reports_views.ReportTemplateDetailView.as_view(), name='template_detail'),
+    path('templates/<int:pk>/snapshot/', reports_views.ReportSnapshotView.as_view(), name='template_snapshot'),
+    path('templates/<int:pk>/snapshots/', reports_views.ReportSnapshotListView.as_view(), name='template_snapshots'),
     path('generate/', reports_views.GenerateReportView.as_view(), name='generate_report'),
     
     # ===== Night Audit =====
     path('night-audits/', reports_views.NightAuditListCreateView.as_view(), name='night_audit_list'),
     path('night-audits/<int:pk>/', reports_views.NightAuditDetailView.as_view(), name='night_audit_detail'),
     path('night-audits/pending/', reports_views.PendingNightAuditsView.as_view(), name='pending_night_audits'),
-    path('night-audits/<int:pk>/start/', reports_views.StartNightAuditView.as_view(), name='night_audit_start'),
+    path('night-audits/<int:pk>/start/', views.StartNightAuditView.as_view(), name='night_audit_start'),
+    path('night-audits/<int:pk>/resume/', views.ResumeNightAuditView.as_view(), name='night_audit_resume'),
     path('night-audits/<int:pk>/complete/', reports_views.CompleteNightAuditView.as_view(), name='night_audit_complete'),
     path('night-audits/<int:audit_id>/logs/', reports_views.AuditLogListView.as_view(), name='audit_logs'),
+    path('night-audits/<int:audit_id>/logs/export/', reports_views.AuditLogExportView.as_view(), name='audit_logs_export'),
     path('night-audits/dashboard/', reports_views.NightAuditDashboardView.as_view(), name='night_audit_dashboard'),
     
     # ===== Convenience Aliases (for better UX) =====
@@ -40,6 +44,7 @@ urlpatterns = [
     path('dashboard/', views.DashboardStatsView.as_view(), name='dashboard'),
     path('advanced-analytics/', views.AdvancedAnalyticsView.as_view(), name='advanced_analytics'),
     path('revenue-forecast/', views.RevenueForecastView.as_view(), name='revenue_forecast'),
+    path('forecast/', views.OccupancyForecastView.as_view(), name='forecast'),
     path('occupancy/', views.OccupancyReportView.as_view(), name='occupancy'),
     path('revenue/', views.RevenueReportView.as_view(), name='revenue'),
     path('daily/', views.DailyReportView.as_view(), name='daily'),
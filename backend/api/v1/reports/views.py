@@ -1,3 +1,4 @@
+import calendar
 from rest_framework.views import APIView
 from rest_framework import generics, status
 from rest_framework.response import Response
@@ -5,14 +6,17 @@ from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django.shortcuts import get_object_or_404
-from django.db.models import Sum, Avg, Count
+from django.db.models import Sum, Avg
 from django.utils import timezone
 from datetime import date, timedelta
 from apps.reports.models import DailyStatistics, MonthlyStatistics, NightAudit, AuditLog
-from apps.reservations.models import Reservation
-from apps.rooms.models import Room
-from apps.billing.models import Payment, Folio
+from apps.reports.tasks import run_night_audit_task
+from apps.reports.services import DailyStatisticsService
+from apps.reports.analytics import AnalyticsService
+from apps.reports.forecast import ForecastService
+from apps.reports.dashboards import DashboardService
 from api.permissions import IsAdminOrManager
+from config.celery import enqueue_on_commit
 from .serializers import (
     MonthlyStatisticsSerializer, MonthlyStatisticsCreateSerializer,
     NightAuditSerializer, NightAuditCreateSerializer, NightAuditUpdateSerializer,
@@ -24,58 +28,9 @@ class DashboardStatsView(APIView):
     permission_classes = [IsAuthenticated, IsAdminOrManager]
     
     def get(self, request):
-        today = date.today()
-        property_obj = request.user.assigned_property
-        
-        # Get today's stats
-        daily_stats = DailyStatistics.objects.filter(date=today)
-        if property_obj:
-            daily_stats = daily_stats.filter(property=property_obj)
-        
-        stats = daily_stats.first()
-        
-        # Calculate live stats if not available
-        if not stats:
-            rooms = Room.objects.filter(is_active=True)
-            reservations = Reservation.objects
-            
-            if property_obj:
-                rooms = rooms.filter(hotel=property_obj)
-                reservations = reservations.filter(hotel=property_obj)
-            
-            total_rooms = rooms.count()
-            occupied = reservations.filter(status='CHECKED_IN').count()
-            
-            occupancy = (occupied / total_rooms * 100) if total_rooms else 0
-            
-            # Today's revenue
-            payments = Payment.objects.filter(payment_date__date=today)
-            revenue = payments.aggregate(total=Sum('amount'))['total'] or 0
-            
-            return Response({
-                'date': today,
-                'total_rooms': total_rooms,
-                'occupied': occupied,
-                'occupancy_percent': round(occupancy, 1),
-                'arrivals': reservations.filter(check_in_date=today, status='CONFIRMED').count(),
-                'departures': reservations.filter(check_out_date=today, status='CHECKED_IN').count(),
-                'revenue': float(revenue),
-            })
-        
-        return Response({
-            'date': stats.date,
-            'total_rooms': stats.total_rooms,
-            'rooms_sold': stats.rooms_sold,
-            'occupancy_percent': float(stats.occupancy_percent),
-            'arrivals': stats.arrivals,
-            'departures': stats.departures,
-            'in_house': stats.in_house,
-            'adr': float(stats.adr),
-            'revpar': float(stats.revpar),
-            'room_revenue': float(stats.room_revenue),
-            'fb_revenue': float(stats.fb_revenue),
-            'total_revenue': float(stats.total_revenue),
-        })
+        return Response(DashboardService.get(
+            DashboardService.REPORTS, request.user.assigned_property
+        ))
 
 
 class OccupancyReportView(APIView):
@@ -179,79 +134,59 @@ class AdvancedAnalyticsView(APIView):
     
     def get(self, request):
         from datetime import datetime
-        from django.db.models import Q
         
         # Get query params
-        start_date = request.query_params.get('start_date')
-        end_date = request.query_params.get('end_date')
         metric = request.query_params.get('metric', 'revenue')
+        if metric not in AnalyticsService.METRICS:
+            return Response(
+                {'error': f'metric must be one of: {", ".join(AnalyticsService.METRICS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Default to last 30 days
-        if not end_date:
-            end_date = date.today()
-        else:
-            end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-        
-        if not start_date:
-            start_date = end_date - timedelta(days=30)
-        else:
-            start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+        try:
+            end_date = request.query_params.get('end_date')
+            end_date = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else date.today()
+            start_date = request.query_params.get('start_date')
+            start_date = (
+                datetime.strptime(start_date, '%Y-%m-%d').date() if start_date
+                else end_date - timedelta(days=30)
+            )
+            window = int(request.query_params.get('window', 7))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if start_date > end_date:
+            return Response(
+                {'error': 'start_date must not be after end_date'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         property_obj = request.user.assigned_property
+        property_id = property_obj.pk if property_obj else None
+        series = AnalyticsService.series(property_id, metric, start_date, end_date, window)
+        
+        data = [
+            {
+                'date': day.isoformat(),
+                'value': round(float(value), 2),
+                'rolling_average': round(float(rolling), 2),
+                'last_year': round(float(last_year), 2),
+            }
+            for day, value, rolling, last_year in zip(
+                series['dates'], series['values'], series['rolling_average'], series['last_year']
+            )
+        ]
         
-        # Get daily statistics
-        stats = DailyStatistics.objects.filter(
-            date__gte=start_date,
-            date__lte=end_date
-        )
-        
-        if property_obj:
-            stats = stats.filter(property=property_obj)
-        
-        # Aggregate data
-        data = []
-        current_date = start_date
-        while current_date <= end_date:
-            day_stat = stats.filter(date=current_date).first()
-            
-            if metric == 'revenue':
-                value = float(day_stat.total_revenue) if day_stat else 0
-            elif metric == 'occupancy':
-                value = float(day_stat.occupancy_percent) if day_stat else 0
-            elif metric == 'reservations':
-                value = Reservation.objects.filter(
-                    created_at__date=current_date
-                ).count()
-                if property_obj:
-                    value = Reservation.objects.filter(
-                        created_at__date=current_date,
-                        property=property_obj
-                    ).count()
-            else:
-                value = 0
-            
-            data.append({
-                'date': current_date.isoformat(),
-                'value': value
-            })
-            current_date += timedelta(days=1)
-        
-        # Calculate summary stats
-        total_value = sum(d['value'] for d in data)
-        avg_value = total_value / len(data) if data else 0
-        
-        return Response({
+        response = {
             'metric': metric,
             'start_date': start_date.isoformat(),
             'end_date': end_date.isoformat(),
+            'window': window,
             'data': data,
-            'summary': {
-                'total': total_value,
-                'average': avg_value,
-                'max': max((d['value'] for d in data), default=0),
-                'min': min((d['value'] for d in data), default=0)
-            }
-        })
+            'summary': AnalyticsService.summarize(series['values'], series['last_year'])
+        }
+        if request.query_params.get('include_pickup') == 'true':
+            response['pickup'] = AnalyticsService.pickup_curve(property_id, start_date, end_date)
+        return Response(response)
 
 
 class RevenueForecastView(APIView):
@@ -260,41 +195,70 @@ class RevenueForecastView(APIView):
     
     def get(self, request):
         property_obj = request.user.assigned_property
-        today = date.today()
-        
-        # Get last 30 days revenue
-        last_30_days = DailyStatistics.objects.filter(
-            date__gte=today - timedelta(days=30),
-            date__lt=today
+        try:
+            days = min(max(int(request.query_params.get('days', 30)), 1), 365)
+            history_days = min(max(int(request.query_params.get('history_days', 365)), 28), 3 * 365)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Day-of-week seasonality on top of the revenue trend
+        result = AnalyticsService.forecast(
+            property_obj.pk if property_obj else None,
+            date.today(),
+            metric='revenue',
+            days=days,
+            history_days=history_days
         )
         
-        if property_obj:
-            last_30_days = last_30_days.filter(property=property_obj)
-        
-        avg_daily_revenue = last_30_days.aggregate(
-            avg=Avg('total_revenue')
-        )['avg'] or 0
-        
-        # Simple forecast: project average for next 30 days
-        forecast = []
-        for i in range(30):
-            forecast_date = today + timedelta(days=i)
-            # Add some variance (±10%)
-            import random
-            variance = random.uniform(0.9, 1.1)
-            forecasted_value = float(avg_daily_revenue) * variance
-            
-            forecast.append({
-                'date': forecast_date.isoformat(),
-                'forecasted_revenue': round(forecasted_value, 2),
-                'confidence': 'medium'
-            })
+        forecast = [
+            {
+                'date': day.isoformat(),
+                'forecasted_revenue': round(float(value), 2),
+                'lower': round(float(lower), 2),
+                'upper': round(float(upper), 2),
+                'confidence': result['confidence']
+            }
+            for day, value, lower, upper in zip(
+                result['dates'], result['values'], result['lower'], result['upper']
+            )
+        ]
+        
+        return Response({
+            'forecast_period': f'{days}_days',
+            'base_avg_revenue': round(result['base_average'], 2),
+            'trend_per_day': round(result['trend_per_day'], 2),
+            'weekday_factors': {
+                calendar.day_name[weekday].lower(): round(float(factor), 3)
+                for weekday, factor in enumerate(result['weekday_factors'])
+            },
+            'forecast': forecast,
+            'total_forecasted': round(sum(f['forecasted_revenue'] for f in forecast), 2)
+        })
+
+
+class OccupancyForecastView(APIView):
+    """Rooms on the books per future date with group and out-of-order overlays."""
+    permission_classes = [IsAuthenticated, IsAdminOrManager]
+    
+    def get(self, request):
+        property_obj = request.user.assigned_property
+        try:
+            days = min(max(int(request.query_params.get('days', 30)), 1), 730)
+            start = request.query_params.get('start_date')
+            start = date.fromisoformat(start) if start else date.today()
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        forecast = ForecastService.rows(property_obj.pk if property_obj else None, start, days)
+        for row in forecast:
+            row['date'] = row['date'].isoformat()
         
         return Response({
-            'forecast_period': '30_days',
-            'base_avg_revenue': float(avg_daily_revenue),
+            'start_date': start.isoformat(),
+            'days': days,
+            'room_nights_on_books': sum(row['occupied'] for row in forecast),
+            'group_room_nights': sum(row['group_blocked'] for row in forecast),
             'forecast': forecast,
-            'total_forecasted': sum(f['forecasted_revenue'] for f in forecast)
         })
 
 
@@ -471,277 +435,49 @@ class StartNightAuditView(APIView):
             message=f'Night audit started by {request.user.get_full_name()}'
         )
         
-        # If auto_process is True, run the audit steps
+        # If auto_process is True, run the audit steps in the background
         if serializer.validated_data.get('auto_process', True):
-            self._run_audit_steps(night_audit, request.user)
+            task_id = enqueue_on_commit(run_night_audit_task, night_audit.pk, request.user.pk)
+            return Response(
+                {'task_id': task_id, 'audit': NightAuditSerializer(night_audit).data},
+                status=status.HTTP_202_ACCEPTED
+            )
         
         return Response(NightAuditSerializer(night_audit).data)
+
+
+class ResumeNightAuditView(APIView):
+    """Resume an in-progress night audit from its last completed stage."""
+    permission_classes = [IsAuthenticated, IsAdminOrManager]
     
-    def _run_audit_steps(self, night_audit, user):
-        """Run automatic audit steps."""
-        from apps.billing.models import FolioCharge, ChargeCode
-        from decimal import Decimal
-        
-        property_obj = night_audit.property
-        business_date = night_audit.business_date
+    def post(self, request, pk):
+        night_audit = get_object_or_404(NightAudit, pk=pk)
         
-        try:
-            # Step 1: Process no-shows
-            AuditLog.objects.create(
-                night_audit=night_audit,
-                step='NO_SHOWS',
-                message='Processing no-show reservations'
-            )
-            
-            # Find reservations that should have checked in but didn't
-            no_show_reservations = Reservation.objects.filter(
-                property=property_obj,
-                check_in_date=business_date,
-                status=Reservation.Status.CONFIRMED
-            )
-            
-            no_show_count = 0
-            for reservation in no_show_reservations:
-                # Update status to no-show
-                reservation.status = Reservation.Status.NO_SHOW
-                reservation.save()
-                
-                # Post no-show charge if folio exists
-                try:
-                    folio = reservation.folios.first()
-                    if folio:
-                        # Get or create no-show charge code
-                        charge_code, _ = ChargeCode.objects.get_or_create(
-                            property=property_obj,
-                            code='NOSHOW',
-                            defaults={
-                                'name': 'No-Show Charge',
-                                'category': 'OTHER',
-                                'default_amount': reservation.total_amount * Decimal('0.2')  # 20% penalty
-                            }
-                        )
-                        
-                        FolioCharge.objects.create(
-                            folio=folio,
-                            charge_code=charge_code,
-                            description=f'No-show penalty for {reservation.confirmation_number}',
-                            amount=charge_code.default_amount,
-                            quantity=1,
-                            date=business_date,
-                            posted_by=user
-                        )
-                        no_show_count += 1
-                except Exception as e:
-                    AuditLog.objects.create(
-                        night_audit=night_audit,
-                        step='NO_SHOWS',
-                        message=f'Error posting no-show charge for {reservation.confirmation_number}: {str(e)}',
-                        is_error=True
-                    )
-            
-            night_audit.no_shows_processed = True
-            night_audit.save()
-            
-            AuditLog.objects.create(
-                night_audit=night_audit,
-                step='NO_SHOWS',
-                message=f'Processed {no_show_count} no-show reservations'
-            )
-            
-            # Step 2: Post room rates
-            AuditLog.objects.create(
-                night_audit=night_audit,
-                step='ROOM_RATES',
-                message='Posting room rates for in-house guests'
-            )
-            
-            # Find all checked-in guests for this date
-            in_house_reservations = Reservation.objects.filter(
-                property=property_obj,
-                status=Reservation.Status.CHECKED_IN,
-                check_in_date__lte=business_date,
-                check_out_date__gt=business_date
-            )
-            
-            room_rate_count = 0
-            for reservation in in_house_reservations:
-                try:
-                    folio = reservation.folios.first()
-                    if not folio:
-                        continue
-                    
-                    # Get or create room rate charge code
-                    charge_code, _ = ChargeCode.objects.get_or_create(
-                        property=property_obj,
-                        code='ROOM',
-                        defaults={
-                            'name': 'Room Rate',
-                            'category': 'ROOM',
-                            'default_amount': Decimal('0')
-                        }
-                    )
-                    
-                    # Calculate room rate for this night
-                    for res_room in reservation.rooms.all():
-                        FolioCharge.objects.create(
-                            folio=folio,
-                            charge_code=charge_code,
-                            description=f'Room rate for {business_date} - Room {res_room.room.room_number if res_room.room else res_room.room_type.name}',
-                            amount=res_room.rate_per_night,
-                            quantity=1,
-                            date=business_date,
-                            posted_by=user
-                        )
-                        room_rate_count += 1
-                        
-                except Exception as e:
-                    AuditLog.objects.create(
-                        night_audit=night_audit,
-                        step='ROOM_RATES',
-                        message=f'Error posting room rate for {reservation.confirmation_number}: {str(e)}',
-                        is_error=True
-                    )
-            
-            night_audit.room_rates_posted = True
-            night_audit.save()
-            
-            AuditLog.objects.create(
-                night_audit=night_audit,
-                step='ROOM_RATES',
-                message=f'Posted {room_rate_count} room rate charges'
-            )
-            
-            # Step 3: Check departures
-            AuditLog.objects.create(
-                night_audit=night_audit,
-                step='DEPARTURES',
-                message='Checking departure folios'
-            )
-            
-            # Find departures for next day
-            next_date = business_date + timedelta(days=1)
-            departing_reservations = Reservation.objects.filter(
-                property=property_obj,
-                check_out_date=next_date,
-                status=Reservation.Status.CHECKED_IN
-            )
-            
-            unsettled_count = 0
-            departure_count = 0
-            for reservation in departing_reservations:
-                departure_count += 1
-                folio = reservation.folios.first()
-                if folio and folio.balance > 0:
-                    unsettled_count += 1
-                    AuditLog.objects.create(
-                        night_audit=night_audit,
-                        step='DEPARTURES',
-                        message=f'Unsettled folio for departure: {reservation.confirmation_number} - Balance: ${folio.balance}',
-                        is_error=True
-                    )
-            
-            night_audit.departures_checked = True
-            night_audit.save()
-            
-            AuditLog.objects.create(
-                night_audit=night_audit,
-                step='DEPARTURES',
-                message=f'Checked {departure_count} departures, {unsettled_count} unsettled'
-            )
-            
-            # Step 4: Verify settled folios
-            AuditLog.objects.create(
-                night_audit=night_audit,
-                step='FOLIOS',
-                message='Verifying all folios are settled'
-            )
-            
-            # Get all active folios
-            active_folios = Folio.objects.filter(
-                property=property_obj,
-                status='OPEN'
-            )
-            
-            total_outstanding = Decimal('0')
-            folio_count = 0
-            for folio in active_folios:
-                if folio.balance != 0:
-                    folio_count += 1
-                    total_outstanding += folio.balance
-            
-            night_audit.folios_settled = (folio_count == 0)
-            night_audit.save()
-            
-            if folio_count > 0:
-                AuditLog.objects.create(
-                    night_audit=night_audit,
-                    step='FOLIOS',
-                    message=f'Warning: {folio_count} folios with outstanding balance: ${total_outstanding}',
-                    is_error=False
-                )
-            else:
-                AuditLog.objects.create(
-                    night_audit=night_audit,
-                    step='FOLIOS',
-                    message='All folios verified and settled'
+        # Check if user has access
+        if request.user.assigned_property:
+            if night_audit.property != request.user.assigned_property:
+                return Response(
+                    {'error': 'You do not have access to this resource'},
+                    status=status.HTTP_403_FORBIDDEN
                 )
-            
-            # Step 5: Calculate totals
-            AuditLog.objects.create(
-                night_audit=night_audit,
-                step='TOTALS',
-                message='Calculating revenue totals'
-            )
-            
-            # Get payments for the business date
-            payments = Payment.objects.filter(
-                folio__property=property_obj,
-                payment_date__date=business_date
-            ).aggregate(total=Sum('amount'))
-            
-            # Get charges for the business date
-            charges = FolioCharge.objects.filter(
-                folio__property=property_obj,
-                date=business_date
-            )
-            
-            room_revenue = charges.filter(charge_code__category='ROOM').aggregate(total=Sum('amount'))['total'] or 0
-            fb_revenue = charges.filter(charge_code__category='FB').aggregate(total=Sum('amount'))['total'] or 0
-            other_revenue = charges.filter(charge_code__category='OTHER').aggregate(total=Sum('amount'))['total'] or 0
-            
-            night_audit.room_revenue = room_revenue
-            night_audit.fb_revenue = fb_revenue
-            night_audit.other_revenue = other_revenue
-            night_audit.total_revenue = room_revenue + fb_revenue + other_revenue
-            night_audit.payments_collected = payments['total'] or 0
-            
-            # Get room counts
-            reservations = Reservation.objects.filter(
-                property=property_obj,
-                check_in_date__lte=business_date,
-                check_out_date__gt=business_date,
-                status=Reservation.Status.CHECKED_IN
-            )
-            night_audit.rooms_sold = reservations.count()
-            night_audit.arrivals_count = reservations.filter(check_in_date=business_date).count()
-            night_audit.departures_count = departure_count
-            
-            night_audit.save()
-            
-            AuditLog.objects.create(
-                night_audit=night_audit,
-                step='COMPLETE',
-                message=f'Night audit completed - Revenue: ${night_audit.total_revenue}, Rooms: {night_audit.rooms_sold}'
-            )
-            
-        except Exception as e:
-            AuditLog.objects.create(
-                night_audit=night_audit,
-                step='ERROR',
-                message=f'Error during audit: {str(e)}',
-                is_error=True
+        
+        if night_audit.status != NightAudit.Status.IN_PROGRESS:
+            return Response(
+                {'error': 'Only in-progress audits can be resumed'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-            raise
+        
+        AuditLog.objects.create(
+            night_audit=night_audit,
+            step='RESUME',
+            message=f'Night audit resumed by {request.user.get_full_name()}'
+        )
+        
+        task_id = enqueue_on_commit(run_night_audit_task, night_audit.pk, request.user.pk)
+        return Response(
+            {'task_id': task_id, 'audit': NightAuditSerializer(night_audit).data},
+            status=status.HTTP_202_ACCEPTED
+        )
 
 
 class CompleteNightAuditView(APIView):
@@ -799,20 +535,8 @@ class CompleteNightAuditView(APIView):
             # property_obj.business_date = new_business_date
             # property_obj.save()
             
-            # Create daily statistics record
-            DailyStatistics.objects.create(
-                property=property_obj,
-                date=night_audit.business_date,
-                total_rooms=Room.objects.filter(property=property_obj, is_active=True).count(),
-                rooms_occupied=night_audit.rooms_sold,
-                occupancy_rate=(night_audit.rooms_sold / Room.objects.filter(property=property_obj, is_active=True).count() * 100) if Room.objects.filter(property=property_obj, is_active=True).count() > 0 else 0,
-                room_revenue=night_audit.room_revenue,
-                fb_revenue=night_audit.fb_revenue,
-                other_revenue=night_audit.other_revenue,
-                total_revenue=night_audit.total_revenue,
-                arrivals=night_audit.arrivals_count,
-                departures=night_audit.departures_count
-            )
+            # Store the audited day's statistics
+            DailyStatisticsService.refresh(property_obj.pk, night_audit.business_date)
             
             AuditLog.objects.create(
                 night_audit=night_audit,
@@ -11,6 +11,7 @@ urlpatterns = [
     path('<int:pk>/cancel/', views.CancelReservationView.as_view(), name='cancel'),
     path('arrivals/', views.ArrivalsView.as_view(), name='arrivals'),
     path('departures/', views.DeparturesView.as_view(), name='departures'),
+    path('logs/export/', views.ReservationLogExportView.as_view(), name='log_export'),
     
     # Availability
     path('check-availability/', views.CheckAvailabilityView.as_view(), name='check_availability'),
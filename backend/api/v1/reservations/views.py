@@ -7,11 +7,13 @@ from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from datetime import date, datetime
-from apps.reservations.models import Reservation, ReservationRoom, GroupBooking
+from apps.reservations.models import Reservation, ReservationRoom, GroupBooking, ReservationLog
 from apps.reservations.services import AvailabilityService
-from apps.rates.services import PricingService
+from apps.rates.services import PricingService, RateGridService
 from apps.guests.models import Guest
 from apps.rooms.models import RoomType
+from api.exports import StreamingExportMixin
+from api.pagination import KeysetPagination
 from api.permissions import IsFrontDeskOrAbove
 from .serializers import (
     ReservationSerializer, ReservationCreateSerializer,
@@ -27,6 +29,8 @@ class ReservationListView(generics.ListCreateAPIView):
     search_fields = ['confirmation_number', 'guest__first_name', 'guest__last_name', 'guest__email']
     ordering_fields = ['check_in_date', 'created_at', 'total_amount']
     ordering = ['-created_at']
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -197,17 +201,28 @@ class CheckAvailabilityView(APIView):
                 hotel_id, room_type_id, check_in, check_out, count
             )
             
+            rooms = list(available_rooms.values('id', 'room_number', 'room_type__name'))
             result = {
-                'available': available_rooms.exists(),
-                'count': available_rooms.count(),
-                'rooms': list(available_rooms.values('id', 'room_number', 'room_type__name'))
+                'available': bool(rooms),
+                'count': len(rooms),
+                'rooms': rooms
             }
             
+            # Best available rate for the arrival night from the rate grid
+            if room_type_id:
+                result['best_available_rate'] = RateGridService.get_best_rate(
+                    hotel_id, room_type_id, check_in
+                )
+            
             # If not available, suggest alternatives
-            if not available_rooms.exists() and room_type_id:
+            if not rooms and room_type_id:
                 result['alternatives'] = AvailabilityService.suggest_alternative_rooms(
                     hotel_id, room_type_id, check_in, check_out
                 )
+                for suggestion in result['alternatives'].values():
+                    suggestion['best_available_rate'] = RateGridService.get_best_rate(
+                        hotel_id, suggestion['room_type_id'], check_in
+                    )
             
             return Response(result)
             
@@ -226,9 +241,22 @@ class AvailabilityCalendarView(APIView):
         try:
             hotel_id = request.query_params.get('hotel_id') or request.query_params.get('property_id')
             room_type_id = request.query_params.get('room_type_id')
+            room_type_ids = request.query_params.get('room_type_ids')
             start_date = datetime.fromisoformat(request.query_params.get('start_date')).date()
             end_date = datetime.fromisoformat(request.query_params.get('end_date')).date()
             
+            # Several room types in one response: ?room_type_ids=1,2,3
+            if room_type_ids:
+                type_ids = [int(type_id) for type_id in room_type_ids.split(',') if type_id.strip()]
+                calendars = AvailabilityService.get_availability_calendars(
+                    hotel_id, type_ids, start_date, end_date
+                )
+                return Response({
+                    'start_date': start_date.isoformat(),
+                    'end_date': end_date.isoformat(),
+                    'calendars': {str(type_id): calendar for type_id, calendar in calendars.items()}
+                })
+            
             calendar = AvailabilityService.get_availability_calendar(
                 hotel_id, room_type_id, start_date, end_date
             )
@@ -285,9 +313,11 @@ class CompareRatesView(APIView):
             room_type_id = request.data.get('room_type_id')
             check_in = datetime.fromisoformat(request.data.get('check_in_date')).date()
             check_out = datetime.fromisoformat(request.data.get('check_out_date')).date()
+            adults = request.data.get('adults', 1)
+            children = request.data.get('children', 0)
             
             comparisons = PricingService.get_rate_comparison(
-                room_type_id, check_in, check_out, property_id
+                room_type_id, check_in, check_out, property_id, adults, children
             )
             
             return Response({
@@ -467,4 +497,35 @@ class GroupBookingCancelView(APIView):
         group_booking.status = GroupBooking.Status.CANCELLED
         group_booking.save()
         
-        return Response(GroupBookingSerializer(group_booking).data)
\ No newline at end of file
+        return Response(GroupBookingSerializer(group_booking).data)
+
+
+class ReservationLogExportView(StreamingExportMixin, generics.GenericAPIView):
+    """Export reservation change history as streamed CSV or NDJSON."""
+    permission_classes = [IsAuthenticated, IsFrontDeskOrAbove]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['reservation', 'action', 'user']
+    export_filename = 'reservation_logs'
+    export_fields = [
+        ('id', 'id'),
+        ('timestamp', 'timestamp'),
+        ('confirmation_number', 'reservation__confirmation_number'),
+        ('action', 'action'),
+        ('old_value', 'old_value'),
+        ('new_value', 'new_value'),
+        ('notes', 'notes'),
+        ('user', 'user__email'),
+    ]
+    
+    def get_queryset(self):
+        queryset = ReservationLog.objects.filter(
+            reservation__hotel=self.request.user.assigned_property
+        ).order_by('-timestamp')
+        
+        start_date = self.request.query_params.get('start_date')
+        end_date = self.request.query_params.get('end_date')
+        if start_date:
+            queryset = queryset.filter(timestamp__date__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(timestamp__date__lte=end_date)
+        return queryset
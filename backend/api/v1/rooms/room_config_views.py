@@ -19,6 +19,7 @@ from .room_config_serializers import (
     RoomStatusLogSerializer,
     BulkAmenityAssignSerializer
 )
+from api.exports import StreamingExportMixin
 from api.permissions import IsAdminOrManager
 
 
@@ -280,6 +281,39 @@ class RoomStatusLogsByRoomView(generics.ListAPIView):
         ).select_related('room', 'changed_by').order_by('-changed_at')
 
 
+class RoomStatusLogExportView(StreamingExportMixin, generics.GenericAPIView):
+    """Export room status history as streamed CSV or NDJSON."""
+    permission_classes = [IsAuthenticated, IsAdminOrManager]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['room', 'previous_status', 'new_status', 'changed_by']
+    export_filename = 'room_status_logs'
+    export_fields = [
+        ('id', 'id'),
+        ('timestamp', 'timestamp'),
+        ('room', 'room__room_number'),
+        ('previous_status', 'previous_status'),
+        ('new_status', 'new_status'),
+        ('changed_by', 'changed_by__email'),
+        ('notes', 'notes'),
+    ]
+    
+    def get_queryset(self):
+        queryset = RoomStatusLog.objects.filter(
+            room__hotel=self.request.user.assigned_property
+        ).order_by('-timestamp')
+        
+        # Filter by date range
+        start_date = self.request.query_params.get('start_date')
+        end_date = self.request.query_params.get('end_date')
+        
+        if start_date:
+            queryset = queryset.filter(timestamp__date__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(timestamp__date__lte=end_date)
+        
+        return queryset
+
+
 class RoomConfigStatsView(APIView):
     """Get room configuration statistics."""
     permission_classes = [IsAuthenticated]
@@ -39,6 +39,7 @@ urlpatterns = [
     
     # Room Status Logs
     path('status-logs/', room_config_views.RoomStatusLogListCreateView.as_view(), name='status_log_list'),
+    path('status-logs/export/', room_config_views.RoomStatusLogExportView.as_view(), name='status_log_export'),
     path('status-logs/<int:pk>/', room_config_views.RoomStatusLogDetailView.as_view(), name='status_log_detail'),
     path('status-logs/room/<int:room_id>/', room_config_views.RoomStatusLogsByRoomView.as_view(), name='status_log_by_room'),
     
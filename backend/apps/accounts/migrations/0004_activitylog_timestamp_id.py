@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0003_user_accounts_us_email_74c8d6_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="activitylog",
+            index=models.Index(
+                fields=["timestamp", "id"], name="accounts_ac_timesta_27c14f_idx"
+            ),
+        ),
+    ]
@@ -169,6 +169,9 @@ class ActivityLog(models.Model):
         verbose_name = _('activity log')
         verbose_name_plural = _('activity logs')
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['timestamp', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.user} - {self.action} - {self.timestamp}"
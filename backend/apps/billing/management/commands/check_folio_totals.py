@@ -0,0 +1,47 @@
+"""
+Django management command to find folios whose stored totals have drifted.
+"""
+from django.core.management.base import BaseCommand
+from apps.billing.models import Folio
+
+
+class Command(BaseCommand):
+    """Compare stored folio totals with their posted charges and payments."""
+
+    help = 'Report (and optionally reconcile) folios whose stored totals drifted from their lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--property', type=int, help='Only check folios of this property ID')
+        parser.add_argument('--open-only', action='store_true', help='Only check open folios')
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Recompute the totals of drifted folios (logged as activity)'
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command."""
+        folios = Folio.drifted()
+        if options.get('property'):
+            folios = folios.filter(reservation__hotel_id=options['property'])
+        if options['open_only']:
+            folios = folios.filter(status=Folio.Status.OPEN)
+
+        drifted = 0
+        for folio in folios.iterator():
+            drifted += 1
+            self.stdout.write(
+                f'Drift: folio {folio.folio_number}: '
+                f'charges {folio.total_charges} (lines {folio.expected_charges}), '
+                f'payments {folio.total_payments} (lines {folio.expected_payments}), '
+                f'taxes {folio.total_taxes} (lines {folio.expected_taxes})'
+            )
+            if options['fix']:
+                folio.recalculate_totals()
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('All folio totals match their lines'))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f'{drifted} drifted folios reconciled'))
+        else:
+            self.stdout.write(self.style.WARNING(f'{drifted} drifted folios found'))
@@ -2,7 +2,9 @@
 Billing Models for Hotel PMS
 """
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 import uuid
@@ -55,15 +57,105 @@ class Folio(models.Model):
     def __str__(self):
         return f"{self.folio_number} - {self.guest}"
     
+    TOTAL_FIELDS = ('total_charges', 'total_payments', 'total_taxes')
+    
     @property
     def balance(self):
         return self.total_charges + self.total_taxes - self.total_payments
     
-    def recalculate_totals(self):
-        self.total_charges = sum(item.amount for item in self.charges.all())
-        self.total_payments = sum(payment.amount for payment in self.payments.all())
-        self.total_taxes = sum(item.tax_amount for item in self.charges.all())
-        self.save()
+    def recalculate_totals(self, user=None):
+        """
+        Reconcile the stored totals against the posted lines.
+        
+        Postings keep the totals current with apply_totals_delta(); this full
+        recompute is only for repairing drift, and records an ActivityLog
+        entry whenever it changes the stored values.
+        
+        Args:
+            user: User performing the reconciliation, if any
+        
+        Returns:
+            bool: True if the stored totals had drifted
+        """
+        from apps.accounts.models import ActivityLog
+        
+        with transaction.atomic():
+            before = Folio.objects.select_for_update().filter(pk=self.pk).values_list(*self.TOTAL_FIELDS).get()
+            Folio.recalculate_totals_for([self.pk])
+            self.refresh_from_db(fields=self.TOTAL_FIELDS + ('updated_at',))
+            after = tuple(getattr(self, field) for field in self.TOTAL_FIELDS)
+            
+            drifted = before != after
+            if drifted:
+                ActivityLog.objects.create(
+                    user=user,
+                    action=ActivityLog.ActionType.UPDATE,
+                    model_name='Folio',
+                    object_id=str(self.pk),
+                    description=(
+                        f'Reconciled folio {self.folio_number} totals: '
+                        f'charges {before[0]} -> {after[0]}, '
+                        f'payments {before[1]} -> {after[1]}, '
+                        f'taxes {before[2]} -> {after[2]}'
+                    )
+                )
+        return drifted
+    
+    @classmethod
+    def apply_totals_delta(cls, folio_id, charges=0, payments=0, taxes=0):
+        """
+        Shift a folio's stored totals with one atomic F() UPDATE.
+        
+        updated_at is touched even when every delta is zero, so a line edit
+        that leaves the totals alone still changes the folio's version.
+        """
+        deltas = {'total_charges': charges, 'total_payments': payments, 'total_taxes': taxes}
+        updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+        cls.objects.filter(pk=folio_id).update(updated_at=timezone.now(), **updates)
+    
+    @classmethod
+    def recalculate_totals_for(cls, folio_ids):
+        """Recompute the stored totals of several folios with one aggregate UPDATE."""
+        cls.objects.filter(pk__in=folio_ids).update(
+            total_charges=_line_total(FolioCharge, 'amount'),
+            total_taxes=_line_total(FolioCharge, 'tax_amount'),
+            total_payments=_line_total(Payment, 'amount'),
+            updated_at=timezone.now()
+        )
+    
+    @classmethod
+    def drifted(cls):
+        """Folios whose stored totals no longer match their posted lines."""
+        return cls.objects.annotate(
+            expected_charges=_line_total(FolioCharge, 'amount'),
+            expected_payments=_line_total(Payment, 'amount'),
+            expected_taxes=_line_total(FolioCharge, 'tax_amount')
+        ).filter(
+            ~Q(total_charges=F('expected_charges'))
+            | ~Q(total_payments=F('expected_payments'))
+            | ~Q(total_taxes=F('expected_taxes'))
+        )
+
+
+def _line_total(model, field):
+    """Subquery summing a field over a folio's charge or payment lines."""
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    return Coalesce(
+        Subquery(
+            model.objects.filter(folio=OuterRef('pk')).values('folio').annotate(
+                total=Sum(field)
+            ).values('total')[:1],
+            output_field=amount
+        ),
+        Value(0),
+        output_field=amount
+    )
+
+
+def _refresh_folio_totals(line):
+    """Reload the totals of a line's cached folio after a delta update."""
+    if type(line).folio.is_cached(line):
+        line.folio.refresh_from_db(fields=Folio.TOTAL_FIELDS + ('updated_at',))
 
 
 class ChargeCode(models.Model):
@@ -124,8 +216,32 @@ class FolioCharge(models.Model):
     
     def save(self, *args, **kwargs):
         self.amount = self.quantity * self.unit_price
-        super().save(*args, **kwargs)
-        self.folio.recalculate_totals()
+        with transaction.atomic():
+            previous = None
+            if self.pk:
+                previous = FolioCharge.objects.select_for_update().filter(pk=self.pk).values(
+                    'folio_id', 'amount', 'tax_amount'
+                ).first()
+            super().save(*args, **kwargs)
+            if previous:
+                Folio.apply_totals_delta(
+                    previous['folio_id'], charges=-previous['amount'], taxes=-previous['tax_amount']
+                )
+            Folio.apply_totals_delta(self.folio_id, charges=self.amount, taxes=self.tax_amount)
+        _refresh_folio_totals(self)
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            stored = FolioCharge.objects.select_for_update().filter(pk=self.pk).values(
+                'folio_id', 'amount', 'tax_amount'
+            ).first()
+            result = super().delete(*args, **kwargs)
+            if stored:
+                Folio.apply_totals_delta(
+                    stored['folio_id'], charges=-stored['amount'], taxes=-stored['tax_amount']
+                )
+        _refresh_folio_totals(self)
+        return result
 
 
 class Payment(models.Model):
@@ -175,8 +291,26 @@ class Payment(models.Model):
     def save(self, *args, **kwargs):
         if not self.payment_number:
             self.payment_number = f"PAY-{uuid.uuid4().hex[:8].upper()}"
-        super().save(*args, **kwargs)
-        self.folio.recalculate_totals()
+        with transaction.atomic():
+            previous = None
+            if self.pk:
+                previous = Payment.objects.select_for_update().filter(pk=self.pk).values(
+                    'folio_id', 'amount'
+                ).first()
+            super().save(*args, **kwargs)
+            if previous:
+                Folio.apply_totals_delta(previous['folio_id'], payments=-previous['amount'])
+            Folio.apply_totals_delta(self.folio_id, payments=self.amount)
+        _refresh_folio_totals(self)
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            stored = Payment.objects.select_for_update().filter(pk=self.pk).values('folio_id', 'amount').first()
+            result = super().delete(*args, **kwargs)
+            if stored:
+                Folio.apply_totals_delta(stored['folio_id'], payments=-stored['amount'])
+        _refresh_folio_totals(self)
+        return result
 
 
 class Invoice(models.Model):
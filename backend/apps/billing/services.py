@@ -0,0 +1,260 @@
+"""
+Billing Document Service
+Renders folio and invoice PDFs and caches the ones that can no longer change
+"""
+
+import logging
+import os
+import zipfile
+from io import BytesIO
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from apps.billing.models import Folio, Invoice
+
+logger = logging.getLogger(__name__)
+
+
+class FolioDocumentService:
+    """
+    PDF documents for folios and invoices.
+
+    Documents of closed or settled folios are rendered once per folio
+    version (its updated_at) and kept in the default storage backend; any
+    later change to the folio or one of its lines, even one that leaves the
+    totals alone, changes the version, so a stale PDF is never served.
+    Open folios are always rendered fresh.
+    """
+
+    CACHE_DIR = 'documents/folios'
+    CACHEABLE_STATUSES = (Folio.Status.CLOSED, Folio.Status.SETTLED)
+
+    @staticmethod
+    def folio_queryset():
+        """Folios with everything a document needs"""
+        return Folio.objects.select_related(
+            'guest', 'reservation__hotel'
+        ).prefetch_related('charges', 'payments')
+
+    @classmethod
+    def is_cacheable(cls, folio: Folio, invoice: Invoice = None) -> bool:
+        """Closed folios and their issued invoices can be cached"""
+        if invoice is not None and invoice.status == Invoice.Status.DRAFT:
+            return False
+        return folio.status in cls.CACHEABLE_STATUSES
+
+    @staticmethod
+    def version(folio: Folio) -> str:
+        """Folio version stamp; changes whenever the folio or any of its lines change"""
+        return folio.updated_at.strftime('%Y%m%d%H%M%S%f')
+
+    @classmethod
+    def cache_name(cls, folio: Folio, invoice: Invoice = None) -> str:
+        document = f'invoice-{invoice.invoice_number}-{invoice.status}' if invoice else f'folio-{folio.folio_number}'
+        return f'{cls.CACHE_DIR}/{folio.pk}/{document}-{cls.version(folio)}.pdf'
+
+    @staticmethod
+    def filename(folio: Folio, invoice: Invoice = None) -> str:
+        """Download name of a document"""
+        return f'invoice_{invoice.invoice_number}.pdf' if invoice else f'folio_{folio.folio_number}.pdf'
+
+    @classmethod
+    def open_pdf(cls, folio: Folio, invoice: Invoice = None):
+        """
+        Open a folio's (or one of its invoices') PDF for reading
+
+        Raises:
+            ImportError: If reportlab is not installed
+
+        Returns:
+            File: Cached file for closed folios, in-memory file otherwise
+        """
+        if not cls.is_cacheable(folio, invoice):
+            return BytesIO(cls.render_pdf(folio, invoice))
+
+        name = cls.cache_name(folio, invoice)
+        if not default_storage.exists(name):
+            cls._store(name, cls.render_pdf(folio, invoice))
+        return default_storage.open(name, 'rb')
+
+    @classmethod
+    def prerender(cls, folio: Folio) -> int:
+        """
+        Cache the PDFs of a closed folio and its issued invoices
+
+        Returns:
+            int: Number of documents rendered
+        """
+        if not cls.is_cacheable(folio):
+            return 0
+        rendered = 0
+        for invoice in [None, *folio.invoices.exclude(status=Invoice.Status.DRAFT)]:
+            name = cls.cache_name(folio, invoice)
+            if not default_storage.exists(name):
+                cls._store(name, cls.render_pdf(folio, invoice))
+                rendered += 1
+        return rendered
+
+    @classmethod
+    def _store(cls, name: str, content: bytes):
+        """Save a rendered PDF and drop earlier versions of the same document"""
+        folder, filename = os.path.split(name)
+        prefix = filename.rsplit('-', 1)[0] + '-'
+        try:
+            _, files = default_storage.listdir(folder)
+        except (FileNotFoundError, NotImplementedError):
+            files = []
+        for stale in files:
+            if stale.startswith(prefix) and stale != filename:
+                default_storage.delete(f'{folder}/{stale}')
+        default_storage.save(name, ContentFile(content))
+
+    @staticmethod
+    def render_pdf(folio: Folio, invoice: Invoice = None) -> bytes:
+        """Render a folio (or invoice) PDF"""
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import letter
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.units import inch
+        from reportlab.lib.enums import TA_CENTER
+
+        buffer = BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=letter)
+        elements = []
+        styles = getSampleStyleSheet()
+
+        # Title
+        title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=24,
+            textColor=colors.HexColor('#1a1a1a'),
+            spaceAfter=30,
+            alignment=TA_CENTER
+        )
+        number = invoice.invoice_number if invoice else folio.folio_number
+        elements.append(Paragraph(f"Invoice - {number}", title_style))
+        elements.append(Spacer(1, 0.3*inch))
+
+        # Guest Info
+        guest = folio.guest
+        guest_data = [
+            ['Guest:', invoice.bill_to_name if invoice else f"{guest.first_name} {guest.last_name}"],
+            ['Email:', guest.email or 'N/A'],
+        ]
+        if folio.reservation:
+            guest_data += [
+                ['Check-in:', folio.reservation.check_in_date.strftime('%Y-%m-%d')],
+                ['Check-out:', folio.reservation.check_out_date.strftime('%Y-%m-%d')],
+            ]
+        if invoice:
+            guest_data.append(['Invoice date:', invoice.invoice_date.strftime('%Y-%m-%d')])
+        guest_table = Table(guest_data, colWidths=[1.5*inch, 4*inch])
+        guest_table.setStyle(TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ]))
+        elements.append(guest_table)
+        elements.append(Spacer(1, 0.3*inch))
+
+        # Charges Table
+        charge_data = [['Date', 'Description', 'Quantity', 'Amount']]
+        for charge in sorted(folio.charges.all(), key=lambda charge: (charge.charge_date, charge.pk)):
+            charge_data.append([
+                charge.charge_date.strftime('%Y-%m-%d'),
+                charge.description,
+                str(charge.quantity),
+                f"${charge.amount:.2f}"
+            ])
+
+        charge_table = Table(charge_data, colWidths=[1*inch, 3*inch, 1*inch, 1.5*inch])
+        charge_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('ALIGN', (2, 0), (-1, -1), 'RIGHT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ]))
+        elements.append(charge_table)
+        elements.append(Spacer(1, 0.2*inch))
+
+        # Totals
+        if invoice:
+            totals_data = [
+                ['Subtotal:', f"${invoice.subtotal:.2f}"],
+                ['Taxes:', f"${invoice.tax_amount:.2f}"],
+                ['Total:', f"${invoice.total:.2f}"],
+            ]
+        else:
+            totals_data = [
+                ['Subtotal:', f"${folio.total_charges:.2f}"],
+                ['Taxes:', f"${folio.total_taxes:.2f}"],
+                ['Total:', f"${folio.total_charges + folio.total_taxes:.2f}"],
+                ['Paid:', f"${folio.total_payments:.2f}"],
+                ['Balance:', f"${folio.balance:.2f}"]
+            ]
+        totals_table = Table(totals_data, colWidths=[4.5*inch, 1.5*inch])
+        totals_table.setStyle(TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('LINEABOVE', (0, -1), (-1, -1), 2, colors.black),
+            ('TOPPADDING', (0, -1), (-1, -1), 10),
+        ]))
+        elements.append(totals_table)
+
+        # Build PDF
+        doc.build(elements)
+        return buffer.getvalue()
+
+
+class _ZipStream:
+    """Write-only file object whose written bytes are drained by the response generator"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_folio_zip(folios, chunk_size=64 * 1024):
+    """
+    Yield a zip archive of folio PDFs as it is written
+
+    Only one document chunk is held in memory at a time; closed folios are
+    copied from the document cache.
+    """
+    stream = _ZipStream()
+    # PDFs are already compressed
+    with zipfile.ZipFile(stream, mode='w', compression=zipfile.ZIP_STORED) as archive:
+        for folio in folios:
+            with FolioDocumentService.open_pdf(folio) as source, \
+                    archive.open(FolioDocumentService.filename(folio), mode='w', force_zip64=True) as target:
+                while True:
+                    data = source.read(chunk_size)
+                    if not data:
+                        break
+                    target.write(data)
+                    yield stream.drain()
+            yield stream.drain()
+    yield stream.drain()
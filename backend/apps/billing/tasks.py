@@ -0,0 +1,21 @@
+"""
+Billing Background Tasks
+Pre-renders documents of closed folios
+"""
+
+from celery import shared_task
+from apps.billing.services import FolioDocumentService
+
+
+@shared_task
+def render_folio_documents_task(folio_id):
+    """
+    Cache the PDFs of a closed folio so later downloads are served from storage.
+    
+    Returns:
+        int: Number of documents rendered
+    """
+    folio = FolioDocumentService.folio_queryset().filter(pk=folio_id).first()
+    if folio is None:
+        return 0
+    return FolioDocumentService.prerender(folio)
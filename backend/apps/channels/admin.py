@@ -1,7 +1,8 @@
 from django.contrib import admin
 from .models import (
     Channel, PropertyChannel, RoomTypeMapping, RatePlanMapping,
-    AvailabilityUpdate, RateUpdate, ChannelReservation
+    AvailabilityUpdate, AvailabilityChange, RateUpdate, ChannelReservation,
+    WebhookInbox
 )
 
 
@@ -34,6 +35,12 @@ class AvailabilityUpdateAdmin(admin.ModelAdmin):
     list_filter = ('status', 'property_channel__channel')
 
 
+@admin.register(AvailabilityChange)
+class AvailabilityChangeAdmin(admin.ModelAdmin):
+    list_display = ('hotel', 'room_type', 'date', 'marked_at')
+    list_filter = ('hotel', 'room_type')
+
+
 @admin.register(RateUpdate)
 class RateUpdateAdmin(admin.ModelAdmin):
     list_display = ('property_channel', 'room_type', 'rate_plan', 'date', 'rate', 'status')
@@ -45,3 +52,11 @@ class ChannelReservationAdmin(admin.ModelAdmin):
     list_display = ('channel_booking_id', 'property_channel', 'guest_name', 'check_in_date', 'status', 'received_at')
     list_filter = ('status', 'property_channel__channel')
     search_fields = ('channel_booking_id', 'guest_name')
+
+
+@admin.register(WebhookInbox)
+class WebhookInboxAdmin(admin.ModelAdmin):
+    list_display = ('channel_booking_id', 'version', 'property_channel', 'status', 'attempts', 'received_at', 'processed_at')
+    list_filter = ('status', 'property_channel__channel')
+    search_fields = ('channel_booking_id',)
+    readonly_fields = ('payload', 'received_at', 'processed_at')
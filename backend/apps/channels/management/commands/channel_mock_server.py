@@ -0,0 +1,28 @@
+"""
+Django management command to run a local OTA endpoint for channel pushes.
+"""
+from django.core.management.base import BaseCommand
+from apps.channels.mock_server import MockChannelServer
+
+
+class Command(BaseCommand):
+    """Serve a mock channel API that accepts rate and availability pushes."""
+
+    help = 'Run a local mock OTA API (point Channel.api_url at it and set CHANNEL_API_ENABLED=True)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency', type=float, default=0.0, help='Seconds to wait before each response')
+
+    def handle(self, *args, **options):
+        """Handle the command."""
+        server = MockChannelServer(options['host'], options['port'], options['latency'])
+        self.stdout.write(self.style.SUCCESS(f'Mock channel API listening on {server.url}'))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f'Received {len(server.requests)} pushes')
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("properties", "0002_systemsetting"),
+        ("rooms", "0003_room_rooms_room_status_19affd_idx_and_more"),
+        ("channels", "0003_synclog"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AvailabilityChange",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="date")),
+                (
+                    "marked_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="marked at"
+                    ),
+                ),
+                (
+                    "hotel",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="availability_changes",
+                        to="properties.property",
+                    ),
+                ),
+                (
+                    "room_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="availability_changes",
+                        to="rooms.roomtype",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "availability change",
+                "verbose_name_plural": "availability changes",
+                "indexes": [
+                    models.Index(
+                        fields=["hotel", "marked_at"],
+                        name="channels_av_hotel_i_b2c5b3_idx",
+                    )
+                ],
+                "unique_together": {("room_type", "date")},
+            },
+        ),
+    ]
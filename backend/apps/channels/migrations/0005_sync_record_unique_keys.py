@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:57
+
+from django.db import migrations
+from django.db.models import Max
+
+
+def remove_duplicate_sync_records(apps, schema_editor):
+    """Keep only the newest record per sync key before the keys become unique."""
+    for model_name, key in [
+        ('AvailabilityUpdate', ['property_channel', 'room_type', 'date']),
+        ('RateUpdate', ['property_channel', 'room_type', 'rate_plan', 'date']),
+    ]:
+        model = apps.get_model('channels', model_name)
+        keep = model.objects.values(*key).annotate(newest=Max('id')).values_list('newest', flat=True)
+        model.objects.exclude(id__in=list(keep)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rooms", "0003_room_rooms_room_status_19affd_idx_and_more"),
+        ("rates", "0001_initial"),
+        ("channels", "0004_availabilitychange"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_sync_records, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name="availabilityupdate",
+            unique_together={("property_channel", "room_type", "date")},
+        ),
+        migrations.AlterUniqueTogether(
+            name="rateupdate",
+            unique_together={("property_channel", "room_type", "rate_plan", "date")},
+        ),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("channels", "0005_sync_record_unique_keys"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WebhookInbox",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "channel_booking_id",
+                    models.CharField(max_length=100, verbose_name="channel booking ID"),
+                ),
+                (
+                    "version",
+                    models.CharField(
+                        blank=True, max_length=100, verbose_name="version"
+                    ),
+                ),
+                ("payload", models.JSONField(default=dict, verbose_name="payload")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pending"),
+                            ("PROCESSED", "Processed"),
+                            ("FAILED", "Failed"),
+                        ],
+                        default="PENDING",
+                        max_length=20,
+                        verbose_name="status",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveIntegerField(default=0, verbose_name="attempts"),
+                ),
+                (
+                    "error_message",
+                    models.TextField(blank=True, verbose_name="error message"),
+                ),
+                ("received_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "processed_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="processed at"
+                    ),
+                ),
+                (
+                    "channel_reservation",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="webhooks",
+                        to="channels.channelreservation",
+                    ),
+                ),
+                (
+                    "property_channel",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="webhook_inbox",
+                        to="channels.propertychannel",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "webhook inbox entry",
+                "verbose_name_plural": "webhook inbox",
+                "ordering": ["id"],
+                "indexes": [
+                    models.Index(
+                        fields=["property_channel", "status", "id"],
+                        name="channels_we_propert_e36aaa_idx",
+                    )
+                ],
+                "unique_together": {
+                    ("property_channel", "channel_booking_id", "version")
+                },
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("channels", "0006_webhookinbox"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="synclog",
+            index=models.Index(
+                fields=["created_at", "id"], name="channels_sy_created_9d0d1c_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,86 @@
+"""
+Local OTA mock server
+Accepts channel pushes over HTTP so the channel transport can be exercised offline
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+
+
+class MockChannelHandler(BaseHTTPRequestHandler):
+    """Records each POST and answers with the server's scripted statuses"""
+
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length)
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+
+        with server.lock:
+            server.requests.append({
+                'path': self.path,
+                'payload': json.loads(body or b'{}'),
+                'client': self.client_address,
+                'authorization': self.headers.get('Authorization'),
+            })
+            status = server.responses.pop(0) if server.responses else 200
+
+        response = json.dumps({'success': status < 300}).encode()
+        self.send_response(status)
+        if status == 429:
+            self.send_header('Retry-After', '0')
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockChannelServer(ThreadingHTTPServer):
+    """
+    In-process OTA endpoint
+
+    Usage:
+        with MockChannelServer() as server:
+            channel.api_url = server.url
+            server.responses = [429, 200]  # next statuses to return
+            ...
+            server.requests  # what the channel received
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0):
+        super().__init__((host, port), MockChannelHandler)
+        self.latency = latency
+        self.requests = []
+        self.responses = []
+        self.lock = threading.Lock()
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
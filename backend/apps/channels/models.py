@@ -137,9 +137,30 @@ class AvailabilityUpdate(models.Model):
     class Meta:
         verbose_name = _('availability update')
         verbose_name_plural = _('availability updates')
+        unique_together = ['property_channel', 'room_type', 'date']
         ordering = ['-created_at']
 
 
+class AvailabilityChange(models.Model):
+    """Room type night whose availability changed since the last channel push."""
+    
+    hotel = models.ForeignKey('properties.Property', on_delete=models.CASCADE, related_name='availability_changes')
+    room_type = models.ForeignKey('rooms.RoomType', on_delete=models.CASCADE, related_name='availability_changes')
+    date = models.DateField(_('date'))
+    marked_at = models.DateTimeField(_('marked at'), default=timezone.now)
+    
+    class Meta:
+        verbose_name = _('availability change')
+        verbose_name_plural = _('availability changes')
+        unique_together = ['room_type', 'date']
+        indexes = [
+            models.Index(fields=['hotel', 'marked_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.room_type} - {self.date}"
+
+
 class RateUpdate(models.Model):
     """Rate update log."""
     
@@ -165,6 +186,7 @@ class RateUpdate(models.Model):
     class Meta:
         verbose_name = _('rate update')
         verbose_name_plural = _('rate updates')
+        unique_together = ['property_channel', 'room_type', 'rate_plan', 'date']
         ordering = ['-created_at']
 
 
@@ -210,6 +232,43 @@ class ChannelReservation(models.Model):
         return f"{self.property_channel.channel.name} - {self.channel_booking_id}"
 
 
+class WebhookInbox(models.Model):
+    """Raw OTA reservation webhook, stored on receipt and processed by a worker."""
+    
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', _('Pending')
+        PROCESSED = 'PROCESSED', _('Processed')
+        FAILED = 'FAILED', _('Failed')
+    
+    property_channel = models.ForeignKey(PropertyChannel, on_delete=models.CASCADE, related_name='webhook_inbox')
+    channel_booking_id = models.CharField(_('channel booking ID'), max_length=100)
+    version = models.CharField(_('version'), max_length=100, blank=True)
+    
+    payload = models.JSONField(_('payload'), default=dict)
+    
+    status = models.CharField(_('status'), max_length=20, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(_('attempts'), default=0)
+    error_message = models.TextField(_('error message'), blank=True)
+    channel_reservation = models.ForeignKey(
+        ChannelReservation, on_delete=models.SET_NULL, null=True, blank=True, related_name='webhooks'
+    )
+    
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(_('processed at'), null=True, blank=True)
+    
+    class Meta:
+        verbose_name = _('webhook inbox entry')
+        verbose_name_plural = _('webhook inbox')
+        unique_together = ['property_channel', 'channel_booking_id', 'version']
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['property_channel', 'status', 'id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.channel_booking_id} ({self.version or 'initial'}) - {self.status}"
+
+
 class SyncLog(models.Model):
     """Log of sync operations."""
     
@@ -236,6 +295,9 @@ class SyncLog(models.Model):
         verbose_name = _('sync log')
         verbose_name_plural = _('sync logs')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.channel.name} - {self.type} - {self.status}"
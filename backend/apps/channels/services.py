@@ -6,20 +6,26 @@ Handles rate sync, availability sync, and OTA reservation webhooks
 from typing import Dict, List, Any, Optional
 from decimal import Decimal
 from datetime import datetime, date, timedelta
+import hashlib
+import json
 import logging
-import requests
+import time
+from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
+from django.db.models import Count
 from django.utils import timezone
 
 from apps.channels.models import (
     Channel, PropertyChannel, RoomTypeMapping, RatePlanMapping,
-    AvailabilityUpdate, RateUpdate, ChannelReservation, SyncLog
+    AvailabilityUpdate, AvailabilityChange, RateUpdate, ChannelReservation, SyncLog, WebhookInbox
 )
-from apps.rates.models import RatePlan, RoomRate
-from apps.rooms.models import Room, RoomType
+from apps.rates.models import RatePlan
+from apps.rooms.models import Room
 from apps.reservations.models import Reservation, ReservationRoom
 from apps.guests.models import Guest
 from apps.properties.models import Property
+from apps.channels.transport import fan_out, get_transport
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +35,96 @@ class ChannelSyncError(Exception):
     pass
 
 
+class SyncRecordService:
+    """Bulk upserts of the per-cell RateUpdate / AvailabilityUpdate sync trail"""
+    
+    @staticmethod
+    def _upsert(model, records, unique_fields: List[str], update_fields: List[str]) -> int:
+        """Insert or update records in chunks, keyed by the model's unique fields"""
+        batch_size = settings.CHANNEL_SYNC_BATCH_SIZE
+        for i in range(0, len(records), batch_size):
+            model.objects.bulk_create(
+                records[i:i + batch_size],
+                update_conflicts=True,
+                unique_fields=unique_fields,
+                update_fields=update_fields
+            )
+        return len(records)
+    
+    @staticmethod
+    def upsert_availability(
+        property_channel: PropertyChannel,
+        room_type_id: int,
+        availability_data: List[Dict],
+        sent: bool
+    ) -> int:
+        """
+        Record pushed availability cells
+        
+        Args:
+            property_channel: Channel the cells were pushed to
+            room_type_id: Room type of the cells
+            availability_data: [{'date': date, 'available': int}, ...]
+            sent: Whether the channel accepted the push
+        """
+        status = AvailabilityUpdate.Status.SENT if sent else AvailabilityUpdate.Status.FAILED
+        now = timezone.now()
+        return SyncRecordService._upsert(
+            AvailabilityUpdate,
+            [
+                AvailabilityUpdate(
+                    property_channel=property_channel,
+                    room_type_id=room_type_id,
+                    date=item['date'],
+                    availability=item['available'],
+                    status=status,
+                    error_message='',
+                    sent_at=now
+                )
+                for item in availability_data
+            ],
+            unique_fields=['property_channel', 'room_type', 'date'],
+            update_fields=['availability', 'status', 'error_message', 'sent_at']
+        )
+    
+    @staticmethod
+    def upsert_rates(
+        property_channel: PropertyChannel,
+        room_type_id: int,
+        rates: List[Dict],
+        sent: bool
+    ) -> int:
+        """
+        Record pushed rate cells
+        
+        Args:
+            property_channel: Channel the rates were pushed to
+            room_type_id: Room type of the rates
+            rates: [{'rate_plan': RatePlan, 'date': date, 'rate': Decimal}, ...]
+            sent: Whether the channel accepted the push
+        """
+        status = RateUpdate.Status.SENT if sent else RateUpdate.Status.FAILED
+        now = timezone.now()
+        return SyncRecordService._upsert(
+            RateUpdate,
+            [
+                RateUpdate(
+                    property_channel=property_channel,
+                    room_type_id=room_type_id,
+                    rate_plan=item['rate_plan'],
+                    date=item['date'],
+                    rate=item['rate'],
+                    status=status,
+                    error_message='',
+                    sent_at=now
+                )
+                for item in rates
+            ],
+            unique_fields=['property_channel', 'room_type', 'rate_plan', 'date'],
+            update_fields=['rate', 'status', 'error_message', 'sent_at']
+        )
+
+
 class BaseChannelService:
     """Base service for channel integrations"""
     
@@ -40,16 +136,19 @@ class BaseChannelService:
         self.api_secret = self.channel.api_secret
         self.property_code = property_channel.property_code
         self.base_url = self._get_base_url()
+        self.transport = get_transport(self.channel, self.base_url, self._create_headers())
     
     def _get_base_url(self) -> str:
-        """Get API base URL based on channel type"""
+        """Get API base URL, from the channel or its known default"""
+        if self.channel.api_url:
+            return self.channel.api_url
         urls = {
             'booking.com': 'https://supply-xml.booking.com/hotels/ota',
             'expedia': 'https://services.expediapartnercentral.com/eqc/ar',
             'airbnb': 'https://api.airbnb.com/v2',
             'agoda': 'https://partnerapi.agoda.com/xml',
         }
-        return urls.get(self.channel.type, '')
+        return urls.get(self.channel.code.lower(), '')
     
     def _create_headers(self) -> Dict[str, str]:
         """Create API request headers"""
@@ -59,6 +158,16 @@ class BaseChannelService:
             'Accept': 'application/json',
         }
     
+    def _room_type_mappings(self, room_types: Optional[List[int]] = None) -> Dict[int, RoomTypeMapping]:
+        """Active room type mappings of this channel, keyed by room type ID"""
+        mappings = RoomTypeMapping.objects.filter(
+            property_channel=self.property_channel,
+            is_active=True
+        ).select_related('room_type')
+        if room_types:
+            mappings = mappings.filter(room_type_id__in=room_types)
+        return {mapping.room_type_id: mapping for mapping in mappings}
+    
     def _log_sync(
         self,
         sync_type: str,
@@ -71,10 +180,10 @@ class BaseChannelService:
         SyncLog.objects.create(
             channel=self.channel,
             type=sync_type,
-            status=status,
+            status=status.upper(),
             message=message,
             records_synced=records_synced,
-            error_details=error_details
+            error_details=error_details or ''
         )
 
 
@@ -89,61 +198,81 @@ class RateSyncService(BaseChannelService):
     ) -> Dict[str, Any]:
         """
         Sync rates for specified date range and room types
+        
+        Nightly two-adult rates (after yield rules, per-night percentage
+        discounts and the channel markup) are priced in one batch for every
+        mapped room type and rate plan. Fixed and minimum-stay discounts
+        apply to whole stays and are not pushed.
         """
+        from apps.rates.services import RateEngine
+        
         try:
-            # Get room types to sync
-            room_type_qs = RoomType.objects.filter(property=self.property)
-            if room_types:
-                room_type_qs = room_type_qs.filter(id__in=room_types)
+            mappings = self._room_type_mappings(room_types)
+            rate_mappings = {
+                mapping.rate_plan_id: mapping
+                for mapping in RatePlanMapping.objects.filter(
+                    property_channel=self.property_channel, is_active=True
+                ).select_related('rate_plan')
+            }
+            rate_plans = [mapping.rate_plan for mapping in rate_mappings.values()]
+            if not rate_plans and self.property_channel.rate_plan_id:
+                rate_plans = [self.property_channel.rate_plan]
+            
+            engine = RateEngine(
+                self.property.id, start_date, end_date + timedelta(days=1),
+                room_type_ids=list(mappings), rate_plans=rate_plans
+            )
+            markup = Decimal('1') + Decimal(str(self.property_channel.rate_markup)) / 100
             
-            total_synced = 0
             errors = []
+            pushes = []
             
-            for room_type in room_type_qs:
+            for room_type_id, mapping in mappings.items():
                 try:
-                    # Get channel mapping for this room type
-                    mapping = RoomTypeMapping.objects.filter(
-                        property_channel=self.property_channel,
-                        room_type=room_type
-                    ).first()
+                    rates = []
+                    for rate_plan in rate_plans:
+                        current_date = start_date
+                        while current_date <= end_date:
+                            rate, season, error = engine.resolve_night(
+                                room_type_id, rate_plan.id, current_date, adults=2
+                            )
+                            if not error:
+                                discount = engine.nightly_discount(rate, current_date)
+                                rates.append({
+                                    'rate_plan': rate_plan,
+                                    'date': current_date,
+                                    'rate': ((rate - discount) * markup).quantize(Decimal('0.01')),
+                                })
+                            current_date += timedelta(days=1)
                     
-                    if not mapping:
-                        logger.warning(f"No mapping found for {room_type.name} on {self.channel.name}")
-                        continue
-                    
-                    # Get rates for date range
-                    rates = RoomRate.objects.filter(
-                        room_type=room_type,
-                        date__gte=start_date,
-                        date__lte=end_date
-                    )
-                    
-                    # Build rate sync payload
-                    rate_data = self._build_rate_payload(mapping, rates)
-                    
-                    # Send to channel API
-                    response = self._push_rates(rate_data)
-                    
-                    # Record sync
-                    for rate in rates:
-                        RateUpdate.objects.update_or_create(
-                            property_channel=self.property_channel,
-                            room_type=room_type,
-                            date=rate.date,
-                            rate_plan=rate.rate_plan if hasattr(rate, 'rate_plan') else self.property_channel.rate_plan,
-                            defaults={
-                                'rate': rate.rate,
-                                'status': 'SENT' if response.get('success') else 'FAILED',
-                                'sent_at': timezone.now()
-                            }
-                        )
-                    
-                    total_synced += rates.count()
+                    if rates:
+                        # Build rate sync payload
+                        pushes.append((mapping, rates, self._build_rate_payload(mapping, rate_mappings, rates)))
                     
                 except Exception as e:
-                    error_msg = f"Error syncing {room_type.name}: {str(e)}"
+                    error_msg = f"Error syncing {mapping.room_type.name}: {str(e)}"
+                    errors.append(error_msg)
+                    logger.error(error_msg)
+            
+            # Send to channel API, room types in parallel
+            responses = fan_out([
+                lambda payload=payload: self._push_rates(payload) for _, _, payload in pushes
+            ])
+            
+            total_synced = 0
+            for (mapping, rates, _), response in zip(pushes, responses):
+                if isinstance(response, Exception):
+                    error_msg = f"Error syncing {mapping.room_type.name}: {str(response)}"
                     errors.append(error_msg)
                     logger.error(error_msg)
+                    continue
+                
+                sent = response.get('success')
+                SyncRecordService.upsert_rates(self.property_channel, mapping.room_type_id, rates, sent)
+                if sent:
+                    total_synced += len(rates)
+                else:
+                    errors.append(f"Channel rejected rates for {mapping.room_type.name}: {response.get('error', '')}")
             
             status = 'success' if not errors else 'partial'
             self._log_sync(
@@ -168,34 +297,90 @@ class RateSyncService(BaseChannelService):
     def _build_rate_payload(
         self,
         mapping: RoomTypeMapping,
-        rates: List[RoomRate]
+        rate_mappings: Dict[int, RatePlanMapping],
+        rates: List[Dict]
     ) -> Dict[str, Any]:
         """Build API payload for rate sync"""
         return {
             'property_code': self.property_code,
-            'room_type_code': mapping.channel_room_type_code,
+            'room_type_code': mapping.channel_room_code,
             'rates': [
                 {
-                    'date': rate.date.isoformat(),
-                    'rate': float(rate.rate),
-                    'extra_person_rate': float(rate.extra_person_rate) if rate.extra_person_rate else None,
+                    'rate_plan_code': (
+                        rate_mappings[item['rate_plan'].id].channel_rate_code
+                        if item['rate_plan'].id in rate_mappings else item['rate_plan'].code
+                    ),
+                    'date': item['date'].isoformat(),
+                    'rate': float(item['rate']),
                     'currency': 'USD',
                 }
-                for rate in rates
+                for item in rates
             ]
         }
     
     def _push_rates(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """Push rates to channel API"""
-        # This is a mock implementation
-        # Real implementation would use channel-specific API
-        logger.info(f"Pushing rates to {self.channel.name}: {payload}")
-        return {'success': True}
+        return self.transport.post('rates', payload)
 
 
 class AvailabilitySyncService(BaseChannelService):
     """Service for syncing availability to channel managers"""
     
+    @staticmethod
+    def compute_availability(
+        hotel_id: int,
+        room_type_ids: List[int],
+        start_date: date,
+        end_date: date
+    ) -> Dict[tuple, int]:
+        """
+        Sellable rooms per room type and night, from the inventory ledger
+        
+        Args:
+            hotel_id: Property ID
+            room_type_ids: Room types to compute
+            start_date: First night
+            end_date: Last night (inclusive)
+        
+        Returns:
+            dict: {(room_type_id, date): rooms available}
+        """
+        from apps.rooms.models import RoomBlock
+        from apps.reservations.models import RoomTypeInventory
+        
+        totals = dict(
+            Room.objects.filter(
+                hotel_id=hotel_id, room_type_id__in=room_type_ids, is_active=True
+            ).values('room_type_id').annotate(total=Count('id')).values_list('room_type_id', 'total')
+        )
+        taken = {
+            (room_type_id, night): rooms_sold
+            for room_type_id, night, rooms_sold in RoomTypeInventory.objects.filter(
+                room_type_id__in=room_type_ids, date__gte=start_date, date__lte=end_date
+            ).values_list('room_type_id', 'date', 'rooms_sold')
+        }
+        blocks = RoomBlock.objects.filter(
+            room__hotel_id=hotel_id,
+            room__room_type_id__in=room_type_ids,
+            room__is_active=True,
+            start_date__lte=end_date,
+            end_date__gte=start_date
+        ).values_list('room__room_type_id', 'start_date', 'end_date')
+        for room_type_id, block_start, block_end in blocks:
+            night = max(block_start, start_date)
+            while night <= min(block_end, end_date):
+                taken[(room_type_id, night)] = taken.get((room_type_id, night), 0) + 1
+                night += timedelta(days=1)
+        
+        availability = {}
+        for room_type_id in room_type_ids:
+            night = start_date
+            while night <= end_date:
+                key = (room_type_id, night)
+                availability[key] = max(totals.get(room_type_id, 0) - taken.get(key, 0), 0)
+                night += timedelta(days=1)
+        return availability
+    
     def sync_availability(
         self,
         start_date: date,
@@ -204,76 +389,14 @@ class AvailabilitySyncService(BaseChannelService):
     ) -> Dict[str, Any]:
         """
         Sync availability for specified date range and room types
+        
+        Pushes every night in the range; used for reconciliation. Day-to-day
+        changes go through AvailabilityChangeService.
         """
         try:
-            room_type_qs = RoomType.objects.filter(property=self.property)
-            if room_types:
-                room_type_qs = room_type_qs.filter(id__in=room_types)
-            
-            total_synced = 0
-            errors = []
-            
-            for room_type in room_type_qs:
-                try:
-                    mapping = RoomTypeMapping.objects.filter(
-                        property_channel=self.property_channel,
-                        room_type=room_type
-                    ).first()
-                    
-                    if not mapping:
-                        continue
-                    
-                    # Calculate availability for each date
-                    current_date = start_date
-                    availability_data = []
-                    
-                    while current_date <= end_date:
-                        # Count total rooms
-                        total_rooms = Room.objects.filter(
-                            room_type=room_type,
-                            status='available'
-                        ).count()
-                        
-                        # Count occupied/reserved rooms
-                        occupied = ReservationRoom.objects.filter(
-                            room__room_type=room_type,
-                            reservation__check_in_date__lte=current_date,
-                            reservation__check_out_date__gt=current_date,
-                            reservation__status__in=['CONFIRMED', 'CHECKED_IN']
-                        ).count()
-                        
-                        available = total_rooms - occupied
-                        
-                        availability_data.append({
-                            'date': current_date,
-                            'available': max(0, available),
-                            'total': total_rooms
-                        })
-                        
-                        # Create/update sync record
-                        AvailabilityUpdate.objects.update_or_create(
-                            property_channel=self.property_channel,
-                            room_type=room_type,
-                            date=current_date,
-                            defaults={
-                                'availability': available,
-                                'status': 'SENT',
-                                'sent_at': timezone.now()
-                            }
-                        )
-                        
-                        current_date += timedelta(days=1)
-                    
-                    # Push to channel
-                    payload = self._build_availability_payload(mapping, availability_data)
-                    response = self._push_availability(payload)
-                    
-                    total_synced += len(availability_data)
-                    
-                except Exception as e:
-                    error_msg = f"Error syncing availability for {room_type.name}: {str(e)}"
-                    errors.append(error_msg)
-                    logger.error(error_msg)
+            mappings = self._room_type_mappings(room_types)
+            availability = self.compute_availability(self.property.id, list(mappings), start_date, end_date)
+            total_synced, errors = self.push_availability(availability, mappings)
             
             status = 'success' if not errors else 'partial'
             self._log_sync(
@@ -295,6 +418,109 @@ class AvailabilitySyncService(BaseChannelService):
             self._log_sync('availability', 'failed', error_msg, error_details=str(e))
             raise ChannelSyncError(error_msg)
     
+    def sync_changes(self, availability: Dict[tuple, int]) -> Dict[str, Any]:
+        """
+        Push changed cells whose value differs from what the channel last received
+        
+        Args:
+            availability: {(room_type_id, date): rooms available}
+        """
+        pushes = self.plan_changes(availability)
+        responses = fan_out([lambda push=push: self._push_availability(push[2]) for push in pushes])
+        return self.record_changes(pushes, responses)
+    
+    def plan_changes(self, availability: Dict[tuple, int]) -> List[tuple]:
+        """
+        Build the pushes for cells the channel does not have yet
+        
+        Returns:
+            list: [(mapping, availability_data, payload), ...]
+        """
+        mappings = self._room_type_mappings(list({room_type_id for room_type_id, _ in availability}))
+        last_sent = {}
+        for room_type_id, night, value in AvailabilityUpdate.objects.filter(
+            property_channel=self.property_channel,
+            room_type_id__in=list(mappings),
+            date__in={night for _, night in availability},
+            status=AvailabilityUpdate.Status.SENT
+        ).order_by('created_at').values_list('room_type_id', 'date', 'availability'):
+            last_sent[(room_type_id, night)] = value
+        
+        changed = {
+            key: value for key, value in availability.items()
+            if key[0] in mappings and last_sent.get(key) != value
+        }
+        return self.plan_push(changed, mappings)
+    
+    def record_changes(self, pushes: List[tuple], responses: List[Any]) -> Dict[str, Any]:
+        """Record the outcome of planned change pushes and log the run"""
+        total_synced, errors = self.record_push(pushes, responses)
+        if total_synced or errors:
+            self._log_sync(
+                'availability',
+                'success' if not errors else 'partial',
+                f'Pushed {total_synced} changed availability records',
+                records_synced=total_synced,
+                error_details='\n'.join(errors) if errors else None
+            )
+        return {'success': not errors, 'total_synced': total_synced, 'errors': errors}
+    
+    def push_availability(self, availability: Dict[tuple, int], mappings: Dict[int, RoomTypeMapping]):
+        """
+        Push cells to the channel, one payload per mapped room type, in parallel
+        
+        Returns:
+            tuple: (cells pushed, error messages)
+        """
+        pushes = self.plan_push(availability, mappings)
+        responses = fan_out([lambda push=push: self._push_availability(push[2]) for push in pushes])
+        return self.record_push(pushes, responses)
+    
+    def plan_push(self, availability: Dict[tuple, int], mappings: Dict[int, RoomTypeMapping]) -> List[tuple]:
+        """
+        Group cells into one payload per mapped room type
+        
+        Returns:
+            list: [(mapping, availability_data, payload), ...]
+        """
+        by_room_type = {}
+        for (room_type_id, night), available in sorted(availability.items()):
+            by_room_type.setdefault(room_type_id, []).append({'date': night, 'available': available})
+        
+        return [
+            (mappings[room_type_id], availability_data,
+             self._build_availability_payload(mappings[room_type_id], availability_data))
+            for room_type_id, availability_data in by_room_type.items()
+        ]
+    
+    def record_push(self, pushes: List[tuple], responses: List[Any]):
+        """
+        Record the channel's response to each push
+        
+        Returns:
+            tuple: (cells pushed, error messages)
+        """
+        total_synced = 0
+        errors = []
+        for (mapping, availability_data, _), response in zip(pushes, responses):
+            if isinstance(response, Exception):
+                error_msg = f"Error syncing availability for {mapping.room_type.name}: {str(response)}"
+                errors.append(error_msg)
+                logger.error(error_msg)
+                continue
+            
+            sent = response.get('success')
+            SyncRecordService.upsert_availability(
+                self.property_channel, mapping.room_type_id, availability_data, sent
+            )
+            if sent:
+                total_synced += len(availability_data)
+            else:
+                errors.append(
+                    f"Channel rejected availability for {mapping.room_type.name}: {response.get('error', '')}"
+                )
+        return total_synced, errors
+    
     def _build_availability_payload(
         self,
         mapping: RoomTypeMapping,
@@ -303,7 +529,7 @@ class AvailabilitySyncService(BaseChannelService):
         """Build API payload for availability sync"""
         return {
             'property_code': self.property_code,
-            'room_type_code': mapping.channel_room_type_code,
+            'room_type_code': mapping.channel_room_code,
             'availability': [
                 {
                     'date': item['date'].isoformat(),
@@ -315,101 +541,324 @@ class AvailabilitySyncService(BaseChannelService):
     
     def _push_availability(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """Push availability to channel API"""
-        logger.info(f"Pushing availability to {self.channel.name}")
-        return {'success': True}
+        return self.transport.post('availability', payload)
+
+
+class AvailabilityChangeService:
+    """Tracks changed (room type, night) cells and pushes them in coalesced batches"""
+    
+    @staticmethod
+    def _schedule_key(hotel_id: int) -> str:
+        return f'channel_availability_push:{hotel_id}'
+    
+    @staticmethod
+    def mark(hotel_id: int, room_type_id: int, start_date: date, end_date: date):
+        """
+        Record that availability changed for nights in [start_date, end_date)
+        
+        Only properties with an availability-synced channel are tracked. A
+        push is scheduled once per debounce window, after the transaction
+        commits.
+        """
+        if end_date <= start_date:
+            return
+        if not PropertyChannel.objects.filter(
+            property_id=hotel_id, is_active=True, sync_availability=True
+        ).exists():
+            return
+        
+        now = timezone.now()
+        AvailabilityChange.objects.bulk_create(
+            [
+                AvailabilityChange(
+                    hotel_id=hotel_id,
+                    room_type_id=room_type_id,
+                    date=start_date + timedelta(days=i),
+                    marked_at=now
+                )
+                for i in range((end_date - start_date).days)
+            ],
+            update_conflicts=True,
+            unique_fields=['room_type', 'date'],
+            update_fields=['marked_at']
+        )
+        
+        transaction.on_commit(lambda: AvailabilityChangeService._schedule(hotel_id))
+    
+    @staticmethod
+    def _schedule(hotel_id: int):
+        debounce = settings.CHANNEL_SYNC_DEBOUNCE_SECONDS
+        if cache.add(AvailabilityChangeService._schedule_key(hotel_id), True, timeout=debounce):
+            from apps.channels.tasks import push_availability_changes_task
+            push_availability_changes_task.apply_async(args=[hotel_id], countdown=debounce)
+    
+    @staticmethod
+    def push_changes(hotel_id: int) -> Dict[str, Any]:
+        """
+        Push all pending changes of a property to its channels
+        
+        Cells marked again while the push runs, and cells whose push failed
+        or was rejected, stay pending and another run is scheduled.
+        """
+        cache.delete(AvailabilityChangeService._schedule_key(hotel_id))
+        claimed_at = timezone.now()
+        changes = list(
+            AvailabilityChange.objects.filter(hotel_id=hotel_id, marked_at__lte=claimed_at)
+            .values_list('id', 'room_type_id', 'date')
+        )
+        if not changes:
+            return {'success': True, 'cells': 0, 'total_synced': 0, 'errors': []}
+        
+        cells = {(room_type_id, night) for _, room_type_id, night in changes}
+        availability = AvailabilitySyncService.compute_availability(
+            hotel_id,
+            list({room_type_id for room_type_id, _ in cells}),
+            min(night for _, night in cells),
+            max(night for _, night in cells)
+        )
+        availability = {key: availability[key] for key in cells}
+        
+        # Plan every channel's pushes, then send them all in one parallel batch
+        planned = []
+        for property_channel in PropertyChannel.objects.filter(
+            property_id=hotel_id, is_active=True, sync_availability=True
+        ).select_related('channel', 'property'):
+            service = AvailabilitySyncService(property_channel)
+            planned.append((service, service.plan_changes(availability)))
+        
+        responses = fan_out([
+            lambda service=service, push=push: service._push_availability(push[2])
+            for service, pushes in planned for push in pushes
+        ])
+        
+        total_synced = 0
+        errors = []
+        failed = set()
+        offset = 0
+        for service, pushes in planned:
+            sent = responses[offset:offset + len(pushes)]
+            result = service.record_changes(pushes, sent)
+            offset += len(pushes)
+            total_synced += result['total_synced']
+            errors.extend(result['errors'])
+            for (mapping, availability_data, _), response in zip(pushes, sent):
+                if isinstance(response, Exception) or not response.get('success'):
+                    failed.update((mapping.room_type_id, item['date']) for item in availability_data)
+        
+        AvailabilityChange.objects.filter(
+            id__in=[
+                change_id for change_id, room_type_id, night in changes
+                if (room_type_id, night) not in failed
+            ],
+            marked_at__lte=claimed_at
+        ).delete()
+        if failed:
+            transaction.on_commit(lambda: AvailabilityChangeService._schedule(hotel_id))
+        
+        return {'success': not errors, 'cells': len(cells), 'total_synced': total_synced, 'errors': errors}
 
 
 class ReservationWebhookService(BaseChannelService):
     """Service for processing OTA reservation webhooks"""
     
+    def __init__(self, property_channel: PropertyChannel):
+        super().__init__(property_channel)
+        # Loaded once and reused across a batch of webhooks
+        self._room_mappings = None
+    
+    @staticmethod
+    def booking_key(webhook_data: Dict[str, Any]) -> tuple:
+        """
+        Get the (channel booking ID, version) a webhook payload refers to
+        
+        Channels that send no version or modified_at get a hash of the
+        reservation payload instead, so an amendment or cancellation is a
+        new version while a replay of the same payload is not.
+        """
+        reservation_data = webhook_data.get('reservation') or {}
+        booking_id = str(reservation_data.get('id') or '')
+        version = str(reservation_data.get('version') or reservation_data.get('modified_at') or '')
+        if not version:
+            canonical = json.dumps(reservation_data, sort_keys=True, default=str)
+            version = 'sha256:' + hashlib.sha256(canonical.encode()).hexdigest()
+        return booking_id, version
+    
     @transaction.atomic
     def process_reservation(self, webhook_data: Dict[str, Any]) -> Reservation:
         """
         Process incoming reservation from OTA
         """
         try:
-            # Extract reservation details
-            guest_data = webhook_data.get('guest', {})
-            reservation_data = webhook_data.get('reservation', {})
-            
-            # Find or create guest
-            guest = self._find_or_create_guest(guest_data)
-            
-            # Find room type from channel mapping
-            channel_room_code = reservation_data.get('room_type_code')
-            mapping = RoomTypeMapping.objects.filter(
-                property_channel=self.property_channel,
-                channel_room_code=channel_room_code
-            ).first()
-            
-            if not mapping:
-                raise ChannelSyncError(f"No mapping found for room code: {channel_room_code}")
-            
-            # Create reservation
-            reservation = Reservation.objects.create(
-                property=self.property,
-                guest=guest,
-                channel_confirmation_code=reservation_data.get('confirmation_code'),
-                check_in_date=datetime.fromisoformat(reservation_data['check_in']).date(),
-                check_out_date=datetime.fromisoformat(reservation_data['check_out']).date(),
-                adults=reservation_data.get('adults', 1),
-                children=reservation_data.get('children', 0),
-                status='CONFIRMED',
-                total_amount=Decimal(reservation_data.get('total_amount', 0)),
-                special_requests=reservation_data.get('special_requests', ''),
-            )
-            
-            # Assign room if available
-            available_room = Room.objects.filter(
-                room_type=mapping.room_type,
-                status='available'
-            ).first()
-            
-            if available_room:
-                ReservationRoom.objects.create(
-                    reservation=reservation,
-                    room=available_room,
-                    rate_per_night=Decimal(reservation_data.get('rate_per_night', 0)),
-                    total_rate=Decimal(reservation_data.get('total_amount', 0)),
-                    guest_name=guest.get_full_name()
-                )
-            
-            # Record sync - create ChannelReservation record
-            ChannelReservation.objects.create(
-                property_channel=self.property_channel,
-                reservation=reservation,
-                channel_booking_id=reservation_data.get('id'),
-                guest_name=guest.get_full_name(),
-                check_in_date=reservation.check_in_date,
-                check_out_date=reservation.check_out_date,
-                room_type_code=channel_room_code,
-                rate_amount=Decimal(reservation_data.get('rate_per_night', 0)),
-                total_amount=reservation.total_amount,
-                status='PROCESSED',
-                processed_at=timezone.now(),
-                raw_data=reservation_data
-            )
+            channel_reservation = self.apply(webhook_data)
             
             self._log_sync(
                 'reservations',
                 'success',
-                f'Created reservation from {self.channel.name}: {reservation.confirmation_code}',
+                f'Processed reservation from {self.channel.name}: {channel_reservation.channel_booking_id}',
                 records_synced=1
             )
             
-            return reservation
+            return channel_reservation.reservation
             
         except Exception as e:
             error_msg = f"Failed to process reservation webhook: {str(e)}"
             self._log_sync('reservations', 'failed', error_msg, error_details=str(e))
             raise ChannelSyncError(error_msg)
     
+    def apply(self, webhook_data: Dict[str, Any]) -> ChannelReservation:
+        """
+        Create, modify or cancel the reservation a webhook refers to
+        
+        A booking ID already received from this channel updates its existing
+        reservation, so replayed or amended webhooks never duplicate it.
+        
+        Returns:
+            ChannelReservation: The channel's record of the booking
+        """
+        guest_data = webhook_data.get('guest') or {}
+        reservation_data = webhook_data.get('reservation') or {}
+        booking_id, version = self.booking_key(webhook_data)
+        if not booking_id:
+            raise ChannelSyncError("Webhook has no reservation id")
+        
+        check_in_date = datetime.fromisoformat(reservation_data['check_in']).date()
+        check_out_date = datetime.fromisoformat(reservation_data['check_out']).date()
+        total_amount = Decimal(str(reservation_data.get('total_amount', 0)))
+        rate_per_night = Decimal(str(reservation_data.get('rate_per_night', 0)))
+        cancelled = str(reservation_data.get('status', '')).lower() == 'cancelled'
+        
+        channel_reservation = ChannelReservation.objects.select_related('reservation').filter(
+            property_channel=self.property_channel,
+            channel_booking_id=booking_id
+        ).first()
+        
+        if channel_reservation and channel_reservation.reservation:
+            reservation = channel_reservation.reservation
+            if cancelled:
+                reservation.status = Reservation.Status.CANCELLED
+                channel_reservation.status = ChannelReservation.Status.CANCELLED
+            else:
+                reservation.check_in_date = check_in_date
+                reservation.check_out_date = check_out_date
+                reservation.adults = reservation_data.get('adults', reservation.adults)
+                reservation.children = reservation_data.get('children', reservation.children)
+                reservation.total_amount = total_amount
+                reservation.special_requests = reservation_data.get('special_requests', reservation.special_requests)
+                channel_reservation.status = ChannelReservation.Status.PROCESSED
+            reservation.save()
+            
+            channel_room_code = reservation_data.get('room_type_code')
+            if not cancelled and channel_room_code and channel_room_code != channel_reservation.room_type_code:
+                self._change_room_type(reservation, channel_room_code)
+                channel_reservation.room_type_code = channel_room_code
+            
+            channel_reservation.check_in_date = check_in_date
+            channel_reservation.check_out_date = check_out_date
+            channel_reservation.rate_amount = rate_per_night
+            channel_reservation.total_amount = total_amount
+            channel_reservation.raw_data = reservation_data
+            channel_reservation.processed_at = timezone.now()
+            channel_reservation.save()
+            return channel_reservation
+        
+        if cancelled:
+            raise ChannelSyncError(f"Cancellation for unknown booking: {booking_id}")
+        
+        # Find room type from channel mapping
+        channel_room_code = reservation_data.get('room_type_code')
+        mapping = self._mapping_for(channel_room_code)
+        if not mapping:
+            raise ChannelSyncError(f"No mapping found for room code: {channel_room_code}")
+        
+        guest = self._find_or_create_guest(guest_data)
+        
+        # Create reservation
+        reservation = Reservation.objects.create(
+            hotel=self.property,
+            guest=guest,
+            external_id=booking_id,
+            source=Reservation.Source.OTA,
+            channel=self.channel,
+            rate_plan=self.property_channel.rate_plan,
+            check_in_date=check_in_date,
+            check_out_date=check_out_date,
+            adults=reservation_data.get('adults', 1),
+            children=reservation_data.get('children', 0),
+            status=Reservation.Status.CONFIRMED,
+            total_amount=total_amount,
+            special_requests=reservation_data.get('special_requests', ''),
+        )
+        
+        # Assign room if available
+        from apps.reservations.services import AvailabilityService
+        available_room = AvailabilityService.get_available_rooms(
+            self.property.id, mapping.room_type_id, check_in_date, check_out_date
+        ).first()
+        
+        ReservationRoom.objects.create(
+            reservation=reservation,
+            room_type=mapping.room_type,
+            room=available_room,
+            rate_per_night=rate_per_night,
+            total_rate=total_amount,
+            adults=reservation.adults,
+            children=reservation.children,
+            guest_name=guest.full_name
+        )
+        
+        # Record sync - create ChannelReservation record
+        values = {
+            'reservation': reservation,
+            'guest_name': guest.full_name,
+            'check_in_date': check_in_date,
+            'check_out_date': check_out_date,
+            'room_type_code': channel_room_code,
+            'rate_amount': rate_per_night,
+            'total_amount': total_amount,
+            'status': ChannelReservation.Status.PROCESSED,
+            'processed_at': timezone.now(),
+            'raw_data': reservation_data,
+        }
+        channel_reservation, _ = ChannelReservation.objects.update_or_create(
+            property_channel=self.property_channel,
+            channel_booking_id=booking_id,
+            defaults=values
+        )
+        return channel_reservation
+    
+    def _change_room_type(self, reservation: Reservation, channel_room_code: str):
+        """Move a modified booking's room lines to the newly mapped room type"""
+        mapping = self._mapping_for(channel_room_code)
+        if not mapping:
+            raise ChannelSyncError(f"No mapping found for room code: {channel_room_code}")
+        
+        from apps.reservations.services import AvailabilityService
+        for line in reservation.rooms.select_related('room'):
+            if line.room_type_id == mapping.room_type_id:
+                continue
+            line.room_type = mapping.room_type
+            line.room = AvailabilityService.get_available_rooms(
+                self.property.id, mapping.room_type_id, reservation.check_in_date, reservation.check_out_date
+            ).first()
+            # Saved one by one so the inventory ledger moves the room nights
+            line.save()
+    
+    def _mapping_for(self, channel_room_code: str) -> Optional[RoomTypeMapping]:
+        """Look up a room type mapping by its channel code"""
+        if self._room_mappings is None:
+            self._room_mappings = {
+                mapping.channel_room_code: mapping
+                for mapping in self._room_type_mappings().values()
+            }
+        return self._room_mappings.get(channel_room_code)
+    
     def _find_or_create_guest(self, guest_data: Dict[str, Any]) -> Guest:
         """Find existing guest or create new one"""
         email = guest_data.get('email')
         
         if email:
-            guest = Guest.objects.filter(email=email).first()
+            # Normalized match, so 'John@Example.com ' finds john@example.com
+            guest = Guest.objects.filter(search_index__email=email.strip().lower()).order_by('pk').first()
             if guest:
                 return guest
         
@@ -417,7 +866,7 @@ class ReservationWebhookService(BaseChannelService):
         return Guest.objects.create(
             first_name=guest_data.get('first_name', ''),
             last_name=guest_data.get('last_name', ''),
-            email=email,
+            email=email or '',
             phone=guest_data.get('phone', ''),
             country=guest_data.get('country', ''),
             address=guest_data.get('address', ''),
@@ -426,6 +875,109 @@ class ReservationWebhookService(BaseChannelService):
         )
 
 
+class WebhookInboxService:
+    """Durable inbox for OTA reservation webhooks"""
+    
+    @staticmethod
+    def accept(property_channel_id: int, payload: Dict[str, Any]) -> tuple:
+        """
+        Store a webhook payload for background processing
+        
+        Replays of the same (booking ID, version) are acknowledged without
+        being stored or processed again.
+        
+        Returns:
+            tuple: (WebhookInbox entry, created)
+        """
+        booking_id, version = ReservationWebhookService.booking_key(payload)
+        if not booking_id:
+            raise ChannelSyncError("Webhook has no reservation id")
+        
+        entry, created = WebhookInbox.objects.get_or_create(
+            property_channel_id=property_channel_id,
+            channel_booking_id=booking_id,
+            version=version,
+            defaults={'payload': payload}
+        )
+        if created:
+            from apps.channels.tasks import process_webhook_inbox_task
+            transaction.on_commit(lambda: process_webhook_inbox_task.delay(property_channel_id))
+        return entry, created
+    
+    @staticmethod
+    def process_pending(property_channel_id: int) -> Dict[str, Any]:
+        """
+        Process a channel's pending webhooks in arrival order, in batches
+        
+        Only one worker drains a channel at a time. An entry that fails is
+        retried on a later run (up to WEBHOOK_INBOX_MAX_ATTEMPTS) and blocks
+        the entries behind it, so a channel's webhooks never apply out of order.
+        
+        Returns:
+            dict: Throughput metrics for the run
+        """
+        lock_key = f'webhook_inbox_lock:{property_channel_id}'
+        if not cache.add(lock_key, True, timeout=settings.WEBHOOK_INBOX_LOCK_SECONDS):
+            return {'skipped': True}
+        
+        started = time.monotonic()
+        metrics = {'processed': 0, 'failed': 0, 'deferred': 0, 'lag_seconds': None}
+        try:
+            property_channel = PropertyChannel.objects.select_related('channel', 'property').get(
+                pk=property_channel_id
+            )
+            service = ReservationWebhookService(property_channel)
+            
+            while not metrics['deferred']:
+                batch = list(WebhookInbox.objects.filter(
+                    property_channel_id=property_channel_id,
+                    status=WebhookInbox.Status.PENDING
+                ).order_by('id')[:settings.WEBHOOK_INBOX_BATCH_SIZE])
+                if not batch:
+                    break
+                if metrics['lag_seconds'] is None:
+                    metrics['lag_seconds'] = (timezone.now() - batch[0].received_at).total_seconds()
+                
+                for entry in batch:
+                    entry.attempts += 1
+                    try:
+                        with transaction.atomic():
+                            entry.channel_reservation = service.apply(entry.payload)
+                            entry.status = WebhookInbox.Status.PROCESSED
+                            entry.error_message = ''
+                            entry.processed_at = timezone.now()
+                            entry.save()
+                        metrics['processed'] += 1
+                    except Exception as e:
+                        entry.error_message = str(e)
+                        if entry.attempts >= settings.WEBHOOK_INBOX_MAX_ATTEMPTS:
+                            entry.status = WebhookInbox.Status.FAILED
+                            metrics['failed'] += 1
+                        entry.save(update_fields=['attempts', 'status', 'error_message'])
+                        logger.error(f"Webhook {entry.channel_booking_id} failed: {str(e)}")
+                        if entry.status == WebhookInbox.Status.PENDING:
+                            metrics['deferred'] += 1
+                            break
+        finally:
+            cache.delete(lock_key)
+        
+        metrics['duration_seconds'] = round(time.monotonic() - started, 3)
+        handled = metrics['processed'] + metrics['failed']
+        metrics['per_second'] = round(handled / metrics['duration_seconds'], 1) if metrics['duration_seconds'] else None
+        
+        if handled or metrics['deferred']:
+            service._log_sync(
+                'reservations',
+                'success' if not (metrics['failed'] or metrics['deferred']) else 'partial',
+                f"Processed {metrics['processed']} webhooks in {metrics['duration_seconds']}s "
+                f"({metrics['per_second']}/s, lag {metrics['lag_seconds']:.0f}s), "
+                f"{metrics['failed']} failed, {metrics['deferred']} deferred",
+                records_synced=metrics['processed']
+            )
+        logger.info(f"Webhook inbox {property_channel_id}: {metrics}")
+        return metrics
+
+
 def sync_channel_rates(property_channel_id: int, start_date: date, end_date: date) -> Dict[str, Any]:
     """Convenience function to sync rates for a channel"""
     property_channel = PropertyChannel.objects.get(id=property_channel_id)
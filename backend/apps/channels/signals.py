@@ -0,0 +1,30 @@
+from datetime import timedelta
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from apps.rooms.models import RoomBlock
+from .services import AvailabilityChangeService
+
+
+@receiver(pre_save, sender=RoomBlock)
+def remember_block_range(sender, instance, **kwargs):
+    """Stash the stored room and dates so a moved block also frees its old nights."""
+    instance._channel_previous = (
+        sender.objects.filter(pk=instance.pk).values(
+            'room__hotel_id', 'room__room_type_id', 'start_date', 'end_date'
+        ).first() if instance.pk else None
+    )
+
+
+@receiver([post_save, post_delete], sender=RoomBlock)
+def mark_block_availability(sender, instance, **kwargs):
+    """A room block changes availability on every night it covers (end date included)."""
+    ranges = {(instance.room.hotel_id, instance.room.room_type_id, instance.start_date, instance.end_date)}
+    previous = getattr(instance, '_channel_previous', None)
+    if previous:
+        ranges.add((
+            previous['room__hotel_id'], previous['room__room_type_id'],
+            previous['start_date'], previous['end_date']
+        ))
+    
+    for hotel_id, room_type_id, start_date, end_date in ranges:
+        AvailabilityChangeService.mark(hotel_id, room_type_id, start_date, end_date + timedelta(days=1))
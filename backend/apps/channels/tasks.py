@@ -0,0 +1,126 @@
+"""
+Channel Manager Background Tasks
+Pushes rates and availability to OTAs outside the request cycle
+"""
+
+from datetime import date, timedelta
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+from apps.channels.models import PropertyChannel, WebhookInbox
+from apps.channels.services import (
+    AvailabilityChangeService, ChannelSyncError, WebhookInboxService,
+    sync_channel_rates, sync_channel_availability
+)
+
+
+@shared_task(
+    autoretry_for=(ChannelSyncError,),
+    retry_backoff=True,
+    retry_backoff_max=600,
+    max_retries=5
+)
+def sync_channel_rates_task(property_channel_id, start_date, end_date):
+    """
+    Sync rates for a property channel.
+    
+    Args:
+        property_channel_id: PropertyChannel ID
+        start_date: First date as YYYY-MM-DD
+        end_date: Last date as YYYY-MM-DD
+    
+    Returns:
+        dict: Sync result from RateSyncService
+    """
+    return sync_channel_rates(
+        property_channel_id, date.fromisoformat(start_date), date.fromisoformat(end_date)
+    )
+
+
+@shared_task(
+    autoretry_for=(ChannelSyncError,),
+    retry_backoff=True,
+    retry_backoff_max=600,
+    max_retries=5
+)
+def sync_channel_availability_task(property_channel_id, start_date, end_date):
+    """
+    Sync availability for a property channel.
+    
+    Args:
+        property_channel_id: PropertyChannel ID
+        start_date: First date as YYYY-MM-DD
+        end_date: Last date as YYYY-MM-DD
+    
+    Returns:
+        dict: Sync result from AvailabilitySyncService
+    """
+    return sync_channel_availability(
+        property_channel_id, date.fromisoformat(start_date), date.fromisoformat(end_date)
+    )
+
+
+@shared_task
+def push_availability_changes_task(hotel_id):
+    """
+    Push the coalesced availability changes of a property to its channels.
+    
+    Cells whose push failed stay pending and are retried by the next run.
+    
+    Returns:
+        dict: Cells processed, cells pushed and errors
+    """
+    return AvailabilityChangeService.push_changes(hotel_id)
+
+
+@shared_task
+def reconcile_channel_availability_task():
+    """
+    Push the full availability horizon to every availability-synced channel.
+    
+    Runs nightly (see CELERY_BEAT_SCHEDULE) to correct any drift missed by
+    the change-driven pushes.
+    
+    Returns:
+        int: Number of channels reconciled
+    """
+    start_date = timezone.now().date()
+    end_date = start_date + timedelta(days=settings.CHANNEL_SYNC_DAYS - 1)
+    channel_ids = PropertyChannel.objects.filter(
+        is_active=True, sync_availability=True
+    ).values_list('id', flat=True)
+    for property_channel_id in channel_ids:
+        sync_channel_availability_task.delay(
+            property_channel_id, start_date.isoformat(), end_date.isoformat()
+        )
+    return len(channel_ids)
+
+
+@shared_task
+def process_webhook_inbox_task(property_channel_id):
+    """
+    Drain the pending reservation webhooks of a property channel.
+    
+    Returns:
+        dict: Throughput metrics (see WebhookInboxService.process_pending)
+    """
+    return WebhookInboxService.process_pending(property_channel_id)
+
+
+@shared_task
+def sweep_webhook_inbox_task():
+    """
+    Queue a drain for every channel with pending webhooks.
+    
+    Picks up entries deferred after a failure and any whose drain was
+    skipped while another worker held the channel.
+    
+    Returns:
+        int: Number of channels queued
+    """
+    channel_ids = list(WebhookInbox.objects.filter(
+        status=WebhookInbox.Status.PENDING
+    ).values_list('property_channel_id', flat=True).distinct())
+    for property_channel_id in channel_ids:
+        process_webhook_inbox_task.delay(property_channel_id)
+    return len(channel_ids)
@@ -0,0 +1,190 @@
+"""
+Channel HTTP Transport
+Pooled, rate-limited connections to OTA APIs and concurrent push fan-out
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, List, Optional
+import logging
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class RateLimiter:
+    """Thread-safe token bucket allowing `rate` requests per second"""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(int(rate), 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class ChannelTransport:
+    """
+    Keep-alive HTTP session for one channel
+
+    Requests are throttled to the channel's quota, at most
+    CHANNEL_HTTP_MAX_PER_CHANNEL are in flight at once, and throttled or
+    failed requests are retried with exponential backoff (honouring
+    Retry-After). When CHANNEL_API_ENABLED is off, or the channel has no
+    API URL, pushes are only logged.
+    """
+
+    def __init__(self, channel, base_url: str, headers: Dict[str, str]):
+        self.channel_name = channel.name
+        self.base_url = base_url.rstrip('/')
+        self.enabled = settings.CHANNEL_API_ENABLED and bool(self.base_url)
+        self.timeout = settings.CHANNEL_HTTP_TIMEOUT
+        self.max_retries = settings.CHANNEL_HTTP_MAX_RETRIES
+        self.backoff = settings.CHANNEL_HTTP_BACKOFF_SECONDS
+
+        max_in_flight = settings.CHANNEL_HTTP_MAX_PER_CHANNEL
+        self.in_flight = threading.BoundedSemaphore(max_in_flight)
+        self.limiter = RateLimiter(
+            settings.CHANNEL_RATE_LIMITS.get(channel.code.upper(), settings.CHANNEL_DEFAULT_RATE_LIMIT)
+        )
+
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_in_flight)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        POST a JSON payload to an endpoint of the channel API
+
+        Args:
+            path: Endpoint path relative to the channel's base URL
+            payload: JSON body
+
+        Returns:
+            dict: {'success': bool, 'status_code': int, 'error': str}
+        """
+        if not self.enabled:
+            logger.info(f"Pushing {path} to {self.channel_name}")
+            return {'success': True}
+
+        url = f'{self.base_url}/{path.lstrip("/")}'
+        error = ''
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(delay)
+            delay = self.backoff * (2 ** attempt)
+
+            self.limiter.acquire()
+            try:
+                with self.in_flight:
+                    response = self.session.post(url, json=payload, timeout=self.timeout)
+            except requests.RequestException as e:
+                error = str(e)
+                logger.warning(f"{self.channel_name} {path} attempt {attempt + 1} failed: {error}")
+                continue
+
+            if response.status_code < 300:
+                return {'success': True, 'status_code': response.status_code}
+
+            error = f'{response.status_code}: {response.text[:500]}'
+            if response.status_code not in RETRY_STATUSES:
+                break
+            delay = max(delay, self._retry_after(response))
+            logger.warning(f"{self.channel_name} {path} attempt {attempt + 1} throttled: {error}")
+
+        logger.error(f"{self.channel_name} {path} push failed: {error}")
+        return {'success': False, 'error': error}
+
+    @staticmethod
+    def _retry_after(response) -> float:
+        """Seconds the server asked us to wait, from a Retry-After header"""
+        value = response.headers.get('Retry-After')
+        if not value:
+            return 0
+        try:
+            return max(float(value), 0)
+        except ValueError:
+            pass
+        try:
+            return max((parsedate_to_datetime(value) - timezone.now()).total_seconds(), 0)
+        except (TypeError, ValueError):
+            return 0
+
+    def close(self):
+        self.session.close()
+
+
+_transports: Dict[tuple, ChannelTransport] = {}
+_transports_lock = threading.Lock()
+
+
+def get_transport(channel, base_url: str, headers: Dict[str, str]) -> ChannelTransport:
+    """
+    Get the process-wide transport of a channel
+
+    Sessions are reused across syncs so connections stay open between
+    pushes; a changed URL or API key opens a new one.
+    """
+    key = (channel.pk, base_url, headers.get('Authorization'))
+    with _transports_lock:
+        transport = _transports.get(key)
+        if transport is None:
+            for stale in [k for k in _transports if k[0] == channel.pk]:
+                _transports.pop(stale).close()
+            transport = _transports[key] = ChannelTransport(channel, base_url, headers)
+        return transport
+
+
+def reset_transports():
+    """Close every pooled channel session"""
+    with _transports_lock:
+        for transport in _transports.values():
+            transport.close()
+        _transports.clear()
+
+
+def fan_out(calls: List[Callable[[], Any]]) -> List[Any]:
+    """
+    Run push calls concurrently, up to CHANNEL_HTTP_CONCURRENCY at a time
+
+    Calls must not touch the database. An exception raised by a call is
+    returned in its place.
+
+    Returns:
+        list: Results in the order of `calls`
+    """
+    def run(call):
+        try:
+            return call()
+        except Exception as e:
+            return e
+
+    workers = min(settings.CHANNEL_HTTP_CONCURRENCY, len(calls))
+    if workers <= 1:
+        return [run(call) for call in calls]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='channel-push') as executor:
+        return list(executor.map(run, calls))
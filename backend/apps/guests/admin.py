@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Guest, GuestPreference, GuestDocument, Company, LoyaltyProgram, LoyaltyTier, LoyaltyTransaction
+from .models import Guest, GuestPreference, GuestDocument, GuestMerge, Company, LoyaltyProgram, LoyaltyTier, LoyaltyTransaction
 
 
 class GuestPreferenceInline(admin.TabularInline):
@@ -73,3 +73,11 @@ class LoyaltyTransactionAdmin(admin.ModelAdmin):
     list_filter = ('transaction_type', 'created_at')
     search_fields = ('guest__first_name', 'guest__last_name', 'description')
     readonly_fields = ('guest', 'transaction_type', 'points', 'description', 'reference', 'balance_after', 'created_at')
+
+
+@admin.register(GuestMerge)
+class GuestMergeAdmin(admin.ModelAdmin):
+    list_display = ('survivor', 'merged_guest_id', 'merged_name', 'merged_email', 'score', 'created_at')
+    list_filter = ('created_at',)
+    search_fields = ('merged_name', 'merged_email', 'survivor__first_name', 'survivor__last_name')
+    readonly_fields = ('survivor', 'merged_guest_id', 'merged_name', 'merged_email', 'score', 'reasons', 'created_at')
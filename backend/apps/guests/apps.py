@@ -5,3 +5,6 @@ class GuestsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.guests'
     verbose_name = 'Guest Management'
+
+    def ready(self):
+        import apps.guests.signals  # noqa
@@ -0,0 +1,51 @@
+"""
+Django management command to merge duplicate guest profiles.
+"""
+from django.core.management.base import BaseCommand
+from apps.guests.models import GuestSearchIndex
+from apps.guests.services import GuestDeduplicationService
+
+
+class Command(BaseCommand):
+    """Find and merge duplicate guests among those not yet checked."""
+
+    help = 'Merge duplicate guest profiles (only guests created or edited since the last run, unless --full)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Guests checked per blocking query'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='List the matches without merging'
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Re-check every guest, not only new ones'
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command."""
+        if options['full'] and not options['dry_run']:
+            GuestSearchIndex.objects.update(resolved_at=None)
+
+        result = GuestDeduplicationService.run(
+            batch_size=max(options['batch_size'], 1),
+            dry_run=options['dry_run'] or False,
+        )
+
+        if options['dry_run']:
+            for guest_id, duplicate_id, score, reasons in result['matches']:
+                self.stdout.write(f'  guest {guest_id} <- {duplicate_id}  score {score}  ({", ".join(reasons)})')
+            self.stdout.write(self.style.WARNING(
+                f'[DRY RUN] {len(result["matches"])} matches among {result["checked"]} guests'
+            ))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {result["checked"]} guests, merged {result["merged"]} duplicates'
+        ))
@@ -0,0 +1,24 @@
+"""
+Django management command to rebuild guest lifetime aggregates.
+"""
+from django.core.management.base import BaseCommand
+from apps.guests.services import GuestAggregateService
+
+
+class Command(BaseCommand):
+    """Recompute every guest's stays, nights, revenue and loyalty totals."""
+
+    help = 'Rebuild guest lifetime aggregates from reservations, folios and loyalty transactions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Guests written per bulk update'
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command."""
+        updated = GuestAggregateService.rebuild(batch_size=max(options['batch_size'], 1))
+        self.stdout.write(self.style.SUCCESS(f'Updated {updated} guests'))
@@ -0,0 +1,24 @@
+"""
+Django management command to rebuild the guest search index.
+"""
+from django.core.management.base import BaseCommand
+from apps.guests.services import GuestSearchService
+
+
+class Command(BaseCommand):
+    """Recompute every guest's normalized search keys."""
+
+    help = 'Rebuild the guest search index (after bulk imports or raw SQL updates)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Guests indexed per bulk upsert'
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command."""
+        indexed = GuestSearchService.rebuild(batch_size=max(options['batch_size'], 1))
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} guests'))
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("guests", "0004_alter_guestdocument_options"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="guest",
+            index=models.Index(
+                fields=["created_at", "id"], name="guests_gues_created_42fa11_idx"
+            ),
+        ),
+    ]
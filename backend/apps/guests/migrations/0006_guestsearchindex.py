@@ -0,0 +1,147 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:36
+
+import re
+import unicodedata
+from django.db import migrations, models
+from django.db.utils import OperationalError
+import django.db.models.deletion
+
+
+FTS_TABLE = 'guests_guestsearchindex_fts'
+# Values are stored padded with blanks so word edges form trigrams, as in pg_trgm
+SQLITE_FTS = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(name, email_local, phone_digits, tokenize='trigram')",
+    f"""CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON guests_guestsearchindex BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, email_local, phone_digits)
+        VALUES (new.guest_id, ' ' || replace(new.name, ' ', '  ') || ' ', ' ' || new.email_local || ' ', new.phone_digits);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON guests_guestsearchindex BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.guest_id;
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE ON guests_guestsearchindex BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.guest_id;
+        INSERT INTO {FTS_TABLE}(rowid, name, email_local, phone_digits)
+        VALUES (new.guest_id, ' ' || replace(new.name, ' ', '  ') || ' ', ' ' || new.email_local || ' ', new.phone_digits);
+    END""",
+]
+POSTGRESQL_TRIGRAM = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX guest_search_name_trgm ON guests_guestsearchindex USING gin (name gin_trgm_ops)',
+    'CREATE INDEX guest_search_email_trgm ON guests_guestsearchindex USING gin (email_local gin_trgm_ops)',
+    'CREATE INDEX guest_search_phone_trgm ON guests_guestsearchindex USING gin (phone_digits gin_trgm_ops)',
+]
+
+
+def create_search_backend(apps, schema_editor):
+    """Trigram GIN indexes on PostgreSQL, an FTS5 trigram table on SQLite."""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        for statement in POSTGRESQL_TRIGRAM:
+            schema_editor.execute(statement)
+    elif vendor == 'sqlite':
+        try:
+            schema_editor.execute(SQLITE_FTS[0])
+        except OperationalError:
+            return  # SQLite built without FTS5 trigram support; search falls back to LIKE
+        for statement in SQLITE_FTS[1:]:
+            schema_editor.execute(statement)
+
+
+def drop_search_backend(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        for name in ('name', 'email', 'phone'):
+            schema_editor.execute(f'DROP INDEX IF EXISTS guest_search_{name}_trgm')
+    elif vendor == 'sqlite':
+        for suffix in ('insert', 'delete', 'update'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+# Normalization as of this migration, frozen so later changes to
+# apps.guests.services do not alter what this migration writes
+def normalize_name(*parts):
+    text = unicodedata.normalize('NFKD', ' '.join(part for part in parts if part))
+    text = ''.join(char for char in text if not unicodedata.combining(char)).lower()
+    return ' '.join(re.findall(r'[a-z0-9]+', text))
+
+
+def normalize_phone(*numbers):
+    return ' '.join(digits for digits in (re.sub(r'\D', '', number or '') for number in numbers) if digits)
+
+
+def search_keys(first_name, middle_name, last_name, email, phone, mobile):
+    return {
+        'name': normalize_name(first_name, middle_name, last_name),
+        'email_local': (email or '').split('@', 1)[0].strip().lower(),
+        'phone_digits': normalize_phone(phone, mobile),
+    }
+
+
+def index_existing_guests(apps, schema_editor):
+    Guest = apps.get_model('guests', 'Guest')
+    GuestSearchIndex = apps.get_model('guests', 'GuestSearchIndex')
+    fields = ('first_name', 'middle_name', 'last_name', 'email', 'phone', 'mobile')
+    batch = []
+    for values in Guest.objects.order_by().values_list('id', *fields).iterator(chunk_size=2000):
+        batch.append(GuestSearchIndex(guest_id=values[0], **search_keys(*values[1:])))
+        if len(batch) >= 2000:
+            GuestSearchIndex.objects.bulk_create(batch)
+            batch = []
+    GuestSearchIndex.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("guests", "0005_guest_created_id"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GuestSearchIndex",
+            fields=[
+                (
+                    "guest",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="search_index",
+                        serialize=False,
+                        to="guests.guest",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(blank=True, max_length=400, verbose_name="name"),
+                ),
+                (
+                    "email_local",
+                    models.CharField(
+                        blank=True, max_length=254, verbose_name="email local part"
+                    ),
+                ),
+                (
+                    "phone_digits",
+                    models.CharField(
+                        blank=True, max_length=50, verbose_name="phone digits"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "guest search index",
+                "verbose_name_plural": "guest search index",
+                "indexes": [
+                    models.Index(fields=["name"], name="guests_gues_name_f67be5_idx"),
+                    models.Index(
+                        fields=["email_local"], name="guests_gues_email_l_af403d_idx"
+                    ),
+                    models.Index(
+                        fields=["phone_digits"], name="guests_gues_phone_d_a4ae09_idx"
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(create_search_backend, drop_search_backend),
+        migrations.RunPython(index_existing_guests, migrations.RunPython.noop),
+    ]
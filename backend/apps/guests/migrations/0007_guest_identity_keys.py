@@ -0,0 +1,173 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:40
+
+import re
+from importlib import import_module
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def restore_search_triggers(apps, schema_editor):
+    """SQLite rebuilds the table to add columns, which drops the FTS triggers."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    search = import_module('apps.guests.migrations.0006_guestsearchindex')
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = %s", [search.FTS_TABLE])
+        if cursor.fetchone() is None:
+            return
+    for suffix in ('insert', 'delete', 'update'):
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {search.FTS_TABLE}_{suffix}')
+    for statement in search.SQLITE_FTS[1:]:
+        schema_editor.execute(statement)
+
+
+# Normalization as of this migration, frozen so later changes to
+# apps.guests.services do not alter what this migration writes
+def normalize_document(number):
+    return re.sub(r'[^0-9A-Za-z]', '', number or '').upper()
+
+
+def identity_keys(email, phone, passport_number, id_number):
+    phone_digits = re.sub(r'\D', '', phone or '')
+    return {
+        'email': (email or '').strip().lower(),
+        'phone_key': phone_digits[-10:] if len(phone_digits) >= 7 else '',
+        'passport': normalize_document(passport_number),
+        'id_number': normalize_document(id_number),
+    }
+
+
+def index_identity_keys(apps, schema_editor):
+    Guest = apps.get_model('guests', 'Guest')
+    GuestSearchIndex = apps.get_model('guests', 'GuestSearchIndex')
+    fields = ('email', 'phone', 'passport_number', 'id_number')
+    batch = []
+    for values in Guest.objects.order_by().values_list('id', *fields).iterator(chunk_size=2000):
+        batch.append(GuestSearchIndex(guest_id=values[0], **identity_keys(*values[1:])))
+        if len(batch) >= 2000:
+            GuestSearchIndex.objects.bulk_update(batch, ['email', 'phone_key', 'passport', 'id_number'])
+            batch = []
+    GuestSearchIndex.objects.bulk_update(batch, ['email', 'phone_key', 'passport', 'id_number'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("guests", "0006_guestsearchindex"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GuestMerge",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "merged_guest_id",
+                    models.PositiveBigIntegerField(verbose_name="merged guest ID"),
+                ),
+                (
+                    "merged_name",
+                    models.CharField(max_length=200, verbose_name="merged name"),
+                ),
+                (
+                    "merged_email",
+                    models.EmailField(
+                        blank=True, max_length=254, verbose_name="merged email"
+                    ),
+                ),
+                (
+                    "score",
+                    models.DecimalField(
+                        decimal_places=2, max_digits=4, verbose_name="match score"
+                    ),
+                ),
+                ("reasons", models.JSONField(default=list, verbose_name="matched on")),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="created at"),
+                ),
+            ],
+            options={
+                "verbose_name": "guest merge",
+                "verbose_name_plural": "guest merges",
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.AddField(
+            model_name="guestsearchindex",
+            name="email",
+            field=models.CharField(blank=True, max_length=254, verbose_name="email"),
+        ),
+        migrations.AddField(
+            model_name="guestsearchindex",
+            name="id_number",
+            field=models.CharField(
+                blank=True, max_length=100, verbose_name="ID number"
+            ),
+        ),
+        migrations.AddField(
+            model_name="guestsearchindex",
+            name="passport",
+            field=models.CharField(blank=True, max_length=50, verbose_name="passport"),
+        ),
+        migrations.AddField(
+            model_name="guestsearchindex",
+            name="phone_key",
+            field=models.CharField(blank=True, max_length=20, verbose_name="phone key"),
+        ),
+        migrations.AddField(
+            model_name="guestsearchindex",
+            name="resolved_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="duplicates checked at"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="guestsearchindex",
+            index=models.Index(fields=["email"], name="guests_gues_email_001c9d_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="guestsearchindex",
+            index=models.Index(
+                fields=["phone_key"], name="guests_gues_phone_k_84ef05_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="guestsearchindex",
+            index=models.Index(
+                fields=["passport"], name="guests_gues_passpor_1e26ee_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="guestsearchindex",
+            index=models.Index(
+                fields=["id_number"], name="guests_gues_id_numb_d78415_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="guestsearchindex",
+            index=models.Index(
+                fields=["resolved_at", "guest"], name="guests_gues_resolve_766880_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="guestmerge",
+            name="survivor",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="merges",
+                to="guests.guest",
+            ),
+        ),
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+        migrations.RunPython(index_identity_keys, migrations.RunPython.noop),
+    ]
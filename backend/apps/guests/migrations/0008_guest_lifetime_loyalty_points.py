@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("guests", "0007_guest_identity_keys"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="guest",
+            name="loyalty_points_earned",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="loyalty points earned"
+            ),
+        ),
+        migrations.AddField(
+            model_name="guest",
+            name="loyalty_points_redeemed",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="loyalty points redeemed"
+            ),
+        ),
+    ]
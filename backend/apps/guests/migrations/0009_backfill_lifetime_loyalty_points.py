@@ -0,0 +1,68 @@
+from django.db import migrations
+from django.db.models import Q, Sum
+from django.db.models.functions import Abs
+
+FIELDS = (
+    'total_stays', 'total_nights', 'last_stay_date', 'total_revenue',
+    'loyalty_points_earned', 'loyalty_points_redeemed',
+)
+
+
+def backfill_guest_aggregates(apps, schema_editor):
+    """Lifetime stays, revenue and loyalty points from the existing history."""
+    Guest = apps.get_model('guests', 'Guest')
+    LoyaltyTransaction = apps.get_model('guests', 'LoyaltyTransaction')
+    Reservation = apps.get_model('reservations', 'Reservation')
+    Folio = apps.get_model('billing', 'Folio')
+    totals = {}
+
+    def row(guest_id):
+        return totals.setdefault(guest_id, {
+            'total_stays': 0, 'total_nights': 0, 'last_stay_date': None, 'total_revenue': 0,
+            'loyalty_points_earned': 0, 'loyalty_points_redeemed': 0,
+        })
+
+    stays = Reservation.objects.filter(status='CHECKED_OUT', guest__isnull=False).values_list(
+        'guest_id', 'check_in_date', 'check_out_date'
+    )
+    for guest_id, check_in, check_out in stays.iterator(chunk_size=2000):
+        values = row(guest_id)
+        values['total_stays'] += 1
+        values['total_nights'] += max((check_out - check_in).days, 0)
+        if values['last_stay_date'] is None or values['last_stay_date'] < check_out:
+            values['last_stay_date'] = check_out
+
+    revenue = Folio.objects.filter(status__in=['CLOSED', 'SETTLED']).order_by().values('guest_id').annotate(
+        total=Sum('total_charges')
+    )
+    for folio in revenue:
+        row(folio['guest_id'])['total_revenue'] = folio['total'] or 0
+
+    points = LoyaltyTransaction.objects.order_by().values('guest_id').annotate(
+        earned=Sum(Abs('points'), filter=Q(transaction_type='EARN')),
+        redeemed=Sum(Abs('points'), filter=Q(transaction_type='REDEEM')),
+    )
+    for loyalty in points:
+        values = row(loyalty['guest_id'])
+        values['loyalty_points_earned'] = loyalty['earned'] or 0
+        values['loyalty_points_redeemed'] = loyalty['redeemed'] or 0
+
+    guest_ids = sorted(totals)
+    for start in range(0, len(guest_ids), 2000):
+        Guest.objects.bulk_update(
+            [Guest(pk=guest_id, **totals[guest_id]) for guest_id in guest_ids[start:start + 2000]],
+            FIELDS
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("guests", "0008_guest_lifetime_loyalty_points"),
+        ("reservations", "0004_reservation_created_id"),
+        ("billing", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_guest_aggregates, migrations.RunPython.noop),
+    ]
@@ -85,6 +85,8 @@ class Guest(models.Model):
     total_nights = models.PositiveIntegerField(_('total nights'), default=0)
     total_revenue = models.DecimalField(_('total revenue'), max_digits=12, decimal_places=2, default=0)
     last_stay_date = models.DateField(_('last stay date'), null=True, blank=True)
+    loyalty_points_earned = models.PositiveIntegerField(_('loyalty points earned'), default=0)
+    loyalty_points_redeemed = models.PositiveIntegerField(_('loyalty points redeemed'), default=0)
     
     # Notes
     notes = models.TextField(_('notes'), blank=True)
@@ -101,6 +103,7 @@ class Guest(models.Model):
             models.Index(fields=['email']),
             models.Index(fields=['phone']),
             models.Index(fields=['last_name', 'first_name']),
+            models.Index(fields=['created_at', 'id']),
         ]
     
     def __str__(self):
@@ -112,6 +115,69 @@ class Guest(models.Model):
         return ' '.join(p for p in parts if p)
 
 
+class GuestSearchIndex(models.Model):
+    """Normalized search keys of a guest, kept current by signals."""
+    
+    guest = models.OneToOneField(
+        Guest,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_index'
+    )
+    name = models.CharField(_('name'), max_length=400, blank=True)  # lowercased, accents removed
+    email_local = models.CharField(_('email local part'), max_length=254, blank=True)
+    phone_digits = models.CharField(_('phone digits'), max_length=50, blank=True)  # phone and mobile
+    
+    # Identity keys for duplicate detection
+    email = models.CharField(_('email'), max_length=254, blank=True)
+    phone_key = models.CharField(_('phone key'), max_length=20, blank=True)  # last digits of the phone
+    passport = models.CharField(_('passport'), max_length=50, blank=True)
+    id_number = models.CharField(_('ID number'), max_length=100, blank=True)
+    resolved_at = models.DateTimeField(_('duplicates checked at'), null=True, blank=True)
+    
+    class Meta:
+        verbose_name = _('guest search index')
+        verbose_name_plural = _('guest search index')
+        indexes = [
+            models.Index(fields=['name']),
+            models.Index(fields=['email_local']),
+            models.Index(fields=['phone_digits']),
+            models.Index(fields=['email']),
+            models.Index(fields=['phone_key']),
+            models.Index(fields=['passport']),
+            models.Index(fields=['id_number']),
+            models.Index(fields=['resolved_at', 'guest']),
+        ]
+    
+    def __str__(self):
+        return self.name
+
+
+class GuestMerge(models.Model):
+    """Record of a duplicate guest merged into another."""
+    
+    survivor = models.ForeignKey(
+        Guest,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='merges'
+    )
+    merged_guest_id = models.PositiveBigIntegerField(_('merged guest ID'))
+    merged_name = models.CharField(_('merged name'), max_length=200)
+    merged_email = models.EmailField(_('merged email'), blank=True)
+    score = models.DecimalField(_('match score'), max_digits=4, decimal_places=2)
+    reasons = models.JSONField(_('matched on'), default=list)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('guest merge')
+        verbose_name_plural = _('guest merges')
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.merged_name} (#{self.merged_guest_id}) -> #{self.survivor_id}"
+
+
 class GuestPreference(models.Model):
     """Guest preferences."""
     
@@ -0,0 +1,720 @@
+"""
+Guest Services
+Indexed, ranked guest search, duplicate guest resolution and lifetime aggregates
+"""
+
+import re
+import unicodedata
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, List
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import BigIntegerField, Case, F, Q, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from apps.billing.models import Folio
+from apps.guests.models import Guest, GuestMerge, GuestSearchIndex, LoyaltyTransaction
+from apps.reservations.models import Reservation
+
+
+SEARCH_FTS_TABLE = 'guests_guestsearchindex_fts'
+
+
+def normalize_name(*parts) -> str:
+    """Lowercase words without accents or punctuation: 'José-Luis' -> 'jose luis'"""
+    text = unicodedata.normalize('NFKD', ' '.join(part for part in parts if part))
+    text = ''.join(char for char in text if not unicodedata.combining(char)).lower()
+    return ' '.join(re.findall(r'[a-z0-9]+', text))
+
+
+def normalize_email(email: str) -> str:
+    """Local part of an address, lowercased"""
+    return (email or '').split('@', 1)[0].strip().lower()
+
+
+def normalize_phone(*numbers) -> str:
+    """Digits of each number, space separated"""
+    return ' '.join(digits for digits in (re.sub(r'\D', '', number or '') for number in numbers) if digits)
+
+
+def search_keys(first_name, middle_name, last_name, email, phone, mobile) -> Dict[str, str]:
+    """GuestSearchIndex field values for a guest's raw fields"""
+    return {
+        'name': normalize_name(first_name, middle_name, last_name),
+        'email_local': normalize_email(email),
+        'phone_digits': normalize_phone(phone, mobile),
+    }
+
+
+def normalize_document(number: str) -> str:
+    """Passport/ID number without separators: 'ab 123-456' -> 'AB123456'"""
+    return re.sub(r'[^0-9A-Za-z]', '', number or '').upper()
+
+
+def identity_keys(email, phone, passport_number, id_number) -> Dict[str, str]:
+    """GuestSearchIndex duplicate-detection keys for a guest's raw fields"""
+    phone_digits = normalize_phone(phone).replace(' ', '')
+    return {
+        'email': (email or '').strip().lower(),
+        # Last ten digits, so '+1 555 010 2030' and '5550102030' agree
+        'phone_key': phone_digits[-10:] if len(phone_digits) >= 7 else '',
+        'passport': normalize_document(passport_number),
+        'id_number': normalize_document(id_number),
+    }
+
+
+def index_keys(first_name, middle_name, last_name, email, phone, mobile, passport_number, id_number) -> Dict[str, str]:
+    """All GuestSearchIndex keys for a guest's raw fields"""
+    return {
+        **search_keys(first_name, middle_name, last_name, email, phone, mobile),
+        **identity_keys(email, phone, passport_number, id_number),
+    }
+
+
+class GuestSearchService:
+    """
+    Ranked, typo-tolerant guest search over GuestSearchIndex.
+
+    Guests are matched on normalized keys (accent-free lowercase name,
+    email local part, phone digits) through an index, so lookups stay flat
+    as the guest table grows:
+
+    - PostgreSQL: pg_trgm GIN indexes; names and emails match by trigram
+      word similarity, phone numbers by indexed substring.
+    - SQLite: an FTS5 trigram table; candidates sharing trigrams with the
+      query are re-ranked in Python by trigram similarity.
+    - Other backends: prefix/substring filters on the normalized keys.
+
+    Results are ordered by similarity, best first; a phone number match
+    ranks like an exact name match.
+    """
+
+    SOURCE_FIELDS = (
+        'first_name', 'middle_name', 'last_name', 'email', 'phone', 'mobile', 'passport_number', 'id_number'
+    )
+    KEY_FIELDS = (
+        'name', 'email_local', 'phone_digits', 'email', 'phone_key', 'passport', 'id_number'
+    )
+    MIN_QUERY_LENGTH = 2
+
+    # ===== Indexing =====
+
+    @classmethod
+    def index(cls, guest: Guest):
+        """
+        Store a guest's keys, queueing it for the next duplicate check only
+        when they are new or changed
+        """
+        keys = index_keys(*(getattr(guest, field) for field in cls.SOURCE_FIELDS))
+        stored = GuestSearchIndex.objects.filter(guest_id=guest.pk).values(*cls.KEY_FIELDS).first()
+        if stored is None:
+            GuestSearchIndex.objects.create(guest_id=guest.pk, **keys)
+        elif stored != keys:
+            GuestSearchIndex.objects.filter(guest_id=guest.pk).update(resolved_at=None, **keys)
+
+    @classmethod
+    def rebuild(cls, batch_size: int = 2000) -> int:
+        """
+        Rebuild the whole index in batches
+
+        Returns:
+            int: Number of guests indexed
+        """
+        indexed = 0
+        batch = []
+        for values in Guest.objects.order_by().values_list('id', *cls.SOURCE_FIELDS).iterator(chunk_size=batch_size):
+            batch.append(GuestSearchIndex(guest_id=values[0], **index_keys(*values[1:])))
+            if len(batch) >= batch_size:
+                indexed += cls._upsert(batch)
+                batch = []
+        if batch:
+            indexed += cls._upsert(batch)
+        return indexed
+
+    @classmethod
+    def _upsert(cls, rows) -> int:
+        GuestSearchIndex.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['guest'],
+            update_fields=list(cls.KEY_FIELDS),
+        )
+        return len(rows)
+
+    # ===== Ranking =====
+
+    @staticmethod
+    def trigrams(word: str) -> set:
+        """pg_trgm-style trigrams of one word (padded with two leading blanks and one trailing)"""
+        padded = f'  {word} '
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    @classmethod
+    def similarity(cls, query: str, text: str) -> float:
+        """
+        How well the query's words match words of the text, from 0 to 1
+
+        Each query word scores against its best text word as the mean of
+        trigram containment (rewards prefixes while typing) and Jaccard
+        overlap (penalizes long unrelated words); the result is the mean
+        over query words.
+        """
+        query_words, text_words = query.split(), text.split()
+        if not query_words or not text_words:
+            return 0.0
+        text_trigrams = [cls.trigrams(word) for word in text_words]
+        total = 0.0
+        for word in query_words:
+            grams = cls.trigrams(word)
+            total += max(
+                (len(grams & other) / len(grams) + len(grams & other) / len(grams | other)) / 2
+                for other in text_trigrams
+            )
+        return total / len(query_words)
+
+    @classmethod
+    def score(cls, terms: Dict[str, str], row: GuestSearchIndex) -> float:
+        scores = [cls.similarity(terms['name'], row.name)]
+        if terms['email'] and row.email_local:
+            scores.append(1.0 if row.email_local == terms['email'] else cls.similarity(terms['email'], row.email_local))
+        if terms['phone'] and terms['phone'] in row.phone_digits:
+            scores.append(1.0)
+        return max(scores)
+
+    # ===== Searching =====
+
+    @staticmethod
+    def terms(query: str) -> Dict[str, str]:
+        """Normalized forms of a query for each key"""
+        digits = normalize_phone(query).replace(' ', '')
+        return {
+            'name': normalize_name(query),
+            'email': normalize_email(query) if '@' in query else normalize_name(query).replace(' ', ''),
+            'phone': digits if len(digits) >= 3 else '',
+        }
+
+    @classmethod
+    def search(cls, query: str, limit: int = 20) -> List[Guest]:
+        """
+        Guests best matching a free-text query (name, email or phone)
+
+        Returns:
+            list: Up to `limit` guests, best match first
+        """
+        terms = cls.terms(query or '')
+        if len(terms['name']) < cls.MIN_QUERY_LENGTH and not terms['phone']:
+            return []
+
+        if connection.vendor == 'postgresql':
+            ids = cls._search_postgresql(terms, limit)
+        else:
+            candidates = cls._candidates_fts(terms) if cls._has_fts() else cls._candidates_fallback(terms)
+            threshold = settings.GUEST_SEARCH_MIN_SIMILARITY
+            ranked = sorted(
+                ((cls.score(terms, row), row.guest_id) for row in candidates),
+                key=lambda item: (-item[0], item[1])
+            )
+            ids = [guest_id for rank, guest_id in ranked if rank >= threshold][:limit]
+
+        guests = Guest.objects.in_bulk(ids)
+        return [guests[guest_id] for guest_id in ids if guest_id in guests]
+
+    @staticmethod
+    def _search_postgresql(terms: Dict[str, str], limit: int) -> List[int]:
+        from django.contrib.postgres.search import TrigramWordSimilarity
+        from django.db.models import Case, FloatField, Value, When
+        from django.db.models.functions import Greatest
+
+        with connection.cursor() as cursor:
+            cursor.execute('SET pg_trgm.word_similarity_threshold = %s', [settings.GUEST_SEARCH_MIN_SIMILARITY])
+
+        condition = Q(name__trigram_word_similar=terms['name'])
+        ranks = [TrigramWordSimilarity(Value(terms['name']), 'name')]
+        if terms['email']:
+            condition |= Q(email_local__trigram_word_similar=terms['email'])
+            ranks.append(TrigramWordSimilarity(Value(terms['email']), 'email_local'))
+        if terms['phone']:
+            condition |= Q(phone_digits__contains=terms['phone'])
+            ranks.append(Case(
+                When(phone_digits__contains=terms['phone'], then=Value(1.0)),
+                default=Value(0.0),
+                output_field=FloatField()
+            ))
+        rank = Greatest(*ranks) if len(ranks) > 1 else ranks[0]
+        return list(
+            GuestSearchIndex.objects.filter(condition).annotate(rank=rank).order_by('-rank', 'guest_id')
+            .values_list('guest_id', flat=True)[:limit]
+        )
+
+    _fts_tables = {}
+
+    @classmethod
+    def _has_fts(cls) -> bool:
+        """Whether this SQLite database has the FTS5 table (checked once per database)"""
+        if connection.vendor != 'sqlite':
+            return False
+        database = connection.settings_dict['NAME']
+        if database not in cls._fts_tables:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [SEARCH_FTS_TABLE])
+                cls._fts_tables[database] = cursor.fetchone() is not None
+        return cls._fts_tables[database]
+
+    @classmethod
+    def _candidates_fts(cls, terms: Dict[str, str]):
+        """
+        Index rows sharing at least one trigram with the query, best bm25
+        rank first
+        """
+        grams = set()
+        for word in terms['name'].split() + ([terms['email']] if terms['email'] else []):
+            # Indexed values are blank padded, so word edges match even when
+            # a typo breaks every inner trigram
+            padded = f' {word} '
+            grams |= {padded[i:i + 3] for i in range(len(padded) - 2)}
+        if terms['phone']:
+            grams.add(terms['phone'])
+
+        match = ' OR '.join('"%s"' % gram.replace('"', '""') for gram in sorted(grams))
+        return GuestSearchIndex.objects.raw(
+            f'SELECT search.guest_id, search.name, search.email_local, search.phone_digits '
+            f'FROM {SEARCH_FTS_TABLE} JOIN {GuestSearchIndex._meta.db_table} AS search '
+            f'ON search.guest_id = {SEARCH_FTS_TABLE}.rowid '
+            f'WHERE {SEARCH_FTS_TABLE} MATCH %s ORDER BY rank LIMIT %s',
+            [match, settings.GUEST_SEARCH_CANDIDATES]
+        )
+
+    @classmethod
+    def _candidates_fallback(cls, terms: Dict[str, str]):
+        """Prefix and substring matches on the normalized keys"""
+        condition = Q(name__startswith=terms['name']) | Q(name__contains=f" {terms['name']}")
+        if terms['email']:
+            condition |= Q(email_local__startswith=terms['email'])
+        if terms['phone']:
+            condition |= Q(phone_digits__contains=terms['phone'])
+        return GuestSearchIndex.objects.filter(condition)[:settings.GUEST_SEARCH_CANDIDATES]
+
+
+class GuestDeduplicationService:
+    """
+    Batch identity resolution for duplicate guest profiles.
+
+    Only guests whose keys changed since they were last checked
+    (GuestSearchIndex.resolved_at is null) are examined, so a run costs in
+    proportion to new and edited guests, not to the table. Per batch:
+
+    1. Blocking: one query finds every indexed guest sharing a normalized
+       name, email, phone, passport or ID number with the batch; blocks
+       larger than GUEST_DEDUP_MAX_BLOCK (common names) are skipped.
+    2. Scoring: each pair in a block is scored from matching and
+       conflicting evidence (see WEIGHTS).
+    3. Merging: pairs scoring GUEST_MERGE_THRESHOLD or more are grouped and
+       merged into the oldest profile of each group. Every relation to the
+       duplicates is re-pointed with one UPDATE per related model, blank
+       profile fields are filled from the duplicates, counters are summed,
+       the duplicates are deleted and each merge is logged as a GuestMerge.
+    """
+
+    BLOCKING_KEYS = ('name', 'email', 'phone_key', 'passport', 'id_number')
+    WEIGHTS = {
+        'passport': 0.7,
+        'id_number': 0.6,
+        'email': 0.6,
+        'phone': 0.4,
+        'name': 0.4,
+        'similar_name': 0.25,
+        'different_name': -0.4,
+        'date_of_birth': 0.3,
+        'different_date_of_birth': -0.6,
+        'different_passport': -0.7,
+    }
+    SIMILAR_NAME = 0.75
+    DIFFERENT_NAME = 0.5
+
+    # Survivor fields taken from a duplicate when blank on the survivor
+    FILL_FIELDS = (
+        'title', 'middle_name', 'gender', 'date_of_birth', 'nationality',
+        'email', 'phone', 'mobile', 'fax',
+        'address', 'city', 'state', 'country', 'postal_code',
+        'id_type', 'id_number', 'id_expiry', 'id_issuing_country', 'passport_number',
+        'company', 'loyalty_tier', 'photo',
+    )
+    SUMMED_FIELDS = (
+        'loyalty_points', 'loyalty_points_earned', 'loyalty_points_redeemed',
+        'total_stays', 'total_nights', 'total_revenue',
+    )
+
+    @classmethod
+    def run(cls, batch_size: int = 500, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Check every pending guest and merge confirmed duplicates
+
+        Args:
+            batch_size: Guests checked per blocking query
+            dry_run: Only report matches; nothing is merged or marked checked
+
+        Returns:
+            dict: checked and merged counts, plus the matches
+                [(guest_id, duplicate_id, score, reasons), ...]
+        """
+        result = {'checked': 0, 'merged': 0, 'matches': []}
+        last_id = 0
+        while True:
+            pending = list(GuestSearchIndex.objects.filter(
+                resolved_at__isnull=True, guest_id__gt=last_id
+            ).order_by('guest_id')[:batch_size])
+            if not pending:
+                break
+            last_id = pending[-1].guest_id
+            matches = cls.find_matches(pending)
+            result['checked'] += len(pending)
+            result['matches'] += matches
+            if dry_run:
+                continue
+            with transaction.atomic():
+                GuestSearchIndex.objects.filter(
+                    guest_id__in=[row.guest_id for row in pending]
+                ).update(resolved_at=timezone.now())
+                result['merged'] += cls.merge(matches)
+        return result
+
+    # ===== Matching =====
+
+    @classmethod
+    def find_matches(cls, pending: List[GuestSearchIndex]) -> List[tuple]:
+        """
+        Pairs involving the pending guests that score at least the merge threshold
+
+        Returns:
+            list: [(guest_id, duplicate_id, score, reasons), ...] with guest_id < duplicate_id
+        """
+        condition = Q()
+        for key in cls.BLOCKING_KEYS:
+            values = {getattr(row, key) for row in pending} - {''}
+            if values:
+                condition |= Q(**{f'{key}__in': values})
+        if not condition:
+            return []
+
+        blocks = {}
+        for row in GuestSearchIndex.objects.filter(condition):
+            for key in cls.BLOCKING_KEYS:
+                if getattr(row, key):
+                    blocks.setdefault((key, getattr(row, key)), []).append(row)
+
+        pending_ids = {row.guest_id for row in pending}
+        pairs = {}
+        for rows in blocks.values():
+            if len(rows) < 2 or len(rows) > settings.GUEST_DEDUP_MAX_BLOCK:
+                continue
+            for i, first in enumerate(rows):
+                for second in rows[i + 1:]:
+                    if first.guest_id != second.guest_id and pending_ids & {first.guest_id, second.guest_id}:
+                        pair = tuple(sorted((first, second), key=lambda row: row.guest_id))
+                        pairs[(pair[0].guest_id, pair[1].guest_id)] = pair
+        if not pairs:
+            return []
+
+        ids = {guest_id for pair in pairs for guest_id in pair}
+        birthdays = dict(Guest.objects.filter(pk__in=ids).values_list('id', 'date_of_birth'))
+        matches = []
+        for first, second in pairs.values():
+            score, reasons = cls.score(first, second, birthdays.get(first.guest_id), birthdays.get(second.guest_id))
+            if score >= settings.GUEST_MERGE_THRESHOLD:
+                matches.append((first.guest_id, second.guest_id, round(score, 2), reasons))
+        return matches
+
+    @classmethod
+    def score(cls, first: GuestSearchIndex, second: GuestSearchIndex, first_birthday=None, second_birthday=None):
+        """
+        Evidence that two guests are the same person
+
+        Returns:
+            tuple: (score, [reason, ...])
+        """
+        reasons = []
+        for key, reason in (('passport', 'passport'), ('id_number', 'id_number'), ('email', 'email'), ('phone_key', 'phone')):
+            if getattr(first, key) and getattr(first, key) == getattr(second, key):
+                reasons.append(reason)
+        if first.passport and second.passport and first.passport != second.passport:
+            reasons.append('different_passport')
+
+        if first.name and first.name == second.name:
+            reasons.append('name')
+        elif first.name and second.name:
+            similarity = (
+                GuestSearchService.similarity(first.name, second.name)
+                + GuestSearchService.similarity(second.name, first.name)
+            ) / 2
+            if similarity >= cls.SIMILAR_NAME:
+                reasons.append('similar_name')
+            elif similarity < cls.DIFFERENT_NAME:
+                reasons.append('different_name')
+
+        if first_birthday and second_birthday:
+            reasons.append('date_of_birth' if first_birthday == second_birthday else 'different_date_of_birth')
+        return sum(cls.WEIGHTS[reason] for reason in reasons), reasons
+
+    # ===== Merging =====
+
+    @classmethod
+    def merge(cls, matches: List[tuple]) -> int:
+        """
+        Merge matched guests into the oldest guest of each connected group
+
+        Returns:
+            int: Number of duplicate guests merged away
+        """
+        parent = {}
+
+        def root(guest_id):
+            while parent.get(guest_id, guest_id) != guest_id:
+                guest_id = parent[guest_id]
+            return guest_id
+
+        evidence = {}
+        for first_id, second_id, score, reasons in sorted(matches, key=lambda match: -match[2]):
+            first_root, second_root = root(first_id), root(second_id)
+            if first_root != second_root:
+                parent[max(first_root, second_root)] = min(first_root, second_root)
+            evidence.setdefault(second_id, (score, reasons))
+            evidence.setdefault(first_id, (score, reasons))
+
+        guests = Guest.objects.in_bulk(list(parent) + [root(guest_id) for guest_id in parent])
+        survivor_of = {
+            guest_id: root(guest_id) for guest_id in parent
+            if guest_id in guests and root(guest_id) in guests and root(guest_id) != guest_id
+        }
+        if not survivor_of:
+            return 0
+
+        # Re-point every relation to the duplicates, one UPDATE per related model
+        for relation in Guest._meta.related_objects:
+            if relation.one_to_one or relation.many_to_many:
+                continue
+            column = relation.field.attname
+            relation.related_model._base_manager.filter(**{f'{column}__in': list(survivor_of)}).update(**{
+                column: Case(
+                    *[When(**{column: duplicate_id}, then=Value(survivor_id)) for duplicate_id, survivor_id in survivor_of.items()],
+                    output_field=BigIntegerField()
+                )
+            })
+
+        survivors = {}
+        logs = []
+        for duplicate_id, survivor_id in sorted(survivor_of.items()):
+            survivor, duplicate = guests[survivor_id], guests[duplicate_id]
+            cls._absorb(survivor, duplicate)
+            survivors[survivor_id] = survivor
+            score, reasons = evidence[duplicate_id]
+            logs.append(GuestMerge(
+                survivor=survivor,
+                merged_guest_id=duplicate_id,
+                merged_name=f'{duplicate.first_name} {duplicate.last_name}'[:200],
+                merged_email=duplicate.email,
+                score=score,
+                reasons=reasons,
+            ))
+        GuestMerge.objects.bulk_create(logs)
+
+        Guest.objects.filter(pk__in=list(survivor_of)).delete()
+        Guest.objects.bulk_update(
+            list(survivors.values()),
+            list(cls.FILL_FIELDS) + list(cls.SUMMED_FIELDS) + [
+                'loyalty_number', 'vip_level', 'last_stay_date', 'is_blacklisted', 'blacklist_reason', 'notes'
+            ]
+        )
+
+        # Filled-in keys may link the survivors to further guests
+        GuestSearchIndex.objects.bulk_create(
+            [
+                GuestSearchIndex(
+                    guest_id=survivor.pk,
+                    **index_keys(*(getattr(survivor, field) for field in GuestSearchService.SOURCE_FIELDS))
+                )
+                for survivor in survivors.values()
+            ],
+            update_conflicts=True,
+            unique_fields=['guest'],
+            update_fields=list(GuestSearchService.KEY_FIELDS) + ['resolved_at'],
+        )
+        return len(survivor_of)
+
+    @classmethod
+    def _absorb(cls, survivor: Guest, duplicate: Guest):
+        """Fold a duplicate's profile into the survivor (in memory)"""
+        for name in cls.FILL_FIELDS:
+            attname = Guest._meta.get_field(name).attname
+            if not getattr(survivor, attname) and getattr(duplicate, attname):
+                setattr(survivor, attname, getattr(duplicate, attname))
+        for name in cls.SUMMED_FIELDS:
+            setattr(survivor, name, getattr(survivor, name) + getattr(duplicate, name))
+        survivor.vip_level = max(survivor.vip_level, duplicate.vip_level)
+        if duplicate.last_stay_date and (not survivor.last_stay_date or duplicate.last_stay_date > survivor.last_stay_date):
+            survivor.last_stay_date = duplicate.last_stay_date
+        if duplicate.is_blacklisted and not survivor.is_blacklisted:
+            survivor.is_blacklisted, survivor.blacklist_reason = True, duplicate.blacklist_reason
+        if duplicate.notes and duplicate.notes not in survivor.notes:
+            survivor.notes = '\n'.join(filter(None, [survivor.notes, duplicate.notes]))
+        # Applied after the duplicate is deleted, as loyalty numbers are unique
+        if not survivor.loyalty_number:
+            survivor.loyalty_number = duplicate.loyalty_number
+
+
+class GuestAggregateService:
+    """
+    Lifetime stay and spend figures stored on Guest.
+
+    Profiles and arrival lists read total_stays, total_nights, last_stay_date,
+    total_revenue and the lifetime loyalty points earned/redeemed from the
+    guest row instead of aggregating its history. Signals keep them current
+    with one UPDATE ... SET x = x + n per event:
+
+        checkout (reservation -> CHECKED_OUT): one stay, its nights, and its
+            departure date if later than the last stay
+        folio close (-> CLOSED/SETTLED): the folio's charges, net of taxes
+        loyalty transaction: its points, earned or redeemed
+
+    Reversals (a checkout undone, a folio reopened) subtract again; the last
+    stay date is not rolled back. rebuild() recomputes everything from the
+    history tables (after imports or to correct drift).
+    """
+
+    STAY_STATUS = Reservation.Status.CHECKED_OUT
+    REVENUE_STATUSES = (Folio.Status.CLOSED, Folio.Status.SETTLED)
+    FIELDS = (
+        'total_stays', 'total_nights', 'last_stay_date', 'total_revenue',
+        'loyalty_points_earned', 'loyalty_points_redeemed',
+    )
+
+    @classmethod
+    def stay_changed(cls, reservation: Reservation, previous_status):
+        """Count or uncount a reservation's stay when it enters or leaves CHECKED_OUT"""
+        was_stay, is_stay = previous_status == cls.STAY_STATUS, reservation.status == cls.STAY_STATUS
+        if was_stay == is_stay or not reservation.guest_id:
+            return
+        nights = max(reservation.nights, 0)
+        guests = Guest.objects.filter(pk=reservation.guest_id)
+        if is_stay:
+            departure = reservation.check_out_date
+            guests.update(
+                total_stays=F('total_stays') + 1,
+                total_nights=F('total_nights') + nights,
+                last_stay_date=Case(
+                    When(Q(last_stay_date__isnull=True) | Q(last_stay_date__lt=departure), then=Value(departure)),
+                    default=F('last_stay_date'),
+                ),
+            )
+        else:
+            guests.update(
+                total_stays=Greatest(F('total_stays') - 1, 0),
+                total_nights=Greatest(F('total_nights') - nights, 0),
+            )
+
+    @classmethod
+    def folio_changed(cls, folio: Folio, previous_status):
+        """Add or remove a folio's charges when it is closed or reopened"""
+        was_closed, is_closed = previous_status in cls.REVENUE_STATUSES, folio.status in cls.REVENUE_STATUSES
+        if was_closed == is_closed or not folio.guest_id or not folio.total_charges:
+            return
+        amount = folio.total_charges if is_closed else -folio.total_charges
+        Guest.objects.filter(pk=folio.guest_id).update(total_revenue=F('total_revenue') + amount)
+
+    @classmethod
+    def loyalty_recorded(cls, transaction: LoyaltyTransaction):
+        """Add a new loyalty transaction to the lifetime earned or redeemed points"""
+        field = {
+            LoyaltyTransaction.TransactionType.EARN: 'loyalty_points_earned',
+            LoyaltyTransaction.TransactionType.REDEEM: 'loyalty_points_redeemed',
+        }.get(transaction.transaction_type)
+        if field and transaction.points:
+            Guest.objects.filter(pk=transaction.guest_id).update(**{field: F(field) + abs(transaction.points)})
+
+    # ===== Rebuild =====
+
+    @staticmethod
+    def _by_guest(guest_ids, values, reduce=np.add) -> Dict[int, int]:
+        """
+        Reduce integer values per guest
+
+        Returns:
+            dict: {guest_id: total (np.add) or largest (np.maximum) value}
+        """
+        if not len(guest_ids):
+            return {}
+        ids, inverse = np.unique(np.asarray(guest_ids, dtype=np.int64), return_inverse=True)
+        totals = np.zeros(len(ids), dtype=np.int64)
+        reduce.at(totals, inverse, np.asarray(values, dtype=np.int64))
+        return dict(zip(ids.tolist(), totals.tolist()))
+
+    @classmethod
+    def compute(cls) -> Dict[str, Dict[int, int]]:
+        """
+        Every guest's aggregates from the history tables, one query per source
+
+        Dates are day ordinals and revenue is in cents, so every reduction
+        runs on int64 arrays.
+
+        Returns:
+            dict: {field: {guest_id: value}} (guests without history omitted)
+        """
+        stays = list(Reservation.objects.filter(status=cls.STAY_STATUS, guest__isnull=False).values_list(
+            'guest_id', 'check_in_date', 'check_out_date'
+        ))
+        guest_ids = [guest_id for guest_id, _, _ in stays]
+        departures = np.array([check_out.toordinal() for _, _, check_out in stays], dtype=np.int64)
+        arrivals = np.array([check_in.toordinal() for _, check_in, _ in stays], dtype=np.int64)
+
+        folios = list(Folio.objects.filter(status__in=cls.REVENUE_STATUSES).values_list('guest_id', 'total_charges'))
+        loyalty = list(LoyaltyTransaction.objects.filter(transaction_type__in=[
+            LoyaltyTransaction.TransactionType.EARN, LoyaltyTransaction.TransactionType.REDEEM,
+        ]).values_list('guest_id', 'transaction_type', 'points'))
+
+        def points(transaction_type):
+            rows = [(guest_id, abs(value)) for guest_id, kind, value in loyalty if kind == transaction_type]
+            return cls._by_guest([row[0] for row in rows], [row[1] for row in rows])
+
+        return {
+            'total_stays': cls._by_guest(guest_ids, np.ones(len(stays))),
+            'total_nights': cls._by_guest(guest_ids, np.maximum(departures - arrivals, 0)),
+            'last_stay_date': cls._by_guest(guest_ids, departures, np.maximum),
+            'total_revenue': cls._by_guest(
+                [guest_id for guest_id, _ in folios], [int(amount * 100) for _, amount in folios]
+            ),
+            'loyalty_points_earned': points(LoyaltyTransaction.TransactionType.EARN),
+            'loyalty_points_redeemed': points(LoyaltyTransaction.TransactionType.REDEEM),
+        }
+
+    @classmethod
+    def rebuild(cls, batch_size: int = 2000) -> int:
+        """
+        Recompute every guest's aggregates and store those that changed
+
+        Returns:
+            int: Number of guests updated
+        """
+        totals = cls.compute()
+        changed = []
+        updated = 0
+        for values in Guest.objects.order_by().values_list('id', *cls.FIELDS).iterator(chunk_size=batch_size):
+            guest_id = values[0]
+            last_stay = totals['last_stay_date'].get(guest_id)
+            expected = (
+                totals['total_stays'].get(guest_id, 0),
+                totals['total_nights'].get(guest_id, 0),
+                date.fromordinal(last_stay) if last_stay else None,
+                Decimal(totals['total_revenue'].get(guest_id, 0)) / 100,
+                totals['loyalty_points_earned'].get(guest_id, 0),
+                totals['loyalty_points_redeemed'].get(guest_id, 0),
+            )
+            if tuple(values[1:]) == expected:
+                continue
+            changed.append(Guest(pk=guest_id, **dict(zip(cls.FIELDS, expected))))
+            if len(changed) >= batch_size:
+                Guest.objects.bulk_update(changed, cls.FIELDS)
+                updated += len(changed)
+                changed = []
+        Guest.objects.bulk_update(changed, cls.FIELDS)
+        return updated + len(changed)
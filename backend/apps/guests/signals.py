@@ -0,0 +1,56 @@
+from django.db.models.signals import post_init, pre_save, post_save
+from django.dispatch import receiver
+from apps.billing.models import Folio
+from apps.reservations.models import Reservation
+from .models import Guest, LoyaltyTransaction
+from .services import GuestAggregateService, GuestSearchService
+
+
+@receiver(post_save, sender=Guest)
+def index_guest(sender, instance, created, update_fields=None, **kwargs):
+    """Re-index a guest when a searchable field may have changed."""
+    if update_fields and not set(update_fields) & set(GuestSearchService.SOURCE_FIELDS):
+        return
+    GuestSearchService.index(instance)
+
+
+# ===== Lifetime aggregates =====
+
+@receiver(post_init, sender=Reservation)
+@receiver(post_init, sender=Folio)
+def remember_status(sender, instance, **kwargs):
+    """Snapshot the status as loaded (None when new or deferred)."""
+    instance._aggregate_status = instance.__dict__.get('status') if instance.pk else None
+
+
+@receiver(pre_save, sender=Reservation)
+@receiver(pre_save, sender=Folio)
+def load_missing_status(sender, instance, **kwargs):
+    """Fall back to the stored status when the instance was loaded without it."""
+    if instance.pk and getattr(instance, '_aggregate_status', None) is None:
+        instance._aggregate_status = sender.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+
+
+@receiver(post_save, sender=Reservation)
+def update_stay_aggregates(sender, instance, created, raw=False, **kwargs):
+    """Count a stay at checkout."""
+    if raw:
+        return
+    GuestAggregateService.stay_changed(instance, None if created else instance._aggregate_status)
+    instance._aggregate_status = instance.status
+
+
+@receiver(post_save, sender=Folio)
+def update_revenue_aggregates(sender, instance, created, raw=False, **kwargs):
+    """Add a folio's charges to the guest's revenue when it closes."""
+    if raw:
+        return
+    GuestAggregateService.folio_changed(instance, None if created else instance._aggregate_status)
+    instance._aggregate_status = instance.status
+
+
+@receiver(post_save, sender=LoyaltyTransaction)
+def update_loyalty_aggregates(sender, instance, created, raw=False, **kwargs):
+    """Add new loyalty transactions to the lifetime points."""
+    if created and not raw:
+        GuestAggregateService.loyalty_recorded(instance)
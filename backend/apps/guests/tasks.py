@@ -0,0 +1,21 @@
+"""
+Guest Background Tasks
+Nightly duplicate guest resolution
+"""
+
+from celery import shared_task
+from apps.guests.services import GuestDeduplicationService
+
+
+@shared_task
+def resolve_guest_identities_task():
+    """
+    Merge duplicate profiles among guests created or edited since the last run.
+    
+    Runs nightly (see CELERY_BEAT_SCHEDULE).
+    
+    Returns:
+        dict: Guests checked and duplicates merged
+    """
+    result = GuestDeduplicationService.run()
+    return {'checked': result['checked'], 'merged': result['merged']}
@@ -8,6 +8,7 @@ from django.db.models import Q
 from django.http import JsonResponse
 from .models import Guest, GuestPreference, GuestDocument, Company, LoyaltyTransaction
 from .forms import GuestForm, GuestPreferenceForm, CompanyForm
+from .services import GuestSearchService
 
 
 class GuestListView(LoginRequiredMixin, ListView):
@@ -81,12 +82,7 @@ class GuestSearchView(LoginRequiredMixin, View):
         if len(query) < 2:
             return JsonResponse({'results': []})
         
-        guests = Guest.objects.filter(
-            Q(first_name__icontains=query) |
-            Q(last_name__icontains=query) |
-            Q(email__icontains=query) |
-            Q(phone__icontains=query)
-        )[:10]
+        guests = GuestSearchService.search(query, limit=10)
         
         results = [{
             'id': g.id,
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0002_pushdevicetoken"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="pushdevicetoken",
+            index=models.Index(
+                fields=["user", "is_active"], name="notificatio_user_id_1b1678_idx"
+            ),
+        ),
+    ]
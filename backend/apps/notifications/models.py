@@ -200,6 +200,9 @@ class PushDeviceToken(models.Model):
         verbose_name = _('push device token')
         verbose_name_plural = _('push device tokens')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'is_active']),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.get_platform_display()} - {self.token[:20]}..."
@@ -4,21 +4,88 @@ Handles push notifications, email, and SMS
 """
 
 import logging
+from datetime import date
+from functools import lru_cache
 from typing import List, Dict, Any, Optional
 from django.conf import settings
-from django.core.mail import send_mail, EmailMultiAlternatives
+from django.core.mail import send_mail, get_connection, EmailMultiAlternatives
+from django.template import Context, Template
 from django.template.loader import render_to_string
+from django.utils import timezone
+
+from apps.notifications.models import NotificationTemplate, EmailLog, SMSLog, PushDeviceToken
 
 logger = logging.getLogger(__name__)
 
 
 class PushNotificationService:
-    """Service for sending push notifications via Firebase Cloud Messaging"""
+    """
+    Service for sending push notifications via Firebase Cloud Messaging
+    
+    Tokens are sent in chunks of FCM_MAX_TOKENS_PER_REQUEST, up to
+    FCM_CONCURRENCY chunks at a time over one pooled session. Tokens FCM
+    reports as unregistered or invalid are deactivated.
+    """
+    
+    INVALID_TOKEN_ERRORS = {'NotRegistered', 'InvalidRegistration', 'MismatchSenderId'}
     
     def __init__(self):
         self.enabled = getattr(settings, 'FCM_ENABLED', False)
         self.server_key = getattr(settings, 'FCM_SERVER_KEY', None)
         self.api_url = 'https://fcm.googleapis.com/fcm/send'
+        self.batch_size = getattr(settings, 'FCM_MAX_TOKENS_PER_REQUEST', 500)
+        self.concurrency = getattr(settings, 'FCM_CONCURRENCY', 4)
+        self._session = None
+    
+    @property
+    def session(self):
+        """Keep-alive session shared by all sends of this process"""
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            
+            session = requests.Session()
+            session.headers.update({
+                'Authorization': f'key={self.server_key}',
+                'Content-Type': 'application/json',
+            })
+            session.mount('https://', HTTPAdapter(pool_maxsize=self.concurrency))
+            self._session = session
+        return self._session
+    
+    @staticmethod
+    def resolve_tokens(
+        users: Optional[List[Any]] = None,
+        roles: Optional[List[str]] = None,
+        departments: Optional[List[int]] = None,
+        property_id: Optional[int] = None
+    ) -> List[str]:
+        """
+        Active device tokens of the targeted users, in one query
+        
+        Args:
+            users: Users or user IDs
+            roles: User roles
+            departments: Department IDs
+            property_id: Limit to users assigned to this property; on its own,
+                targets all of the property's users
+        """
+        from django.db.models import Q
+        
+        targets = Q()
+        if users:
+            targets |= Q(user_id__in=[getattr(user, 'pk', user) for user in users])
+        if roles:
+            targets |= Q(user__role__in=roles)
+        if departments:
+            targets |= Q(user__department_id__in=departments)
+        if not targets and property_id is None:
+            return []
+        
+        tokens = PushDeviceToken.objects.filter(targets, is_active=True, user__is_active=True)
+        if property_id is not None:
+            tokens = tokens.filter(user__assigned_property_id=property_id)
+        return list(tokens.values_list('token', flat=True).distinct())
     
     def send_notification(
         self,
@@ -35,6 +102,9 @@ class PushNotificationService:
             title: Notification title
             body: Notification body
             data: Optional custom data payload
+        
+        Returns:
+            dict: success, sent, failed and pruned counts
         """
         if not self.enabled:
             logger.warning("Push notifications are disabled")
@@ -44,52 +114,90 @@ class PushNotificationService:
             logger.error("FCM server key not configured")
             return {'success': False, 'error': 'FCM not configured'}
         
+        device_tokens = list(dict.fromkeys(device_tokens))
+        if not device_tokens:
+            return {'success': True, 'sent': 0, 'failed': 0, 'pruned': 0}
+        
+        chunks = [
+            device_tokens[i:i + self.batch_size]
+            for i in range(0, len(device_tokens), self.batch_size)
+        ]
+        notification = {'title': title, 'body': body, 'sound': 'default'}
+        
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(chunks))) as executor:
+            results = list(executor.map(
+                lambda chunk: self._send_chunk(chunk, notification, data or {}), chunks
+            ))
+        
+        sent = sum(result['sent'] for result in results)
+        invalid = [token for result in results for token in result['invalid']]
+        errors = [result['error'] for result in results if result.get('error')]
+        pruned = self.prune_tokens(invalid)
+        
+        logger.info(f"Push notification sent: {sent} successful, {len(device_tokens) - sent} failed, {pruned} pruned")
+        response = {
+            'success': sent > 0 or not errors,
+            'sent': sent,
+            'failed': len(device_tokens) - sent,
+            'pruned': pruned,
+        }
+        if errors:
+            response['error'] = errors[0]
+        return response
+    
+    def _send_chunk(self, tokens: List[str], notification: Dict[str, str], data: Dict[str, Any]) -> Dict[str, Any]:
+        """POST one chunk of tokens; runs on a worker thread, so no database access"""
+        payload = {
+            'registration_ids': tokens,
+            'notification': notification,
+            'data': data,
+            'priority': 'high',
+        }
         try:
-            import requests
-            
-            headers = {
-                'Authorization': f'key={self.server_key}',
-                'Content-Type': 'application/json',
-            }
-            
-            payload = {
-                'registration_ids': device_tokens,
-                'notification': {
-                    'title': title,
-                    'body': body,
-                    'sound': 'default',
-                },
-                'data': data or {},
-                'priority': 'high',
-            }
-            
-            response = requests.post(
-                self.api_url,
-                headers=headers,
-                json=payload,
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                logger.info(f"Push notification sent: {result.get('success', 0)} successful")
-                return {
-                    'success': True,
-                    'results': result
-                }
-            else:
-                logger.error(f"FCM error: {response.status_code} - {response.text}")
-                return {
-                    'success': False,
-                    'error': response.text
-                }
-                
+            response = self.session.post(self.api_url, json=payload, timeout=10)
         except Exception as e:
             logger.error(f"Failed to send push notification: {str(e)}")
-            return {
-                'success': False,
-                'error': str(e)
-            }
+            return {'sent': 0, 'invalid': [], 'error': str(e)}
+        
+        if response.status_code != 200:
+            logger.error(f"FCM error: {response.status_code} - {response.text}")
+            return {'sent': 0, 'invalid': [], 'error': response.text}
+        
+        # Results are in the same order as registration_ids
+        results = response.json().get('results', [])
+        invalid = [
+            token for token, result in zip(tokens, results)
+            if result.get('error') in self.INVALID_TOKEN_ERRORS
+        ]
+        sent = sum(1 for result in results if 'message_id' in result)
+        return {'sent': sent, 'invalid': invalid}
+    
+    @staticmethod
+    def prune_tokens(tokens: List[str]) -> int:
+        """Deactivate tokens the provider no longer accepts"""
+        if not tokens:
+            return 0
+        return PushDeviceToken.objects.filter(token__in=tokens, is_active=True).update(is_active=False)
+    
+    def send_to_targets(
+        self,
+        title: str,
+        body: str,
+        data: Optional[Dict[str, Any]] = None,
+        **targets
+    ) -> Dict[str, Any]:
+        """
+        Send notification to every device of the targeted users
+        
+        Args:
+            targets: users, roles, departments and/or property_id (see resolve_tokens)
+        """
+        device_tokens = self.resolve_tokens(**targets)
+        if not device_tokens:
+            logger.warning(f"No device tokens for push targets {targets}")
+            return {'success': False, 'error': 'No device tokens'}
+        return self.send_notification(device_tokens, title, body, data)
     
     def send_to_user(
         self,
@@ -100,16 +208,9 @@ class PushNotificationService:
     ) -> Dict[str, Any]:
         """
         Send notification to a specific user
-        Looks up user's device tokens from their profile
+        Looks up the user's registered device tokens
         """
-        # Get user's device tokens (would need to be stored in user profile)
-        device_tokens = getattr(user, 'fcm_tokens', [])
-        
-        if not device_tokens:
-            logger.warning(f"User {user.id} has no FCM tokens")
-            return {'success': False, 'error': 'No device tokens'}
-        
-        return self.send_notification(device_tokens, title, body, data)
+        return self.send_to_targets(title, body, data, users=[user])
 
 
 class EmailService:
@@ -173,83 +274,27 @@ class EmailService:
     
     def send_reservation_confirmation(self, reservation) -> bool:
         """Send reservation confirmation email"""
-        subject = f"Reservation Confirmation - {reservation.property.name}"
-        
-        context = {
-            'reservation': reservation,
-            'guest': reservation.guest,
-            'property': reservation.property,
-        }
-        
-        message = f"""
-Dear {reservation.guest.first_name},
-
-Your reservation has been confirmed!
-
-Confirmation Code: {reservation.confirmation_code}
-Check-in: {reservation.check_in_date}
-Check-out: {reservation.check_out_date}
-Guests: {reservation.adults} adults, {reservation.children} children
-
-Property: {reservation.property.name}
-Address: {reservation.property.address}
-
-Thank you for choosing us!
-        """.strip()
-        
-        # Could use a template here
-        html_message = f"""
-<html>
-<body>
-    <h2>Reservation Confirmed</h2>
-    <p>Dear {reservation.guest.first_name},</p>
-    <p>Your reservation has been confirmed!</p>
-    
-    <h3>Reservation Details</h3>
-    <ul>
-        <li><strong>Confirmation Code:</strong> {reservation.confirmation_code}</li>
-        <li><strong>Check-in:</strong> {reservation.check_in_date}</li>
-        <li><strong>Check-out:</strong> {reservation.check_out_date}</li>
-        <li><strong>Guests:</strong> {reservation.adults} adults, {reservation.children} children</li>
-    </ul>
-    
-    <h3>Property Information</h3>
-    <p><strong>{reservation.property.name}</strong><br>
-    {reservation.property.address}</p>
-    
-    <p>Thank you for choosing us!</p>
-</body>
-</html>
-        """
-        
-        return self.send_email(
-            to_emails=[reservation.guest.email],
-            subject=subject,
-            message=message,
-            html_message=html_message
+        result = notification_dispatcher.send_emails(
+            notification_dispatcher.get_template(
+                NotificationTemplate.TriggerEvent.RESERVATION_CONFIRMED,
+                NotificationTemplate.TemplateType.EMAIL,
+                reservation.hotel_id
+            ),
+            [reservation_recipient(reservation)]
         )
+        return result['sent'] == 1
     
     def send_check_in_reminder(self, reservation) -> bool:
         """Send check-in reminder email"""
-        subject = f"Check-in Reminder - {reservation.property.name}"
-        
-        message = f"""
-Dear {reservation.guest.first_name},
-
-This is a reminder that your check-in is tomorrow!
-
-Confirmation Code: {reservation.confirmation_code}
-Check-in Date: {reservation.check_in_date}
-Check-in Time: {reservation.property.check_in_time}
-
-We look forward to welcoming you!
-        """.strip()
-        
-        return self.send_email(
-            to_emails=[reservation.guest.email],
-            subject=subject,
-            message=message
+        result = notification_dispatcher.send_emails(
+            notification_dispatcher.get_template(
+                NotificationTemplate.TriggerEvent.PRE_ARRIVAL,
+                NotificationTemplate.TemplateType.EMAIL,
+                reservation.hotel_id
+            ),
+            [reservation_recipient(reservation)]
         )
+        return result['sent'] == 1
 
 
 class SMSService:
@@ -278,16 +323,7 @@ class SMSService:
             return False
         
         try:
-            from twilio.rest import Client
-            
-            client = Client(self.account_sid, self.auth_token)
-            
-            message = client.messages.create(
-                body=message,
-                from_=self.from_number,
-                to=to_number
-            )
-            
+            message = self.send_with(self.get_client(), to_number, message)
             logger.info(f"SMS sent to {to_number}: {message.sid}")
             return True
             
@@ -295,24 +331,321 @@ class SMSService:
             logger.error(f"Failed to send SMS: {str(e)}")
             return False
     
+    @property
+    def configured(self) -> bool:
+        return self.enabled and all([self.account_sid, self.auth_token, self.from_number])
+    
+    def get_client(self):
+        """Twilio client; reuse one for a batch of messages"""
+        from twilio.rest import Client
+        return Client(self.account_sid, self.auth_token)
+    
+    def send_with(self, client, to_number: str, message: str):
+        """Send one SMS through an existing client, raising on failure"""
+        return client.messages.create(
+            body=message,
+            from_=self.from_number,
+            to=to_number
+        )
+    
     def send_reservation_confirmation_sms(self, reservation) -> bool:
         """Send reservation confirmation via SMS"""
         if not reservation.guest.phone:
             return False
         
-        message = f"""
-{reservation.property.name} - Reservation Confirmed!
-Code: {reservation.confirmation_code}
-Check-in: {reservation.check_in_date}
-        """.strip()
+        result = notification_dispatcher.send_sms_batch(
+            notification_dispatcher.get_template(
+                NotificationTemplate.TriggerEvent.RESERVATION_CONFIRMED,
+                NotificationTemplate.TemplateType.SMS,
+                reservation.hotel_id
+            ),
+            [reservation_recipient(reservation, channel='phone')]
+        )
+        return result['sent'] == 1
+
+
+# Built-in templates used when a property has no NotificationTemplate for an event
+DEFAULT_TEMPLATES = {
+    (NotificationTemplate.TriggerEvent.RESERVATION_CONFIRMED, NotificationTemplate.TemplateType.EMAIL): {
+        'subject': 'Reservation Confirmation - {{ property.name }}',
+        'body': """Dear {{ guest.first_name }},
+
+Your reservation has been confirmed!
+
+Confirmation Code: {{ reservation.confirmation_number }}
+Check-in: {{ reservation.check_in_date }}
+Check-out: {{ reservation.check_out_date }}
+Guests: {{ reservation.adults }} adults, {{ reservation.children }} children
+
+Property: {{ property.name }}
+Address: {{ property.address }}
+
+Thank you for choosing us!""",
+        'html_body': """<html>
+<body>
+    <h2>Reservation Confirmed</h2>
+    <p>Dear {{ guest.first_name }},</p>
+    <p>Your reservation has been confirmed!</p>
+    
+    <h3>Reservation Details</h3>
+    <ul>
+        <li><strong>Confirmation Code:</strong> {{ reservation.confirmation_number }}</li>
+        <li><strong>Check-in:</strong> {{ reservation.check_in_date }}</li>
+        <li><strong>Check-out:</strong> {{ reservation.check_out_date }}</li>
+        <li><strong>Guests:</strong> {{ reservation.adults }} adults, {{ reservation.children }} children</li>
+    </ul>
+    
+    <h3>Property Information</h3>
+    <p><strong>{{ property.name }}</strong><br>
+    {{ property.address }}</p>
+    
+    <p>Thank you for choosing us!</p>
+</body>
+</html>""",
+    },
+    (NotificationTemplate.TriggerEvent.PRE_ARRIVAL, NotificationTemplate.TemplateType.EMAIL): {
+        'subject': 'Check-in Reminder - {{ property.name }}',
+        'body': """Dear {{ guest.first_name }},
+
+This is a reminder that your check-in is on {{ reservation.check_in_date }}!
+
+Confirmation Code: {{ reservation.confirmation_number }}
+Check-in Date: {{ reservation.check_in_date }}
+Check-in Time: {{ property.check_in_time }}
+
+We look forward to welcoming you!""",
+    },
+    (NotificationTemplate.TriggerEvent.RESERVATION_CONFIRMED, NotificationTemplate.TemplateType.SMS): {
+        'body': """{{ property.name }} - Reservation Confirmed!
+Code: {{ reservation.confirmation_number }}
+Check-in: {{ reservation.check_in_date }}""",
+    },
+}
+
+
+@lru_cache(maxsize=512)
+def compile_template(source: str) -> Template:
+    """Compile template source once per process; edited templates get a new entry"""
+    return Template(source)
+
+
+def reservation_recipient(reservation, channel: str = 'email') -> Dict[str, Any]:
+    """Build a dispatcher recipient for a reservation's guest"""
+    return {
+        'to': getattr(reservation.guest, channel),
+        'context': {'reservation': reservation, 'guest': reservation.guest, 'property': reservation.hotel},
+        'object': reservation,
+    }
+
+
+class NotificationDispatcher:
+    """
+    Renders NotificationTemplates for many recipients and sends them in batches
+    
+    Recipients are dicts of {'to': address, 'context': dict, 'object': model or None}.
+    Emails go out over one SMTP connection per batch and every message is
+    logged with a single bulk insert.
+    """
+    
+    def get_template(
+        self,
+        trigger_event: str,
+        template_type: str,
+        property_id: Optional[int] = None
+    ) -> NotificationTemplate:
+        """
+        Get the active template for an event, preferring the property's own
+        
+        Falls back to a global template, then to an unsaved built-in default.
+        """
+        templates = NotificationTemplate.objects.filter(
+            trigger_event=trigger_event, template_type=template_type, is_active=True
+        )
+        template = (
+            templates.filter(property_id=property_id).order_by('-id').first() if property_id else None
+        ) or templates.filter(property__isnull=True).order_by('-id').first()
+        if template:
+            return template
+        
+        defaults = DEFAULT_TEMPLATES.get((trigger_event, template_type))
+        if defaults is None:
+            raise ValueError(f"No {template_type} template for {trigger_event}")
+        return NotificationTemplate(
+            name=f'Default {trigger_event}',
+            template_type=template_type,
+            trigger_event=trigger_event,
+            subject=defaults.get('subject', ''),
+            body=defaults['body'],
+            html_body=defaults.get('html_body', '')
+        )
+    
+    @staticmethod
+    def render(template: NotificationTemplate, context: Dict[str, Any]) -> Dict[str, str]:
+        """Render a template's subject, text and HTML bodies"""
+        plain = Context(context, autoescape=False)
+        return {
+            'subject': compile_template(template.subject).render(plain).strip() if template.subject else '',
+            'body': compile_template(template.body).render(plain).strip(),
+            'html_body': compile_template(template.html_body).render(Context(context)) if template.html_body else '',
+        }
+    
+    @staticmethod
+    def _log_fields(template: NotificationTemplate, recipient: Dict[str, Any]) -> Dict[str, Any]:
+        obj = recipient.get('object')
+        return {
+            'related_object_type': obj._meta.model_name if obj is not None else '',
+            'related_object_id': obj.pk if obj is not None else None,
+        }
+    
+    def send_emails(self, template: NotificationTemplate, recipients: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Render and send an email template to many recipients
+        
+        Returns:
+            dict: {'sent': int, 'failed': int}
+        """
+        messages = []
+        logs = []
+        for recipient in recipients:
+            if not recipient.get('to'):
+                continue
+            rendered = self.render(template, recipient['context'])
+            message = EmailMultiAlternatives(
+                subject=rendered['subject'],
+                body=rendered['body'],
+                from_email=email_service.from_email,
+                to=[recipient['to']]
+            )
+            if rendered['html_body']:
+                message.attach_alternative(rendered['html_body'], 'text/html')
+            messages.append(message)
+            logs.append(EmailLog(
+                template=template if template.pk else None,
+                to_email=recipient['to'],
+                subject=rendered['subject'][:255],
+                body=rendered['body'],
+                **self._log_fields(template, recipient)
+            ))
+        
+        if not email_service.enabled:
+            logger.warning("Email is disabled")
+            for log in logs:
+                log.status = EmailLog.Status.FAILED
+                log.error_message = 'Email is disabled'
+        elif messages:
+            self.deliver(messages, logs)
         
-        return self.send_sms(reservation.guest.phone, message)
+        EmailLog.objects.bulk_create(logs, batch_size=500)
+        sent = sum(1 for log in logs if log.status == EmailLog.Status.SENT)
+        logger.info(f"Email batch: {sent} sent, {len(logs) - sent} failed")
+        return {'sent': sent, 'failed': len(logs) - sent}
+    
+    @staticmethod
+    def deliver(messages, logs) -> int:
+        """
+        Send messages over shared connections and mark each log as it goes
+        
+        Each NOTIFICATION_EMAIL_BATCH_SIZE messages share one connection, but
+        are sent one at a time, so a failure affects only its own message and
+        nothing that already went out is sent again. A connection that cannot
+        be opened fails its whole batch. The logs are not saved here.
+        
+        Returns:
+            int: Number of messages sent
+        """
+        sent = 0
+        batch_size = settings.NOTIFICATION_EMAIL_BATCH_SIZE
+        for i in range(0, len(messages), batch_size):
+            batch = list(zip(messages[i:i + batch_size], logs[i:i + batch_size]))
+            try:
+                connection = get_connection(fail_silently=False)
+                connection.open()
+            except Exception as e:
+                logger.error(f"Failed to open email connection: {str(e)}")
+                for _, log in batch:
+                    log.status, log.error_message = EmailLog.Status.FAILED, str(e)
+                continue
+            try:
+                for message, log in batch:
+                    try:
+                        delivered = connection.send_messages([message])
+                    except Exception as e:
+                        log.status, log.error_message = EmailLog.Status.FAILED, str(e)
+                        continue
+                    if delivered:
+                        log.status, log.sent_at = EmailLog.Status.SENT, timezone.now()
+                        sent += 1
+                    else:
+                        log.status, log.error_message = EmailLog.Status.FAILED, 'Message was not accepted'
+            finally:
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+        return sent
+    
+    def send_sms_batch(self, template: NotificationTemplate, recipients: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Render and send an SMS template to many recipients through one client
+        
+        Returns:
+            dict: {'sent': int, 'failed': int}
+        """
+        pending = [
+            (recipient, SMSLog(to_number=recipient['to'], message=self.render(template, recipient['context'])['body']))
+            for recipient in recipients if recipient.get('to')
+        ]
+        
+        client = None
+        if sms_service.configured:
+            try:
+                client = sms_service.get_client()
+            except Exception as e:
+                logger.error(f"Failed to create SMS client: {str(e)}")
+        
+        now = timezone.now()
+        for recipient, log in pending:
+            if client is None:
+                log.status, log.error_message = SMSLog.Status.FAILED, 'SMS is not configured'
+                continue
+            try:
+                message = sms_service.send_with(client, log.to_number, log.message)
+                log.status, log.sent_at, log.provider_message_id = SMSLog.Status.SENT, now, message.sid
+            except Exception as e:
+                log.status, log.error_message = SMSLog.Status.FAILED, str(e)
+        
+        logs = [log for _, log in pending]
+        SMSLog.objects.bulk_create(logs, batch_size=500)
+        sent = sum(1 for log in logs if log.status == SMSLog.Status.SENT)
+        return {'sent': sent, 'failed': len(logs) - sent}
+    
+    def send_arrival_reminders(self, hotel_id: int, arrival_date: date) -> Dict[str, int]:
+        """
+        Email a check-in reminder to every confirmed arrival of a property
+        
+        Returns:
+            dict: {'sent': int, 'failed': int}
+        """
+        from apps.reservations.models import Reservation
+        
+        reservations = Reservation.objects.filter(
+            hotel_id=hotel_id,
+            check_in_date=arrival_date,
+            status=Reservation.Status.CONFIRMED
+        ).select_related('guest', 'hotel')
+        template = self.get_template(
+            NotificationTemplate.TriggerEvent.PRE_ARRIVAL,
+            NotificationTemplate.TemplateType.EMAIL,
+            hotel_id
+        )
+        return self.send_emails(template, [reservation_recipient(reservation) for reservation in reservations])
 
 
 # Service instances
 push_service = PushNotificationService()
 email_service = EmailService()
 sms_service = SMSService()
+notification_dispatcher = NotificationDispatcher()
 
 
 # Convenience functions
@@ -321,6 +654,17 @@ def send_push_notification(device_tokens: List[str], title: str, body: str, data
     return push_service.send_notification(device_tokens, title, body, data)
 
 
+def queue_push_notification(title: str, body: str, data: Optional[Dict] = None, **targets):
+    """
+    Send push notification from a background worker once the current transaction commits
+    
+    Targets are user IDs (users), roles, department IDs (departments) and/or property_id.
+    """
+    from config.celery import enqueue_on_commit
+    from apps.notifications.tasks import send_push_task
+    return enqueue_on_commit(send_push_task, title, body, data, **targets)
+
+
 def send_email(to_emails: List[str], subject: str, message: str, html_message: Optional[str] = None):
     """Send email"""
     return email_service.send_email(to_emails, subject, message, html_message)
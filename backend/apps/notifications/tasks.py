@@ -0,0 +1,82 @@
+"""
+Notification Background Tasks
+Sends email outside the request cycle
+"""
+
+from datetime import date, timedelta
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+from apps.notifications.services import email_service, notification_dispatcher, push_service
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def send_email_task(self, to_emails, subject, message, html_message=None, cc=None, bcc=None):
+    """
+    Send an email, retrying when delivery fails.
+    
+    Returns:
+        bool: True if the email was sent
+    """
+    sent = email_service.send_email(
+        to_emails=to_emails,
+        subject=subject,
+        message=message,
+        html_message=html_message,
+        cc=cc,
+        bcc=bcc
+    )
+    if not sent and email_service.enabled and self.request.retries < self.max_retries:
+        raise self.retry()
+    return sent
+
+
+@shared_task
+def send_arrival_reminders_task(hotel_id, arrival_date):
+    """
+    Email check-in reminders to all of a property's arrivals in one batch.
+    
+    Args:
+        hotel_id: Property ID
+        arrival_date: Arrival date as YYYY-MM-DD
+    
+    Returns:
+        dict: Sent and failed counts
+    """
+    return notification_dispatcher.send_arrival_reminders(hotel_id, date.fromisoformat(arrival_date))
+
+
+@shared_task
+def schedule_arrival_reminders_task():
+    """
+    Queue one reminder batch per active property for upcoming arrivals.
+    
+    Returns:
+        int: Number of properties queued
+    """
+    from apps.properties.models import Property
+    
+    arrival_date = timezone.localdate() + timedelta(days=settings.ARRIVAL_REMINDER_DAYS_AHEAD)
+    hotel_ids = list(Property.objects.filter(is_active=True).values_list('id', flat=True))
+    for hotel_id in hotel_ids:
+        send_arrival_reminders_task.delay(hotel_id, arrival_date.isoformat())
+    return len(hotel_ids)
+
+
+@shared_task
+def send_push_task(title, body, data=None, users=None, roles=None, departments=None, property_id=None):
+    """
+    Push a notification to every device of the targeted staff.
+    
+    Args:
+        users: User IDs
+        roles: User roles
+        departments: Department IDs
+        property_id: Property whose users are targeted
+    
+    Returns:
+        dict: Sent, failed and pruned counts
+    """
+    return push_service.send_to_targets(
+        title, body, data, users=users, roles=roles, departments=departments, property_id=property_id
+    )
@@ -5,3 +5,6 @@ class RatesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.rates'
     verbose_name = 'Rate & Revenue Management'
+
+    def ready(self):
+        import apps.rates.signals  # noqa
@@ -0,0 +1,27 @@
+"""
+Django management command to precompute the best-available-rate grid.
+"""
+from django.core.management.base import BaseCommand
+from apps.properties.models import Property
+from apps.rates.services import RateGridService
+
+
+class Command(BaseCommand):
+    """Build the cached rate grid for the configured horizon."""
+
+    help = 'Precompute the room type x rate plan x date rate grid (RATE_GRID_DAYS ahead)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--property', type=int, help='Only build this property ID')
+
+    def handle(self, *args, **options):
+        """Handle the command."""
+        properties = Property.objects.filter(is_active=True)
+        if options.get('property'):
+            properties = properties.filter(id=options['property'])
+
+        for property_obj in properties:
+            cells = RateGridService.build(property_obj.id)
+            self.stdout.write(f'{property_obj.name}: {cells} rate grid cells')
+
+        self.stdout.write(self.style.SUCCESS('Rate grid built'))
@@ -4,9 +4,14 @@ Handles dynamic rate calculation with seasons, discounts, packages, and yield ru
 """
 
 from decimal import Decimal
-from datetime import datetime, timedelta
-from django.db.models import Q
-from apps.rates.models import RatePlan, Season, RoomRate, Discount, Package, YieldRule
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+from apps.rooms.models import RoomType
+from apps.rates.models import RatePlan, Season, RoomRate, DateRate, Discount, YieldRule
 
 
 class PricingService:
@@ -37,50 +42,157 @@ class PricingService:
         except RatePlan.DoesNotExist:
             return {'error': 'Rate plan not found'}
         
+        engine = RateEngine(
+            rate_plan.property_id, check_in_date, check_out_date,
+            room_type_ids=[room_type_id], rate_plans=[rate_plan]
+        )
+        return engine.price_stay(room_type_id, rate_plan.id, check_in_date, check_out_date, adults, children)
+    
+    @staticmethod
+    def get_rate_comparison(room_type_id, check_in_date, check_out_date, property_id, adults=1, children=0):
+        """Compare rates across all available rate plans."""
+        engine = RateEngine(property_id, check_in_date, check_out_date, room_type_ids=[room_type_id])
+        return engine.compare(room_type_id, check_in_date, check_out_date, adults, children)
+
+
+class YieldRuleTable:
+    """
+    Yield rules compiled into per-trigger threshold tables.
+    
+    Rules are sorted by priority (highest first). For every trigger type
+    the first rule whose [min_threshold, max_threshold] range contains the
+    metric adjusts the rate; adjustments of different triggers compound.
+    """
+    
+    def __init__(self, rules):
+        self.tables = {}
+        for rule in sorted(rules, key=lambda rule: -rule.priority):
+            self.tables.setdefault(rule.trigger_type, []).append((
+                rule.min_threshold,
+                rule.max_threshold,
+                Decimal('1') + rule.adjustment_percent / 100
+            ))
+    
+    def apply(self, rate, metrics):
+        """
+        Adjust a rate using lazily evaluated metrics.
+        
+        Args:
+            rate: Nightly rate
+            metrics: {trigger_type: callable returning the metric value}
+        """
+        for trigger_type, thresholds in self.tables.items():
+            if trigger_type not in metrics:
+                continue
+            value = metrics[trigger_type]()
+            for min_threshold, max_threshold, factor in thresholds:
+                if min_threshold <= value and (max_threshold is None or value <= max_threshold):
+                    rate = rate * factor
+                    break
+        return rate
+
+
+class RateEngine:
+    """
+    Batched rate resolution for one property and date window.
+    
+    Seasons, room rates, date rates, yield rules and discounts are loaded
+    up front with one query each; every night and rate plan is then priced
+    in memory.
+    """
+    
+    TAX_RATE = Decimal('0.15')  # 15% tax (configure per property)
+    PICKUP_DAYS = 7  # Booking window measured by DEMAND yield rules
+    
+    def __init__(self, property_id, start_date, end_date, room_type_ids=None, rate_plans=None):
+        self.property_id = property_id
+        self.start_date = start_date
+        self.end_date = end_date
+        
+        if rate_plans is None:
+            rate_plans = RatePlan.objects.filter(property_id=property_id, is_active=True)
+        self.rate_plans = {rate_plan.id: rate_plan for rate_plan in rate_plans}
+        
+        # Seasons overlapping the window, highest priority first
+        self.seasons = list(Season.objects.filter(
+            property_id=property_id,
+            is_active=True,
+            start_date__lt=end_date,
+            end_date__gte=start_date
+        ).order_by('-priority', 'start_date'))
+        
+        room_rates = RoomRate.objects.filter(rate_plan_id__in=self.rate_plans, is_active=True)
+        date_rates = DateRate.objects.filter(
+            Q(rate_plan_id__in=list(self.rate_plans)) | Q(rate_plan__isnull=True),
+            date__gte=start_date,
+            date__lt=end_date
+        )
+        if room_type_ids is not None:
+            room_rates = room_rates.filter(room_type_id__in=room_type_ids)
+            date_rates = date_rates.filter(room_type_id__in=room_type_ids)
+        else:
+            date_rates = date_rates.filter(room_type__hotel_id=property_id)
+        
+        self.room_rates = {
+            (rate.rate_plan_id, rate.room_type_id, rate.season_id): rate
+            for rate in room_rates
+        }
+        self.date_rates = {
+            (rate.room_type_id, rate.rate_plan_id, rate.date): rate
+            for rate in date_rates
+        }
+        
+        self.yield_table = YieldRuleTable(YieldRule.objects.filter(
+            property_id=property_id,
+            is_active=True
+        ))
+        self._occupancy = None
+        self._pickup = None
+        self.discounts = list(Discount.objects.filter(
+            property_id=property_id,
+            is_active=True,
+            valid_from__lt=end_date,
+            valid_to__gte=start_date
+        ))
+        
+        self._season_cache = {}
+    
+    def season_for(self, date):
+        """Get applicable season for a date."""
+        if date not in self._season_cache:
+            self._season_cache[date] = next(
+                (season for season in self.seasons if season.start_date <= date <= season.end_date),
+                None
+            )
+        return self._season_cache[date]
+    
+    def price_stay(self, room_type_id, rate_plan_id, check_in_date, check_out_date, adults=1, children=0):
+        """
+        Price a stay for one room type and rate plan.
+        
+        Returns:
+            dict: Pricing breakdown (or {'error': ...})
+        """
+        nights = (check_out_date - check_in_date).days
+        if nights <= 0:
+            return {'error': 'Invalid date range'}
+        
+        rate_plan = self.rate_plans.get(int(rate_plan_id))
+        if rate_plan is None:
+            return {'error': 'Rate plan not found'}
+        room_type_id = int(room_type_id)
+        
         # Calculate daily rates
         daily_rates = []
         total_base = Decimal('0')
         current_date = check_in_date
         
         while current_date < check_out_date:
-            # Get applicable season
-            season = PricingService._get_season(rate_plan.property_id, current_date)
-            
-            # Get room rate for this season
-            try:
-                if season:
-                    room_rate = RoomRate.objects.get(
-                        rate_plan=rate_plan,
-                        room_type_id=room_type_id,
-                        season=season,
-                        is_active=True
-                    )
-                else:
-                    room_rate = RoomRate.objects.get(
-                        rate_plan=rate_plan,
-                        room_type_id=room_type_id,
-                        season__isnull=True,
-                        is_active=True
-                    )
-            except RoomRate.DoesNotExist:
-                return {'error': f'No rate found for date {current_date}'}
-            
-            # Calculate daily rate based on occupancy
-            if adults <= 2:
-                daily_rate = room_rate.double_rate if adults == 2 else room_rate.single_rate
-            else:
-                daily_rate = room_rate.double_rate + (room_rate.extra_adult * (adults - 2))
-            
-            if children > 0:
-                daily_rate += room_rate.extra_child * children
-            
-            # Apply yield management
-            daily_rate = PricingService._apply_yield_rules(
-                rate_plan.property_id, 
-                room_type_id,
-                current_date,
-                daily_rate
+            daily_rate, season, error = self.resolve_night(
+                room_type_id, rate_plan.id, current_date, adults, children
             )
+            if error:
+                return {'error': error}
             
             daily_rates.append({
                 'date': current_date.isoformat(),
@@ -91,24 +203,14 @@ class PricingService:
             total_base += daily_rate
             current_date += timedelta(days=1)
         
-        # Apply discounts
-        discount_amount, discount_details = PricingService._calculate_discounts(
-            rate_plan.property_id,
-            rate_plan_id,
-            total_base,
-            nights,
-            check_in_date
-        )
+        discount_amount, discount_details = self.calculate_discounts(total_base, nights, check_in_date)
         
-        # Apply packages
-        package_value, package_details = PricingService._apply_packages(
-            rate_plan_id,
-            nights
-        )
+        # Packages functionality can be added later
+        package_value = Decimal('0')
+        package_details = []
         
         subtotal = total_base - discount_amount
-        tax_rate = Decimal('0.15')  # 15% tax (configure per property)
-        tax_amount = subtotal * tax_rate
+        tax_amount = subtotal * self.TAX_RATE
         total = subtotal + tax_amount + package_value
         
         return {
@@ -122,67 +224,130 @@ class PricingService:
             'package_value': float(package_value),
             'package_details': package_details,
             'subtotal': float(subtotal),
-            'tax_rate': float(tax_rate),
+            'tax_rate': float(self.TAX_RATE),
             'tax_amount': float(tax_amount),
             'total_amount': float(total),
             'average_per_night': float(total / nights) if nights > 0 else 0,
         }
     
-    @staticmethod
-    def _get_season(property_id, date):
-        """Get applicable season for a date."""
-        seasons = Season.objects.filter(
-            property_id=property_id,
-            is_active=True,
-            start_date__lte=date,
-            end_date__gte=date
-        ).order_by('-priority')
+    def resolve_night(self, room_type_id, rate_plan_id, date, adults=1, children=0):
+        """
+        Price a single night before discounts.
         
-        return seasons.first()
-    
-    @staticmethod
-    def _apply_yield_rules(property_id, room_type_id, date, base_rate):
-        """Apply yield management rules to adjust pricing."""
-        rules = YieldRule.objects.filter(
-            property_id=property_id,
-            is_active=True
+        Returns:
+            tuple: (rate, season, error) - rate is None when error is set
+        """
+        room_type_id = int(room_type_id)
+        rate_plan_id = int(rate_plan_id)
+        
+        season = self.season_for(date)
+        room_rate = self.room_rates.get(
+            (rate_plan_id, room_type_id, season.id if season else None)
         )
+        if room_rate is None:
+            return None, season, f'No rate found for date {date}'
+        
+        date_rate = (
+            self.date_rates.get((room_type_id, rate_plan_id, date))
+            or self.date_rates.get((room_type_id, None, date))
+        )
+        if date_rate and date_rate.is_closed:
+            return None, season, f'Room type closed on {date}'
+        
+        # Calculate daily rate based on occupancy
+        if date_rate:
+            daily_rate = date_rate.rate
+            if adults > 2:
+                daily_rate += room_rate.extra_adult * (adults - 2)
+        elif adults <= 2:
+            daily_rate = room_rate.double_rate if adults == 2 else room_rate.single_rate
+        else:
+            daily_rate = room_rate.double_rate + (room_rate.extra_adult * (adults - 2))
         
-        for rule in rules:
-            # Apply rules based on trigger type
-            if rule.trigger_type == 'OCCUPANCY':
-                # Would need actual occupancy calculation
-                # For now, apply adjustment
-                base_rate = base_rate * (Decimal('1') + rule.adjustment_percent / 100)
-            elif rule.trigger_type == 'DAY_AHEAD':
-                # Calculate days until check-in
-                days_until = (date - datetime.now().date()).days
-                if rule.min_threshold <= days_until:
-                    if rule.max_threshold is None or days_until <= rule.max_threshold:
-                        base_rate = base_rate * (Decimal('1') + rule.adjustment_percent / 100)
-            elif rule.trigger_type == 'DEMAND':
-                # Would need demand calculation
-                pass
-        
-        return base_rate
+        if children > 0:
+            daily_rate += room_rate.extra_child * children
+        
+        # Apply yield management
+        daily_rate = self.apply_yield_rules(room_type_id, date, daily_rate)
+        
+        return daily_rate, season, None
     
-    @staticmethod
-    def _calculate_discounts(property_id, rate_plan_id, base_amount, nights, check_in_date):
+    def occupancy_for(self, date):
+        """
+        Property occupancy percentage for a night, read from the inventory ledger.
+        
+        The whole window is loaded with one grouped query on first use.
+        """
+        if self._occupancy is None:
+            from apps.reservations.models import RoomTypeInventory
+            from apps.rooms.models import Room
+            
+            total_rooms = Room.objects.filter(hotel_id=self.property_id, is_active=True).count()
+            sold = RoomTypeInventory.objects.filter(
+                hotel_id=self.property_id,
+                date__gte=self.start_date,
+                date__lt=self.end_date
+            ).values('date').annotate(sold=Sum('rooms_sold'))
+            self._occupancy = {
+                row['date']: (row['sold'] * 100 / total_rooms) if total_rooms else 0
+                for row in sold
+            }
+        return self._occupancy.get(date, 0)
+    
+    def pickup_for(self, date):
+        """
+        Rooms booked for a night within the last PICKUP_DAYS days.
+        
+        The window is counted in whole days up to the start of today, so
+        pickup (like DAY_AHEAD lead time) only moves when the date does or a
+        booking changes.
+        
+        Recent bookings are loaded with one interval query on first use and
+        expanded per night with a difference array.
+        """
+        if self._pickup is None:
+            from apps.reservations.models import ReservationRoom
+            from apps.reservations.services import InventoryService
+            
+            days = (self.end_date - self.start_date).days
+            diff = [0] * (days + 1)
+            stays = ReservationRoom.objects.filter(
+                reservation__hotel_id=self.property_id,
+                reservation__status__in=InventoryService.HOLDING_STATUSES,
+                reservation__created_at__gte=timezone.now().replace(
+                    hour=0, minute=0, second=0, microsecond=0
+                ) - timedelta(days=self.PICKUP_DAYS),
+                reservation__check_in_date__lt=self.end_date,
+                reservation__check_out_date__gt=self.start_date
+            ).values_list('reservation__check_in_date', 'reservation__check_out_date')
+            for check_in, check_out in stays:
+                diff[max((check_in - self.start_date).days, 0)] += 1
+                diff[min((check_out - self.start_date).days, days)] -= 1
+            
+            self._pickup = {}
+            running = 0
+            for offset in range(days):
+                running += diff[offset]
+                self._pickup[self.start_date + timedelta(days=offset)] = running
+        return self._pickup.get(date, 0)
+    
+    def apply_yield_rules(self, room_type_id, date, base_rate):
+        """Apply yield management rules to adjust pricing."""
+        metrics = {
+            YieldRule.TriggerType.DAY_AHEAD: lambda: (date - timezone.now().date()).days,
+            YieldRule.TriggerType.OCCUPANCY: lambda: self.occupancy_for(date),
+            YieldRule.TriggerType.DEMAND: lambda: self.pickup_for(date),
+        }
+        return self.yield_table.apply(base_rate, metrics)
+    
+    def calculate_discounts(self, base_amount, nights, check_in_date):
         """Calculate applicable discounts."""
         discount_amount = Decimal('0')
         discount_details = []
         
-        # Get applicable discounts
-        discounts = Discount.objects.filter(
-            property_id=property_id,
-            is_active=True,
-            valid_from__lte=check_in_date,
-            valid_to__gte=check_in_date
-        )
-        
-        for discount in discounts:
-            amount = Decimal('0')
-            applies = False
+        for discount in self.discounts:
+            if not discount.valid_from <= check_in_date <= discount.valid_to:
+                continue
             
             # Check if discount applies
             if discount.min_nights and nights < discount.min_nights:
@@ -191,46 +356,50 @@ class PricingService:
             # Calculate discount
             if discount.discount_type == 'PERCENTAGE':
                 amount = base_amount * (discount.value / 100)
-                applies = True
             elif discount.discount_type == 'FIXED':
                 amount = discount.value
-                applies = True
+            else:
+                continue
             
-            if applies:
-                discount_amount += amount
-                discount_details.append({
-                    'name': discount.name,
-                    'type': discount.discount_type,
-                    'amount': float(amount)
-                })
+            discount_amount += amount
+            discount_details.append({
+                'name': discount.name,
+                'type': discount.discount_type,
+                'amount': float(amount)
+            })
         
         return discount_amount, discount_details
     
-    @staticmethod
-    def _apply_packages(rate_plan_id, nights):
-        """Apply package additions."""
-        # Packages functionality can be added later
-        # For now, return empty values
-        package_value = Decimal('0')
-        package_details = []
+    def nightly_discount(self, rate, date):
+        """
+        Discount on one night's sell rate (channel pushes, rate grid).
         
-        return package_value, package_details
-    
-    @staticmethod
-    def get_rate_comparison(room_type_id, check_in_date, check_out_date, property_id):
-        """Compare rates across all available rate plans."""
-        rate_plans = RatePlan.objects.filter(
-            property_id=property_id,
-            is_active=True
+        Only percentage discounts without a minimum stay scale per night;
+        fixed and minimum-stay discounts depend on the whole stay and are
+        left to price_stay().
+        """
+        return sum(
+            (
+                rate * (discount.value / 100)
+                for discount in self.discounts
+                if discount.discount_type == 'PERCENTAGE'
+                and (discount.min_nights or 1) <= 1
+                and discount.valid_from <= date <= discount.valid_to
+            ),
+            Decimal('0')
         )
-        
+    
+    def compare(self, room_type_id, check_in_date, check_out_date, adults=1, children=0):
+        """Compare rates across all loaded rate plans, cheapest first."""
         comparisons = []
-        for rate_plan in rate_plans:
-            pricing = PricingService.calculate_room_rate(
-                room_type_id, 
-                rate_plan.id, 
-                check_in_date, 
-                check_out_date
+        for rate_plan in self.rate_plans.values():
+            pricing = self.price_stay(
+                room_type_id,
+                rate_plan.id,
+                check_in_date,
+                check_out_date,
+                adults,
+                children
             )
             
             if 'error' not in pricing:
@@ -249,3 +418,180 @@ class PricingService:
         comparisons.sort(key=lambda x: x['total_amount'])
         
         return comparisons
+
+
+class RateGridService:
+    """
+    Precomputed best-available-rate grid cached per room type, rate plan and date.
+    
+    Each cell holds the pre-tax price of one night for two adults, after
+    yield rules and discounts. Cells are invalidated individually when the
+    rates, seasons, discounts or yield rules behind them change, and are
+    recomputed lazily on the next read.
+    
+    Lead-time (DAY_AHEAD) and pickup (DEMAND) prices also depend on today's
+    date, so keys include the business date: the first read after the date
+    rolls over recomputes the cell, and the previous day's cells just expire.
+    RATE_GRID_TIMEOUT is only a safety net.
+    """
+    
+    KEY_PREFIX = 'rate_grid'
+    NO_RATE = ''
+    
+    @staticmethod
+    def business_date():
+        """Date the cells are priced on (as used by DAY_AHEAD yield rules)."""
+        return timezone.now().date()
+    
+    @staticmethod
+    def cell_key(room_type_id, rate_plan_id, date, business_date=None):
+        """Cache key of one grid cell."""
+        business_date = business_date or RateGridService.business_date()
+        return (
+            f"{RateGridService.KEY_PREFIX}:{business_date.isoformat()}:"
+            f"{room_type_id}:{rate_plan_id}:{date.isoformat()}"
+        )
+    
+    @staticmethod
+    def horizon():
+        """Dates covered by the grid: [today, today + RATE_GRID_DAYS)."""
+        start_date = RateGridService.business_date()
+        return start_date, start_date + timedelta(days=settings.RATE_GRID_DAYS)
+    
+    @staticmethod
+    def _clip(start_date, end_date):
+        """Clip a date range to the grid horizon."""
+        horizon_start, horizon_end = RateGridService.horizon()
+        start_date = max(start_date or horizon_start, horizon_start)
+        end_date = min(end_date or horizon_end, horizon_end)
+        return start_date, end_date
+    
+    @staticmethod
+    def _axes(property_id, room_type_ids=None, rate_plan_ids=None):
+        """Room type and rate plan IDs of a property, optionally narrowed."""
+        room_types = RoomType.objects.filter(hotel_id=property_id, is_active=True)
+        rate_plans = RatePlan.objects.filter(property_id=property_id, is_active=True)
+        if room_type_ids is not None:
+            room_types = room_types.filter(id__in=room_type_ids)
+        if rate_plan_ids is not None:
+            rate_plans = rate_plans.filter(id__in=rate_plan_ids)
+        return list(room_types.values_list('id', flat=True)), list(rate_plans)
+    
+    @staticmethod
+    def _cell_value(engine, room_type_id, rate_plan_id, date):
+        """Compute the cached value of one cell."""
+        rate, season, error = engine.resolve_night(room_type_id, rate_plan_id, date, adults=2)
+        if error:
+            return RateGridService.NO_RATE
+        return str((rate - engine.nightly_discount(rate, date)).quantize(Decimal('0.01')))
+    
+    @staticmethod
+    def build(property_id, start_date=None, end_date=None, room_type_ids=None, rate_plan_ids=None):
+        """
+        Compute and store grid cells for a property.
+        
+        Returns:
+            int: Number of cells written
+        """
+        start_date, end_date = RateGridService._clip(start_date, end_date)
+        if end_date <= start_date:
+            return 0
+        
+        type_ids, rate_plans = RateGridService._axes(property_id, room_type_ids, rate_plan_ids)
+        engine = RateEngine(property_id, start_date, end_date, room_type_ids=type_ids, rate_plans=rate_plans)
+        
+        business_date = RateGridService.business_date()
+        cells = {}
+        current_date = start_date
+        while current_date < end_date:
+            for room_type_id in type_ids:
+                for rate_plan in rate_plans:
+                    cells[RateGridService.cell_key(room_type_id, rate_plan.id, current_date, business_date)] = (
+                        RateGridService._cell_value(engine, room_type_id, rate_plan.id, current_date)
+                    )
+            current_date += timedelta(days=1)
+        
+        cache.set_many(cells, timeout=settings.RATE_GRID_TIMEOUT)
+        return len(cells)
+    
+    @staticmethod
+    def invalidate(property_id, start_date=None, end_date=None, room_type_ids=None, rate_plan_ids=None):
+        """
+        Drop the affected grid cells once the current transaction commits.
+        
+        Args:
+            property_id: Property ID
+            start_date: First affected date (defaults to the horizon start)
+            end_date: Day after the last affected date (defaults to the horizon end)
+            room_type_ids: Affected room types (defaults to all)
+            rate_plan_ids: Affected rate plans (defaults to all)
+        """
+        start_date, end_date = RateGridService._clip(start_date, end_date)
+        if end_date <= start_date:
+            return
+        
+        type_ids, rate_plans = RateGridService._axes(property_id, room_type_ids, rate_plan_ids)
+        business_date = RateGridService.business_date()
+        keys = [
+            RateGridService.cell_key(room_type_id, rate_plan.id, start_date + timedelta(days=offset), business_date)
+            for offset in range((end_date - start_date).days)
+            for room_type_id in type_ids
+            for rate_plan in rate_plans
+        ]
+        if keys:
+            transaction.on_commit(lambda: cache.delete_many(keys))
+    
+    @staticmethod
+    def get_rates(property_id, room_type_id, date, rate_plan_ids=None):
+        """
+        Read the grid cells of one room type and date, filling any misses.
+        
+        Returns:
+            dict: {rate_plan_id: Decimal rate or None when not sellable}
+        """
+        if rate_plan_ids is None:
+            rate_plan_ids = list(RatePlan.objects.filter(
+                property_id=property_id, is_active=True
+            ).values_list('id', flat=True))
+        
+        business_date = RateGridService.business_date()
+        keys = {
+            RateGridService.cell_key(room_type_id, rate_plan_id, date, business_date): rate_plan_id
+            for rate_plan_id in rate_plan_ids
+        }
+        cells = cache.get_many(list(keys))
+        
+        missing = [rate_plan_id for key, rate_plan_id in keys.items() if key not in cells]
+        if missing:
+            RateGridService.build(
+                property_id, date, date + timedelta(days=1),
+                room_type_ids=[room_type_id], rate_plan_ids=missing
+            )
+            cells.update(cache.get_many([
+                RateGridService.cell_key(room_type_id, rate_plan_id, date, business_date) for rate_plan_id in missing
+            ]))
+        
+        return {
+            rate_plan_id: Decimal(cells[key]) if cells.get(key) else None
+            for key, rate_plan_id in keys.items()
+        }
+    
+    @staticmethod
+    def get_best_rate(property_id, room_type_id, date, rate_plan_ids=None):
+        """Get the lowest sellable nightly rate for a room type and date (or None)."""
+        rates = [
+            rate for rate in RateGridService.get_rates(property_id, room_type_id, date, rate_plan_ids).values()
+            if rate is not None
+        ]
+        return min(rates) if rates else None
+    
+    @staticmethod
+    def invalidate_for_inventory(property_id, start_date, end_date):
+        """Drop cells priced by occupancy or demand rules when inventory changes."""
+        demand_priced = YieldRule.objects.filter(
+            property_id=property_id,
+            is_active=True,
+            trigger_type__in=[YieldRule.TriggerType.OCCUPANCY, YieldRule.TriggerType.DEMAND]
+        ).exists()
+        if demand_priced:
+            RateGridService.invalidate(property_id, start_date, end_date)
@@ -0,0 +1,84 @@
+from datetime import timedelta
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .models import Season, RoomRate, DateRate, Discount, YieldRule
+from .services import RateGridService
+
+
+def _remember_previous(sender, instance, *fields):
+    """Stash the stored values of fields whose old range must also be invalidated."""
+    instance._grid_previous = (
+        sender.objects.filter(pk=instance.pk).values(*fields).first() if instance.pk else None
+    )
+
+
+@receiver(pre_save, sender=Season)
+def remember_season_dates(sender, instance, **kwargs):
+    _remember_previous(sender, instance, 'start_date', 'end_date')
+
+
+@receiver(pre_save, sender=Discount)
+def remember_discount_dates(sender, instance, **kwargs):
+    _remember_previous(sender, instance, 'valid_from', 'valid_to')
+
+
+@receiver(pre_save, sender=DateRate)
+def remember_date_rate_date(sender, instance, **kwargs):
+    _remember_previous(sender, instance, 'date')
+
+
+@receiver([post_save, post_delete], sender=RoomRate)
+def invalidate_grid_for_room_rate(sender, instance, **kwargs):
+    """A room rate affects its room type and rate plan across the horizon."""
+    RateGridService.invalidate(
+        instance.rate_plan.property_id,
+        room_type_ids=[instance.room_type_id],
+        rate_plan_ids=[instance.rate_plan_id]
+    )
+
+
+@receiver([post_save, post_delete], sender=DateRate)
+def invalidate_grid_for_date_rate(sender, instance, **kwargs):
+    """A date rate affects one night of its room type (and rate plan, if set)."""
+    previous = getattr(instance, '_grid_previous', None)
+    dates = {instance.date}
+    if previous:
+        dates.add(previous['date'])
+    
+    property_id = instance.room_type.hotel_id
+    for date in dates:
+        RateGridService.invalidate(
+            property_id, date, date + timedelta(days=1),
+            room_type_ids=[instance.room_type_id],
+            rate_plan_ids=[instance.rate_plan_id] if instance.rate_plan_id else None
+        )
+
+
+@receiver([post_save, post_delete], sender=Season)
+def invalidate_grid_for_season(sender, instance, **kwargs):
+    """A season affects every cell of its property inside its old and new dates."""
+    ranges = [(instance.start_date, instance.end_date)]
+    previous = getattr(instance, '_grid_previous', None)
+    if previous:
+        ranges.append((previous['start_date'], previous['end_date']))
+    
+    for start_date, end_date in ranges:
+        RateGridService.invalidate(instance.property_id, start_date, end_date + timedelta(days=1))
+
+
+@receiver([post_save, post_delete], sender=Discount)
+def invalidate_grid_for_discount(sender, instance, **kwargs):
+    """A discount affects every cell of its property inside its validity window."""
+    ranges = [(instance.valid_from, instance.valid_to)]
+    previous = getattr(instance, '_grid_previous', None)
+    if previous:
+        ranges.append((previous['valid_from'], previous['valid_to']))
+    
+    for start_date, end_date in ranges:
+        RateGridService.invalidate(instance.property_id, start_date, end_date + timedelta(days=1))
+
+
+@receiver([post_save, post_delete], sender=YieldRule)
+def invalidate_grid_for_yield_rule(sender, instance, **kwargs):
+    """Yield rules can change any cell of their property."""
+    RateGridService.invalidate(instance.property_id)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import DailyStatistics, MonthlyStatistics, ReportTemplate, NightAudit, AuditLog
+from .models import DailyStatistics, MonthlyStatistics, ReportTemplate, ReportSnapshot, NightAudit, AuditLog
 
 
 @admin.register(DailyStatistics)
@@ -20,6 +20,13 @@ class ReportTemplateAdmin(admin.ModelAdmin):
     list_filter = ('report_type', 'is_scheduled')
 
 
+@admin.register(ReportSnapshot)
+class ReportSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('template', 'report_date', 'version', 'is_scheduled_run', 'emailed_at', 'created_at')
+    list_filter = ('is_scheduled_run', 'template__report_type')
+    readonly_fields = ('data',)
+
+
 class AuditLogInline(admin.TabularInline):
     model = AuditLog
     extra = 0
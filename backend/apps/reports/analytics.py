@@ -0,0 +1,266 @@
+"""
+Analytics Engine
+Vectorized time series over precomputed daily statistics
+"""
+
+from datetime import timedelta
+from typing import Any, Dict, Optional, Sequence
+import numpy as np
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from apps.reports.models import DailyStatistics
+from apps.reservations.models import Reservation
+
+
+class AnalyticsService:
+    """
+    Time series analytics backed by NumPy.
+
+    Every series is loaded with one grouped query into arrays indexed by
+    day, and all derived figures (rolling averages, last-year comparison,
+    pickup, forecast) are computed on the arrays, so a multi-year range
+    costs the same number of queries as a single week. Days without
+    statistics count as zero.
+    """
+
+    METRICS = ('revenue', 'room_revenue', 'occupancy', 'adr', 'revpar', 'rooms_sold', 'reservations')
+    LAST_YEAR_OFFSET = 364  # 52 weeks, so weekdays line up
+    PICKUP_LEAD_DAYS = (90, 60, 30, 14, 7, 3, 1, 0)
+    BOOKED_STATUSES = [
+        Reservation.Status.PENDING,
+        Reservation.Status.CONFIRMED,
+        Reservation.Status.CHECKED_IN,
+        Reservation.Status.CHECKED_OUT,
+    ]
+
+    # ===== Loading =====
+
+    @staticmethod
+    def _scatter(rows, start, days: int, columns: int) -> np.ndarray:
+        """Place (date, value...) rows into a (columns, days) array of zeros"""
+        values = np.zeros((columns, days))
+        rows = list(rows)
+        if rows:
+            index = np.fromiter(((row[0] - start).days for row in rows), dtype=np.int64, count=len(rows))
+            values[:, index] = np.array([row[1:] for row in rows], dtype=float).T
+        return values
+
+    @classmethod
+    def load_statistics(cls, property_id, start, end) -> Dict[str, np.ndarray]:
+        """
+        Daily totals from start to end (inclusive), summed across properties
+        when property_id is None
+
+        Returns:
+            dict: rooms_sold, total_rooms, room_revenue, revenue arrays
+        """
+        stats = DailyStatistics.objects.filter(date__gte=start, date__lte=end)
+        if property_id:
+            stats = stats.filter(property_id=property_id)
+        rows = stats.values('date').annotate(
+            sold=Sum('rooms_sold'),
+            rooms=Sum('total_rooms'),
+            room_rev=Sum('room_revenue'),
+            revenue=Sum('total_revenue'),
+        ).values_list('date', 'sold', 'rooms', 'room_rev', 'revenue')
+        sold, rooms, room_revenue, revenue = cls._scatter(rows, start, (end - start).days + 1, 4)
+        return {'rooms_sold': sold, 'total_rooms': rooms, 'room_revenue': room_revenue, 'revenue': revenue}
+
+    @classmethod
+    def load_bookings(cls, property_id, start, end) -> np.ndarray:
+        """Reservations created per day from start to end (inclusive)"""
+        reservations = Reservation.objects.filter(created_at__date__gte=start, created_at__date__lte=end)
+        if property_id:
+            reservations = reservations.filter(hotel_id=property_id)
+        rows = reservations.annotate(day=TruncDate('created_at')).values('day').annotate(
+            count=Count('id')
+        ).values_list('day', 'count')
+        return cls._scatter(rows, start, (end - start).days + 1, 1)[0]
+
+    @classmethod
+    def load_metric(cls, property_id, metric: str, start, end) -> np.ndarray:
+        """Daily values of one metric"""
+        if metric == 'reservations':
+            return cls.load_bookings(property_id, start, end)
+        return cls.derive(cls.load_statistics(property_id, start, end), metric)
+
+    @staticmethod
+    def derive(series: Dict[str, np.ndarray], metric: str) -> np.ndarray:
+        """Compute a metric from loaded daily totals"""
+        def ratio(numerator, denominator, scale=1.0):
+            out = np.zeros_like(numerator)
+            np.divide(numerator * scale, denominator, out=out, where=denominator > 0)
+            return out
+
+        if metric == 'occupancy':
+            return ratio(series['rooms_sold'], series['total_rooms'], 100.0)
+        if metric == 'adr':
+            return ratio(series['room_revenue'], series['rooms_sold'])
+        if metric == 'revpar':
+            return ratio(series['room_revenue'], series['total_rooms'])
+        return series[metric]
+
+    # ===== Series =====
+
+    @staticmethod
+    def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+        """Trailing mean over `window` days; the first days average what is available"""
+        window = max(int(window), 1)
+        sums = np.cumsum(np.insert(values, 0, 0.0))
+        ends = np.arange(1, len(values) + 1)
+        starts = np.maximum(ends - window, 0)
+        return (sums[ends] - sums[starts]) / (ends - starts)
+
+    @classmethod
+    def series(cls, property_id, metric: str, start, end, window: int = 7) -> Dict[str, Any]:
+        """
+        A metric with its rolling average and the same weekdays a year earlier
+
+        The current and last-year ranges are read with one query.
+
+        Returns:
+            dict: dates, values, rolling_average, last_year arrays
+        """
+        days = (end - start).days + 1
+        offset = cls.LAST_YEAR_OFFSET
+        values = cls.load_metric(property_id, metric, start - timedelta(days=offset), end)
+        current = values[-days:]
+        # values[i] is the day `offset` days before current[i]
+        previous = values[:days]
+        return {
+            'dates': [start + timedelta(days=i) for i in range(days)],
+            'values': current,
+            'rolling_average': cls.rolling_mean(values, window)[-days:],
+            'last_year': previous,
+        }
+
+    @staticmethod
+    def summarize(values: np.ndarray, last_year: Optional[np.ndarray] = None) -> Dict[str, float]:
+        """Totals and extremes of a series, with change against last year"""
+        total = float(values.sum())
+        summary = {
+            'total': round(total, 2),
+            'average': round(float(values.mean()), 2) if len(values) else 0,
+            'max': round(float(values.max()), 2) if len(values) else 0,
+            'min': round(float(values.min()), 2) if len(values) else 0,
+        }
+        if last_year is not None:
+            previous = float(last_year.sum())
+            summary['last_year_total'] = round(previous, 2)
+            summary['change_percent'] = round((total - previous) / previous * 100, 1) if previous else None
+        return summary
+
+    # ===== Pickup =====
+
+    @classmethod
+    def pickup_curve(cls, property_id, start, end, lead_days: Sequence[int] = None) -> list:
+        """
+        Average rooms on the books per stay date by days before arrival
+
+        Reservation nights are expanded in arrays from one query over the
+        stay intervals; rooms booked at least `lead` days before a night are
+        on the books for that lead.
+
+        Returns:
+            list: [{'days_before', 'rooms_on_books', 'percent_of_final'}, ...]
+        """
+        lead_days = sorted(lead_days or cls.PICKUP_LEAD_DAYS, reverse=True)
+        days = (end - start).days + 1
+        reservations = Reservation.objects.filter(
+            status__in=cls.BOOKED_STATUSES,
+            check_in_date__lte=end,
+            check_out_date__gt=start
+        )
+        if property_id:
+            reservations = reservations.filter(hotel_id=property_id)
+        rows = list(reservations.annotate(room_count=Count('rooms')).values_list(
+            'created_at', 'check_in_date', 'check_out_date', 'room_count'
+        ))
+        if not rows:
+            return [{'days_before': lead, 'rooms_on_books': 0.0, 'percent_of_final': 0.0} for lead in lead_days]
+
+        origin = start.toordinal()
+        booked = np.array([timezone.localtime(row[0]).date().toordinal() - origin for row in rows])
+        arrival = np.array([row[1].toordinal() - origin for row in rows])
+        nights = np.array([(row[2] - row[1]).days for row in rows])
+        rooms = np.maximum(np.array([row[3] for row in rows], dtype=float), 1)
+
+        # One entry per reserved night
+        owner = np.repeat(np.arange(len(rows)), nights)
+        first_night = np.repeat(np.cumsum(nights) - nights, nights)
+        night = arrival[owner] + np.arange(len(owner)) - first_night
+        in_range = (night >= 0) & (night < days)
+        owner, night = owner[in_range], night[in_range]
+        lead = night - booked[owner]
+        weight = rooms[owner]
+
+        final = np.bincount(night, weights=weight, minlength=days).mean()
+        curve = []
+        for days_before in lead_days:
+            on_books = np.bincount(
+                night[lead >= days_before], weights=weight[lead >= days_before], minlength=days
+            ).mean()
+            curve.append({
+                'days_before': days_before,
+                'rooms_on_books': round(float(on_books), 2),
+                'percent_of_final': round(float(on_books / final * 100), 1) if final else 0.0,
+            })
+        return curve
+
+    # ===== Forecast =====
+
+    @classmethod
+    def forecast(cls, property_id, today, metric: str = 'revenue', days: int = 30,
+                 history_days: int = 365) -> Dict[str, Any]:
+        """
+        Seasonal forecast: a linear trend scaled by day-of-week factors
+
+        Fitted on the history before `today`; days without statistics are
+        left out of the fit.
+
+        Returns:
+            dict: dates, values, lower, upper arrays plus base_average,
+                trend_per_day, weekday_factors and confidence
+        """
+        history_start = today - timedelta(days=history_days)
+        history = cls.load_metric(property_id, metric, history_start, today - timedelta(days=1))
+        t = np.arange(history_days)
+        weekday = (history_start.weekday() + t) % 7
+        future_t = np.arange(history_days, history_days + days)
+        future_weekday = (history_start.weekday() + future_t) % 7
+        observed = history != 0
+
+        if observed.sum() >= 2:
+            slope, intercept = np.polyfit(t[observed], history[observed], 1)
+        else:
+            slope, intercept = 0.0, float(history[observed].mean()) if observed.any() else 0.0
+        trend = intercept + slope * t
+
+        # Mean ratio to trend per weekday, normalised so a week averages 1
+        factors = np.ones(7)
+        usable = observed & (trend > 0)
+        if usable.any():
+            ratios = history[usable] / trend[usable]
+            sums = np.bincount(weekday[usable], weights=ratios, minlength=7)
+            counts = np.bincount(weekday[usable], minlength=7)
+            factors = np.divide(sums, counts, out=np.ones(7), where=counts > 0)
+            factors = factors / factors.mean()
+
+        fitted = trend * factors[weekday]
+        spread = float(np.std(history[observed] - fitted[observed])) if observed.any() else 0.0
+        values = np.maximum((intercept + slope * future_t) * factors[future_weekday], 0)
+
+        base = float(history[observed].mean()) if observed.any() else 0.0
+        variation = spread / base if base else 1.0
+        confidence = 'high' if variation < 0.15 else 'medium' if variation < 0.35 else 'low'
+        return {
+            'dates': [today + timedelta(days=i) for i in range(days)],
+            'values': values,
+            'lower': np.maximum(values - 1.96 * spread, 0),
+            'upper': values + 1.96 * spread,
+            'base_average': base,
+            'trend_per_day': float(slope),
+            'weekday_factors': factors,
+            'confidence': confidence,
+        }
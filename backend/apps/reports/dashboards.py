@@ -0,0 +1,321 @@
+"""
+Dashboard Metrics Service
+Operational dashboards computed with one aggregate query per model and cached per property
+"""
+
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q, F, Avg, Count, Sum, DurationField, ExpressionWrapper
+from django.utils import timezone
+from apps.billing.models import Payment
+from apps.frontdesk.models import CheckIn, CheckOut, RoomMove, WalkIn
+from apps.housekeeping.models import HousekeepingTask, RoomInspection, LinenInventory, AmenityInventory
+from apps.maintenance.models import MaintenanceRequest, Asset
+from apps.reports.models import DailyStatistics
+from apps.reservations.models import Reservation
+from apps.rooms.models import Room
+
+
+class DashboardService:
+    """
+    Metrics behind the staff dashboards.
+
+    Each dashboard issues a single conditional aggregate per model and the
+    result is cached per (dashboard, property, business date) for
+    DASHBOARD_CACHE_TTL seconds, so every device polling the same property
+    shares one computation. Saves and deletes of the models a dashboard
+    reads drop its cached copy (see apps.reports.signals); bulk
+    ``update()`` calls bypass signals and are picked up when the TTL lapses.
+    """
+
+    FRONT_DESK = 'frontdesk'
+    ROOMS = 'rooms'
+    HOUSEKEEPING = 'housekeeping'
+    MAINTENANCE = 'maintenance'
+    REPORTS = 'reports'
+
+    # Dashboards fed by each model
+    DEPENDENCIES = {
+        Room: [FRONT_DESK, ROOMS, HOUSEKEEPING, REPORTS],
+        Reservation: [FRONT_DESK, ROOMS, REPORTS],
+        CheckIn: [FRONT_DESK],
+        CheckOut: [FRONT_DESK],
+        RoomMove: [FRONT_DESK],
+        WalkIn: [FRONT_DESK],
+        HousekeepingTask: [HOUSEKEEPING],
+        RoomInspection: [HOUSEKEEPING],
+        LinenInventory: [HOUSEKEEPING],
+        AmenityInventory: [HOUSEKEEPING],
+        MaintenanceRequest: [MAINTENANCE],
+        Asset: [MAINTENANCE],
+        DailyStatistics: [REPORTS],
+        Payment: [REPORTS],
+    }
+
+    OPEN_REQUEST_STATUSES = [
+        MaintenanceRequest.Status.PENDING,
+        MaintenanceRequest.Status.ASSIGNED,
+        MaintenanceRequest.Status.IN_PROGRESS,
+    ]
+    UNSTARTED_REQUEST_STATUSES = [
+        MaintenanceRequest.Status.PENDING,
+        MaintenanceRequest.Status.ASSIGNED,
+    ]
+
+    # ===== Cache =====
+
+    @staticmethod
+    def cache_key(dashboard: str, property_id=None, business_date=None) -> str:
+        business_date = business_date or timezone.localdate()
+        return f'dashboard:{dashboard}:{property_id or "all"}:{business_date.isoformat()}'
+
+    @classmethod
+    def get(cls, dashboard: str, property_obj=None) -> dict:
+        """
+        Cached metrics of a dashboard
+
+        Args:
+            dashboard: One of FRONT_DESK, ROOMS, HOUSEKEEPING, MAINTENANCE, REPORTS
+            property_obj: Property to scope to, or None for all properties
+
+        Returns:
+            dict: Dashboard payload
+        """
+        today = timezone.localdate()
+        property_id = property_obj.pk if property_obj else None
+        key = cls.cache_key(dashboard, property_id, today)
+        data = cache.get(key)
+        if data is None:
+            compute = getattr(cls, dashboard)
+            data = compute(property_id, today)
+            cache.set(key, data, settings.DASHBOARD_CACHE_TTL)
+        return data
+
+    @classmethod
+    def invalidate(cls, dashboards, property_id=None):
+        """
+        Drop today's cached copies of dashboards for a property
+
+        The unscoped copy is dropped as well. Keys are deleted right away and
+        again after commit, so a poll racing the writing transaction cannot
+        keep its pre-commit numbers.
+        """
+        today = timezone.localdate()
+        keys = [
+            cls.cache_key(dashboard, scope, today)
+            for dashboard in dashboards
+            for scope in {property_id, None}
+        ]
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+    # ===== Dashboards =====
+
+    @staticmethod
+    def _scoped(queryset, lookup, property_id):
+        return queryset.filter(**{lookup: property_id}) if property_id else queryset
+
+    @classmethod
+    def _room_counts(cls, property_id) -> dict:
+        """Housekeeping status counts of active rooms"""
+        return cls._scoped(Room.objects.filter(is_active=True), 'hotel_id', property_id).aggregate(
+            total=Count('id'),
+            vacant_clean=Count('id', filter=Q(status=Room.RoomStatus.VACANT_CLEAN)),
+            vacant_dirty=Count('id', filter=Q(status=Room.RoomStatus.VACANT_DIRTY)),
+            occupied_clean=Count('id', filter=Q(status=Room.RoomStatus.OCCUPIED_CLEAN)),
+            occupied_dirty=Count('id', filter=Q(status=Room.RoomStatus.OCCUPIED_DIRTY)),
+            out_of_order=Count('id', filter=Q(status=Room.RoomStatus.OUT_OF_ORDER)),
+            out_of_service=Count('id', filter=Q(status=Room.RoomStatus.OUT_OF_SERVICE)),
+        )
+
+    @classmethod
+    def _reservation_counts(cls, property_id, today) -> dict:
+        """Today's arrivals and departures and the in-house count"""
+        return cls._scoped(Reservation.objects, 'hotel_id', property_id).aggregate(
+            arrivals=Count('id', filter=Q(
+                check_in_date=today,
+                status__in=[Reservation.Status.CONFIRMED, Reservation.Status.PENDING]
+            )),
+            confirmed_arrivals=Count('id', filter=Q(check_in_date=today, status=Reservation.Status.CONFIRMED)),
+            departures=Count('id', filter=Q(check_out_date=today, status=Reservation.Status.CHECKED_IN)),
+            in_house=Count('id', filter=Q(status=Reservation.Status.CHECKED_IN)),
+        )
+
+    @classmethod
+    def rooms(cls, property_id, today) -> dict:
+        """Room status breakdown with today's movements"""
+        rooms = cls._room_counts(property_id)
+        reservations = cls._reservation_counts(property_id, today)
+        return {
+            'date': today,
+            'rooms': {
+                'total': rooms['total'],
+                'vacant_clean': rooms['vacant_clean'],
+                'vacant_dirty': rooms['vacant_dirty'],
+                'occupied_clean': rooms['occupied_clean'],
+                'occupied_dirty': rooms['occupied_dirty'],
+                'out_of_order': rooms['out_of_order'],
+            },
+            'arrivals': reservations['arrivals'],
+            'departures': reservations['departures'],
+            'in_house': reservations['in_house'],
+        }
+
+    @classmethod
+    def frontdesk(cls, property_id, today) -> dict:
+        """Front desk activity; check-outs are counted through the stay they close"""
+        stays = cls._scoped(CheckIn.objects, 'room__hotel_id', property_id).aggregate(
+            check_ins=Count('id', filter=Q(check_in_time__date=today)),
+            check_outs=Count('id', filter=Q(check_out__check_out_time__date=today)),
+            expected_departures=Count('id', filter=Q(expected_check_out=today, check_out__isnull=True)),
+            in_house=Count('id', filter=Q(check_out__isnull=True)),
+        )
+        rooms = cls._room_counts(property_id)
+        reservations = cls._reservation_counts(property_id, today)
+        walk_ins = cls._scoped(WalkIn.objects, 'property_id', property_id).filter(
+            created_at__date=today
+        ).count()
+        room_moves = cls._scoped(RoomMove.objects, 'from_room__hotel_id', property_id).filter(
+            move_time__date=today
+        ).count()
+        return {
+            'total_check_ins_today': stays['check_ins'],
+            'total_check_outs_today': stays['check_outs'],
+            'expected_arrivals': reservations['confirmed_arrivals'],
+            'expected_departures': stays['expected_departures'],
+            'in_house_guests': stays['in_house'],
+            'available_rooms': rooms['vacant_clean'],
+            'occupied_rooms': rooms['occupied_clean'] + rooms['occupied_dirty'],
+            'dirty_rooms': rooms['vacant_dirty'] + rooms['occupied_dirty'],
+            'walk_ins_today': walk_ins,
+            'room_moves_today': room_moves,
+        }
+
+    @classmethod
+    def housekeeping(cls, property_id, today) -> dict:
+        """Task progress, inspection results, room condition and low stock"""
+        Status = HousekeepingTask.Status
+        tasks = cls._scoped(HousekeepingTask.objects, 'room__hotel_id', property_id).aggregate(
+            pending=Count('id', filter=Q(status=Status.PENDING)),
+            in_progress=Count('id', filter=Q(status=Status.IN_PROGRESS)),
+            completed_today=Count('id', filter=Q(
+                status__in=[Status.COMPLETED, Status.INSPECTED], completed_at__date=today
+            )),
+            inspecting_rooms=Count('room', distinct=True, filter=Q(
+                task_type=HousekeepingTask.TaskType.INSPECTION,
+                status__in=[Status.PENDING, Status.IN_PROGRESS]
+            )),
+        )
+        inspections = cls._scoped(RoomInspection.objects, 'room__hotel_id', property_id).filter(
+            inspection_date__date=today
+        ).aggregate(
+            total=Count('id'),
+            failed=Count('id', filter=Q(passed=False)),
+        )
+        rooms = cls._room_counts(property_id)
+        low_linen = cls._scoped(LinenInventory.objects, 'hotel_id', property_id).filter(
+            reorder_level__gte=(
+                F('quantity_total') - F('quantity_in_use') - F('quantity_in_laundry') - F('quantity_damaged')
+            )
+        ).count()
+        low_amenities = cls._scoped(AmenityInventory.objects, 'hotel_id', property_id).filter(
+            quantity__lte=F('reorder_level')
+        ).count()
+        return {
+            'pending_tasks': tasks['pending'],
+            'in_progress_tasks': tasks['in_progress'],
+            'completed_today': tasks['completed_today'],
+            'inspections_today': inspections['total'],
+            'failed_inspections': inspections['failed'],
+            'clean_rooms': rooms['vacant_clean'] + rooms['occupied_clean'],
+            'dirty_rooms': rooms['vacant_dirty'] + rooms['occupied_dirty'],
+            'inspecting_rooms': tasks['inspecting_rooms'],
+            'out_of_order_rooms': rooms['out_of_order'] + rooms['out_of_service'],
+            'low_stock_items': low_linen + low_amenities,
+        }
+
+    @classmethod
+    def maintenance(cls, property_id, today) -> dict:
+        """Request backlog (overdue: emergency > 1h, high > 24h), assets and resolution time"""
+        now = timezone.now()
+        requests = cls._scoped(MaintenanceRequest.objects, 'property_id', property_id).aggregate(
+            pending=Count('id', filter=Q(status=MaintenanceRequest.Status.PENDING)),
+            assigned=Count('id', filter=Q(status=MaintenanceRequest.Status.ASSIGNED)),
+            in_progress=Count('id', filter=Q(status=MaintenanceRequest.Status.IN_PROGRESS)),
+            completed_today=Count('id', filter=Q(
+                status=MaintenanceRequest.Status.COMPLETED, completed_at__date=today
+            )),
+            emergency=Count('id', filter=Q(
+                priority=MaintenanceRequest.Priority.EMERGENCY,
+                status__in=cls.OPEN_REQUEST_STATUSES
+            )),
+            overdue=Count('id', filter=Q(status__in=cls.UNSTARTED_REQUEST_STATUSES) & (
+                Q(priority=MaintenanceRequest.Priority.EMERGENCY, created_at__lt=now - timedelta(hours=1))
+                | Q(priority=MaintenanceRequest.Priority.HIGH, created_at__lt=now - timedelta(days=1))
+            )),
+            avg_resolution=Avg(
+                ExpressionWrapper(F('completed_at') - F('started_at'), output_field=DurationField()),
+                filter=Q(
+                    status=MaintenanceRequest.Status.COMPLETED,
+                    started_at__isnull=False,
+                    completed_at__isnull=False
+                )
+            ),
+        )
+        assets = cls._scoped(Asset.objects.filter(is_active=True), 'property_id', property_id).aggregate(
+            total=Count('id'),
+            due_maintenance=Count('id', filter=Q(next_maintenance__lte=today)),
+            under_warranty=Count('id', filter=Q(warranty_expiry__gte=today)),
+        )
+        avg_resolution = requests['avg_resolution']
+        return {
+            'pending_requests': requests['pending'],
+            'assigned_requests': requests['assigned'],
+            'in_progress_requests': requests['in_progress'],
+            'completed_today': requests['completed_today'],
+            'emergency_requests': requests['emergency'],
+            'overdue_requests': requests['overdue'],
+            'total_assets': assets['total'],
+            'assets_due_maintenance': assets['due_maintenance'],
+            'assets_under_warranty': assets['under_warranty'],
+            'avg_resolution_hours': round(avg_resolution.total_seconds() / 3600, 2) if avg_resolution else 0,
+        }
+
+    @classmethod
+    def reports(cls, property_id, today) -> dict:
+        """Today's statistics once the night audit has stored them, live figures until then"""
+        stats = cls._scoped(DailyStatistics.objects, 'property_id', property_id).filter(date=today).first()
+        if stats:
+            return {
+                'date': stats.date,
+                'total_rooms': stats.total_rooms,
+                'rooms_sold': stats.rooms_sold,
+                'occupancy_percent': float(stats.occupancy_percent),
+                'arrivals': stats.arrivals,
+                'departures': stats.departures,
+                'in_house': stats.in_house,
+                'adr': float(stats.adr),
+                'revpar': float(stats.revpar),
+                'room_revenue': float(stats.room_revenue),
+                'fb_revenue': float(stats.fb_revenue),
+                'total_revenue': float(stats.total_revenue),
+            }
+
+        rooms = cls._room_counts(property_id)
+        reservations = cls._reservation_counts(property_id, today)
+        revenue = cls._scoped(Payment.objects, 'folio__reservation__hotel_id', property_id).filter(
+            payment_date__date=today,
+            status=Payment.Status.COMPLETED
+        ).aggregate(total=Sum('amount'))['total'] or 0
+        occupancy = (reservations['in_house'] / rooms['total'] * 100) if rooms['total'] else 0
+        return {
+            'date': today,
+            'total_rooms': rooms['total'],
+            'occupied': reservations['in_house'],
+            'occupancy_percent': round(occupancy, 1),
+            'arrivals': reservations['confirmed_arrivals'],
+            'departures': reservations['departures'],
+            'revenue': float(revenue),
+        }
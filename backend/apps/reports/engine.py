@@ -0,0 +1,498 @@
+"""
+Report Engine
+Runs report templates into stored, versioned snapshots
+"""
+
+import csv
+import io
+import logging
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.db.models import Count, F, Max, Prefetch, Q, Sum
+from django.utils import timezone
+from apps.reports.analytics import AnalyticsService
+from apps.reports.forecast import ForecastService
+from apps.reports.models import DailyStatistics, ReportSnapshot, ReportTemplate
+from apps.reservations.models import Reservation, ReservationRoom
+
+logger = logging.getLogger(__name__)
+
+
+class ReportEngine:
+    """
+    Build report templates into snapshots and serve views from them.
+
+    A run stores the report's rows as JSON on a ReportSnapshot, together
+    with CSV and PDF renderings in the default storage backend. Views read
+    the latest snapshot of the requested date instead of recomputing the
+    report, so the morning rush is served from what the scheduler built
+    off-peak. Every run adds a new version; older versions beyond
+    REPORT_SNAPSHOT_RETENTION are pruned.
+
+    Template config keys:
+        days: Days covered by range reports (default 30)
+        offset_days: Report date as days before today (default 1, the last
+            audited day, for historical reports and 0 for forecast and in-house)
+    """
+
+    BUILDERS = {
+        ReportTemplate.ReportType.DAILY: 'build_daily',
+        ReportTemplate.ReportType.OCCUPANCY: 'build_occupancy',
+        ReportTemplate.ReportType.REVENUE: 'build_revenue',
+        ReportTemplate.ReportType.FORECAST: 'build_forecast',
+        ReportTemplate.ReportType.PRODUCTION: 'build_production',
+        ReportTemplate.ReportType.IN_HOUSE: 'build_in_house',
+    }
+    FORMATS = {
+        'csv': 'text/csv',
+        'pdf': 'application/pdf',
+    }
+    DEFAULT_DAYS = 30
+    # Reports on days already lived; run at 04:00 today has barely started
+    HISTORICAL_TYPES = {
+        ReportTemplate.ReportType.DAILY,
+        ReportTemplate.ReportType.OCCUPANCY,
+        ReportTemplate.ReportType.REVENUE,
+        ReportTemplate.ReportType.PRODUCTION,
+    }
+
+    # ===== Running =====
+
+    @classmethod
+    def supports(cls, template: ReportTemplate) -> bool:
+        return template.report_type in cls.BUILDERS
+
+    @classmethod
+    def report_date(cls, template: ReportTemplate, today=None):
+        """Date a template reports on when run today"""
+        today = today or timezone.localdate()
+        default = 1 if template.report_type in cls.HISTORICAL_TYPES else 0
+        return today - timedelta(days=int(template.config.get('offset_days', default)))
+
+    @classmethod
+    def build(cls, template: ReportTemplate, report_date) -> Dict[str, Any]:
+        """
+        Compute a template's report
+
+        Returns:
+            dict: title, report_type, report_date, columns [{'key', 'label'}],
+                rows [{key: value}] and summary {label: value}
+        """
+        builder = getattr(cls, cls.BUILDERS[template.report_type])
+        days = max(int(template.config.get('days', cls.DEFAULT_DAYS)), 1)
+        columns, rows, summary = builder(template.property_id, report_date, days)
+        return {
+            'title': template.name,
+            'report_type': template.report_type,
+            'report_date': report_date.isoformat(),
+            'property': template.property.name if template.property_id else None,
+            'columns': [{'key': key, 'label': label} for key, label in columns],
+            'rows': [{key: cls._clean(value) for key, value in row.items()} for row in rows],
+            'summary': {label: cls._clean(value) for label, value in summary.items()},
+        }
+
+    @classmethod
+    def run(cls, template: ReportTemplate, report_date=None, user=None, scheduled=False) -> ReportSnapshot:
+        """
+        Build a template and store the result as its next snapshot version
+
+        Raises:
+            ValueError: If the template's report type has no builder
+
+        Returns:
+            ReportSnapshot: The new snapshot
+        """
+        if not cls.supports(template):
+            raise ValueError(f'{template.get_report_type_display()} cannot be generated')
+        report_date = report_date or cls.report_date(template)
+        data = cls.build(template, report_date)
+
+        with transaction.atomic():
+            # Lock the template so concurrent runs get distinct versions
+            ReportTemplate.objects.select_for_update().filter(pk=template.pk).first()
+            version = (template.snapshots.aggregate(latest=Max('version'))['latest'] or 0) + 1
+            snapshot = ReportSnapshot.objects.create(
+                template=template,
+                report_date=report_date,
+                version=version,
+                data=data,
+                is_scheduled_run=scheduled,
+                generated_by=user,
+            )
+
+        base_name = f'{settings.REPORT_SNAPSHOT_DIR}/{template.pk}/{report_date:%Y%m%d}-v{version}'
+        snapshot.csv_file = default_storage.save(f'{base_name}.csv', ContentFile(cls.render_csv(data)))
+        try:
+            snapshot.pdf_file = default_storage.save(f'{base_name}.pdf', ContentFile(cls.render_pdf(data)))
+        except ImportError:
+            logger.warning("reportlab is not installed; report snapshots are stored without PDF")
+        snapshot.save(update_fields=['csv_file', 'pdf_file'])
+
+        cls.prune(template)
+        return snapshot
+
+    @staticmethod
+    def latest(template: ReportTemplate, report_date) -> Optional[ReportSnapshot]:
+        """Newest snapshot of a template for a report date"""
+        return template.snapshots.filter(report_date=report_date).order_by('-version').first()
+
+    @classmethod
+    def get_or_run(cls, template: ReportTemplate, report_date=None, user=None, refresh=False) -> ReportSnapshot:
+        """
+        Latest snapshot for the date, running the template only if there is
+        none yet (or a refresh is asked for)
+        """
+        report_date = report_date or cls.report_date(template)
+        snapshot = None if refresh else cls.latest(template, report_date)
+        return snapshot or cls.run(template, report_date, user=user)
+
+    @classmethod
+    def prune(cls, template: ReportTemplate) -> int:
+        """
+        Delete snapshots beyond the newest REPORT_SNAPSHOT_RETENTION versions
+
+        Returns:
+            int: Number of snapshots deleted
+        """
+        stale = list(template.snapshots.order_by('-version')[settings.REPORT_SNAPSHOT_RETENTION:])
+        for snapshot in stale:
+            for name in (snapshot.csv_file, snapshot.pdf_file):
+                if name:
+                    default_storage.delete(name)
+        ReportSnapshot.objects.filter(pk__in=[snapshot.pk for snapshot in stale]).delete()
+        return len(stale)
+
+    # ===== Scheduling =====
+
+    @classmethod
+    def due_templates(cls, now=None):
+        """
+        Scheduled templates whose run time has passed today and that have
+        not had a scheduled run yet today
+
+        Templates without a schedule time run at REPORT_DEFAULT_SCHEDULE_TIME.
+        """
+        now = timezone.localtime(now)
+        default_time = datetime.strptime(settings.REPORT_DEFAULT_SCHEDULE_TIME, '%H:%M').time()
+        start_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        run_today = ReportSnapshot.objects.filter(
+            is_scheduled_run=True, created_at__gte=start_of_day
+        ).values('template_id')
+
+        due_time = Q(schedule_time__lte=now.time())
+        if default_time <= now.time():
+            due_time |= Q(schedule_time__isnull=True)
+        return ReportTemplate.objects.filter(
+            due_time,
+            is_scheduled=True,
+            report_type__in=list(cls.BUILDERS),
+        ).exclude(pk__in=run_today).select_related('property')
+
+    @staticmethod
+    def unemailed(now=None):
+        """
+        Today's scheduled snapshots whose email has not gone out to anyone
+        (e.g. the mail server was down), to be retried without re-running
+        the report
+        """
+        start_of_day = timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0)
+        return ReportSnapshot.objects.filter(
+            is_scheduled_run=True,
+            emailed_at__isnull=True,
+            created_at__gte=start_of_day,
+        ).exclude(template__email_recipients='')
+
+    @classmethod
+    def email(cls, snapshot: ReportSnapshot) -> int:
+        """
+        Send a snapshot to its template's recipients
+
+        Messages are sent one at a time over shared connections (see
+        NotificationDispatcher.deliver) and every attempt is logged.
+        emailed_at is set once any recipient got the report.
+
+        Returns:
+            int: Number of messages sent
+        """
+        from apps.notifications.models import EmailLog
+        from apps.notifications.services import NotificationDispatcher, email_service
+
+        template = snapshot.template
+        recipients = template.get_recipient_list()
+        if not recipients:
+            return 0
+
+        subject = f"{template.name} - {snapshot.report_date:%Y-%m-%d}"
+        body = cls.render_text(snapshot.data)
+        attachments = [
+            (name.rsplit('/', 1)[-1], default_storage.open(name, 'rb').read(), cls.FORMATS[name.rsplit('.', 1)[-1]])
+            for name in (snapshot.csv_file, snapshot.pdf_file) if name
+        ]
+        messages = [
+            EmailMessage(subject, body, email_service.from_email, [recipient], attachments=attachments)
+            for recipient in recipients
+        ]
+        logs = [
+            EmailLog(
+                to_email=recipient, subject=subject[:255], body=body,
+                related_object_type='report_snapshot', related_object_id=snapshot.pk
+            )
+            for recipient in recipients
+        ]
+
+        sent = 0
+        if not email_service.enabled:
+            for log in logs:
+                log.status, log.error_message = EmailLog.Status.FAILED, 'Email is disabled'
+        else:
+            sent = NotificationDispatcher.deliver(messages, logs)
+
+        EmailLog.objects.bulk_create(logs)
+        if sent:
+            snapshot.emailed_at = timezone.now()
+            snapshot.save(update_fields=['emailed_at'])
+        return sent
+
+    # ===== Builders =====
+    # Each returns (columns, rows, summary); property_id None covers all properties
+
+    @staticmethod
+    def _scoped(queryset, property_id, field='property_id'):
+        return queryset.filter(**{field: property_id}) if property_id else queryset
+
+    @classmethod
+    def build_daily(cls, property_id, report_date, days):
+        stats = cls._scoped(DailyStatistics.objects.filter(date=report_date), property_id)
+        if property_id and not stats.exists():
+            from apps.reports.services import DailyStatisticsService
+            DailyStatisticsService.refresh(property_id, report_date)
+        columns = [
+            ('property_name', 'Property'), ('total_rooms', 'Rooms'), ('rooms_sold', 'Sold'),
+            ('occupancy_percent', 'Occupancy %'), ('adr', 'ADR'), ('revpar', 'RevPAR'),
+            ('room_revenue', 'Room Revenue'), ('total_revenue', 'Total Revenue'),
+            ('arrivals', 'Arrivals'), ('departures', 'Departures'), ('in_house', 'In House'),
+        ]
+        rows = list(stats.order_by('property__name').values(
+            *[key for key, _ in columns[1:]], property_name=F('property__name')
+        ))
+        totals = {key: sum(row[key] for row in rows) for key in ('total_rooms', 'rooms_sold', 'room_revenue', 'total_revenue')}
+        summary = {
+            'Rooms sold': totals['rooms_sold'],
+            'Occupancy %': cls._percent(totals['rooms_sold'], totals['total_rooms']),
+            'ADR': cls._divide(totals['room_revenue'], totals['rooms_sold']),
+            'RevPAR': cls._divide(totals['room_revenue'], totals['total_rooms']),
+            'Total revenue': totals['total_revenue'],
+        }
+        return columns, rows, summary
+
+    @classmethod
+    def build_occupancy(cls, property_id, report_date, days):
+        start = report_date - timedelta(days=days - 1)
+        series = AnalyticsService.load_statistics(property_id, start, report_date)
+        occupancy = AnalyticsService.derive(series, 'occupancy')
+        adr = AnalyticsService.derive(series, 'adr')
+        revpar = AnalyticsService.derive(series, 'revpar')
+        columns = [
+            ('date', 'Date'), ('rooms_sold', 'Sold'), ('total_rooms', 'Rooms'),
+            ('occupancy', 'Occupancy %'), ('adr', 'ADR'), ('revpar', 'RevPAR'),
+        ]
+        rows = [
+            {
+                'date': start + timedelta(days=i),
+                'rooms_sold': int(series['rooms_sold'][i]),
+                'total_rooms': int(series['total_rooms'][i]),
+                'occupancy': float(occupancy[i]),
+                'adr': float(adr[i]),
+                'revpar': float(revpar[i]),
+            }
+            for i in range(days)
+        ]
+        sold, rooms, revenue = (float(series[key].sum()) for key in ('rooms_sold', 'total_rooms', 'room_revenue'))
+        summary = {
+            'Room nights': int(sold),
+            'Average occupancy %': cls._percent(sold, rooms),
+            'Average ADR': cls._divide(revenue, sold),
+            'Average RevPAR': cls._divide(revenue, rooms),
+        }
+        return columns, rows, summary
+
+    @classmethod
+    def build_revenue(cls, property_id, report_date, days):
+        start = report_date - timedelta(days=days - 1)
+        stats = cls._scoped(DailyStatistics.objects.filter(date__gte=start, date__lte=report_date), property_id)
+        rows = list(stats.values('date').annotate(
+            room_revenue=Sum('room_revenue'),
+            fb_revenue=Sum('fb_revenue'),
+            other_revenue=Sum('other_revenue'),
+            total_revenue=Sum('total_revenue'),
+        ).order_by('date'))
+        columns = [
+            ('date', 'Date'), ('room_revenue', 'Room'), ('fb_revenue', 'F&B'),
+            ('other_revenue', 'Other'), ('total_revenue', 'Total'),
+        ]
+        summary = {
+            label: sum((row[key] for row in rows), Decimal('0'))
+            for key, label in columns[1:]
+        }
+        return columns, rows, summary
+
+    @classmethod
+    def build_forecast(cls, property_id, report_date, days):
+        rows = ForecastService.rows(property_id, report_date, days)
+        columns = [
+            ('date', 'Date'), ('occupied', 'On Books'), ('group_blocked', 'Group Blocks'),
+            ('out_of_order', 'Out of Order'), ('available', 'Available'),
+            ('occupancy', 'Occupancy %'), ('projected_occupancy', 'Projected %'),
+        ]
+        summary = {
+            'Room nights on books': sum(row['occupied'] for row in rows),
+            'Group room nights': sum(row['group_blocked'] for row in rows),
+            'Average occupancy %': round(sum(row['occupancy'] for row in rows) / len(rows), 2),
+        }
+        return columns, rows, summary
+
+    @classmethod
+    def build_production(cls, property_id, report_date, days):
+        start = report_date - timedelta(days=days - 1)
+        reservations = cls._scoped(Reservation.objects.filter(
+            created_at__date__gte=start,
+            created_at__date__lte=report_date,
+        ), property_id, 'hotel_id')
+        rows = list(reservations.values('source').annotate(
+            reservations=Count('id'),
+            revenue=Sum('total_amount'),
+        ).order_by('-reservations', 'source'))
+        columns = [('source', 'Source'), ('reservations', 'Reservations'), ('revenue', 'Revenue')]
+        summary = {
+            'Reservations': sum(row['reservations'] for row in rows),
+            'Revenue': sum((row['revenue'] or Decimal('0') for row in rows), Decimal('0')),
+        }
+        return columns, rows, summary
+
+    @classmethod
+    def build_in_house(cls, property_id, report_date, days):
+        in_house = cls._scoped(Reservation.objects.filter(
+            status=Reservation.Status.CHECKED_IN,
+            check_in_date__lte=report_date,
+        ), property_id, 'hotel_id').select_related('guest').prefetch_related(
+            Prefetch('rooms', queryset=ReservationRoom.objects.select_related('room'))
+        ).order_by('check_out_date', 'guest__last_name')
+        columns = [
+            ('confirmation_number', 'Confirmation'), ('guest', 'Guest'), ('rooms', 'Rooms'),
+            ('check_in_date', 'Arrival'), ('check_out_date', 'Departure'),
+            ('adults', 'Adults'), ('children', 'Children'),
+        ]
+        rows = [
+            {
+                'confirmation_number': reservation.confirmation_number,
+                'guest': f'{reservation.guest.first_name} {reservation.guest.last_name}',
+                'rooms': ', '.join(line.room.room_number for line in reservation.rooms.all() if line.room),
+                'check_in_date': reservation.check_in_date,
+                'check_out_date': reservation.check_out_date,
+                'adults': reservation.adults,
+                'children': reservation.children,
+            }
+            for reservation in in_house
+        ]
+        summary = {
+            'Reservations': len(rows),
+            'Guests': sum(row['adults'] + row['children'] for row in rows),
+        }
+        return columns, rows, summary
+
+    # ===== Rendering =====
+
+    @staticmethod
+    def _clean(value):
+        """JSON-safe cell value"""
+        if isinstance(value, Decimal):
+            return float(round(value, 2))
+        if isinstance(value, float):
+            return round(value, 2)
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return value
+
+    @staticmethod
+    def _divide(numerator, denominator):
+        return round(float(numerator) / float(denominator), 2) if denominator else 0.0
+
+    @classmethod
+    def _percent(cls, part, whole):
+        return cls._divide(float(part) * 100, whole)
+
+    @staticmethod
+    def _table(data: Dict[str, Any]) -> List[List[Any]]:
+        """Header row followed by the report rows"""
+        keys = [column['key'] for column in data['columns']]
+        return [[column['label'] for column in data['columns']]] + [
+            ['' if row.get(key) is None else row.get(key) for key in keys] for row in data['rows']
+        ]
+
+    @classmethod
+    def render_csv(cls, data: Dict[str, Any]) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerows(cls._table(data))
+        if data['summary']:
+            writer.writerow([])
+            writer.writerows(data['summary'].items())
+        return buffer.getvalue().encode()
+
+    @staticmethod
+    def render_text(data: Dict[str, Any]) -> str:
+        """Plain-text email body with the report summary"""
+        lines = [f"{data['title']} ({data['report_date']})"]
+        if data['property']:
+            lines.append(data['property'])
+        lines.append('')
+        lines += [f'{label}: {value}' for label, value in data['summary'].items()]
+        lines += ['', 'The full report is attached.']
+        return '\n'.join(lines)
+
+    @classmethod
+    def render_pdf(cls, data: Dict[str, Any]) -> bytes:
+        """Render a report as a landscape PDF table"""
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import letter, landscape
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.lib.units import inch
+
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=landscape(letter))
+        styles = getSampleStyleSheet()
+        subtitle = ' - '.join(filter(None, [data['property'], data['report_date']]))
+        elements = [
+            Paragraph(data['title'], styles['Heading1']),
+            Paragraph(subtitle, styles['Normal']),
+            Spacer(1, 0.2*inch),
+        ]
+
+        if data['summary']:
+            summary_table = Table([[label, str(value)] for label, value in data['summary'].items()])
+            summary_table.setStyle(TableStyle([
+                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, -1), 9),
+                ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+            ]))
+            elements += [summary_table, Spacer(1, 0.2*inch)]
+
+        table = Table([[str(cell) for cell in row] for row in cls._table(data)], repeatRows=1)
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+        ]))
+        elements.append(table)
+
+        doc.build(elements)
+        return buffer.getvalue()
@@ -0,0 +1,52 @@
+"""
+Django management command to backfill DailyStatistics for a historical range.
+"""
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from apps.properties.models import Property
+from apps.reports.services import DailyStatisticsService
+
+
+class Command(BaseCommand):
+    """Rebuild DailyStatistics rows from reservations and postings."""
+
+    help = 'Backfill daily statistics for a date range from reservations and folio postings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--property', type=int, help='Only backfill this property ID')
+        parser.add_argument('--start', required=True, help='First day to rebuild (YYYY-MM-DD)')
+        parser.add_argument('--end', help='Last day to rebuild, inclusive (YYYY-MM-DD, default today)')
+        parser.add_argument(
+            '--chunk-days',
+            type=int,
+            default=92,
+            help='Days rebuilt per batch of queries'
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command."""
+        try:
+            start_date = date.fromisoformat(options['start'])
+            end_date = date.fromisoformat(options['end']) if options.get('end') else timezone.localdate()
+        except ValueError as e:
+            raise CommandError(f'Invalid date: {e}')
+        if end_date < start_date:
+            raise CommandError('--end must not be before --start')
+        chunk_days = max(options['chunk_days'], 1)
+
+        properties = Property.objects.all()
+        if options.get('property'):
+            properties = properties.filter(pk=options['property'])
+
+        written = 0
+        for property_id in properties.values_list('id', flat=True):
+            chunk_start = start_date
+            while chunk_start <= end_date:
+                chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end_date)
+                written += DailyStatisticsService.rebuild(property_id, chunk_start, chunk_end)
+                chunk_start = chunk_end + timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Daily statistics backfilled: {written} rows from {start_date} to {end_date}'
+        ))
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reports", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="nightaudit",
+            name="current_step",
+            field=models.CharField(
+                blank=True, max_length=20, verbose_name="current step"
+            ),
+        ),
+        migrations.AddField(
+            model_name="nightaudit",
+            name="step_timings",
+            field=models.JSONField(
+                blank=True, default=dict, verbose_name="step timings"
+            ),
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("reports", "0002_night_audit_checkpoints"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReportSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("report_date", models.DateField(verbose_name="report date")),
+                (
+                    "version",
+                    models.PositiveIntegerField(default=1, verbose_name="version"),
+                ),
+                ("data", models.JSONField(default=dict, verbose_name="data")),
+                (
+                    "csv_file",
+                    models.CharField(
+                        blank=True, max_length=255, verbose_name="CSV file"
+                    ),
+                ),
+                (
+                    "pdf_file",
+                    models.CharField(
+                        blank=True, max_length=255, verbose_name="PDF file"
+                    ),
+                ),
+                (
+                    "is_scheduled_run",
+                    models.BooleanField(default=False, verbose_name="scheduled run"),
+                ),
+                (
+                    "emailed_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="emailed at"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "generated_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "template",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="snapshots",
+                        to="reports.reporttemplate",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "report snapshot",
+                "verbose_name_plural": "report snapshots",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["template", "report_date", "-version"],
+                        name="report_snapshot_latest_idx",
+                    )
+                ],
+                "unique_together": {("template", "version")},
+            },
+        ),
+    ]
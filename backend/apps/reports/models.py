@@ -120,6 +120,39 @@ class ReportTemplate(models.Model):
     def __str__(self):
         return f"{self.name} ({self.get_report_type_display()})"
 
+    def get_recipient_list(self):
+        """Email recipients, one per comma, semicolon or line"""
+        return [email.strip() for email in self.email_recipients.replace(';', ',').replace('\n', ',').split(',') if email.strip()]
+
+
+class ReportSnapshot(models.Model):
+    """Stored result of a report template run."""
+
+    template = models.ForeignKey(ReportTemplate, on_delete=models.CASCADE, related_name='snapshots')
+    report_date = models.DateField(_('report date'))
+    version = models.PositiveIntegerField(_('version'), default=1)
+
+    data = models.JSONField(_('data'), default=dict)
+    csv_file = models.CharField(_('CSV file'), max_length=255, blank=True)
+    pdf_file = models.CharField(_('PDF file'), max_length=255, blank=True)
+
+    is_scheduled_run = models.BooleanField(_('scheduled run'), default=False)
+    emailed_at = models.DateTimeField(_('emailed at'), null=True, blank=True)
+    generated_by = models.ForeignKey('accounts.User', on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('report snapshot')
+        verbose_name_plural = _('report snapshots')
+        unique_together = ['template', 'version']
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['template', 'report_date', '-version'], name='report_snapshot_latest_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.template.name} - {self.report_date} v{self.version}"
+
 
 class NightAudit(models.Model):
     """Night audit record."""
@@ -155,6 +188,10 @@ class NightAudit(models.Model):
     arrivals_count = models.PositiveIntegerField(_('arrivals'), default=0)
     departures_count = models.PositiveIntegerField(_('departures'), default=0)
     
+    # Step checkpoints
+    current_step = models.CharField(_('current step'), max_length=20, blank=True)
+    step_timings = models.JSONField(_('step timings'), default=dict, blank=True)
+    
     started_at = models.DateTimeField(_('started at'), null=True, blank=True)
     completed_at = models.DateTimeField(_('completed at'), null=True, blank=True)
     completed_by = models.ForeignKey('accounts.User', on_delete=models.SET_NULL, null=True, blank=True)
@@ -0,0 +1,488 @@
+"""
+Reports Services
+Set-based, checkpointed night audit pipeline and daily statistics rollups
+"""
+
+import time
+from decimal import Decimal
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q, F, Sum, Count, DecimalField, ExpressionWrapper
+from django.utils import timezone
+from apps.billing.models import Folio, FolioCharge, ChargeCode, Payment
+from apps.reports.dashboards import DashboardService
+from apps.reports.models import DailyStatistics, AuditLog
+from apps.reservations.models import Reservation, ReservationRoom
+from apps.reservations.services import InventoryService
+from apps.rooms.models import Room, RoomBlock
+
+
+class NightAuditService:
+    """
+    Run the night audit as a sequence of resumable stages.
+
+    Each stage posts its rows with bulk statements inside its own
+    transaction, together with its checkpoint in NightAudit.step_timings.
+    A failed stage is rolled back on its own; running the audit again
+    skips completed stages and continues from the failed one.
+    """
+
+    STEPS = ['NO_SHOWS', 'ROOM_RATES', 'DEPARTURES', 'FOLIOS', 'TOTALS']
+    NO_SHOW_PENALTY = Decimal('0.2')  # 20% of the reservation total
+
+    BALANCE = ExpressionWrapper(
+        F('total_charges') + F('total_taxes') - F('total_payments'),
+        output_field=DecimalField(max_digits=12, decimal_places=2)
+    )
+
+    def __init__(self, night_audit, user=None):
+        self.night_audit = night_audit
+        self.user = user
+        self.property = night_audit.property
+        self.business_date = night_audit.business_date
+
+    def is_completed(self, step):
+        """Return True if a stage already has a successful checkpoint."""
+        return bool(self.night_audit.step_timings.get(step, {}).get('completed'))
+
+    def run(self):
+        """
+        Run every stage that has not completed yet.
+
+        Returns:
+            bool: True if all stages completed, False if one failed
+        """
+        for step in self.STEPS:
+            if self.is_completed(step):
+                continue
+            if not self._run_step(step):
+                return False
+
+        self.night_audit.current_step = ''
+        self.night_audit.save(update_fields=['current_step'])
+        # Postings above were bulk inserted, bypassing the statistics signals
+        DailyStatisticsService.refresh(self.property.pk, self.business_date)
+        AuditLog.objects.create(
+            night_audit=self.night_audit,
+            step='COMPLETE',
+            message=f'Night audit completed - Revenue: ${self.night_audit.total_revenue}, Rooms: {self.night_audit.rooms_sold}'
+        )
+        return True
+
+    def _run_step(self, step):
+        """Run one stage and record its checkpoint and timing."""
+        started_at = timezone.now()
+        started = time.monotonic()
+        self.night_audit.current_step = step
+        self.night_audit.save(update_fields=['current_step'])
+
+        try:
+            with transaction.atomic():
+                message, rows = getattr(self, f'_step_{step.lower()}')()
+
+                self.night_audit.step_timings[step] = {
+                    'completed': True,
+                    'started_at': started_at.isoformat(),
+                    'duration_ms': int((time.monotonic() - started) * 1000),
+                    'rows': rows,
+                }
+                self.night_audit.save()
+                AuditLog.objects.create(night_audit=self.night_audit, step=step, message=message)
+        except Exception as e:
+            # The stage's own writes were rolled back; keep earlier checkpoints
+            self.night_audit.refresh_from_db()
+            self.night_audit.step_timings[step] = {
+                'completed': False,
+                'started_at': started_at.isoformat(),
+                'duration_ms': int((time.monotonic() - started) * 1000),
+                'error': str(e),
+            }
+            self.night_audit.save(update_fields=['step_timings'])
+            AuditLog.objects.create(
+                night_audit=self.night_audit,
+                step=step,
+                message=f'Error during audit: {str(e)}',
+                is_error=True
+            )
+            return False
+
+        return True
+
+    def _charge_code(self, code, name, category):
+        """Get or create a system charge code."""
+        charge_code, _ = ChargeCode.objects.get_or_create(
+            code=code,
+            defaults={'name': name, 'category': category, 'default_amount': Decimal('0')}
+        )
+        return charge_code
+
+    def _post_charges(self, charges):
+        """Insert charges in bulk and refresh the affected folio totals once."""
+        if not charges:
+            return
+        FolioCharge.objects.bulk_create(charges, batch_size=500)
+        Folio.recalculate_totals_for({charge.folio_id for charge in charges})
+
+    def _step_no_shows(self):
+        """Mark today's unarrived confirmed reservations as no-shows and charge them."""
+        reservations = list(Reservation.objects.filter(
+            hotel=self.property,
+            check_in_date=self.business_date,
+            status=Reservation.Status.CONFIRMED
+        ).only('id', 'hotel_id', 'status', 'check_in_date', 'check_out_date', 'total_amount', 'confirmation_number'))
+
+        charges = []
+        if reservations:
+            by_id = {reservation.pk: reservation for reservation in reservations}
+            Reservation.objects.filter(pk__in=list(by_id)).update(
+                status=Reservation.Status.NO_SHOW,
+                updated_at=timezone.now()
+            )
+            InventoryService.release_reservations(reservations)
+
+            charge_code = self._charge_code('NOSHOW', 'No-Show Charge', ChargeCode.ChargeCategory.OTHER)
+            for folio_id, reservation_id in Folio.objects.filter(
+                reservation_id__in=list(by_id)
+            ).values_list('id', 'reservation_id'):
+                reservation = by_id[reservation_id]
+                amount = (reservation.total_amount * self.NO_SHOW_PENALTY).quantize(Decimal('0.01'))
+                charges.append(FolioCharge(
+                    folio_id=folio_id,
+                    charge_code=charge_code,
+                    description=f'No-show penalty for {reservation.confirmation_number}',
+                    quantity=1,
+                    unit_price=amount,
+                    amount=amount,
+                    charge_date=self.business_date,
+                    reference=f'NA{self.night_audit.pk}:NS:{reservation_id}',
+                    posted_by=self.user
+                ))
+            self._post_charges(charges)
+
+        self.night_audit.no_shows_processed = True
+        return f'Processed {len(reservations)} no-show reservations, posted {len(charges)} charges', len(reservations)
+
+    def _step_room_rates(self):
+        """Post one room charge per in-house reservation room."""
+        prefix = f'NA{self.night_audit.pk}:RR:'
+        already_posted = set(FolioCharge.objects.filter(
+            reference__startswith=prefix
+        ).values_list('reference', flat=True))
+
+        rooms = ReservationRoom.objects.filter(
+            reservation__hotel=self.property,
+            reservation__status=Reservation.Status.CHECKED_IN,
+            reservation__check_in_date__lte=self.business_date,
+            reservation__check_out_date__gt=self.business_date,
+            reservation__folio__isnull=False
+        ).values('id', 'rate_per_night', 'reservation__folio__id', 'room__room_number', 'room_type__name')
+
+        charge_code = self._charge_code('ROOM', 'Room Rate', ChargeCode.ChargeCategory.ROOM)
+        charges = []
+        for room in rooms:
+            reference = f'{prefix}{room["id"]}'
+            if reference in already_posted:
+                continue
+            label = room['room__room_number'] or room['room_type__name']
+            charges.append(FolioCharge(
+                folio_id=room['reservation__folio__id'],
+                charge_code=charge_code,
+                description=f'Room rate for {self.business_date} - Room {label}',
+                quantity=1,
+                unit_price=room['rate_per_night'],
+                amount=room['rate_per_night'],
+                charge_date=self.business_date,
+                reference=reference,
+                posted_by=self.user
+            ))
+        self._post_charges(charges)
+
+        self.night_audit.room_rates_posted = True
+        return f'Posted {len(charges)} room rate charges', len(charges)
+
+    def _step_departures(self):
+        """Flag tomorrow's departures whose folios still carry a balance."""
+        departures = Reservation.objects.filter(
+            hotel=self.property,
+            check_out_date=self.business_date + timedelta(days=1),
+            status=Reservation.Status.CHECKED_IN
+        )
+        departure_count = departures.count()
+
+        unsettled = Folio.objects.filter(reservation__in=departures).annotate(
+            balance_due=self.BALANCE
+        ).filter(balance_due__gt=0).values_list('reservation__confirmation_number', 'balance_due')
+
+        logs = [
+            AuditLog(
+                night_audit=self.night_audit,
+                step='DEPARTURES',
+                message=f'Unsettled folio for departure: {confirmation_number} - Balance: ${balance_due}',
+                is_error=True
+            )
+            for confirmation_number, balance_due in unsettled
+        ]
+        AuditLog.objects.bulk_create(logs)
+
+        self.night_audit.departures_count = departure_count
+        self.night_audit.departures_checked = True
+        return f'Checked {departure_count} departures, {len(logs)} unsettled', departure_count
+
+    def _step_folios(self):
+        """Summarise open folios with an outstanding balance."""
+        summary = Folio.objects.filter(
+            reservation__hotel=self.property,
+            status=Folio.Status.OPEN
+        ).annotate(balance_due=self.BALANCE).exclude(balance_due=0).aggregate(
+            count=Count('id'),
+            total=Sum('balance_due')
+        )
+
+        self.night_audit.folios_settled = summary['count'] == 0
+        if summary['count']:
+            return (
+                f'Warning: {summary["count"]} folios with outstanding balance: ${summary["total"]}',
+                summary['count']
+            )
+        return 'All folios verified and settled', 0
+
+    def _step_totals(self):
+        """Aggregate the business date's revenue, payments and room counts."""
+        charges = FolioCharge.objects.filter(
+            folio__reservation__hotel=self.property,
+            charge_date=self.business_date
+        ).aggregate(
+            room=Sum('amount', filter=Q(charge_code__category=ChargeCode.ChargeCategory.ROOM)),
+            fb=Sum('amount', filter=Q(charge_code__category=ChargeCode.ChargeCategory.FOOD)),
+            other=Sum('amount', filter=~Q(charge_code__category__in=[
+                ChargeCode.ChargeCategory.ROOM, ChargeCode.ChargeCategory.FOOD
+            ])),
+            tax=Sum('tax_amount')
+        )
+        payments = Payment.objects.filter(
+            folio__reservation__hotel=self.property,
+            payment_date__date=self.business_date
+        ).aggregate(total=Sum('amount'))
+        rooms = ReservationRoom.objects.filter(
+            reservation__hotel=self.property,
+            reservation__status=Reservation.Status.CHECKED_IN,
+            reservation__check_in_date__lte=self.business_date,
+            reservation__check_out_date__gt=self.business_date
+        ).aggregate(
+            sold=Count('id'),
+            arrivals=Count('reservation', distinct=True, filter=Q(reservation__check_in_date=self.business_date))
+        )
+
+        audit = self.night_audit
+        audit.room_revenue = charges['room'] or 0
+        audit.fb_revenue = charges['fb'] or 0
+        audit.other_revenue = charges['other'] or 0
+        audit.tax_amount = charges['tax'] or 0
+        audit.total_revenue = audit.room_revenue + audit.fb_revenue + audit.other_revenue
+        audit.payments_collected = payments['total'] or 0
+        audit.rooms_sold = rooms['sold']
+        audit.arrivals_count = rooms['arrivals']
+
+        return f'Revenue: ${audit.total_revenue}, Rooms: {audit.rooms_sold}', rooms['sold']
+
+
+class DailyStatisticsService:
+    """
+    Keep DailyStatistics rows current from the operational tables.
+
+    A range of days is rebuilt with five grouped queries (rooms, stored
+    rows, room blocks, stays, postings) and one upsert, whatever its length. Postings, check-ins,
+    check-outs and room status changes mark their day dirty (see
+    apps.reports.signals); marks are coalesced for
+    STATISTICS_REFRESH_DEBOUNCE_SECONDS and the day is then rebuilt by a
+    task, so today's row follows activity without a query per posting.
+    """
+
+    SOLD_STATUSES = [Reservation.Status.CHECKED_IN, Reservation.Status.CHECKED_OUT]
+    OUT_OF_ORDER_STATUSES = [Room.RoomStatus.OUT_OF_ORDER, Room.RoomStatus.OUT_OF_SERVICE]
+    CENT = Decimal('0.01')
+
+    @staticmethod
+    def _schedule_key(property_id, business_date):
+        return f'daily_statistics:scheduled:{property_id}:{business_date.isoformat()}'
+
+    @classmethod
+    def mark(cls, property_id, business_date=None):
+        """
+        Schedule a rebuild of one property's day once the transaction commits
+
+        Repeated marks within the debounce window share one rebuild; marks
+        of a rolled back transaction are dropped.
+        """
+        if not property_id:
+            return
+        business_date = business_date or timezone.localdate()
+        transaction.on_commit(lambda: cls._schedule(property_id, business_date))
+
+    @classmethod
+    def _schedule(cls, property_id, business_date):
+        debounce = settings.STATISTICS_REFRESH_DEBOUNCE_SECONDS
+        if cache.add(cls._schedule_key(property_id, business_date), True, timeout=debounce):
+            from apps.reports.tasks import refresh_daily_statistics_task
+            refresh_daily_statistics_task.apply_async(
+                args=[property_id, business_date.isoformat()], countdown=debounce
+            )
+
+    @classmethod
+    def refresh(cls, property_id, business_date=None):
+        """
+        Rebuild one day of a property now
+
+        Returns:
+            DailyStatistics: The stored row
+        """
+        business_date = business_date or timezone.localdate()
+        cache.delete(cls._schedule_key(property_id, business_date))
+        cls.rebuild(property_id, business_date, business_date)
+        return DailyStatistics.objects.get(property_id=property_id, date=business_date)
+
+    @classmethod
+    def rebuild(cls, property_id, start_date, end_date) -> int:
+        """
+        Recompute and upsert every day from start_date to end_date (inclusive)
+
+        Past days keep the total_rooms and rooms_ooo already stored for them
+        (captured while the day was current, or audited); only the stays and
+        postings are recomputed. Past days without a row take today's active
+        rooms and the rooms under a RoomBlock that night, since the history
+        of room statuses is not recorded. Today uses the live room status.
+
+        Returns:
+            int: Number of rows written
+        """
+        days = (end_date - start_date).days + 1
+        if days <= 0:
+            return 0
+        today = timezone.localdate()
+
+        rooms = Room.objects.filter(hotel_id=property_id, is_active=True).aggregate(
+            total=Count('id'),
+            ooo=Count('id', filter=Q(status__in=cls.OUT_OF_ORDER_STATUSES))
+        )
+        stored = {
+            row['date']: row
+            for row in DailyStatistics.objects.filter(
+                property_id=property_id,
+                date__gte=start_date,
+                date__lte=min(end_date, today - timedelta(days=1))
+            ).values('date', 'total_rooms', 'rooms_ooo')
+        }
+
+        # Rooms blocked per night; a room under overlapping blocks counts once
+        blocked = [set() for _ in range(days)]
+        blocks = RoomBlock.objects.filter(
+            room__hotel_id=property_id,
+            room__is_active=True,
+            start_date__lte=end_date,
+            end_date__gte=start_date
+        ).values_list('room_id', 'start_date', 'end_date')
+        for room_id, block_start, block_end in blocks:
+            for i in range(max((block_start - start_date).days, 0), min((block_end - start_date).days, days - 1) + 1):
+                blocked[i].add(room_id)
+
+        # Occupancy per night, expanded from stay intervals with a difference array
+        sold = [0] * (days + 1)
+        complimentary = [0] * (days + 1)
+        guests = [0] * (days + 1)
+        arrivals = [0] * days
+        departures = [0] * days
+        stays = Reservation.objects.filter(
+            hotel_id=property_id,
+            status__in=cls.SOLD_STATUSES,
+            check_in_date__lte=end_date,
+            check_out_date__gte=start_date
+        ).annotate(
+            room_count=Count('rooms'),
+            comp_count=Count('rooms', filter=Q(rooms__rate_per_night=0))
+        ).values_list('check_in_date', 'check_out_date', 'status', 'adults', 'children', 'room_count', 'comp_count')
+        for check_in, check_out, status, adults, children, room_count, comp_count in stays:
+            if start_date <= check_in <= end_date:
+                arrivals[(check_in - start_date).days] += 1
+            if status == Reservation.Status.CHECKED_OUT and start_date <= check_out <= end_date:
+                departures[(check_out - start_date).days] += 1
+            first = max((check_in - start_date).days, 0)
+            last = min((check_out - start_date).days, days)
+            if first >= last:
+                continue
+            for counter, value in ((sold, room_count or 1), (complimentary, comp_count), (guests, adults + children)):
+                counter[first] += value
+                counter[last] -= value
+        for counter in (sold, complimentary, guests):
+            for i in range(1, days):
+                counter[i] += counter[i - 1]
+
+        revenue = {
+            row['charge_date']: row
+            for row in FolioCharge.objects.filter(
+                folio__reservation__hotel_id=property_id,
+                charge_date__gte=start_date,
+                charge_date__lte=end_date
+            ).values('charge_date').annotate(
+                room=Sum('amount', filter=Q(charge_code__category=ChargeCode.ChargeCategory.ROOM)),
+                fb=Sum('amount', filter=Q(charge_code__category=ChargeCode.ChargeCategory.FOOD)),
+                other=Sum('amount', filter=~Q(charge_code__category__in=[
+                    ChargeCode.ChargeCategory.ROOM, ChargeCode.ChargeCategory.FOOD
+                ])),
+            )
+        }
+
+        rows = []
+        for i in range(days):
+            business_date = start_date + timedelta(days=i)
+            posted = revenue.get(business_date, {})
+            room_revenue = posted.get('room') or Decimal('0')
+            fb_revenue = posted.get('fb') or Decimal('0')
+            other_revenue = posted.get('other') or Decimal('0')
+            if business_date in stored:
+                total_rooms, rooms_ooo = stored[business_date]['total_rooms'], stored[business_date]['rooms_ooo']
+            elif business_date == today:
+                total_rooms, rooms_ooo = rooms['total'], rooms['ooo']
+            else:
+                total_rooms, rooms_ooo = rooms['total'], len(blocked[i])
+            rows.append(DailyStatistics(
+                property_id=property_id,
+                date=business_date,
+                total_rooms=total_rooms,
+                rooms_sold=sold[i],
+                rooms_ooo=rooms_ooo,
+                available_rooms=max(total_rooms - rooms_ooo - sold[i], 0),
+                complimentary_rooms=complimentary[i],
+                occupancy_percent=cls._ratio(sold[i] * 100, total_rooms),
+                room_revenue=room_revenue,
+                fb_revenue=fb_revenue,
+                other_revenue=other_revenue,
+                total_revenue=room_revenue + fb_revenue + other_revenue,
+                adr=cls._ratio(room_revenue, sold[i]),
+                revpar=cls._ratio(room_revenue, total_rooms),
+                arrivals=arrivals[i],
+                departures=departures[i],
+                in_house=guests[i],
+            ))
+
+        DailyStatistics.objects.bulk_create(
+            rows,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['property', 'date'],
+            update_fields=[
+                'total_rooms', 'rooms_sold', 'rooms_ooo', 'available_rooms', 'complimentary_rooms',
+                'occupancy_percent', 'room_revenue', 'fb_revenue', 'other_revenue', 'total_revenue',
+                'adr', 'revpar', 'arrivals', 'departures', 'in_house',
+            ]
+        )
+        if start_date <= today <= end_date:
+            DashboardService.invalidate([DashboardService.REPORTS], property_id)
+        return len(rows)
+
+    @classmethod
+    def _ratio(cls, numerator, denominator) -> Decimal:
+        if not denominator:
+            return Decimal('0')
+        return (Decimal(numerator) / Decimal(denominator)).quantize(cls.CENT)
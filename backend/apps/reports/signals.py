@@ -0,0 +1,97 @@
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from apps.billing.models import FolioCharge
+from apps.frontdesk.models import CheckIn, CheckOut
+from apps.reservations.models import Reservation
+from apps.rooms.models import Room
+from .dashboards import DashboardService
+from .services import DailyStatisticsService
+
+
+# Attribute path from each model to its property id
+PROPERTY_PATHS = {
+    'Room': 'hotel_id',
+    'Reservation': 'hotel_id',
+    'CheckIn': 'room.hotel_id',
+    'CheckOut': 'check_in.room.hotel_id',
+    'RoomMove': 'from_room.hotel_id',
+    'WalkIn': 'property_id',
+    'HousekeepingTask': 'room.hotel_id',
+    'RoomInspection': 'room.hotel_id',
+    'LinenInventory': 'hotel_id',
+    'AmenityInventory': 'hotel_id',
+    'MaintenanceRequest': 'property_id',
+    'Asset': 'property_id',
+    'DailyStatistics': 'property_id',
+    'Payment': 'folio.reservation.hotel_id',
+    'FolioCharge': 'folio.reservation.hotel_id',
+}
+FOLIO_LINES = {'Payment', 'FolioCharge'}
+
+
+def _property_id(instance):
+    value = instance
+    for attr in PROPERTY_PATHS[type(instance).__name__].split('.'):
+        try:
+            value = getattr(value, attr)
+        except ObjectDoesNotExist:
+            return None
+        if value is None:
+            return None
+    return value
+
+
+def _property_ids(instance):
+    """
+    Properties a row belongs to; lines of a folio without a reservation
+    (master, company or walk-in folios) belong to every property its guest
+    has stayed at
+    """
+    property_id = _property_id(instance)
+    if property_id is not None or type(instance).__name__ not in FOLIO_LINES:
+        return {property_id}
+    try:
+        guest_id = instance.folio.guest_id
+    except ObjectDoesNotExist:
+        return {None}
+    return set(Reservation.objects.filter(guest_id=guest_id).values_list('hotel_id', flat=True).distinct()) or {None}
+
+
+def invalidate_dashboards(sender, instance, **kwargs):
+    """Drop the cached dashboards that read the changed row."""
+    if kwargs.get('raw'):
+        return
+    for property_id in _property_ids(instance):
+        DashboardService.invalidate(DashboardService.DEPENDENCIES[sender], property_id)
+
+
+for model in DashboardService.DEPENDENCIES:
+    post_save.connect(invalidate_dashboards, sender=model, dispatch_uid=f'dashboards_{model.__name__}_save')
+    post_delete.connect(invalidate_dashboards, sender=model, dispatch_uid=f'dashboards_{model.__name__}_delete')
+
+
+# ===== Daily statistics =====
+
+@receiver([post_save, post_delete], sender=FolioCharge)
+def mark_statistics_for_charge(sender, instance, **kwargs):
+    """A posting changes the revenue of its charge date."""
+    if kwargs.get('raw'):
+        return
+    DailyStatisticsService.mark(_property_id(instance), instance.charge_date)
+
+
+@receiver([post_save, post_delete], sender=CheckIn)
+@receiver([post_save, post_delete], sender=CheckOut)
+@receiver(post_save, sender=Room)
+@receiver(post_save, sender=Reservation)
+def mark_statistics_for_today(sender, instance, **kwargs):
+    """Arrivals, departures, stays and out-of-order rooms change today's figures."""
+    if kwargs.get('raw'):
+        return
+    if sender is Reservation:
+        today = timezone.localdate()
+        if not instance.check_in_date <= today <= instance.check_out_date:
+            return
+    DailyStatisticsService.mark(_property_id(instance))
@@ -0,0 +1,127 @@
+"""
+Reports Background Tasks
+Runs the night audit, statistics rollups and scheduled reports outside the request cycle
+"""
+
+from datetime import date
+from celery import shared_task
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from apps.properties.models import Property
+from apps.reports.engine import ReportEngine
+from apps.reports.models import NightAudit, ReportSnapshot, ReportTemplate
+from apps.reports.services import NightAuditService, DailyStatisticsService
+
+
+@shared_task
+def run_night_audit_task(night_audit_id, user_id=None):
+    """
+    Run (or resume) the night audit stages.
+    
+    Failed stages are recorded on the audit itself, so the task is not
+    retried; the audit can be resumed once the cause is fixed.
+    
+    Returns:
+        bool: True if every stage completed
+    """
+    night_audit = NightAudit.objects.select_related('property').get(pk=night_audit_id)
+    user = get_user_model().objects.filter(pk=user_id).first() if user_id else None
+    return NightAuditService(night_audit, user).run()
+
+
+@shared_task
+def refresh_daily_statistics_task(property_id, business_date=None):
+    """
+    Rebuild one day of a property's statistics (default: today).
+    
+    Returns:
+        int: ID of the stored DailyStatistics row
+    """
+    business_date = date.fromisoformat(business_date) if business_date else None
+    return DailyStatisticsService.refresh(property_id, business_date).pk
+
+
+@shared_task
+def refresh_todays_statistics_task():
+    """
+    Rebuild today's statistics of every active property.
+    
+    Catches changes made by bulk updates, which bypass the signals that
+    normally keep today's row current.
+    
+    Returns:
+        int: Number of properties refreshed
+    """
+    today = timezone.localdate()
+    property_ids = list(Property.objects.filter(is_active=True).values_list('id', flat=True))
+    for property_id in property_ids:
+        DailyStatisticsService.rebuild(property_id, today, today)
+    return len(property_ids)
+
+
+@shared_task
+def run_scheduled_reports_task():
+    """
+    Queue a run of every scheduled report template that is due, and a
+    retry of scheduled report emails that could not be sent.
+    
+    Runs every few minutes from beat; a template is queued at most once
+    per day even if its run is still waiting in the queue at the next beat,
+    and an email at most once per REPORT_EMAIL_RETRY_MINUTES.
+    
+    Returns:
+        int: Number of templates queued
+    """
+    today = timezone.localdate()
+    queued = 0
+    for template_id in ReportEngine.due_templates().values_list('id', flat=True):
+        if cache.add(f'reports:scheduled-run:{template_id}:{today}', True, timeout=24 * 60 * 60):
+            run_report_template_task.delay(template_id, scheduled=True)
+            queued += 1
+    
+    for snapshot_id in ReportEngine.unemailed().values_list('id', flat=True):
+        _queue_email(snapshot_id)
+    return queued
+
+
+def _queue_email(snapshot_id):
+    if cache.add(f'reports:email:{snapshot_id}', True, timeout=settings.REPORT_EMAIL_RETRY_MINUTES * 60):
+        email_report_snapshot_task.delay(snapshot_id)
+
+
+@shared_task
+def run_report_template_task(template_id, scheduled=False, user_id=None):
+    """
+    Run a report template into a new snapshot and, for scheduled runs,
+    queue its email to the template's recipients.
+    
+    Returns:
+        int: ID of the new ReportSnapshot
+    """
+    template = ReportTemplate.objects.select_related('property').get(pk=template_id)
+    user = get_user_model().objects.filter(pk=user_id).first() if user_id else None
+    snapshot = ReportEngine.run(template, user=user, scheduled=scheduled)
+    if scheduled:
+        _queue_email(snapshot.pk)
+    return snapshot.pk
+
+
+@shared_task
+def email_report_snapshot_task(snapshot_id):
+    """
+    Email a stored snapshot unless it has already gone out.
+    
+    Separate from the run, so a mail failure neither loses the snapshot nor
+    re-runs the report; run_scheduled_reports_task retries unsent ones.
+    
+    Returns:
+        int: Number of messages sent
+    """
+    snapshot = ReportSnapshot.objects.select_related('template').filter(
+        pk=snapshot_id, emailed_at__isnull=True
+    ).first()
+    if snapshot is None:
+        return 0
+    return ReportEngine.email(snapshot)
@@ -223,37 +223,12 @@ class ForecastReportView(LoginRequiredMixin, View):
     template_name = 'reports/forecast.html'
     
     def get(self, request):
-        from apps.reservations.models import Reservation
-        from apps.rooms.models import Room
+        from .forecast import ForecastService
         
-        days = int(request.GET.get('days', 30))
-        today = date.today()
+        days = min(max(int(request.GET.get('days', 30)), 1), 730)
+        property_obj = request.user.assigned_property
         
-        forecast_data = []
-        for i in range(days):
-            forecast_date = today + timedelta(days=i)
-            
-            # Count reservations
-            reservations = Reservation.objects.filter(
-                check_in_date__lte=forecast_date,
-                check_out_date__gt=forecast_date,
-                status__in=['CONFIRMED', 'CHECKED_IN']
-            )
-            
-            if request.user.assigned_property:
-                reservations = reservations.filter(property=request.user.assigned_property)
-                total_rooms = Room.objects.filter(property=request.user.assigned_property, is_active=True).count()
-            else:
-                total_rooms = Room.objects.filter(is_active=True).count()
-            
-            rooms_occupied = reservations.count()
-            
-            forecast_data.append({
-                'date': forecast_date,
-                'occupied': rooms_occupied,
-                'available': total_rooms - rooms_occupied if total_rooms else 0,
-                'occupancy': (rooms_occupied / total_rooms * 100) if total_rooms else 0
-            })
+        forecast_data = ForecastService.rows(property_obj.pk if property_obj else None, date.today(), days)
         
         context = {
             'forecast': forecast_data,
@@ -355,15 +330,45 @@ class ReportTemplateListView(LoginRequiredMixin, ListView):
 
 
 class RunReportView(LoginRequiredMixin, View):
+    """
+    Show a template's report from its latest snapshot for the date,
+    generating one only when none exists yet (or ?refresh=1).
+    ?format=csv|pdf downloads the stored rendering.
+    """
+    template_name = 'reports/report_snapshot.html'
+    
     def get(self, request, pk):
-        template = get_object_or_404(ReportTemplate, pk=pk)
+        from django.core.files.storage import default_storage
+        from django.http import FileResponse, Http404, HttpResponseBadRequest
+        from .engine import ReportEngine
+        
+        template = get_object_or_404(ReportTemplate.objects.select_related('property'), pk=pk)
+        if not ReportEngine.supports(template):
+            return redirect('reports:dashboard')
+        
+        try:
+            report_date = date.fromisoformat(request.GET['date']) if request.GET.get('date') else None
+        except ValueError:
+            return HttpResponseBadRequest('Invalid date. Use YYYY-MM-DD.')
+        snapshot = ReportEngine.get_or_run(
+            template, report_date, user=request.user, refresh=request.GET.get('refresh') == '1'
+        )
         
-        # Route to appropriate report view based on type
-        if template.report_type == ReportTemplate.ReportType.DAILY:
-            return redirect('reports:daily')
-        elif template.report_type == ReportTemplate.ReportType.OCCUPANCY:
-            return redirect('reports:occupancy')
-        elif template.report_type == ReportTemplate.ReportType.REVENUE:
-            return redirect('reports:revenue')
+        file_format = request.GET.get('format')
+        if file_format in ReportEngine.FORMATS:
+            name = snapshot.csv_file if file_format == 'csv' else snapshot.pdf_file
+            if not name:
+                raise Http404('This report has no %s rendering' % file_format.upper())
+            return FileResponse(
+                default_storage.open(name, 'rb'),
+                as_attachment=True,
+                filename=name.rsplit('/', 1)[-1],
+                content_type=ReportEngine.FORMATS[file_format]
+            )
         
-        return redirect('reports:dashboard')
+        context = {
+            'template': template,
+            'snapshot': snapshot,
+            'report': snapshot.data,
+        }
+        return render(request, self.template_name, context)
@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Reservation, ReservationRoom, ReservationRateDetail, GroupBooking, ReservationLog
+from .models import (
+    Reservation, ReservationRoom, ReservationRateDetail, GroupBooking, ReservationLog,
+    RoomTypeInventory
+)
 
 
 class ReservationRoomInline(admin.TabularInline):
@@ -77,3 +80,11 @@ class ReservationLogAdmin(admin.ModelAdmin):
     list_filter = ('action', 'timestamp')
     search_fields = ('reservation__confirmation_number',)
     readonly_fields = ('reservation', 'action', 'old_value', 'new_value', 'notes', 'user', 'timestamp')
+
+
+@admin.register(RoomTypeInventory)
+class RoomTypeInventoryAdmin(admin.ModelAdmin):
+    list_display = ('room_type', 'hotel', 'date', 'rooms_sold', 'updated_at')
+    list_filter = ('hotel', 'room_type')
+    date_hierarchy = 'date'
+    readonly_fields = ('hotel', 'room_type', 'date', 'rooms_sold', 'updated_at')
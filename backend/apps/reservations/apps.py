@@ -5,3 +5,6 @@ class ReservationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.reservations'
     verbose_name = 'Reservations'
+
+    def ready(self):
+        import apps.reservations.signals  # noqa
@@ -0,0 +1,77 @@
+"""
+Django management command to rebuild and reconcile the room type inventory ledger.
+"""
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from apps.reservations.models import RoomTypeInventory
+from apps.reservations.services import InventoryService
+
+
+class Command(BaseCommand):
+    """Rebuild RoomTypeInventory from existing reservations."""
+
+    help = 'Rebuild and reconcile the room type inventory ledger from reservations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--property', type=int, help='Only rebuild this property ID')
+        parser.add_argument('--start', help='First night to reconcile (YYYY-MM-DD)')
+        parser.add_argument('--end', help='Reconcile nights before this date (YYYY-MM-DD)')
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report drifted ledger rows without changing them'
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command."""
+        hotel_id = options.get('property')
+        try:
+            start_date = date.fromisoformat(options['start']) if options.get('start') else None
+            end_date = date.fromisoformat(options['end']) if options.get('end') else None
+        except ValueError as e:
+            raise CommandError(f'Invalid date: {e}')
+
+        expected = InventoryService.expected_ledger(hotel_id, start_date, end_date)
+
+        ledger = RoomTypeInventory.objects.all()
+        if hotel_id:
+            ledger = ledger.filter(hotel_id=hotel_id)
+        if start_date:
+            ledger = ledger.filter(date__gte=start_date)
+        if end_date:
+            ledger = ledger.filter(date__lt=end_date)
+
+        to_update = []
+        seen = set()
+        for row in ledger.iterator():
+            key = (row.hotel_id, row.room_type_id, row.date)
+            seen.add(key)
+            rooms_sold = expected.get(key, 0)
+            if row.rooms_sold != rooms_sold:
+                self.stdout.write(
+                    f'Drift: room type {row.room_type_id} on {row.date}: '
+                    f'ledger {row.rooms_sold}, reservations {rooms_sold}'
+                )
+                row.rooms_sold = rooms_sold
+                to_update.append(row)
+
+        to_create = [
+            RoomTypeInventory(hotel_id=key[0], room_type_id=key[1], date=key[2], rooms_sold=rooms_sold)
+            for key, rooms_sold in expected.items()
+            if key not in seen
+        ]
+
+        if options['check']:
+            self.stdout.write(
+                f'{len(to_update)} drifted rows, {len(to_create)} missing rows'
+            )
+            return
+
+        with transaction.atomic():
+            RoomTypeInventory.objects.bulk_update(to_update, ['rooms_sold'], batch_size=1000)
+            RoomTypeInventory.objects.bulk_create(to_create, batch_size=1000, ignore_conflicts=True)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Inventory ledger rebuilt: {len(to_update)} rows corrected, {len(to_create)} rows created'
+        ))
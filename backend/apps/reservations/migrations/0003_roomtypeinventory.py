@@ -0,0 +1,66 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("properties", "0002_systemsetting"),
+        ("rooms", "0003_room_rooms_room_status_19affd_idx_and_more"),
+        ("reservations", "0002_reservation_reservation_check_i_a5b8d0_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RoomTypeInventory",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="date")),
+                (
+                    "rooms_sold",
+                    models.IntegerField(default=0, verbose_name="rooms sold"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="updated at"),
+                ),
+                (
+                    "hotel",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="room_type_inventory",
+                        to="properties.property",
+                    ),
+                ),
+                (
+                    "room_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="inventory",
+                        to="rooms.roomtype",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "room type inventory",
+                "verbose_name_plural": "room type inventory",
+                "ordering": ["room_type", "date"],
+                "indexes": [
+                    models.Index(
+                        fields=["hotel", "date"], name="reservation_hotel_i_9690c2_idx"
+                    )
+                ],
+                "unique_together": {("room_type", "date")},
+            },
+        ),
+    ]
@@ -158,6 +158,7 @@ class Reservation(models.Model):
             models.Index(fields=['check_out_date']),
             models.Index(fields=['status']),
             models.Index(fields=['check_in_date', 'check_out_date']),
+            models.Index(fields=['created_at', 'id']),
         ]
     
     def __str__(self):
@@ -363,3 +364,33 @@ class ReservationLog(models.Model):
     
     def __str__(self):
         return f"{self.reservation.confirmation_number} - {self.action}"
+
+
+class RoomTypeInventory(models.Model):
+    """Day-by-room-type inventory ledger used for availability lookups."""
+    
+    hotel = models.ForeignKey(
+        'properties.Property',
+        on_delete=models.CASCADE,
+        related_name='room_type_inventory'
+    )
+    room_type = models.ForeignKey(
+        'rooms.RoomType',
+        on_delete=models.CASCADE,
+        related_name='inventory'
+    )
+    date = models.DateField(_('date'))
+    rooms_sold = models.IntegerField(_('rooms sold'), default=0)
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+    
+    class Meta:
+        verbose_name = _('room type inventory')
+        verbose_name_plural = _('room type inventory')
+        unique_together = ['room_type', 'date']
+        ordering = ['room_type', 'date']
+        indexes = [
+            models.Index(fields=['hotel', 'date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.room_type.code} - {self.date}: {self.rooms_sold} sold"
@@ -4,9 +4,244 @@ Handles availability checking, booking conflicts, and room allocation
 """
 
 from datetime import datetime, timedelta
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Q, F, Count, Max, Exists, OuterRef
+from django.utils import timezone
 from apps.rooms.models import Room
-from apps.reservations.models import Reservation
+from apps.reservations.models import Reservation, ReservationRoom, RoomTypeInventory
+
+
+class InventoryService:
+    """Maintains the day-by-room-type inventory ledger (RoomTypeInventory)."""
+    
+    # Reservation statuses that consume a room night
+    HOLDING_STATUSES = ('CONFIRMED', 'CHECKED_IN')
+    
+    @staticmethod
+    def reservation_state(reservation):
+        """
+        Snapshot the fields of a reservation that affect inventory.
+        
+        Returns:
+            tuple: (status, check_in_date, check_out_date), read without
+            triggering deferred-field loads (missing values are None)
+        """
+        values = reservation.__dict__
+        return (values.get('status'), values.get('check_in_date'), values.get('check_out_date'))
+    
+    @staticmethod
+    def holds_inventory(state):
+        """Return True if a reservation state consumes room nights."""
+        return bool(state) and state[0] in InventoryService.HOLDING_STATUSES and all(state)
+    
+    @staticmethod
+    def apply_delta(hotel_id, room_type_id, start_date, end_date, delta):
+        """
+        Add delta to rooms_sold for every night in [start_date, end_date).
+        
+        Missing ledger rows are created first so the update is a single
+        range statement.
+        """
+        if not delta or end_date <= start_date:
+            return
+        
+        nights = (end_date - start_date).days
+        with transaction.atomic():
+            RoomTypeInventory.objects.bulk_create(
+                [
+                    RoomTypeInventory(
+                        hotel_id=hotel_id,
+                        room_type_id=room_type_id,
+                        date=start_date + timedelta(days=i)
+                    )
+                    for i in range(nights)
+                ],
+                ignore_conflicts=True
+            )
+            RoomTypeInventory.objects.filter(
+                room_type_id=room_type_id,
+                date__gte=start_date,
+                date__lt=end_date
+            ).update(rooms_sold=F('rooms_sold') + delta, updated_at=timezone.now())
+        
+        # Occupancy- and demand-priced rate grid cells follow the ledger
+        from apps.rates.services import RateGridService
+        RateGridService.invalidate_for_inventory(hotel_id, start_date, end_date)
+        
+        # Channels receive the changed nights in their next coalesced push
+        from apps.channels.services import AvailabilityChangeService
+        AvailabilityChangeService.mark(hotel_id, room_type_id, start_date, end_date)
+    
+    @staticmethod
+    def room_type_counts(reservation_id):
+        """Get the number of booked rooms per room type for a reservation."""
+        rows = ReservationRoom.objects.filter(
+            reservation_id=reservation_id
+        ).values('room_type_id').annotate(rooms=Count('id'))
+        return {row['room_type_id']: row['rooms'] for row in rows}
+    
+    @staticmethod
+    def reservation_changed(reservation, previous_state):
+        """
+        Move a saved reservation's rooms between ledger states.
+        
+        Args:
+            reservation: Reservation instance that was just saved
+            previous_state: State tuple before the save (None for new rows)
+        """
+        current_state = InventoryService.reservation_state(reservation)
+        was_holding = InventoryService.holds_inventory(previous_state)
+        is_holding = InventoryService.holds_inventory(current_state)
+        
+        if not was_holding and not is_holding:
+            return
+        if was_holding and is_holding and previous_state[1:] == current_state[1:]:
+            return
+        
+        counts = InventoryService.room_type_counts(reservation.pk)
+        with transaction.atomic():
+            for room_type_id, rooms in counts.items():
+                if was_holding:
+                    InventoryService.apply_delta(
+                        reservation.hotel_id, room_type_id,
+                        previous_state[1], previous_state[2], -rooms
+                    )
+                if is_holding:
+                    InventoryService.apply_delta(
+                        reservation.hotel_id, room_type_id,
+                        current_state[1], current_state[2], rooms
+                    )
+    
+    @staticmethod
+    def reservation_room_changed(previous, current):
+        """
+        Update the ledger after a ReservationRoom is added, edited or removed.
+        
+        Args:
+            previous: (reservation_id, room_type_id) before the change or None
+            current: (reservation_id, room_type_id) after the change or None
+        """
+        if previous == current:
+            return
+        
+        with transaction.atomic():
+            for key, delta in ((previous, -1), (current, 1)):
+                if not key or not all(key):
+                    continue
+                reservation = Reservation.objects.filter(pk=key[0]).values(
+                    'hotel_id', 'status', 'check_in_date', 'check_out_date'
+                ).first()
+                if not reservation:
+                    continue
+                state = (reservation['status'], reservation['check_in_date'], reservation['check_out_date'])
+                if InventoryService.holds_inventory(state):
+                    InventoryService.apply_delta(
+                        reservation['hotel_id'], key[1], state[1], state[2], delta
+                    )
+    
+    @staticmethod
+    def release_reservations(reservations):
+        """
+        Release the ledger nights of reservations moved out of a holding
+        status in bulk (e.g. with QuerySet.update(), which skips signals).
+        
+        Args:
+            reservations: Reservation instances as they were before the update
+        """
+        holding = {
+            reservation.pk: reservation for reservation in reservations
+            if InventoryService.holds_inventory(InventoryService.reservation_state(reservation))
+        }
+        if not holding:
+            return
+        
+        deltas = {}
+        rows = ReservationRoom.objects.filter(
+            reservation_id__in=list(holding)
+        ).values('reservation_id', 'room_type_id').annotate(rooms=Count('id'))
+        for row in rows:
+            reservation = holding[row['reservation_id']]
+            key = (reservation.hotel_id, row['room_type_id'], reservation.check_in_date, reservation.check_out_date)
+            deltas[key] = deltas.get(key, 0) - row['rooms']
+        
+        with transaction.atomic():
+            for (hotel_id, room_type_id, start_date, end_date), delta in deltas.items():
+                InventoryService.apply_delta(hotel_id, room_type_id, start_date, end_date, delta)
+    
+    @staticmethod
+    def get_peak_sold(hotel_id, start_date, end_date, room_type_id=None):
+        """
+        Get the highest number of rooms sold on any night in a date range.
+        
+        Returns:
+            dict: {room_type_id: peak rooms sold}
+        """
+        ledger = RoomTypeInventory.objects.filter(
+            hotel_id=hotel_id,
+            date__gte=start_date,
+            date__lt=end_date
+        )
+        if room_type_id:
+            ledger = ledger.filter(room_type_id=room_type_id)
+        
+        rows = ledger.values('room_type_id').annotate(peak=Max('rooms_sold'))
+        return {row['room_type_id']: row['peak'] for row in rows}
+    
+    @staticmethod
+    def get_room_type_availability(hotel_id, start_date, end_date, room_type_id=None):
+        """
+        Get the number of sellable rooms per room type for a whole stay.
+        
+        Returns:
+            dict: {room_type_id: rooms available on every night of the stay}
+        """
+        rooms = Room.objects.filter(hotel_id=hotel_id, is_active=True)
+        if room_type_id:
+            rooms = rooms.filter(room_type_id=room_type_id)
+        
+        totals = {
+            row['room_type_id']: row['total']
+            for row in rooms.values('room_type_id').annotate(total=Count('id'))
+        }
+        peaks = InventoryService.get_peak_sold(hotel_id, start_date, end_date, room_type_id)
+        
+        return {
+            type_id: max(total - peaks.get(type_id, 0), 0)
+            for type_id, total in totals.items()
+        }
+    
+    @staticmethod
+    def expected_ledger(hotel_id=None, start_date=None, end_date=None):
+        """
+        Rebuild expected rooms_sold values from reservations.
+        
+        Returns:
+            dict: {(hotel_id, room_type_id, date): rooms sold}
+        """
+        reservation_rooms = ReservationRoom.objects.filter(
+            reservation__status__in=InventoryService.HOLDING_STATUSES
+        )
+        if hotel_id:
+            reservation_rooms = reservation_rooms.filter(reservation__hotel_id=hotel_id)
+        if start_date:
+            reservation_rooms = reservation_rooms.filter(reservation__check_out_date__gt=start_date)
+        if end_date:
+            reservation_rooms = reservation_rooms.filter(reservation__check_in_date__lt=end_date)
+        
+        expected = {}
+        rows = reservation_rooms.values_list(
+            'reservation__hotel_id', 'room_type_id',
+            'reservation__check_in_date', 'reservation__check_out_date'
+        )
+        for row_hotel_id, room_type_id, check_in, check_out in rows.iterator():
+            night = max(check_in, start_date) if start_date else check_in
+            last = min(check_out, end_date) if end_date else check_out
+            while night < last:
+                key = (row_hotel_id, room_type_id, night)
+                expected[key] = expected.get(key, 0) + 1
+                night += timedelta(days=1)
+        
+        return expected
 
 
 class AvailabilityService:
@@ -26,8 +261,6 @@ class AvailabilityService:
         Returns:
             bool: True if available, False otherwise
         """
-        from apps.reservations.models import ReservationRoom
-        
         # Build query for conflicting reservation rooms
         query = Q(
             room_id=room_id,
@@ -66,28 +299,43 @@ class AvailabilityService:
         Returns:
             QuerySet: Available rooms
         """
+        count = int(count)
+        
+        # Sold-out room types are answered from the inventory ledger
+        if room_type_id:
+            availability = InventoryService.get_room_type_availability(
+                hotel_id, check_in_date, check_out_date, room_type_id
+            )
+            count = min(count, availability.get(int(room_type_id), 0))
+            if count <= 0:
+                return Room.objects.none()
+        
         # Get all rooms matching criteria
-        rooms = Room.objects.filter(
-            hotel_id=hotel_id,
-            is_active=True,
-            status='VC'  # Vacant Clean
-        )
+        rooms = AvailabilityService._free_rooms(hotel_id, check_in_date, check_out_date)
         
         if room_type_id:
             rooms = rooms.filter(room_type_id=room_type_id)
         
-        # Filter out rooms with conflicting reservations
-        available_rooms = []
-        for room in rooms:
-            if AvailabilityService.check_availability(
-                room.id, check_in_date, check_out_date
-            ):
-                available_rooms.append(room.id)
-                if len(available_rooms) >= count:
-                    break
+        available_rooms = list(rooms.values_list('id', flat=True)[:count])
         
         return Room.objects.filter(id__in=available_rooms)
     
+    @staticmethod
+    def _free_rooms(hotel_id, check_in_date, check_out_date):
+        """Vacant clean rooms without a conflicting reservation (single query)."""
+        conflicts = ReservationRoom.objects.filter(
+            room_id=OuterRef('pk'),
+            reservation__status__in=InventoryService.HOLDING_STATUSES,
+            reservation__check_in_date__lt=check_out_date,
+            reservation__check_out_date__gt=check_in_date
+        )
+        
+        return Room.objects.filter(
+            hotel_id=hotel_id,
+            is_active=True,
+            status='VC'  # Vacant Clean
+        ).filter(~Exists(conflicts)).order_by('room_number')
+    
     @staticmethod
     def get_availability_calendar(hotel_id, room_type_id, start_date, end_date):
         """
@@ -102,54 +350,104 @@ class AvailabilityService:
         Returns:
             dict: Availability data by date
         """
+        calendars = AvailabilityService.get_availability_calendars(
+            hotel_id, [room_type_id] if room_type_id else None, start_date, end_date
+        )
+        return calendars[int(room_type_id) if room_type_id else None]
+    
+    @staticmethod
+    def get_availability_calendars(hotel_id, room_type_ids, start_date, end_date):
+        """
+        Get availability calendars for several room types in one pass.
+        
+        Reservation intervals are loaded with a single query and expanded
+        into per-day occupancy with a sweep over a difference array.
+        
+        Args:
+            hotel_id: Hotel/Property ID
+            room_type_ids: List of room type IDs, or None for all rooms combined
+            start_date: Start date
+            end_date: End date
+            
+        Returns:
+            dict: {room_type_id (None for all rooms): availability data by date}
+        """
+        days = max((end_date - start_date).days, 0)
+        keys = [int(type_id) for type_id in room_type_ids] if room_type_ids else [None]
+        
         # Get all rooms
         rooms = Room.objects.filter(
             hotel_id=hotel_id,
             is_active=True
         )
         
-        if room_type_id:
-            rooms = rooms.filter(room_type_id=room_type_id)
-        
-        total_rooms = rooms.count()
-        
-        # Get all reservation rooms in date range
-        from apps.reservations.models import ReservationRoom
+        if room_type_ids:
+            rooms = rooms.filter(room_type_id__in=keys)
+            totals = dict.fromkeys(keys, 0)
+            totals.update(
+                (row['room_type_id'], row['total'])
+                for row in rooms.values('room_type_id').annotate(total=Count('id'))
+            )
+        else:
+            totals = {None: rooms.count()}
         
-        reservation_rooms = ReservationRoom.objects.filter(
+        # Get all reservation room intervals in date range
+        intervals = ReservationRoom.objects.filter(
             room__in=rooms,
-            reservation__status__in=['CONFIRMED', 'CHECKED_IN'],
+            reservation__status__in=InventoryService.HOLDING_STATUSES,
             reservation__check_in_date__lt=end_date,
             reservation__check_out_date__gt=start_date
-        ).select_related('room', 'reservation')
+        ).values_list(
+            'room__room_type_id', 'room_id',
+            'reservation__check_in_date', 'reservation__check_out_date'
+        )
         
-        # Build calendar
-        calendar = {}
-        current_date = start_date
+        by_room = {}
+        for type_id, room_id, check_in, check_out in intervals:
+            key = type_id if room_type_ids else None
+            by_room.setdefault((key, room_id), []).append(
+                (max((check_in - start_date).days, 0), min((check_out - start_date).days, days))
+            )
         
-        while current_date < end_date:
-            next_date = current_date + timedelta(days=1)
+        # Merge overlapping stays per room so each room is counted once per day
+        diffs = {key: [0] * (days + 1) for key in keys}
+        for (key, room_id), spans in by_room.items():
+            spans.sort()
+            merged_start, merged_end = spans[0]
+            for span_start, span_end in spans[1:]:
+                if span_start <= merged_end:
+                    merged_end = max(merged_end, span_end)
+                    continue
+                diffs[key][merged_start] += 1
+                diffs[key][merged_end] -= 1
+                merged_start, merged_end = span_start, span_end
+            diffs[key][merged_start] += 1
+            diffs[key][merged_end] -= 1
+        
+        # Build calendars
+        calendars = {}
+        for key in keys:
+            total_rooms = totals.get(key, 0)
+            calendar = {}
+            occupied = 0
             
-            # Count occupied rooms for this date
-            occupied = reservation_rooms.filter(
-                reservation__check_in_date__lt=next_date,
-                reservation__check_out_date__gt=current_date
-            ).values('room').distinct().count()
-            
-            available = total_rooms - occupied
-            occupancy_rate = (occupied / total_rooms * 100) if total_rooms > 0 else 0
-            
-            calendar[current_date.isoformat()] = {
-                'date': current_date.isoformat(),
-                'total_rooms': total_rooms,
-                'occupied': occupied,
-                'available': available,
-                'occupancy_rate': round(occupancy_rate, 2)
-            }
+            for offset in range(days):
+                occupied += diffs[key][offset]
+                current_date = (start_date + timedelta(days=offset)).isoformat()
+                available = total_rooms - occupied
+                occupancy_rate = (occupied / total_rooms * 100) if total_rooms > 0 else 0
+                
+                calendar[current_date] = {
+                    'date': current_date,
+                    'total_rooms': total_rooms,
+                    'occupied': occupied,
+                    'available': available,
+                    'occupancy_rate': round(occupancy_rate, 2)
+                }
             
-            current_date = next_date
+            calendars[key] = calendar
         
-        return calendar
+        return calendars
     
     @staticmethod
     def validate_booking_dates(check_in_date, check_out_date):
@@ -194,8 +492,6 @@ class AvailabilityService:
         Returns:
             QuerySet: Overlapping reservations
         """
-        from apps.reservations.models import ReservationRoom
-        
         reservation_rooms = ReservationRoom.objects.filter(
             room_id=room_id,
             reservation__status__in=['CONFIRMED', 'CHECKED_IN'],
@@ -226,23 +522,44 @@ class AvailabilityService:
         suggestions = {}
         
         # Get all room types for the property
-        room_types = RoomType.objects.filter(
-            hotel_id=hotel_id,
-            is_active=True
-        ).exclude(id=room_type_id)
-        
-        for room_type in room_types:
-            available = AvailabilityService.get_available_rooms(
-                hotel_id, room_type.id, check_in_date, check_out_date, count=3
-            )
-            
-            if available.exists():
+        room_types = {
+            room_type.id: room_type
+            for room_type in RoomType.objects.filter(
+                hotel_id=hotel_id,
+                is_active=True
+            ).exclude(id=room_type_id)
+        }
+        
+        # One ledger scan decides which room types can still be sold
+        availability = InventoryService.get_room_type_availability(
+            hotel_id, check_in_date, check_out_date
+        )
+        candidate_ids = [
+            type_id for type_id in room_types
+            if availability.get(type_id, 0) > 0
+        ]
+        if not candidate_ids:
+            return suggestions
+        
+        rooms_by_type = {}
+        free_rooms = AvailabilityService._free_rooms(
+            hotel_id, check_in_date, check_out_date
+        ).filter(room_type_id__in=candidate_ids).values('id', 'room_number', 'room_type_id')
+        
+        for room in free_rooms:
+            type_rooms = rooms_by_type.setdefault(room['room_type_id'], [])
+            if len(type_rooms) < min(3, availability[room['room_type_id']]):
+                type_rooms.append({'id': room['id'], 'room_number': room['room_number']})
+        
+        for type_id, rooms in rooms_by_type.items():
+            if rooms:
+                room_type = room_types[type_id]
                 suggestions[room_type.name] = {
                     'room_type_id': room_type.id,
                     'room_type_name': room_type.name,
                     'base_rate': str(room_type.base_rate),
-                    'available_count': available.count(),
-                    'rooms': list(available.values('id', 'room_number'))
+                    'available_count': len(rooms),
+                    'rooms': rooms
                 }
         
         return suggestions
@@ -0,0 +1,57 @@
+from django.db.models.signals import post_init, pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .models import Reservation, ReservationRoom
+from .services import InventoryService
+
+
+def _room_key(instance):
+    """Ledger identity of a reservation room: (reservation_id, room_type_id)."""
+    values = instance.__dict__
+    return (values.get('reservation_id'), values.get('room_type_id'))
+
+
+@receiver(post_init, sender=Reservation)
+def remember_reservation_state(sender, instance, **kwargs):
+    """Snapshot inventory-relevant fields as loaded from the database."""
+    instance._inventory_state = InventoryService.reservation_state(instance) if instance.pk else None
+
+
+@receiver(pre_save, sender=Reservation)
+def load_missing_reservation_state(sender, instance, **kwargs):
+    """Fall back to the stored row when the instance was loaded with deferred fields."""
+    state = getattr(instance, '_inventory_state', None)
+    if instance.pk and (state is None or not all(state)):
+        row = Reservation.objects.filter(pk=instance.pk).values_list(
+            'status', 'check_in_date', 'check_out_date'
+        ).first()
+        instance._inventory_state = row
+
+
+@receiver(post_save, sender=Reservation)
+def update_inventory_for_reservation(sender, instance, created, **kwargs):
+    """Keep the inventory ledger in step with reservation status and dates."""
+    previous_state = None if created else getattr(instance, '_inventory_state', None)
+    InventoryService.reservation_changed(instance, previous_state)
+    instance._inventory_state = InventoryService.reservation_state(instance)
+
+
+@receiver(post_init, sender=ReservationRoom)
+def remember_reservation_room_state(sender, instance, **kwargs):
+    """Snapshot the reservation and room type as loaded from the database."""
+    instance._inventory_key = _room_key(instance) if instance.pk else None
+
+
+@receiver(post_save, sender=ReservationRoom)
+def update_inventory_for_reservation_room(sender, instance, created, **kwargs):
+    """Consume or move a room night allocation when a room is added or edited."""
+    previous = None if created else getattr(instance, '_inventory_key', None)
+    current = _room_key(instance)
+    InventoryService.reservation_room_changed(previous, current)
+    instance._inventory_key = current
+
+
+@receiver(post_delete, sender=ReservationRoom)
+def release_inventory_for_reservation_room(sender, instance, **kwargs):
+    """Release the room nights of a removed reservation room."""
+    previous = getattr(instance, '_inventory_key', None) or _room_key(instance)
+    InventoryService.reservation_room_changed(previous, None)
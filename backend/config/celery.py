@@ -0,0 +1,38 @@
+"""
+Celery application for Hotel PMS.
+
+Workers are started with ``celery -A config worker``; task modules are
+discovered from each app's ``tasks.py``. Without a configured broker the
+tasks run eagerly in-process (see CELERY_TASK_ALWAYS_EAGER in settings).
+"""
+
+import os
+import uuid
+
+from celery import Celery
+from django.db import transaction
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+app = Celery('config')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
+
+
+def enqueue_on_commit(task, *args, **kwargs):
+    """
+    Queue a task once the current transaction commits.
+    
+    Use this when the task reads rows written by the caller, so a worker
+    never picks it up before the data is visible.
+    
+    Args:
+        task: Celery task to run
+        *args, **kwargs: Task arguments (must be serialisable)
+    
+    Returns:
+        str: The id the task will run under
+    """
+    task_id = str(uuid.uuid4())
+    transaction.on_commit(lambda: task.apply_async(args=args, kwargs=kwargs, task_id=task_id))
+    return task_id
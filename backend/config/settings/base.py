@@ -5,6 +5,7 @@ Django base settings for Hotel PMS project.
 from pathlib import Path
 import os
 from dotenv import load_dotenv
+from celery.schedules import crontab
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -135,6 +136,8 @@ else:
             }
         }
     }
+    # Trigram lookups for the guest search index
+    INSTALLED_APPS += ['django.contrib.postgres']
 
 # Custom User Model
 AUTH_USER_MODEL = 'accounts.User'
@@ -208,6 +211,129 @@ REST_FRAMEWORK = {
 # Token Expiration Settings
 TOKEN_EXPIRATION_HOURS = int(os.getenv('TOKEN_EXPIRATION_HOURS', '24'))
 
+# Rate Grid Settings (precomputed best-available rates)
+RATE_GRID_DAYS = int(os.getenv('RATE_GRID_DAYS', '365'))
+RATE_GRID_TIMEOUT = int(os.getenv('RATE_GRID_TIMEOUT', '86400'))  # 24 hours
+
+# Celery (background tasks)
+# Without a broker, tasks run eagerly in-process (development and tests)
+CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', os.getenv('REDIS_URL', ''))
+CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', CELERY_BROKER_URL or None)
+CELERY_TASK_ALWAYS_EAGER = os.getenv(
+    'CELERY_TASK_ALWAYS_EAGER', 'False' if CELERY_BROKER_URL else 'True'
+).lower() in ['true', '1', 'yes']
+CELERY_TASK_EAGER_PROPAGATES = True
+CELERY_TASK_SERIALIZER = 'json'
+CELERY_RESULT_SERIALIZER = 'json'
+CELERY_ACCEPT_CONTENT = ['json']
+CELERY_TIMEZONE = TIME_ZONE
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+# One queue per workload so each can get its own worker concurrency
+# (e.g. celery -A config worker -Q channels --concurrency=8)
+CELERY_TASK_ROUTES = {
+    'apps.channels.tasks.*': {'queue': 'channels'},
+    'apps.notifications.tasks.*': {'queue': 'notifications'},
+    'apps.reports.tasks.*': {'queue': 'night_audit'},
+}
+CELERY_BEAT_SCHEDULE = {
+    'reconcile-channel-availability': {
+        'task': 'apps.channels.tasks.reconcile_channel_availability_task',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    'sweep-webhook-inbox': {
+        'task': 'apps.channels.tasks.sweep_webhook_inbox_task',
+        'schedule': 60.0,
+    },
+    'send-arrival-reminders': {
+        'task': 'apps.notifications.tasks.schedule_arrival_reminders_task',
+        'schedule': crontab(hour=10, minute=0),
+    },
+    'refresh-daily-statistics': {
+        'task': 'apps.reports.tasks.refresh_todays_statistics_task',
+        'schedule': crontab(minute='*/15'),
+    },
+    'run-scheduled-reports': {
+        'task': 'apps.reports.tasks.run_scheduled_reports_task',
+        'schedule': crontab(minute='*/5'),
+    },
+    'resolve-guest-identities': {
+        'task': 'apps.guests.tasks.resolve_guest_identities_task',
+        'schedule': crontab(hour=2, minute=30),
+    },
+}
+CELERY_TASK_ANNOTATIONS = {
+    'apps.channels.tasks.sync_channel_rates_task': {
+        'rate_limit': os.getenv('CHANNEL_SYNC_RATE_LIMIT', '30/m')
+    },
+    'apps.channels.tasks.sync_channel_availability_task': {
+        'rate_limit': os.getenv('CHANNEL_SYNC_RATE_LIMIT', '30/m')
+    },
+    'apps.notifications.tasks.send_email_task': {
+        'rate_limit': os.getenv('EMAIL_RATE_LIMIT', '120/m')
+    },
+}
+
+# Channel Manager Settings
+# Availability changes are coalesced for this long before being pushed
+CHANNEL_SYNC_DEBOUNCE_SECONDS = int(os.getenv('CHANNEL_SYNC_DEBOUNCE_SECONDS', '30'))
+CHANNEL_SYNC_DAYS = int(os.getenv('CHANNEL_SYNC_DAYS', '365'))  # nightly reconciliation horizon
+CHANNEL_SYNC_BATCH_SIZE = int(os.getenv('CHANNEL_SYNC_BATCH_SIZE', '1000'))  # rows per sync-record upsert
+# OTA API calls are only made when enabled; otherwise pushes are logged
+CHANNEL_API_ENABLED = os.getenv('CHANNEL_API_ENABLED', 'False') == 'True'
+CHANNEL_HTTP_TIMEOUT = float(os.getenv('CHANNEL_HTTP_TIMEOUT', '10'))
+CHANNEL_HTTP_CONCURRENCY = int(os.getenv('CHANNEL_HTTP_CONCURRENCY', '8'))  # parallel pushes per sync
+CHANNEL_HTTP_MAX_PER_CHANNEL = int(os.getenv('CHANNEL_HTTP_MAX_PER_CHANNEL', '4'))  # open connections per channel
+CHANNEL_HTTP_MAX_RETRIES = int(os.getenv('CHANNEL_HTTP_MAX_RETRIES', '3'))
+CHANNEL_HTTP_BACKOFF_SECONDS = float(os.getenv('CHANNEL_HTTP_BACKOFF_SECONDS', '0.5'))
+# Requests per second per channel process, keyed by Channel.code
+CHANNEL_DEFAULT_RATE_LIMIT = float(os.getenv('CHANNEL_DEFAULT_RATE_LIMIT', '10'))
+CHANNEL_RATE_LIMITS = {
+    'BOOKINGCOM': 5,
+    'EXPEDIA': 10,
+    'AIRBNB': 5,
+    'AGODA': 5,
+}
+WEBHOOK_INBOX_BATCH_SIZE = int(os.getenv('WEBHOOK_INBOX_BATCH_SIZE', '100'))
+WEBHOOK_INBOX_MAX_ATTEMPTS = int(os.getenv('WEBHOOK_INBOX_MAX_ATTEMPTS', '5'))
+WEBHOOK_INBOX_LOCK_SECONDS = int(os.getenv('WEBHOOK_INBOX_LOCK_SECONDS', '300'))
+
+# Dashboard Settings
+DASHBOARD_CACHE_TTL = int(os.getenv('DASHBOARD_CACHE_TTL', '60'))  # seconds a computed dashboard is served from cache
+# Changes to a day's statistics are coalesced for this long before the day is rebuilt
+STATISTICS_REFRESH_DEBOUNCE_SECONDS = int(os.getenv('STATISTICS_REFRESH_DEBOUNCE_SECONDS', '30'))
+
+# Report Settings
+# Scheduled templates without a schedule time run at this (off-peak) local time
+REPORT_DEFAULT_SCHEDULE_TIME = os.getenv('REPORT_DEFAULT_SCHEDULE_TIME', '04:00')
+REPORT_SNAPSHOT_DIR = 'reports/snapshots'
+REPORT_SNAPSHOT_RETENTION = int(os.getenv('REPORT_SNAPSHOT_RETENTION', '30'))  # versions kept per template
+REPORT_EMAIL_RETRY_MINUTES = int(os.getenv('REPORT_EMAIL_RETRY_MINUTES', '30'))  # between attempts at an unsent scheduled report
+
+# Guest Search Settings
+GUEST_SEARCH_MIN_SIMILARITY = float(os.getenv('GUEST_SEARCH_MIN_SIMILARITY', '0.3'))  # 0-1, lower is more typo tolerant
+GUEST_SEARCH_CANDIDATES = int(os.getenv('GUEST_SEARCH_CANDIDATES', '200'))  # SQLite: FTS matches re-ranked per query
+
+# Guest Deduplication Settings
+# Pairs scoring at least this are merged (an equal passport alone scores 0.7, with a similar name 0.95)
+GUEST_MERGE_THRESHOLD = float(os.getenv('GUEST_MERGE_THRESHOLD', '0.8'))
+GUEST_DEDUP_MAX_BLOCK = int(os.getenv('GUEST_DEDUP_MAX_BLOCK', '50'))  # larger blocks (common names) are not compared
+
+# Export Settings
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '2000'))  # rows per database fetch in streamed exports
+
+# Billing Settings
+FOLIO_EXPORT_MAX_FOLIOS = int(os.getenv('FOLIO_EXPORT_MAX_FOLIOS', '500'))  # per zip export
+
+# Notification Settings
+NOTIFICATION_EMAIL_BATCH_SIZE = int(os.getenv('NOTIFICATION_EMAIL_BATCH_SIZE', '100'))  # messages per SMTP connection
+ARRIVAL_REMINDER_DAYS_AHEAD = int(os.getenv('ARRIVAL_REMINDER_DAYS_AHEAD', '1'))
+FCM_ENABLED = os.getenv('FCM_ENABLED', 'False') == 'True'
+FCM_SERVER_KEY = os.getenv('FCM_SERVER_KEY', '')
+FCM_MAX_TOKENS_PER_REQUEST = int(os.getenv('FCM_MAX_TOKENS_PER_REQUEST', '500'))  # provider limit is 1000
+FCM_CONCURRENCY = int(os.getenv('FCM_CONCURRENCY', '4'))
+
 # Swagger/API Documentation Settings
 SWAGGER_SETTINGS = {
     'SECURITY_DEFINITIONS': {
@@ -270,3 +270,223 @@ class TestGuestAPI:
         
         assert response.status_code == status.HTTP_200_OK
         assert len(response.data['results']) > 0
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    """Test cursor pagination of the large list endpoints."""
+    
+    def test_cursor_pages_are_stable_and_page_numbers_still_work(self, monkeypatch):
+        """Cursors walk every row once despite tied timestamps and new inserts."""
+        from django.utils import timezone
+        from api.pagination import KeysetPagination
+        
+        monkeypatch.setattr(KeysetPagination, 'page_size', 3)
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user(email='keyset@example.com', password='testpass123'))
+        guests = [
+            Guest.objects.create(first_name='Guest', last_name=str(i), email=f'guest{i}@example.com')
+            for i in range(7)
+        ]
+        tied = timezone.now()
+        Guest.objects.filter(pk__in=[guest.pk for guest in guests[2:5]]).update(created_at=tied)
+        
+        response = client.get('/api/v1/guests/')
+        assert response.data['count'] == 7
+        assert response.data['previous'] is None
+        seen = [row['id'] for row in response.data['results']]
+        second_page = response.data['next']
+        
+        # A row inserted mid-walk must not shift later pages
+        Guest.objects.create(first_name='Late', last_name='Arrival', email='late@example.com')
+        next_link = second_page
+        while next_link:
+            response = client.get(next_link)
+            seen += [row['id'] for row in response.data['results']]
+            next_link = response.data['next']
+        expected = list(Guest.objects.filter(pk__in=[guest.pk for guest in guests]).order_by(
+            '-created_at', '-id'
+        ).values_list('id', flat=True))
+        assert seen == expected
+        
+        response = client.get(second_page + '&skip_count=true')
+        assert 'count' not in response.data
+        previous = client.get(response.data['previous'])
+        assert [row['id'] for row in previous.data['results']] == seen[:3]
+        
+        response = client.get('/api/v1/guests/?page=1')
+        assert response.data['count'] == 8
+        assert len(response.data['results']) == 8
+        assert 'cursor=' in client.get('/api/v1/guests/').data['next']
+        assert client.get('/api/v1/guests/?ordering=last_name').data['next'] is None
+        assert client.get('/api/v1/guests/?cursor=bogus').status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+class TestGuestSearch:
+    """Test the indexed guest search."""
+    
+    def test_ranked_typo_tolerant_search(self, django_assert_max_num_queries):
+        """Names, emails and phones are matched through the index, best match first."""
+        import io
+        from django.core.management import call_command
+        from apps.guests.models import GuestSearchIndex
+        from apps.guests.services import GuestSearchService
+        
+        john = Guest.objects.create(first_name='John', last_name='Smith', email='jsmith@example.com', phone='+1 (555) 010-2030')
+        johanna = Guest.objects.create(first_name='Johanna', last_name='Smythe', email='jo@example.com', phone='555-999')
+        jose = Guest.objects.create(first_name='José', last_name='Álvarez', email='jose.alvarez@example.com', phone='123')
+        Guest.objects.create(first_name='Mary', last_name='Brown', email='mary@example.com', phone='777')
+        
+        assert GuestSearchIndex.objects.get(guest=jose).name == 'jose alvarez'
+        assert GuestSearchIndex.objects.get(guest=john).phone_digits == '15550102030'
+        
+        with django_assert_max_num_queries(3):
+            assert GuestSearchService.search('john smith')[0] == john
+        assert GuestSearchService.search('jonh smith')[0] == john
+        assert GuestSearchService.search('jose alvarez') == [jose]
+        assert GuestSearchService.search('Alvarez')[0] == jose
+        assert GuestSearchService.search('0102030') == [john]
+        assert GuestSearchService.search('jsmith@example.com')[0] == john
+        assert set(GuestSearchService.search('jo')) == {john, johanna, jose}
+        assert GuestSearchService.search('x') == []
+        
+        # Renames re-index; unrelated saves do not touch the index
+        john.last_name = 'Doe'
+        john.save()
+        assert GuestSearchService.search('john doe')[0] == john
+        GuestSearchIndex.objects.filter(guest=john).update(name='stale')
+        john.total_stays = 3
+        john.save(update_fields=['total_stays'])
+        assert GuestSearchIndex.objects.get(guest=john).name == 'stale'
+        call_command('rebuild_guest_search_index', stdout=io.StringIO())
+        assert GuestSearchIndex.objects.get(guest=john).name == 'john doe'
+        
+        user = User.objects.create_user(email='desk@example.com', password='testpass123', role='FRONT_DESK')
+        client = APIClient()
+        client.force_authenticate(user=user)
+        response = client.get('/api/v1/guests/search/', {'q': 'smythe'})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['results'][0]['id'] == johanna.pk
+
+
+@pytest.mark.django_db
+class TestGuestDeduplication:
+    """Test batch duplicate guest resolution."""
+    
+    def test_merges_confirmed_duplicates_incrementally(self):
+        """Matching guests are merged into the oldest; only new guests are re-checked."""
+        import io
+        from django.core.management import call_command
+        from apps.guests.models import GuestMerge, GuestSearchIndex, LoyaltyTransaction
+        from apps.guests.services import GuestDeduplicationService
+        
+        hotel = Property.objects.create(name='Test Hotel', code='DEDUP', total_rooms=10)
+        john = Guest.objects.create(first_name='John', last_name='Smith', email='john@example.com', passport_number='X1234567')
+        copy = Guest.objects.create(
+            first_name='Jon', last_name='Smith', email='JOHN@example.com', phone='+1 555 010 2030',
+            passport_number='x-1234567', loyalty_points=40
+        )
+        namesake = Guest.objects.create(first_name='John', last_name='Smith', passport_number='Y7654321')
+        Reservation.objects.create(
+            hotel=hotel, guest=copy, adults=1, status='CONFIRMED',
+            check_in_date=date.today() + timedelta(days=1), check_out_date=date.today() + timedelta(days=2),
+        )
+        LoyaltyTransaction.objects.create(guest=copy, transaction_type='EARN', points=40, description='Stay', balance_after=40)
+        
+        call_command('deduplicate_guests', '--dry-run', stdout=io.StringIO())
+        assert Guest.objects.count() == 3
+        
+        result = GuestDeduplicationService.run()
+        assert (result['checked'], result['merged']) == (3, 1)
+        assert not Guest.objects.filter(pk=copy.pk).exists()
+        assert Guest.objects.filter(pk=namesake.pk).exists()
+        john.refresh_from_db()
+        assert (john.phone, john.loyalty_points) == ('+1 555 010 2030', 40)
+        assert Reservation.objects.get().guest_id == john.pk
+        assert LoyaltyTransaction.objects.get().guest_id == john.pk
+        merge = GuestMerge.objects.get()
+        assert (merge.survivor_id, merge.merged_guest_id) == (john.pk, copy.pk)
+        assert 'passport' in merge.reasons
+        
+        # The survivor's filled-in phone is re-checked, then nothing is pending
+        assert GuestSearchIndex.objects.get(guest=john).resolved_at is None
+        GuestDeduplicationService.run()
+        assert GuestDeduplicationService.run()['checked'] == 0
+        
+        # Edits that leave the keys alone do not queue the guest again
+        john.notes = 'Prefers a high floor'
+        john.save()
+        assert GuestSearchIndex.objects.get(guest=john).resolved_at is not None
+        later = Guest.objects.create(first_name='John', last_name='Smith', phone='5550102030', email='john@example.com')
+        result = GuestDeduplicationService.run()
+        assert (result['checked'], result['merged']) == (1, 1)
+        assert not Guest.objects.filter(pk=later.pk).exists()
+
+
+@pytest.mark.django_db
+class TestGuestAggregates:
+    """Test the stored guest lifetime aggregates."""
+    
+    def test_maintained_at_checkout_and_folio_close(self):
+        """Checkout, folio close and loyalty postings update the guest; rebuild agrees."""
+        import io
+        from decimal import Decimal
+        from importlib import import_module
+        from django.apps import apps as django_apps
+        from django.core.management import call_command
+        from apps.billing.models import Folio
+        from apps.guests.models import LoyaltyTransaction
+        
+        hotel = Property.objects.create(name='Test Hotel', code='AGG', total_rooms=10)
+        guest = Guest.objects.create(first_name='Ada', last_name='Lovelace', vip_level=2)
+        reservation = Reservation.objects.create(
+            hotel=hotel, guest=guest, adults=1, status='CHECKED_IN',
+            check_in_date=date(2026, 3, 1), check_out_date=date(2026, 3, 4),
+        )
+        folio = Folio.objects.create(folio_number='AGG-1', guest=guest, reservation=reservation, total_charges=Decimal('450.00'))
+        
+        reservation = Reservation.objects.get(pk=reservation.pk)
+        reservation.status = 'CHECKED_OUT'
+        reservation.save()
+        reservation.save()
+        folio = Folio.objects.get(pk=folio.pk)
+        folio.status = 'CLOSED'
+        folio.save()
+        folio.status = 'SETTLED'
+        folio.save()
+        LoyaltyTransaction.objects.create(guest=guest, transaction_type='EARN', points=100, description='Stay', balance_after=100)
+        LoyaltyTransaction.objects.create(guest=guest, transaction_type='REDEEM', points=-30, description='Upgrade', balance_after=70)
+        
+        guest.refresh_from_db()
+        expected = (1, 3, date(2026, 3, 4), Decimal('450.00'), 100, 30)
+        fields = ('total_stays', 'total_nights', 'last_stay_date', 'total_revenue', 'loyalty_points_earned', 'loyalty_points_redeemed')
+        assert tuple(getattr(guest, field) for field in fields) == expected
+        
+        # Drift is corrected by the rebuild command
+        Guest.objects.filter(pk=guest.pk).update(total_stays=0, total_nights=9, last_stay_date=None, total_revenue=0)
+        call_command('rebuild_guest_aggregates', stdout=io.StringIO())
+        guest.refresh_from_db()
+        assert tuple(getattr(guest, field) for field in fields) == expected
+        
+        # The data migration fills existing guests the same way
+        backfill = import_module('apps.guests.migrations.0009_backfill_lifetime_loyalty_points')
+        Guest.objects.filter(pk=guest.pk).update(
+            total_stays=0, total_nights=0, last_stay_date=None, total_revenue=0,
+            loyalty_points_earned=0, loyalty_points_redeemed=0
+        )
+        backfill.backfill_guest_aggregates(django_apps, None)
+        guest.refresh_from_db()
+        assert tuple(getattr(guest, field) for field in fields) == expected
+        
+        # Reopening the folio takes its charges back out
+        folio.status = 'OPEN'
+        folio.save()
+        guest.refresh_from_db()
+        assert guest.total_revenue == 0
+        
+        user = User.objects.create_user(email='desk@example.com', password='testpass123', role='FRONT_DESK')
+        client = APIClient()
+        client.force_authenticate(user=user)
+        response = client.get(f'/api/v1/guests/{guest.pk}/loyalty/dashboard/')
+        assert (response.data['total_earned'], response.data['total_redeemed']) == (100, 30)
@@ -202,3 +202,112 @@ class TestBillingModels:
         assert folio.total_charges == Decimal('125.00')
         assert folio.total_taxes == Decimal('12.50')
         assert folio.balance == Decimal('137.50')
+    
+    def test_line_edits_and_deletes_shift_totals(self, setup_data):
+        """Updating or deleting a line adjusts the stored totals by the difference."""
+        folio = Folio.objects.create(
+            folio_number='F006',
+            guest=setup_data['guest'],
+            status='OPEN'
+        )
+        
+        charge = FolioCharge.objects.create(
+            folio=folio,
+            charge_code=setup_data['charge_code'],
+            description='Room Night 1',
+            quantity=1,
+            unit_price=Decimal('100.00'),
+            tax_amount=Decimal('10.00')
+        )
+        payment = Payment.objects.create(
+            folio=folio,
+            payment_method='CASH',
+            amount=Decimal('50.00')
+        )
+        
+        charge.quantity = 2
+        charge.save()
+        payment.delete()
+        
+        folio.refresh_from_db()
+        assert folio.total_charges == Decimal('200.00')
+        assert folio.total_taxes == Decimal('10.00')
+        assert folio.total_payments == Decimal('0.00')
+    
+    def test_check_folio_totals_reconciles_drift(self, setup_data):
+        """The consistency checker flags drifted folios and repairs them with --fix."""
+        from io import StringIO
+        from django.core.management import call_command
+        from apps.accounts.models import ActivityLog
+        
+        folio = Folio.objects.create(
+            folio_number='F007',
+            guest=setup_data['guest'],
+            status='OPEN'
+        )
+        FolioCharge.objects.create(
+            folio=folio,
+            charge_code=setup_data['charge_code'],
+            description='Room Night 1',
+            quantity=1,
+            unit_price=Decimal('100.00')
+        )
+        Folio.objects.filter(pk=folio.pk).update(total_charges=Decimal('90.00'))
+        
+        out = StringIO()
+        call_command('check_folio_totals', stdout=out)
+        assert 'F007' in out.getvalue()
+        
+        call_command('check_folio_totals', '--fix', stdout=StringIO())
+        folio.refresh_from_db()
+        assert folio.total_charges == Decimal('100.00')
+        assert not Folio.drifted().exists()
+        assert ActivityLog.objects.filter(model_name='Folio', object_id=str(folio.pk)).count() == 1
+    
+    def test_closed_folio_pdf_is_cached_per_version(self, setup_data, settings, tmp_path, monkeypatch):
+        """Closed folios render once per version; zip exports stream the cached PDFs."""
+        import io
+        import zipfile
+        from apps.billing.services import FolioDocumentService, stream_folio_zip
+        
+        settings.MEDIA_ROOT = str(tmp_path)
+        folio = Folio.objects.create(
+            folio_number='F900', guest=setup_data['guest'], reservation=setup_data['reservation']
+        )
+        FolioCharge.objects.create(
+            folio=folio, charge_code=setup_data['charge_code'], description='Room',
+            quantity=1, unit_price=Decimal('100.00'), amount=Decimal('100.00')
+        )
+        folio.status = Folio.Status.CLOSED
+        folio.save()
+        
+        renders = []
+        render_pdf = FolioDocumentService.render_pdf
+        monkeypatch.setattr(
+            FolioDocumentService, 'render_pdf',
+            staticmethod(lambda *args: renders.append(args) or render_pdf(*args))
+        )
+        
+        assert FolioDocumentService.prerender(FolioDocumentService.folio_queryset().get(pk=folio.pk)) == 1
+        for _ in range(2):
+            with FolioDocumentService.open_pdf(FolioDocumentService.folio_queryset().get(pk=folio.pk)) as pdf:
+                assert pdf.read(5) == b'%PDF-'
+        assert len(renders) == 1
+        
+        FolioCharge.objects.create(
+            folio=folio, charge_code=setup_data['charge_code'], description='Late checkout',
+            quantity=1, unit_price=Decimal('20.00'), amount=Decimal('20.00')
+        )
+        archive = b''.join(stream_folio_zip(FolioDocumentService.folio_queryset().filter(pk=folio.pk)))
+        assert len(renders) == 2
+        assert zipfile.ZipFile(io.BytesIO(archive)).namelist() == ['folio_F900.pdf']
+        assert len(list((tmp_path / 'documents' / 'folios' / str(folio.pk)).iterdir())) == 1
+        
+        # A line that leaves the totals alone still changes the document
+        FolioCharge.objects.create(
+            folio=folio, charge_code=setup_data['charge_code'], description='Complimentary upgrade',
+            quantity=1, unit_price=Decimal('0.00'), amount=Decimal('0.00')
+        )
+        with FolioDocumentService.open_pdf(FolioDocumentService.folio_queryset().get(pk=folio.pk)) as pdf:
+            assert pdf.read(5) == b'%PDF-'
+        assert len(renders) == 3
@@ -491,3 +491,342 @@ class TestChannelsModels:
         property_channel.save()
         
         assert property_channel.last_sync is not None
+
+
+@pytest.mark.django_db
+class TestAvailabilityChangeSync:
+    """Test change-driven channel availability pushes."""
+    
+    @pytest.fixture
+    def connected(self, setup_channel_data):
+        from apps.rooms.models import Room
+        
+        room = Room.objects.create(
+            hotel=setup_channel_data['property'],
+            room_type=setup_channel_data['room_type'],
+            room_number='201'
+        )
+        channel = Channel.objects.create(name='Booking.com', code='BOOKINGCOM', channel_type='OTA')
+        property_channel = PropertyChannel.objects.create(
+            property=setup_channel_data['property'],
+            channel=channel,
+            property_code='BEACH-BKG'
+        )
+        RoomTypeMapping.objects.create(
+            property_channel=property_channel,
+            room_type=setup_channel_data['room_type'],
+            channel_room_code='DBL',
+            channel_room_name='Double Room'
+        )
+        return {**setup_channel_data, 'room': room, 'property_channel': property_channel}
+    
+    def test_reservation_pushes_only_changed_nights(self, connected, django_capture_on_commit_callbacks):
+        """Booking two nights pushes exactly those two cells once the transaction commits."""
+        from apps.channels.models import AvailabilityChange
+        from apps.guests.models import Guest
+        from apps.reservations.models import Reservation, ReservationRoom
+        
+        check_in = date.today() + timedelta(days=10)
+        guest = Guest.objects.create(first_name='Ana', last_name='Silva', email='ana@example.com')
+        with django_capture_on_commit_callbacks(execute=True):
+            reservation = Reservation.objects.create(
+                hotel=connected['property'],
+                guest=guest,
+                check_in_date=check_in,
+                check_out_date=check_in + timedelta(days=2),
+                status='CONFIRMED'
+            )
+            ReservationRoom.objects.create(
+                reservation=reservation,
+                room=connected['room'],
+                room_type=connected['room_type']
+            )
+        
+        updates = AvailabilityUpdate.objects.filter(property_channel=connected['property_channel'])
+        assert sorted(updates.values_list('date', 'availability')) == [
+            (check_in, 0), (check_in + timedelta(days=1), 0)
+        ]
+        assert not AvailabilityChange.objects.exists()
+    
+    def test_room_block_marks_inclusive_range_and_skips_unchanged(self, connected):
+        """Blocks mark every covered night; cells the channel already has are not re-sent."""
+        from apps.channels.models import AvailabilityChange
+        from apps.channels.services import AvailabilityChangeService
+        from apps.rooms.models import RoomBlock
+        
+        start = date.today() + timedelta(days=5)
+        RoomBlock.objects.create(room=connected['room'], start_date=start, end_date=start + timedelta(days=2))
+        assert AvailabilityChange.objects.count() == 3
+        
+        result = AvailabilityChangeService.push_changes(connected['property'].id)
+        assert result['total_synced'] == 3
+        
+        AvailabilityChangeService.mark(
+            connected['property'].id, connected['room_type'].id, start, start + timedelta(days=1)
+        )
+        result = AvailabilityChangeService.push_changes(connected['property'].id)
+        assert result['cells'] == 1
+        assert result['total_synced'] == 0
+    
+    def test_failed_push_stays_pending_and_rollback_schedules_nothing(
+        self, connected, monkeypatch, django_capture_on_commit_callbacks
+    ):
+        """Rejected cells are retried by the next run; a rolled back mark leaves no debounce key."""
+        from django.core.cache import cache
+        from django.db import transaction
+        from apps.channels.models import AvailabilityChange
+        from apps.channels.services import AvailabilityChangeService, AvailabilitySyncService
+        
+        cache.clear()
+        hotel_id = connected['property'].id
+        start = date.today() + timedelta(days=5)
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            with transaction.atomic():
+                AvailabilityChangeService.mark(hotel_id, connected['room_type'].id, start, start + timedelta(days=1))
+                transaction.set_rollback(True)
+        assert not callbacks
+        assert cache.get(AvailabilityChangeService._schedule_key(hotel_id)) is None
+        
+        AvailabilityChangeService.mark(hotel_id, connected['room_type'].id, start, start + timedelta(days=2))
+        monkeypatch.setattr(
+            AvailabilitySyncService, '_push_availability', lambda self, payload: {'success': False, 'error': 'down'}
+        )
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            result = AvailabilityChangeService.push_changes(hotel_id)
+        assert not result['success']
+        assert AvailabilityChange.objects.count() == 2
+        assert len(callbacks) == 1  # the retry run
+        
+        monkeypatch.undo()
+        result = AvailabilityChangeService.push_changes(hotel_id)
+        assert result['total_synced'] == 2
+        assert not AvailabilityChange.objects.exists()
+        
+    def test_manual_sync_is_queued_after_commit(self, connected, django_capture_on_commit_callbacks):
+        """The sync endpoint answers 202 and the worker pushes once the request commits."""
+        from rest_framework.test import APIClient
+        from apps.accounts.models import User
+        
+        user = User.objects.create_user(
+            email='revenue@beachresort.com', password='testpass123', first_name='Rev', last_name='Manager', role='ADMIN'
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+        start = date.today() + timedelta(days=3)
+        url = f"/api/v1/channels/property-channels/{connected['property_channel'].id}/sync-availability/"
+        
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            response = client.post(url, {'start_date': start.isoformat(), 'end_date': start.isoformat()}, format='json')
+        assert response.status_code == 202 and response.data['task_id']
+        assert not AvailabilityUpdate.objects.exists()
+        
+        for callback in callbacks:
+            callback()
+        assert AvailabilityUpdate.objects.filter(property_channel=connected['property_channel'], date=start).exists()
+    
+    def test_rate_sync_upserts_one_record_per_cell(self, connected, django_assert_max_num_queries):
+        """Repeated rate pushes update the same sync records in a few statements."""
+        from apps.channels.services import RateSyncService
+        
+        property_channel = connected['property_channel']
+        property_channel.rate_markup = Decimal('10.00')
+        property_channel.save()
+        RatePlanMapping.objects.create(
+            property_channel=property_channel,
+            rate_plan=connected['rate_plan'],
+            channel_rate_code='BAR-OTA',
+            channel_rate_name='Best Available'
+        )
+        start = date.today() + timedelta(days=1)
+        
+        RateSyncService(property_channel).sync_rates(start, start + timedelta(days=29))
+        with django_assert_max_num_queries(15):
+            result = RateSyncService(property_channel).sync_rates(start, start + timedelta(days=29))
+        
+        assert result['total_synced'] == 30
+        updates = RateUpdate.objects.filter(property_channel=property_channel)
+        assert updates.count() == 30
+        assert set(updates.values_list('rate', flat=True)) == {Decimal('198.00')}
+    
+    def test_rate_sync_leaves_stay_discounts_to_booking(self, connected):
+        """Fixed and minimum-stay discounts are not taken off every pushed night."""
+        from apps.rates.models import Discount
+        from apps.channels.services import RateSyncService
+        
+        property_channel = connected['property_channel']
+        RatePlanMapping.objects.create(
+            property_channel=property_channel,
+            rate_plan=connected['rate_plan'],
+            channel_rate_code='BAR-OTA',
+            channel_rate_name='Best Available'
+        )
+        start = date.today() + timedelta(days=1)
+        for code, discount_type, value, min_nights in [
+            ('FIFTY', 'FIXED', '50.00', None),
+            ('WEEK', 'PERCENTAGE', '20.00', 7),
+            ('WEB', 'PERCENTAGE', '10.00', None),
+        ]:
+            Discount.objects.create(
+                property=connected['property'], name=code, code=code, discount_type=discount_type,
+                value=Decimal(value), min_nights=min_nights, valid_from=start, valid_to=start + timedelta(days=30)
+            )
+        
+        RateSyncService(property_channel).sync_rates(start, start + timedelta(days=4))
+        rates = RateUpdate.objects.filter(property_channel=property_channel).values_list('rate', flat=True)
+        assert set(rates) == {Decimal('162.00')}
+
+
+@pytest.mark.django_db
+class TestWebhookInbox:
+    """Test idempotent reservation webhook ingestion."""
+    
+    def _payload(self, check_in, version='1', adults=2):
+        return {
+            'guest': {'first_name': 'Lena', 'last_name': 'Berg', 'email': 'lena@example.com'},
+            'reservation': {
+                'id': 'BKG-1001',
+                'version': version,
+                'check_in': check_in.isoformat(),
+                'check_out': (check_in + timedelta(days=2)).isoformat(),
+                'room_type_code': 'DBL',
+                'adults': adults,
+                'rate_per_night': '180.00',
+                'total_amount': '360.00',
+            }
+        }
+    
+    def test_replayed_webhook_creates_one_reservation(self, setup_channel_data, django_capture_on_commit_callbacks):
+        """Duplicate deliveries are acknowledged but applied once; new versions update the booking."""
+        from rest_framework.test import APIClient
+        from apps.channels.models import WebhookInbox
+        from apps.reservations.models import Reservation
+        
+        channel = Channel.objects.create(name='Expedia', code='EXPEDIA', channel_type='OTA')
+        property_channel = PropertyChannel.objects.create(
+            property=setup_channel_data['property'],
+            channel=channel,
+            property_code='BEACH-EXP'
+        )
+        RoomTypeMapping.objects.create(
+            property_channel=property_channel,
+            room_type=setup_channel_data['room_type'],
+            channel_room_code='DBL',
+            channel_room_name='Double Room'
+        )
+        url = f'/api/v1/channels/webhook/{property_channel.id}/'
+        check_in = date.today() + timedelta(days=7)
+        client = APIClient()
+        
+        with django_capture_on_commit_callbacks(execute=True):
+            first = client.post(url, self._payload(check_in), format='json')
+        second = client.post(url, self._payload(check_in), format='json')
+        
+        assert first.status_code == 202 and not first.data['duplicate']
+        assert second.status_code == 202 and second.data['duplicate']
+        assert WebhookInbox.objects.count() == 1
+        assert WebhookInbox.objects.get().status == WebhookInbox.Status.PROCESSED
+        assert Reservation.objects.filter(external_id='BKG-1001').count() == 1
+        
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(url, self._payload(check_in, version='2', adults=1), format='json')
+        
+        reservation = Reservation.objects.get(external_id='BKG-1001')
+        assert reservation.adults == 1
+        assert ChannelReservation.objects.filter(property_channel=property_channel).count() == 1
+        assert not WebhookInbox.objects.filter(status=WebhookInbox.Status.PENDING).exists()
+    
+    def test_unversioned_amendment_and_cancellation_are_applied(self, setup_channel_data, django_capture_on_commit_callbacks):
+        """Without a version, each distinct payload is a new version; a cancellation frees the booking."""
+        from rest_framework.test import APIClient
+        from apps.channels.models import WebhookInbox
+        from apps.reservations.models import Reservation
+        
+        channel = Channel.objects.create(name='Expedia', code='EXPEDIA', channel_type='OTA')
+        property_channel = PropertyChannel.objects.create(
+            property=setup_channel_data['property'],
+            channel=channel,
+            property_code='BEACH-EXP'
+        )
+        suite = RoomType.objects.create(
+            hotel=setup_channel_data['property'], name='Suite', code='STE', max_occupancy=2, base_rate=Decimal('300.00')
+        )
+        for room_type, code in ((setup_channel_data['room_type'], 'DBL'), (suite, 'STE')):
+            RoomTypeMapping.objects.create(
+                property_channel=property_channel, room_type=room_type, channel_room_code=code, channel_room_name=code
+            )
+        url = f'/api/v1/channels/webhook/{property_channel.id}/'
+        check_in = date.today() + timedelta(days=7)
+        client = APIClient()
+        
+        booking = self._payload(check_in)
+        del booking['reservation']['version']
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(url, booking, format='json')
+        assert client.post(url, booking, format='json').data['duplicate']
+        
+        booking['reservation']['room_type_code'] = 'STE'
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(url, booking, format='json')
+        reservation = Reservation.objects.get(external_id='BKG-1001')
+        assert reservation.rooms.get().room_type == suite
+        
+        booking['reservation']['status'] = 'cancelled'
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.post(url, booking, format='json')
+        assert not response.data['duplicate']
+        assert WebhookInbox.objects.count() == 3
+        assert Reservation.objects.get(external_id='BKG-1001').status == Reservation.Status.CANCELLED
+        assert ChannelReservation.objects.get().status == ChannelReservation.Status.CANCELLED
+
+
+@pytest.mark.django_db
+class TestChannelTransport:
+    """Test pooled, rate-limited pushes against a local OTA endpoint."""
+    
+    def test_rate_push_fans_out_over_kept_alive_connections(self, setup_channel_data, settings):
+        """Each room type is pushed once; a throttled push is retried and connections are reused."""
+        from apps.channels.mock_server import MockChannelServer
+        from apps.channels.services import RateSyncService
+        from apps.channels.transport import reset_transports
+        
+        settings.CHANNEL_API_ENABLED = True
+        settings.CHANNEL_HTTP_BACKOFF_SECONDS = 0
+        settings.CHANNEL_HTTP_MAX_PER_CHANNEL = 2
+        suite = RoomType.objects.create(
+            hotel=setup_channel_data['property'], name='Suite', code='STE',
+            max_occupancy=2, base_rate=Decimal('300.00')
+        )
+        RoomRate.objects.create(
+            rate_plan=setup_channel_data['rate_plan'], room_type=suite,
+            season=setup_channel_data['season'], single_rate=Decimal('280.00'), double_rate=Decimal('300.00')
+        )
+        
+        with MockChannelServer() as server:
+            channel = Channel.objects.create(
+                name='Agoda', code='AGODA', channel_type='OTA', api_url=server.url, api_key='secret'
+            )
+            property_channel = PropertyChannel.objects.create(
+                property=setup_channel_data['property'], channel=channel,
+                property_code='BEACH-AGD', rate_plan=setup_channel_data['rate_plan']
+            )
+            for room_type in (setup_channel_data['room_type'], suite):
+                RoomTypeMapping.objects.create(
+                    property_channel=property_channel, room_type=room_type,
+                    channel_room_code=room_type.code, channel_room_name=room_type.name
+                )
+            server.responses = [429]
+            start = date.today() + timedelta(days=1)
+            try:
+                first = RateSyncService(property_channel).sync_rates(start, start + timedelta(days=6))
+                second = RateSyncService(property_channel).sync_rates(start, start + timedelta(days=6))
+            finally:
+                reset_transports()
+        
+        assert first['success'] and second['success']
+        assert first['total_synced'] == 14
+        assert len(server.requests) == 5  # 2 room types x 2 syncs + 1 retry
+        assert {request['path'] for request in server.requests} == {'/rates'}
+        assert {request['payload']['room_type_code'] for request in server.requests} == {'DBL', 'STE'}
+        assert {request['authorization'] for request in server.requests} == {'Bearer secret'}
+        assert len({request['client'] for request in server.requests}) <= 2
+        assert RateUpdate.objects.filter(property_channel=property_channel).count() == 14
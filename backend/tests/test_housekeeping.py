@@ -147,3 +147,52 @@ class TestHousekeepingModels:
         
         assert task.priority == 'URGENT'
         assert task.special_instructions != ''
+
+
+@pytest.mark.django_db
+class TestHousekeepingTaskPush:
+    """Test push notifications for new housekeeping tasks."""
+    
+    def test_new_tasks_are_pushed_after_commit(self, monkeypatch, django_capture_on_commit_callbacks):
+        """Unassigned tasks go to the property's housekeepers; assigned ones to the assignee."""
+        from rest_framework.test import APIClient
+        from apps.notifications import tasks
+        
+        property_obj = Property.objects.create(name='Test Hotel', code='PUSH01', total_rooms=10)
+        room_type = RoomType.objects.create(hotel=property_obj, name='Standard Room', code='STD', max_occupancy=2, base_rate=100)
+        rooms = [
+            Room.objects.create(hotel=property_obj, room_type=room_type, room_number=number, status='VD')
+            for number in ('101', '102')
+        ]
+        manager = User.objects.create_user(
+            email='manager@test.com', password='testpass123', role='MANAGER', assigned_property=property_obj
+        )
+        housekeeper = User.objects.create_user(
+            email='hk@test.com', password='testpass123', role='HOUSEKEEPING', assigned_property=property_obj
+        )
+        pushes = []
+        monkeypatch.setattr(
+            tasks.push_service, 'send_to_targets',
+            lambda title, body, data=None, **targets: pushes.append((title, body, targets)) or {'success': True}
+        )
+        client = APIClient()
+        client.force_authenticate(user=manager)
+        
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.post('/api/v1/housekeeping/tasks/', {
+                'room': rooms[0].id, 'task_type': 'CLEANING', 'scheduled_date': date.today().isoformat()
+            }, format='json')
+        assert response.status_code == 201
+        title, body, targets = pushes[0]
+        assert (title, body) == ('New housekeeping task', 'Room 101')
+        assert targets['roles'] == ['HOUSEKEEPING'] and targets['property_id'] == property_obj.id
+        
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.post('/api/v1/housekeeping/tasks/bulk-assign/', {
+                'rooms': [room.id for room in rooms], 'task_type': 'CLEANING',
+                'assigned_to': housekeeper.id, 'scheduled_date': date.today().isoformat()
+            }, format='json')
+        assert response.status_code == 201
+        assert len(pushes) == 2
+        assert pushes[1][2]['users'] == [housekeeper.id]
+        assert pushes[1][0] == '2 new housekeeping tasks'
@@ -504,3 +504,124 @@ class TestNotificationsModels:
         
         assert email.status == 'BOUNCED'
         assert 'not exist' in email.error_message
+
+
+@pytest.mark.django_db
+class TestNotificationDispatcher:
+    """Test batched, template-driven notification delivery."""
+    
+    def test_arrival_reminders_render_template_and_log_in_bulk(
+        self, setup_notifications_data, mailoutbox, django_assert_max_num_queries
+    ):
+        """Every arrival with an email gets the property's template; logs are bulk inserted."""
+        from apps.guests.models import Guest
+        from apps.notifications.services import notification_dispatcher
+        from apps.reservations.models import Reservation
+        
+        property = setup_notifications_data['property']
+        template = NotificationTemplate.objects.create(
+            property=property,
+            name='Arrival Reminder',
+            template_type='EMAIL',
+            trigger_event='PRE_ARRIVAL',
+            subject='See you soon at {{ property.name }}',
+            body='Hi {{ guest.first_name }}, booking {{ reservation.confirmation_number }} starts tomorrow.'
+        )
+        arrival = timezone.localdate() + timedelta(days=1)
+        for first_name, email in [('Ana', 'ana@example.com'), ('Ben', 'ben@example.com'), ('Cy', '')]:
+            Reservation.objects.create(
+                hotel=property,
+                guest=Guest.objects.create(first_name=first_name, last_name='Guest', email=email),
+                check_in_date=arrival,
+                check_out_date=arrival + timedelta(days=2),
+                status='CONFIRMED'
+            )
+        
+        with django_assert_max_num_queries(4):
+            result = notification_dispatcher.send_arrival_reminders(property.id, arrival)
+        
+        assert result == {'sent': 2, 'failed': 0}
+        assert sorted(message.to[0] for message in mailoutbox) == ['ana@example.com', 'ben@example.com']
+        assert mailoutbox[0].subject == 'See you soon at Seaside Hotel'
+        logs = EmailLog.objects.filter(template=template, status='SENT', related_object_type='reservation')
+        assert logs.count() == 2
+        assert 'starts tomorrow' in logs.first().body
+    
+    def test_failed_message_is_isolated_and_logged(self, setup_notifications_data, mailoutbox, monkeypatch):
+        """A rejected message fails alone, nothing is resent, and a dead connection still writes logs."""
+        from django.core.mail.backends.locmem import EmailBackend
+        from apps.notifications import services
+        from apps.notifications.services import notification_dispatcher
+        
+        template = NotificationTemplate(name='Note', template_type='EMAIL', subject='Hello', body='Hi {{ name }}')
+        recipients = [{'to': f'{name}@example.com', 'context': {'name': name}} for name in ('ana', 'ben', 'cy')]
+        send_messages = EmailBackend.send_messages
+        
+        def reject_ben(backend, messages):
+            if messages[0].to == ['ben@example.com']:
+                raise ConnectionError('mailbox unavailable')
+            return send_messages(backend, messages)
+        
+        monkeypatch.setattr(EmailBackend, 'send_messages', reject_ben)
+        assert notification_dispatcher.send_emails(template, recipients) == {'sent': 2, 'failed': 1}
+        assert sorted(message.to[0] for message in mailoutbox) == ['ana@example.com', 'cy@example.com']
+        assert EmailLog.objects.get(status='FAILED').to_email == 'ben@example.com'
+        
+        def refuse(**kwargs):
+            raise ConnectionRefusedError('smtp down')
+        
+        monkeypatch.setattr(services, 'get_connection', refuse)
+        assert notification_dispatcher.send_emails(template, recipients) == {'sent': 0, 'failed': 3}
+        assert EmailLog.objects.filter(status='FAILED', error_message='smtp down').count() == 3
+
+
+@pytest.mark.django_db
+class TestPushFanOut:
+    """Test FCM push delivery to resolved device tokens."""
+    
+    def test_role_broadcast_chunks_tokens_and_prunes_invalid(self, setup_notifications_data, settings):
+        """Targets resolve to active tokens, go out in chunks, and unregistered tokens are deactivated."""
+        import threading
+        from apps.notifications.models import PushDeviceToken
+        from apps.notifications.services import PushNotificationService
+        
+        settings.FCM_ENABLED = True
+        settings.FCM_SERVER_KEY = 'server-key'
+        settings.FCM_MAX_TOKENS_PER_REQUEST = 2
+        property = setup_notifications_data['property']
+        for i in range(3):
+            user = User.objects.create_user(
+                email=f'hk{i}@seasidehotel.com', password='testpass123',
+                role='HOUSEKEEPING', assigned_property=property
+            )
+            PushDeviceToken.objects.create(user=user, token=f'hk-token-{i}', platform='ANDROID')
+        PushDeviceToken.objects.create(user=setup_notifications_data['user1'], token='manager-token', platform='IOS')
+        
+        class FakeResponse:
+            status_code = 200
+            
+            def __init__(self, tokens):
+                self.tokens = tokens
+            
+            def json(self):
+                return {'results': [
+                    {'error': 'NotRegistered'} if token == 'hk-token-1' else {'message_id': f'm-{token}'}
+                    for token in self.tokens
+                ]}
+        
+        calls = []
+        lock = threading.Lock()
+        
+        def fake_post(url, json, timeout):
+            with lock:
+                calls.append(json['registration_ids'])
+            return FakeResponse(json['registration_ids'])
+        
+        service = PushNotificationService()
+        service.session.post = fake_post
+        result = service.send_to_targets('Rooms ready', '3 rooms to clean', roles=['HOUSEKEEPING'], property_id=property.id)
+        
+        assert result == {'success': True, 'sent': 2, 'failed': 1, 'pruned': 1}
+        assert sorted(len(chunk) for chunk in calls) == [1, 2]
+        assert not PushDeviceToken.objects.get(token='hk-token-1').is_active
+        assert 'manager-token' not in [token for chunk in calls for token in chunk]
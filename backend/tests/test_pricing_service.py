@@ -149,3 +149,143 @@ class TestPricingService:
         # Discount should be applied
         assert result['discount_amount'] > 0
         assert len(result['discount_details']) > 0
+    
+    def test_date_rate_override(self, setup_data):
+        """Test date-specific rate replaces the seasonal rate."""
+        from apps.rates.models import DateRate
+        
+        check_in = date.today()
+        DateRate.objects.create(
+            room_type=setup_data['room_type'],
+            rate_plan=setup_data['rate_plan'],
+            date=check_in,
+            rate=Decimal('90.00')
+        )
+        
+        result = PricingService.calculate_room_rate(
+            room_type_id=setup_data['room_type'].id,
+            rate_plan_id=setup_data['rate_plan'].id,
+            check_in_date=check_in,
+            check_out_date=check_in + timedelta(days=2),
+            adults=2
+        )
+        
+        assert float(result['base_amount']) == 240.00  # 90 + 150
+    
+    def test_rate_comparison_uses_bulk_queries(self, setup_data, django_assert_max_num_queries):
+        """Test comparing many plans does not query per night or plan."""
+        for index in range(5):
+            rate_plan = RatePlan.objects.create(
+                property=setup_data['property'],
+                name=f'Plan {index}',
+                code=f'P{index}',
+                is_active=True
+            )
+            RoomRate.objects.create(
+                rate_plan=rate_plan,
+                room_type=setup_data['room_type'],
+                season=setup_data['season'],
+                single_rate=Decimal('80.00') + index,
+                double_rate=Decimal('120.00') + index,
+                is_active=True
+            )
+        
+        check_in = date.today()
+        with django_assert_max_num_queries(8):
+            comparisons = PricingService.get_rate_comparison(
+                setup_data['room_type'].id,
+                check_in,
+                check_in + timedelta(days=14),
+                setup_data['property'].id
+            )
+        
+        assert len(comparisons) == 6
+        assert comparisons[0]['rate_plan_name'] == 'Plan 0'
+    
+    def test_rate_grid_cells_invalidated_on_rate_change(self, setup_data, django_capture_on_commit_callbacks):
+        """Test grid lookups are cached and refreshed after a rate edit."""
+        from django.core.cache import cache
+        from apps.rates.services import RateGridService
+        
+        cache.clear()
+        today = date.today()
+        property_id = setup_data['property'].id
+        room_type_id = setup_data['room_type'].id
+        
+        RateGridService.build(property_id, today, today + timedelta(days=7))
+        assert RateGridService.get_best_rate(property_id, room_type_id, today) == Decimal('150.00')
+        
+        with django_capture_on_commit_callbacks(execute=True):
+            room_rate = setup_data['room_rate']
+            room_rate.double_rate = Decimal('175.00')
+            room_rate.save()
+        
+        key = RateGridService.cell_key(room_type_id, setup_data['rate_plan'].id, today)
+        assert cache.get(key) is None
+        assert RateGridService.get_best_rate(property_id, room_type_id, today) == Decimal('175.00')
+    
+    def test_rate_grid_follows_business_date(self, setup_data, monkeypatch):
+        """Lead-time prices are recomputed once the date rolls over."""
+        from django.core.cache import cache
+        from django.utils import timezone
+        from apps.rates.models import YieldRule
+        from apps.rates.services import RateGridService
+        
+        cache.clear()
+        property_id = setup_data['property'].id
+        room_type_id = setup_data['room_type'].id
+        YieldRule.objects.create(
+            property=setup_data['property'], name='Last minute', trigger_type='DAY_AHEAD',
+            min_threshold=0, max_threshold=1, adjustment_percent=Decimal('20.00')
+        )
+        now = timezone.now()
+        stay = now.date() + timedelta(days=2)
+        assert RateGridService.get_best_rate(property_id, room_type_id, stay) == Decimal('150.00')
+        
+        monkeypatch.setattr(timezone, 'now', lambda: now + timedelta(days=1))
+        assert RateGridService.get_best_rate(property_id, room_type_id, stay) == Decimal('180.00')
+    
+    def test_occupancy_yield_rule_uses_inventory(self, setup_data):
+        """Test occupancy rules only apply above their threshold."""
+        from apps.rates.models import YieldRule
+        from apps.reservations.models import Reservation, ReservationRoom
+        from apps.rooms.models import Room
+        from apps.guests.models import Guest
+        
+        for number in ('101', '102'):
+            Room.objects.create(
+                hotel=setup_data['property'],
+                room_type=setup_data['room_type'],
+                room_number=number
+            )
+        YieldRule.objects.create(
+            property=setup_data['property'],
+            name='High occupancy',
+            trigger_type='OCCUPANCY',
+            min_threshold=50,
+            adjustment_percent=Decimal('10.00')
+        )
+        check_in = date.today() + timedelta(days=1)
+        
+        def nightly_rate():
+            result = PricingService.calculate_room_rate(
+                room_type_id=setup_data['room_type'].id,
+                rate_plan_id=setup_data['rate_plan'].id,
+                check_in_date=check_in,
+                check_out_date=check_in + timedelta(days=1),
+                adults=2
+            )
+            return result['daily_rates'][0]['rate']
+        
+        assert nightly_rate() == 150.00
+        
+        reservation = Reservation.objects.create(
+            hotel=setup_data['property'],
+            guest=Guest.objects.create(first_name='Ann', last_name='Lee', email='ann@example.com'),
+            check_in_date=check_in,
+            check_out_date=check_in + timedelta(days=1),
+            status='CONFIRMED'
+        )
+        ReservationRoom.objects.create(reservation=reservation, room_type=setup_data['room_type'])
+        
+        assert nightly_rate() == 165.00
@@ -411,6 +411,117 @@ class TestReportsModels:
         assert stats1.property != stats2.property
 
 
+
+@pytest.mark.django_db
+class TestNightAuditService:
+    """Test the checkpointed night audit pipeline."""
+    
+    def _stay(self, setup_reports_data, number, status, rate):
+        from apps.billing.models import Folio
+        from apps.guests.models import Guest
+        from apps.reservations.models import Reservation, ReservationRoom
+        from apps.rooms.models import Room, RoomType
+        
+        hotel = setup_reports_data['property']
+        room_type, _ = RoomType.objects.get_or_create(
+            hotel=hotel, code='STD', defaults={'name': 'Standard', 'max_occupancy': 2}
+        )
+        room = Room.objects.create(hotel=hotel, room_type=room_type, room_number=number)
+        guest = Guest.objects.create(first_name='Guest', last_name=number, email=f'{number}@example.com')
+        reservation = Reservation.objects.create(
+            hotel=hotel,
+            guest=guest,
+            check_in_date=date.today(),
+            check_out_date=date.today() + timezone.timedelta(days=2),
+            status=status,
+            total_amount=rate * 2
+        )
+        ReservationRoom.objects.create(
+            reservation=reservation, room=room, room_type=room_type, rate_per_night=rate
+        )
+        Folio.objects.create(folio_number=f'F{number}', guest=guest, reservation=reservation)
+        return reservation
+    
+    def test_run_posts_in_bulk_and_resumes_without_double_posting(self, setup_reports_data):
+        """Completed stages are skipped when the audit is run again."""
+        from apps.billing.models import FolioCharge
+        from apps.reports.services import NightAuditService
+        from apps.reservations.models import RoomTypeInventory
+        
+        in_house = self._stay(setup_reports_data, '101', 'CHECKED_IN', Decimal('100.00'))
+        no_show = self._stay(setup_reports_data, '102', 'CONFIRMED', Decimal('150.00'))
+        audit = NightAudit.objects.create(
+            property=setup_reports_data['property'],
+            business_date=date.today(),
+            status='IN_PROGRESS'
+        )
+        
+        assert NightAuditService(audit, setup_reports_data['user']).run() is True
+        
+        no_show.refresh_from_db()
+        assert no_show.status == 'NO_SHOW'
+        assert no_show.folio.total_charges == Decimal('60.00')
+        assert in_house.folio.charges.get().amount == Decimal('100.00')
+        assert RoomTypeInventory.objects.get(date=date.today()).rooms_sold == 1
+        assert audit.room_revenue == Decimal('100.00')
+        assert audit.rooms_sold == 1
+        assert all(audit.step_timings[step]['completed'] for step in NightAuditService.STEPS)
+        
+        # Re-open the room-rate stage as if it had failed after posting
+        audit.step_timings['ROOM_RATES']['completed'] = False
+        audit.save()
+        assert NightAuditService(audit).run() is True
+        assert FolioCharge.objects.filter(folio=in_house.folio).count() == 1
+    
+    def test_failed_stage_keeps_earlier_checkpoints(self, setup_reports_data, monkeypatch):
+        """A failing stage is rolled back and recorded without losing prior stages."""
+        from apps.reports.services import NightAuditService
+        
+        audit = NightAudit.objects.create(
+            property=setup_reports_data['property'],
+            business_date=date.today(),
+            status='IN_PROGRESS'
+        )
+        
+        def fail(self):
+            raise ValueError('boom')
+        
+        monkeypatch.setattr(NightAuditService, '_step_departures', fail)
+        assert NightAuditService(audit).run() is False
+        
+        audit.refresh_from_db()
+        assert audit.current_step == 'DEPARTURES'
+        assert audit.step_timings['ROOM_RATES']['completed'] is True
+        assert audit.step_timings['DEPARTURES'] == {
+            **audit.step_timings['DEPARTURES'], 'completed': False, 'error': 'boom'
+        }
+        assert AuditLog.objects.filter(night_audit=audit, is_error=True).count() == 1
+
+    
+    def test_start_view_queues_audit_task(self, setup_reports_data, django_capture_on_commit_callbacks):
+        """Starting an audit queues the stages; the eager backend runs them on commit."""
+        from rest_framework.test import APIClient
+        
+        user = setup_reports_data['user']
+        user.role = 'ADMIN'
+        user.save()
+        audit = NightAudit.objects.create(
+            property=setup_reports_data['property'],
+            business_date=date.today()
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+        
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.post(f'/api/v1/reports/night-audits/{audit.pk}/start/', {}, format='json')
+        
+        assert response.status_code == 202
+        assert response.data['task_id']
+        audit.refresh_from_db()
+        assert audit.status == 'IN_PROGRESS'
+        assert audit.step_timings['TOTALS']['completed'] is True
+
+
 def all_checks_passed(self):
     """Helper method to check if all audit checks are complete."""
     return (
@@ -422,3 +533,475 @@ def all_checks_passed(self):
 
 # Monkey patch the method for testing
 NightAudit.all_checks_passed = all_checks_passed
+
+
+@pytest.mark.django_db
+class TestStreamingExports:
+    """Test streamed CSV/NDJSON log exports."""
+    
+    def test_audit_and_activity_logs_stream_in_chunks(self, setup_reports_data, settings):
+        """Exports stream every row in the requested format, fetching rows in chunks."""
+        import csv
+        import io
+        import json
+        from rest_framework.test import APIClient
+        from apps.accounts.models import ActivityLog
+        
+        settings.EXPORT_CHUNK_SIZE = 2
+        user = setup_reports_data['user']
+        user.role = 'ADMIN'
+        user.assigned_property = setup_reports_data['property']
+        user.save()
+        audit = NightAudit.objects.create(property=setup_reports_data['property'], business_date=date.today())
+        AuditLog.objects.bulk_create([
+            AuditLog(night_audit=audit, step=f'STEP_{i}', message=f'Message, "{i}"') for i in range(5)
+        ])
+        ActivityLog.objects.bulk_create([
+            ActivityLog(user=user, action='UPDATE', model_name='Folio', object_id=str(i)) for i in range(3)
+        ])
+        client = APIClient()
+        client.force_authenticate(user)
+        
+        response = client.get(f'/api/v1/reports/night-audits/{audit.pk}/logs/export/')
+        assert response.status_code == 200
+        assert response.streaming
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        assert rows[0] == ['id', 'created_at', 'business_date', 'step', 'message', 'is_error']
+        assert [row[4] for row in rows[1:]] == [f'Message, "{i}"' for i in range(5)]
+        
+        response = client.get('/api/v1/accounts/activity-logs/export/?export_format=ndjson&action=UPDATE')
+        assert response['Content-Type'] == 'application/x-ndjson'
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        assert sorted(line['object_id'] for line in lines) == ['0', '1', '2']
+        assert {line['user'] for line in lines} == {user.email}
+        
+        assert client.get('/api/v1/accounts/activity-logs/export/?export_format=xml').status_code == 400
+
+
+@pytest.mark.django_db
+class TestDashboardMetrics:
+    """Test cached, aggregate-backed operational dashboards."""
+    
+    def test_dashboards_are_cached_and_invalidated_on_save(self, setup_reports_data, django_assert_num_queries):
+        """Dashboards aggregate per model, serve polls from cache and drop stale copies on save."""
+        from django.core.cache import cache
+        from rest_framework.test import APIClient
+        from apps.maintenance.models import MaintenanceRequest
+        from apps.reports.dashboards import DashboardService
+        from apps.rooms.models import Room, RoomType
+        
+        cache.clear()
+        hotel = setup_reports_data['property']
+        user = setup_reports_data['user']
+        user.role = 'ADMIN'
+        user.assigned_property = hotel
+        user.save()
+        room_type = RoomType.objects.create(hotel=hotel, name='Standard', code='STD', max_occupancy=2)
+        for number, room_status in [('101', 'VC'), ('102', 'VD'), ('103', 'OD'), ('104', 'OOO')]:
+            Room.objects.create(hotel=hotel, room_type=room_type, room_number=number, status=room_status)
+        now = timezone.now()
+        MaintenanceRequest.objects.create(
+            request_number='MR1', property=hotel, title='Leak', description='Sink',
+            priority='EMERGENCY', created_at=now
+        )
+        MaintenanceRequest.objects.filter(request_number='MR1').update(created_at=now - timezone.timedelta(hours=2))
+        MaintenanceRequest.objects.create(
+            request_number='MR2', property=hotel, title='Lamp', description='Bulb', status='COMPLETED',
+            started_at=now - timezone.timedelta(hours=3), completed_at=now - timezone.timedelta(hours=1)
+        )
+        
+        with django_assert_num_queries(5):
+            front_desk = DashboardService.get(DashboardService.FRONT_DESK, hotel)
+        assert front_desk['available_rooms'] == 1
+        assert front_desk['occupied_rooms'] == 1
+        assert front_desk['dirty_rooms'] == 2
+        with django_assert_num_queries(0):
+            DashboardService.get(DashboardService.FRONT_DESK, hotel)
+        
+        maintenance = DashboardService.get(DashboardService.MAINTENANCE, hotel)
+        assert maintenance['emergency_requests'] == 1
+        assert maintenance['overdue_requests'] == 1
+        assert maintenance['avg_resolution_hours'] == 2.0
+        
+        room = Room.objects.get(room_number='102')
+        room.status = 'VC'
+        room.save()
+        with django_assert_num_queries(5):
+            assert DashboardService.get(DashboardService.FRONT_DESK, hotel)['available_rooms'] == 2
+        
+        client = APIClient()
+        client.force_authenticate(user)
+        housekeeping = client.get('/api/v1/housekeeping/dashboard/').json()
+        assert housekeeping['clean_rooms'] == 2
+        assert housekeeping['out_of_order_rooms'] == 1
+        assert client.get('/api/v1/frontdesk/dashboard/').json()['rooms']['vacant_clean'] == 2
+        assert client.get('/api/v1/frontdesk/dashboard-stats/').json()['dirty_rooms'] == 1
+        assert client.get('/api/v1/maintenance/dashboard/').json()['pending_requests'] == 1
+        assert client.get('/api/v1/reports/dashboard/').json()['total_rooms'] == 4
+    
+    def test_payment_without_reservation_invalidates_guest_properties(self, setup_reports_data):
+        """Payments on folios without a reservation drop the dashboards of the guest's properties."""
+        from django.core.cache import cache
+        from apps.billing.models import Folio, Payment
+        from apps.guests.models import Guest
+        from apps.reports.dashboards import DashboardService
+        from apps.reservations.models import Reservation
+        
+        hotel = setup_reports_data['property']
+        today = timezone.localdate()
+        guest = Guest.objects.create(first_name='Ada', last_name='Lovelace', email='ada@example.com')
+        Reservation.objects.create(
+            hotel=hotel, guest=guest, check_in_date=today - timezone.timedelta(days=30),
+            check_out_date=today - timezone.timedelta(days=28), status='CHECKED_OUT'
+        )
+        folio = Folio.objects.create(folio_number='MASTER-1', folio_type='MASTER', guest=guest)
+        key = DashboardService.cache_key(DashboardService.REPORTS, hotel.pk, today)
+        cache.set(key, {'stale': True})
+        
+        Payment.objects.create(folio=folio, payment_method='CASH', amount=Decimal('50.00'))
+        assert cache.get(key) is None
+
+
+@pytest.mark.django_db
+class TestDailyStatisticsRollups:
+    """Test incremental and backfilled daily statistics."""
+    
+    def _stay(self, hotel, number, check_in, nights, rate, status):
+        from apps.billing.models import Folio
+        from apps.guests.models import Guest
+        from apps.reservations.models import Reservation, ReservationRoom
+        from apps.rooms.models import Room, RoomType
+        
+        room_type, _ = RoomType.objects.get_or_create(
+            hotel=hotel, code='STD', defaults={'name': 'Standard', 'max_occupancy': 2}
+        )
+        room = Room.objects.create(hotel=hotel, room_type=room_type, room_number=number)
+        guest = Guest.objects.create(first_name='Guest', last_name=number, email=f'{number}@example.com')
+        reservation = Reservation.objects.create(
+            hotel=hotel, guest=guest, check_in_date=check_in,
+            check_out_date=check_in + timezone.timedelta(days=nights),
+            status=status, adults=2, total_amount=rate * nights
+        )
+        ReservationRoom.objects.create(reservation=reservation, room=room, room_type=room_type, rate_per_night=rate)
+        return Folio.objects.create(folio_number=f'F{number}', guest=guest, reservation=reservation)
+    
+    def _post(self, folio, charge_code, amount, charge_date):
+        from apps.billing.models import FolioCharge
+        return FolioCharge.objects.create(
+            folio=folio, charge_code=charge_code, description=charge_code.name,
+            unit_price=amount, charge_date=charge_date
+        )
+    
+    def test_backfill_and_incremental_refresh(self, setup_reports_data, django_capture_on_commit_callbacks):
+        """The backfill rebuilds a range set-based; postings refresh their day after commit."""
+        from django.core.cache import cache
+        from django.core.management import call_command
+        from apps.billing.models import ChargeCode
+        from apps.rooms.models import Room, RoomBlock
+        
+        cache.clear()
+        hotel = setup_reports_data['property']
+        today = timezone.localdate()
+        start = today - timezone.timedelta(days=3)
+        room_code = ChargeCode.objects.create(code='RM', name='Room', category='ROOM')
+        food_code = ChargeCode.objects.create(code='FB', name='Dinner', category='FOOD')
+        
+        past = self._stay(hotel, '101', start, 2, Decimal('100.00'), 'CHECKED_OUT')
+        current = self._stay(hotel, '102', start + timezone.timedelta(days=1), 3, Decimal('0.00'), 'CHECKED_IN')
+        self._stay(hotel, '103', today, 1, Decimal('80.00'), 'CANCELLED')
+        blocked = Room.objects.create(hotel=hotel, room_type=Room.objects.first().room_type, room_number='104', status='OOO')
+        # Two overlapping blocks on the first night take the room out once
+        RoomBlock.objects.create(room=blocked, start_date=start, end_date=start)
+        RoomBlock.objects.create(room=blocked, start_date=start - timezone.timedelta(days=1), end_date=start)
+        self._post(past, room_code, Decimal('100.00'), start)
+        self._post(past, food_code, Decimal('30.00'), start)
+        
+        call_command('backfill_daily_statistics', start=start.isoformat(), end=today.isoformat(), chunk_days=2)
+        
+        rows = {row.date: row for row in DailyStatistics.objects.filter(property=hotel)}
+        assert len(rows) == 4
+        first = rows[start]
+        assert (first.total_rooms, first.rooms_sold, first.rooms_ooo, first.arrivals) == (4, 1, 1, 1)
+        assert first.room_revenue == Decimal('100.00')
+        assert first.fb_revenue == Decimal('30.00')
+        assert first.total_revenue == Decimal('130.00')
+        assert first.adr == Decimal('100.00')
+        assert first.revpar == Decimal('25.00')
+        assert first.occupancy_percent == Decimal('25.00')
+        second = rows[start + timezone.timedelta(days=1)]
+        assert (second.rooms_sold, second.complimentary_rooms, second.in_house) == (2, 1, 4)
+        assert (second.total_rooms, second.rooms_ooo) == (4, 0)
+        assert rows[start + timezone.timedelta(days=2)].departures == 1
+        assert (rows[today].rooms_sold, rows[today].rooms_ooo) == (1, 1)
+        assert rows[today].room_revenue == 0
+        
+        # Past days keep the inventory they were stored with
+        Room.objects.create(hotel=hotel, room_type=blocked.room_type, room_number='105')
+        Room.objects.filter(pk=blocked.pk).update(status='VC')
+        call_command('backfill_daily_statistics', start=start.isoformat(), end=today.isoformat())
+        first.refresh_from_db()
+        assert (first.total_rooms, first.rooms_ooo, first.rooms_sold, first.revpar) == (4, 1, 1, Decimal('25.00'))
+        assert DailyStatistics.objects.get(property=hotel, date=today).total_rooms == 5
+        
+        with django_capture_on_commit_callbacks(execute=True):
+            self._post(current, room_code, Decimal('120.00'), today)
+            self._post(current, food_code, Decimal('15.00'), today)
+        
+        refreshed = DailyStatistics.objects.get(property=hotel, date=today)
+        assert refreshed.room_revenue == Decimal('120.00')
+        assert refreshed.total_revenue == Decimal('135.00')
+        assert refreshed.adr == Decimal('120.00')
+
+
+@pytest.mark.django_db
+class TestAnalyticsEngine:
+    """Test vectorized analytics over daily statistics."""
+    
+    def test_series_forecast_and_pickup(self, setup_reports_data, django_assert_max_num_queries):
+        """Series, comparisons and forecasts come from single grouped queries."""
+        from rest_framework.test import APIClient
+        from apps.guests.models import Guest
+        from apps.reports.analytics import AnalyticsService
+        from apps.reservations.models import Reservation
+        
+        hotel = setup_reports_data['property']
+        today = date.today()
+        start = today - timezone.timedelta(days=800)
+        # Weekends earn double on a slowly rising base
+        DailyStatistics.objects.bulk_create([
+            DailyStatistics(
+                property=hotel,
+                date=start + timezone.timedelta(days=i),
+                total_rooms=10,
+                rooms_sold=5,
+                room_revenue=Decimal(500),
+                total_revenue=Decimal(100 + i // 10) * (2 if (start + timezone.timedelta(days=i)).weekday() >= 5 else 1)
+            )
+            for i in range(800)
+        ])
+        
+        week_start = today - timezone.timedelta(days=7)
+        with django_assert_max_num_queries(1):
+            series = AnalyticsService.series(hotel.pk, 'revenue', week_start, today - timezone.timedelta(days=1))
+        assert len(series['values']) == 7
+        last_year = DailyStatistics.objects.get(property=hotel, date=week_start - timezone.timedelta(days=364))
+        assert series['last_year'][0] == float(last_year.total_revenue)
+        assert series['rolling_average'][-1] == pytest.approx(series['values'].mean())
+        occupancy = AnalyticsService.series(hotel.pk, 'occupancy', week_start, week_start)
+        assert occupancy['values'][0] == 50.0
+        
+        with django_assert_max_num_queries(1):
+            forecast = AnalyticsService.forecast(hotel.pk, today, days=14)
+        factors = forecast['weekday_factors']
+        assert factors[5] / factors[0] == pytest.approx(2, rel=0.05)
+        assert forecast['trend_per_day'] > 0
+        saturday = next(i for i, day in enumerate(forecast['dates']) if day.weekday() == 5)
+        assert forecast['values'][saturday] == pytest.approx(2 * (100 + 800 // 10 + saturday // 10), rel=0.1)
+        
+        guest = Guest.objects.create(first_name='Early', last_name='Bird', email='early@example.com')
+        stay = today + timezone.timedelta(days=10)
+        for lead in (30, 5):
+            reservation = Reservation.objects.create(
+                hotel=hotel, guest=guest, check_in_date=stay,
+                check_out_date=stay + timezone.timedelta(days=1), status='CONFIRMED'
+            )
+            Reservation.objects.filter(pk=reservation.pk).update(
+                created_at=timezone.now() + timezone.timedelta(days=10 - lead)
+            )
+        curve = {point['days_before']: point for point in AnalyticsService.pickup_curve(hotel.pk, stay, stay)}
+        assert curve[60]['rooms_on_books'] == 0
+        assert curve[30]['rooms_on_books'] == 1
+        assert curve[7]['percent_of_final'] == 50.0
+        assert curve[0]['rooms_on_books'] == 2
+        
+        user = setup_reports_data['user']
+        user.role = 'ADMIN'
+        user.assigned_property = hotel
+        user.save()
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get(
+            f'/api/v1/reports/advanced-analytics/?metric=revenue&start_date={week_start}'
+            f'&end_date={today - timezone.timedelta(days=1)}&include_pickup=true'
+        ).json()
+        assert response['summary']['total'] == pytest.approx(float(series['values'].sum()))
+        assert response['summary']['change_percent'] > 0
+        assert 'pickup' in response
+        assert client.get('/api/v1/reports/advanced-analytics/?metric=bogus').status_code == 400
+        response = client.get('/api/v1/reports/revenue-forecast/?days=7').json()
+        assert len(response['forecast']) == 7
+        assert response['weekday_factors']['saturday'] > response['weekday_factors']['monday']
+
+
+@pytest.mark.django_db
+class TestReportEngine:
+    """Test scheduled report runs and snapshot serving."""
+    
+    def test_scheduled_run_emails_and_serves_snapshots(self, setup_reports_data, settings, tmp_path, mailoutbox):
+        from django.core.cache import cache
+        from rest_framework.test import APIClient
+        from apps.guests.models import Guest
+        from apps.reports.engine import ReportEngine
+        from apps.reports.models import ReportSnapshot
+        from apps.reports.tasks import run_scheduled_reports_task
+        from apps.reservations.models import Reservation
+        
+        cache.clear()
+        settings.MEDIA_ROOT = str(tmp_path)
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+        hotel = setup_reports_data['property']
+        today = timezone.localdate()
+        DailyStatistics.objects.bulk_create([
+            DailyStatistics(
+                property=hotel, date=today - timezone.timedelta(days=i),
+                total_rooms=10, rooms_sold=5, room_revenue=Decimal('500.00'), total_revenue=Decimal('600.00')
+            )
+            for i in range(1, 8)
+        ])
+        template = ReportTemplate.objects.create(
+            property=hotel, name='Weekly Occupancy', report_type='OCCUPANCY',
+            config={'days': 7}, is_scheduled=True, schedule_time=time(0, 0),
+            email_recipients='gm@grandplaza.com; revenue@grandplaza.com'
+        )
+        ReportTemplate.objects.create(property=hotel, name='Custom', report_type='CUSTOM', is_scheduled=True)
+        
+        assert run_scheduled_reports_task() == 1
+        assert run_scheduled_reports_task() == 0
+        snapshot = ReportSnapshot.objects.get(template=template)
+        assert snapshot.report_date == today - timezone.timedelta(days=1)
+        assert snapshot.is_scheduled_run and snapshot.emailed_at
+        assert len(snapshot.data['rows']) == 7
+        assert snapshot.data['summary']['Average occupancy %'] == 50.0
+        assert snapshot.csv_file and snapshot.pdf_file
+        assert sorted(message.to[0] for message in mailoutbox) == ['gm@grandplaza.com', 'revenue@grandplaza.com']
+        assert len(mailoutbox[0].attachments) == 2
+        assert not ReportEngine.due_templates().filter(pk=template.pk).exists()
+        
+        user = setup_reports_data['user']
+        user.assigned_property = hotel
+        user.save()
+        client = APIClient()
+        client.force_authenticate(user)
+        url = f'/api/v1/reports/templates/{template.pk}/snapshot/'
+        response = client.get(url)
+        assert response.json()['version'] == 1
+        csv_response = client.get(url, {'export_format': 'csv'})
+        assert b'Occupancy %' in b''.join(csv_response.streaming_content)
+        assert client.get(url, {'refresh': 'true'}).json()['version'] == 2
+        listed = client.get(f'/api/v1/reports/templates/{template.pk}/snapshots/').json()
+        assert [row['version'] for row in listed['results']] == [2, 1]
+        
+        guest = Guest.objects.create(first_name='Ada', last_name='Lovelace', email='ada@example.com')
+        Reservation.objects.create(
+            hotel=hotel, guest=guest, check_in_date=today,
+            check_out_date=today + timezone.timedelta(days=2), status='CHECKED_IN', adults=2
+        )
+        for report_type in ('DAILY', 'REVENUE', 'FORECAST', 'PRODUCTION', 'IN_HOUSE'):
+            report = ReportEngine.build(
+                ReportTemplate(property=hotel, name=report_type, report_type=report_type, config={'days': 3}), today
+            )
+            assert report['rows'], report_type
+        forecast = ReportEngine.build(ReportTemplate(property=hotel, name='F', report_type='FORECAST', config={'days': 3}), today)
+        assert [row['occupied'] for row in forecast['rows']] == [1, 1, 0]
+    
+    def test_failed_report_email_is_retried_without_rerun(self, setup_reports_data, settings, tmp_path, mailoutbox, monkeypatch):
+        """A dead mail server leaves FAILED logs and an unsent snapshot that the next beat retries."""
+        from django.core.cache import cache
+        from django.test import RequestFactory
+        from apps.notifications import services
+        from apps.notifications.models import EmailLog
+        from apps.reports.models import ReportSnapshot
+        from apps.reports.tasks import run_scheduled_reports_task
+        from apps.reports.views import RunReportView
+        
+        cache.clear()
+        settings.MEDIA_ROOT = str(tmp_path)
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+        template = ReportTemplate.objects.create(
+            property=setup_reports_data['property'], name='Daily', report_type='DAILY',
+            is_scheduled=True, schedule_time=time(0, 0), email_recipients='gm@grandplaza.com'
+        )
+        get_connection = services.get_connection
+        
+        def refuse(**kwargs):
+            raise ConnectionRefusedError('smtp down')
+        
+        monkeypatch.setattr(services, 'get_connection', refuse)
+        run_scheduled_reports_task()
+        snapshot = ReportSnapshot.objects.get(template=template)
+        assert snapshot.emailed_at is None
+        assert EmailLog.objects.get().status == 'FAILED'
+        
+        monkeypatch.setattr(services, 'get_connection', get_connection)
+        run_scheduled_reports_task()
+        assert not mailoutbox
+        cache.delete(f'reports:email:{snapshot.pk}')
+        run_scheduled_reports_task()
+        assert [message.to for message in mailoutbox] == [['gm@grandplaza.com']]
+        assert ReportSnapshot.objects.get().emailed_at is not None
+        
+        request = RequestFactory().get('/', {'date': 'not-a-date'})
+        request.user = setup_reports_data['user']
+        assert RunReportView.as_view()(request, pk=template.pk).status_code == 400
+
+
+@pytest.mark.django_db
+class TestForecastService:
+    """Test the set-based on-the-books forecast."""
+    
+    def test_forecast_overlays_in_constant_queries(self, setup_reports_data, django_assert_num_queries):
+        import time as clock
+        from rest_framework.test import APIClient
+        from apps.guests.models import Guest
+        from apps.reports.forecast import ForecastService
+        from apps.reservations.models import GroupBooking, Reservation, ReservationRoom
+        from apps.rooms.models import Room, RoomBlock, RoomType
+        
+        hotel = setup_reports_data['property']
+        today = date.today()
+        day = lambda n: today + timezone.timedelta(days=n)
+        room_type = RoomType.objects.create(hotel=hotel, code='STD', name='Standard', max_occupancy=2)
+        rooms = [Room.objects.create(hotel=hotel, room_type=room_type, room_number=str(100 + i)) for i in range(10)]
+        guest = Guest.objects.create(first_name='Ada', last_name='Lovelace', email='ada@example.com')
+        
+        two_rooms = Reservation.objects.create(hotel=hotel, guest=guest, check_in_date=day(0), check_out_date=day(3), status='CONFIRMED')
+        for room in rooms[:2]:
+            ReservationRoom.objects.create(reservation=two_rooms, room=room, room_type=room_type, rate_per_night=Decimal('100'))
+        Reservation.objects.create(hotel=hotel, guest=guest, check_in_date=day(1), check_out_date=day(2), status='CHECKED_IN')
+        Reservation.objects.create(hotel=hotel, guest=guest, check_in_date=day(0), check_out_date=day(5), status='CANCELLED')
+        GroupBooking.objects.create(
+            hotel=hotel, name='Wedding', code='WED', contact_name='Planner',
+            check_in_date=day(2), check_out_date=day(4), rooms_blocked=5, rooms_picked_up=2, status='CONFIRMED'
+        )
+        GroupBooking.objects.create(
+            hotel=hotel, name='Dropped', code='DROP', contact_name='Planner',
+            check_in_date=day(0), check_out_date=day(4), rooms_blocked=5, status='CANCELLED'
+        )
+        RoomBlock.objects.create(room=rooms[9], start_date=day(3), end_date=day(4))
+        # Overlaps the block above; the room is still out of order only once
+        RoomBlock.objects.create(room=rooms[9], start_date=day(4), end_date=day(5))
+        
+        with django_assert_num_queries(4):
+            rows = ForecastService.rows(hotel.pk, today, 6)
+        assert [row['occupied'] for row in rows] == [2, 3, 2, 0, 0, 0]
+        assert [row['group_blocked'] for row in rows] == [0, 0, 3, 3, 0, 0]
+        assert [row['out_of_order'] for row in rows] == [0, 0, 0, 1, 1, 1]
+        assert [row['available'] for row in rows] == [8, 7, 5, 6, 9, 9]
+        assert rows[2]['occupancy'] == 20.0
+        assert rows[2]['projected_occupancy'] == 50.0
+        
+        started = clock.monotonic()
+        with django_assert_num_queries(4):
+            year = ForecastService.rows(hotel.pk, today, 365)
+        assert clock.monotonic() - started < 1
+        assert len(year) == 365
+        
+        user = setup_reports_data['user']
+        user.role = 'ADMIN'
+        user.assigned_property = hotel
+        user.save()
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get('/api/v1/reports/forecast/?days=6').json()
+        assert response['room_nights_on_books'] == 7
+        assert response['forecast'][1]['date'] == day(1).isoformat()